@@ -0,0 +1,30 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    # CQL connection broker options
+    DOCUMENTATION = r'''
+options:
+  connection_backend:
+    description:
+      - How the module connects to the cluster.
+      - C(direct) connects, authenticates and discovers the cluster from every task.
+      - C(broker) sends the statements to a long-lived connection broker on the managed node, reached over
+        a private unix socket. One broker is started per set of hosts, port, credentials, SSL and driver
+        options, and keeps its connections to the cluster open between tasks. This saves the TCP and TLS
+        handshakes, authentication and cluster discovery of every task, which adds up quickly in plays
+        running the module many times.
+      - When the broker can't be started or can't connect the module connects directly instead.
+    type: str
+    default: direct
+    choices:
+      - direct
+      - broker
+  broker_idle_timeout:
+    description:
+      - Number of seconds without any statement after which the connection broker disconnects and exits.
+      - Only relevant when I(connection_backend=broker).
+    type: int
+    default: 300
+'''
@@ -0,0 +1,48 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    # CQL connection options of modules otherwise using nodetool
+    DOCUMENTATION = r'''
+options:
+  cql_host:
+    description:
+      - The hosts to connect to with CQL.
+      - Defaults to I(host).
+    type: list
+    elements: str
+  cql_port:
+    description:
+      - The CQL native transport port.
+    type: int
+    default: 9042
+  cql_username:
+    description:
+      - The CQL user, when authentication is enabled.
+    type: str
+  cql_password:
+    description:
+      - The password of I(cql_username).
+    type: str
+  cql_ssl:
+    description:
+      - Connect with SSL.
+    type: bool
+    default: false
+  cql_ssl_cert_reqs:
+    description:
+      - SSL verification mode.
+    type: str
+    choices:
+      - CERT_NONE
+      - CERT_OPTIONAL
+      - CERT_REQUIRED
+    default: CERT_NONE
+  cql_ssl_ca_certs:
+    description:
+      - The SSL CA chain or certificate location to confirm supplied certificate validity.
+      - Required when I(cql_ssl_cert_reqs) is C(CERT_OPTIONAL) or C(CERT_REQUIRED).
+    type: str
+    default: ''
+'''
@@ -13,6 +13,20 @@ options:
     default: 127.0.0.1
     aliases:
       - "login_host"
+  hosts:
+    description:
+      - Run the module against all of these hosts instead of I(host), from a single task.
+      - Up to I(max_parallel) hosts are handled at the same time.
+      - The per host results are returned in C(hosts), keyed by host. C(changed) is true when any
+        host changed, and the task fails when any host failed.
+      - Not supported by all modules. Those that don't support it fail when it's set.
+    type: list
+    elements: str
+  max_parallel:
+    description:
+      - Maximum number of I(hosts) handled at the same time.
+    type: int
+    default: 10
   port:
     description:
       - The Cassandra TCP port.
@@ -56,5 +70,52 @@ options:
     description:
       - Version of Cassandra being connected to by nodetool.
       - If a value if not provided we use `nodetool version`to auto-discover it.
+      - An auto-discovered version is cached on the managed node, see I(version_cache_ttl).
+        The C(version_cache) return value is one of C(provided), C(hit), C(miss) or C(disabled).
+    type: str
+  version_cache_ttl:
+    description:
+      - Number of seconds an auto-discovered Cassandra version is cached for on the managed node, per host and port.
+      - The cache is invalidated early when the Cassandra daemon running on the managed node
+        restarts or the nodetool executable changes.
+      - Set to 0 to disable the cache and run `nodetool version` in every task.
+    type: int
+    default: 3600
+  nodetool_backend:
+    description:
+      - How nodetool commands are executed.
+      - C(subprocess) runs the nodetool executable for every command.
+      - C(session) runs every command of a task in one nodetool JVM sharing a single JMX connection, for modules
+        running several commands per task like M(community.cassandra.cassandra_timeout). Other modules, or a session
+        that can't be started, use C(subprocess). The JVM is started directly rather than through the nodetool
+        script, so settings the script makes, such as JMX SSL options from its environment, must be given in
+        I(nodetool_flags). It has the same requirements as the daemon.
+      - C(daemon) sends commands to a long-lived nodetool JVM on the managed node, reached over a private unix socket.
+        One daemon is started per host, port and set of credentials, and reuses its JMX connection between tasks.
+      - The daemon requires Cassandra 4.0 or later and Java 11 or later. When it can't be used
+        the module silently falls back to C(subprocess).
+      - C(jolokia) reads and writes MBean attributes directly through a Jolokia agent, see I(jolokia_url).
+        Only the get, set, status, enable and disable commands of the timeout, streamthroughput,
+        compactionthroughput, traceprobability, handoff, binary, gossip and backup modules are
+        supported this way, everything else (or a failing agent) falls back to C(subprocess).
+    type: str
+    choices:
+      - subprocess
+      - session
+      - daemon
+      - jolokia
+    default: subprocess
+  nodetool_daemon_idle_timeout:
+    description:
+      - Number of seconds without any request after which the nodetool daemon exits.
+      - Only relevant when I(nodetool_backend=daemon).
+    type: int
+    default: 300
+  jolokia_url:
+    description:
+      - URL of the Jolokia agent attached to the Cassandra JVM.
+      - Defaults to http://<host>:8778/jolokia/.
+      - I(username) and I(password), when set, are sent as HTTP basic authentication credentials.
+      - Only relevant when I(nodetool_backend=jolokia).
     type: str
 '''
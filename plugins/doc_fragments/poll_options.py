@@ -0,0 +1,47 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    # Polling options
+    DOCUMENTATION = r'''
+options:
+  poll:
+    description:
+      - The maximum number of times to query the cluster.
+      - Defaults to 1, or to no limit other than I(timeout) when I(timeout) is set.
+      - Must be at least 1.
+    type: int
+  interval:
+    description:
+      - The number of seconds to wait between the first two polls.
+    type: int
+    default: 30
+  backoff:
+    description:
+      - Factor the wait between two polls is multiplied by after every poll, up to I(max_interval).
+      - The default of 1 waits I(interval) seconds every time.
+    type: float
+    default: 1.0
+  max_interval:
+    description:
+      - The longest wait between two polls, in seconds.
+      - Defaults to I(interval).
+    type: int
+  fast_interval:
+    description:
+      - Seconds to wait before polling again right after the cluster state changed, when another
+        change is likely to follow shortly. The backoff then restarts from this value.
+      - By default a state change doesn't affect the wait.
+    type: int
+  jitter:
+    description:
+      - Randomly lengthen or shorten every wait by up to this fraction of it, between 0 and 1.
+      - Keeps tasks started together against different hosts from polling in lockstep.
+    type: float
+    default: 0.0
+  timeout:
+    description:
+      - Stop polling once this many seconds have elapsed. A last poll is made at the deadline.
+    type: int
+'''
@@ -10,6 +10,8 @@ def cassandra_common_argument_spec():
     return dict(
         debug=dict(type='bool', default=False),
         host=dict(type='str', default="127.0.0.1", aliases=['login_host']),
+        hosts=dict(type='list', elements='str', default=None),
+        max_parallel=dict(type='int', default=10),
         nodetool_path=dict(type='str', default=None),
         password=dict(type='str', no_log=True, aliases=['login_password']),
         password_file=dict(type='str', no_log=True, aliases=['login_password_file']),
@@ -17,4 +19,8 @@ def cassandra_common_argument_spec():
         username=dict(type='str', no_log=True, aliases=['login_user']),
         nodetool_flags=dict(type='str', default="-Dcom.sun.jndi.rmiURLParsing=legacy"),
         cassandra_version=dict(type='str', default=None),
+        version_cache_ttl=dict(type='int', default=3600),
+        nodetool_backend=dict(type='str', default="subprocess", choices=["subprocess", "session", "daemon", "jolokia"]),
+        nodetool_daemon_idle_timeout=dict(type='int', default=300),
+        jolokia_url=dict(type='str', default=None),
     )
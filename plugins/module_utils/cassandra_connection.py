@@ -0,0 +1,238 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import os
+
+try:
+    from cassandra import ConsistencyLevel, DriverException
+    from cassandra.cluster import Cluster, EXEC_PROFILE_DEFAULT, ExecutionProfile
+    from cassandra.concurrent import execute_concurrent
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra.policies import ConstantReconnectionPolicy, RoundRobinPolicy
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+try:
+    from ssl import SSLContext, PROTOCOL_TLS
+    import ssl as ssl_lib
+    HAS_SSL_LIBRARY = True
+except Exception:
+    HAS_SSL_LIBRARY = False
+
+# Name of the execution profile writes are made with, reads using the default one
+EXEC_PROFILE_WRITE = "write"
+
+# Consistency levels the server rejects for reads or for writes
+READ_UNSUPPORTED_CONSISTENCY = ("ANY", "EACH_QUORUM")
+WRITE_UNSUPPORTED_CONSISTENCY = ("SERIAL", "LOCAL_SERIAL")
+
+# full downloads the schema and token metadata of the whole cluster when
+# connecting, lazy doesn't and only refreshes keyspaces and tables when
+# asked to, tokens only downloads the token metadata
+METADATA_MODES = ("full", "lazy", "tokens")
+
+CASSANDRA_DRIVER_MISSING = ("This module requires the cassandra-driver python"
+                            " driver. You can probably install it with pip"
+                            " install cassandra-driver.")
+
+
+def cql_connection_argument_spec():
+    """
+    Returns the options of the modules that also talk CQL to the node they
+    otherwise manage over JMX, see the cql_connection_options doc fragment.
+    """
+    return dict(
+        cql_host=dict(type='list', elements='str', default=None),
+        cql_port=dict(type='int', default=9042),
+        cql_username=dict(type='str', no_log=True),
+        cql_password=dict(type='str', no_log=True),
+        cql_ssl=dict(type='bool', default=False),
+        cql_ssl_cert_reqs=dict(type='str', default='CERT_NONE',
+                               choices=['CERT_NONE', 'CERT_OPTIONAL', 'CERT_REQUIRED']),
+        cql_ssl_ca_certs=dict(type='str', default=''),
+    )
+
+
+def cql_ssl_context(module, ssl, ssl_cert_reqs, ssl_ca_certs):
+    """
+    Returns the SSLContext to connect with, or None when ssl is false.
+    Fails the module on invalid certificate options.
+    """
+    if not ssl:
+        return None
+    if HAS_SSL_LIBRARY is False:
+        module.fail_json(msg=("This module requires the SSL python"
+                              " library. You can probably install it with pip"
+                              " install ssl."))
+    if ssl_cert_reqs in ('CERT_REQUIRED', 'CERT_OPTIONAL'):
+        if ssl_ca_certs == '':
+            module.fail_json(msg=("When verify mode is set to CERT_REQUIRED or CERT_OPTIONAL"
+                                  "ssl_ca_certs is also required to be set and not empty"))
+        if os.path.exists(ssl_ca_certs) is not True:
+            module.fail_json(msg="ssl_ca_certs certificate: File not found")
+    ssl_context = SSLContext(PROTOCOL_TLS)
+    ssl_context.verify_mode = getattr(ssl_lib, ssl_cert_reqs)
+    if ssl_cert_reqs in ('CERT_REQUIRED', 'CERT_OPTIONAL'):
+        ssl_context.load_verify_locations(ssl_ca_certs)
+    return ssl_context
+
+
+def topology_cluster(module):
+    """
+    Returns an unconnected Cluster, from the cql_connection_argument_spec()
+    options, for reading cluster topology and state only. Schema and token
+    metadata aren't downloaded. Every node is connected to, so that the
+    driver's view of which nodes are up is first hand, and a node that went
+    down is retried every second.
+    """
+    if HAS_CASSANDRA_DRIVER is False:
+        module.fail_json(msg=CASSANDRA_DRIVER_MISSING)
+    params = module.params
+    auth_provider = None
+    if params['cql_username'] is not None:
+        auth_provider = PlainTextAuthProvider(username=params['cql_username'],
+                                              password=params['cql_password'])
+    profile = ExecutionProfile(load_balancing_policy=RoundRobinPolicy())
+    return Cluster(params['cql_host'] or [params['host']],
+                   port=params['cql_port'],
+                   auth_provider=auth_provider,
+                   ssl_context=cql_ssl_context(module,
+                                               params['cql_ssl'],
+                                               params['cql_ssl_cert_reqs'],
+                                               params['cql_ssl_ca_certs']),
+                   execution_profiles={EXEC_PROFILE_DEFAULT: profile},
+                   reconnection_policy=ConstantReconnectionPolicy(1.0),
+                   schema_metadata_enabled=False,
+                   token_metadata_enabled=False)
+
+
+def read_write_profiles(consistency_level):
+    """
+    Returns the execution profiles of a Cluster reading and writing at
+    consistency_level, the default profile for reads and EXEC_PROFILE_WRITE
+    for writes. A consistency level the server rejects for reads (ANY,
+    EACH_QUORUM) or writes (SERIAL, LOCAL_SERIAL) leaves that profile at
+    the driver's default, LOCAL_ONE.
+    """
+    level = ConsistencyLevel.name_to_value[consistency_level]
+    if consistency_level in READ_UNSUPPORTED_CONSISTENCY:
+        read_profile = ExecutionProfile()
+    else:
+        read_profile = ExecutionProfile(consistency_level=level)
+    if consistency_level in WRITE_UNSUPPORTED_CONSISTENCY:
+        write_profile = ExecutionProfile()
+    else:
+        write_profile = ExecutionProfile(consistency_level=level)
+    return {EXEC_PROFILE_DEFAULT: read_profile, EXEC_PROFILE_WRITE: write_profile}
+
+
+def read_write_cluster(login_host, login_port, auth_provider, ssl_context, consistency_level,
+                       metadata_mode="full", max_schema_agreement_wait=10):
+    """
+    Returns a single unconnected Cluster for both the reads and the writes
+    of a module, see read_write_profiles(). Connect it with
+    read_and_write_sessions(). With metadata_mode lazy the schema and token
+    metadata aren't downloaded when connecting, see keyspace_metadata()
+    and table_metadata(). With metadata_mode tokens only the token
+    metadata is, for modules routing statements by token themselves. With
+    max_schema_agreement_wait 0 schema changes return without waiting for
+    the nodes to agree, see wait_for_schema_agreement().
+    """
+    full = metadata_mode == "full"
+    return Cluster(login_host,
+                   port=login_port,
+                   auth_provider=auth_provider,
+                   ssl_context=ssl_context,
+                   execution_profiles=read_write_profiles(consistency_level),
+                   schema_metadata_enabled=full,
+                   token_metadata_enabled=full or metadata_mode == "tokens",
+                   max_schema_agreement_wait=max_schema_agreement_wait)
+
+
+def wait_for_schema_agreement(cluster, wait_time):
+    """
+    Waits up to wait_time seconds for every node of the connected cluster
+    to have the same schema version. Returns whether they do.
+    """
+    return cluster.control_connection.wait_for_schema_agreement(wait_time=wait_time) is True
+
+
+def keyspace_metadata(cluster, keyspace):
+    """
+    Returns the driver's KeyspaceMetadata of keyspace, or None if there is
+    no such keyspace. Only that keyspace is fetched when the cluster
+    doesn't have it, as with metadata_mode lazy.
+    """
+    if keyspace not in cluster.metadata.keyspaces:
+        cluster.refresh_keyspace_metadata(keyspace)
+    return cluster.metadata.keyspaces.get(keyspace)
+
+
+def table_metadata(cluster, keyspace, table):
+    """
+    Returns the driver's TableMetadata of keyspace.table, or None if there
+    is no such table. Unless the cluster has the full schema metadata
+    keyspace_metadata() leaves the tables out, so the table is fetched
+    when the keyspace doesn't have it.
+    """
+    if keyspace_metadata(cluster, keyspace) is None:
+        return None
+    if table not in cluster.metadata.keyspaces[keyspace].tables:
+        try:
+            cluster.refresh_table_metadata(keyspace, table)
+        except DriverException:
+            return None
+    ks_meta = cluster.metadata.keyspaces.get(keyspace)
+    return ks_meta.tables.get(table) if ks_meta is not None else None
+
+
+class ProfileSession(object):
+    """
+    A Session executing statements with the given execution profile unless
+    told otherwise. Everything else is the wrapped Session's.
+    """
+
+    def __init__(self, session, profile):
+        self.session = session
+        self.profile = profile
+
+    def execute(self, query, parameters=None, **kwargs):
+        kwargs.setdefault('execution_profile', self.profile)
+        return self.session.execute(query, parameters, **kwargs)
+
+    def execute_async(self, query, parameters=None, **kwargs):
+        kwargs.setdefault('execution_profile', self.profile)
+        return self.session.execute_async(query, parameters, **kwargs)
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        if ep is EXEC_PROFILE_DEFAULT:
+            ep = self.profile
+        return self.session.execution_profile_clone_update(ep, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def read_and_write_sessions(cluster):
+    """
+    Connects cluster, from read_write_cluster(), once and returns the
+    (read, write) sessions sharing that connection.
+    """
+    session = cluster.connect()
+    return session, ProfileSession(session, EXEC_PROFILE_WRITE)
+
+
+def execute_concurrently(session, statements, concurrency):
+    """
+    Runs statements, in no particular order, with up to concurrency of them
+    in flight at once, using the execution profile of session if it is a
+    ProfileSession. Every statement is attempted. Returns the
+    [(statement, exception)] of those that failed.
+    """
+    profile = session.profile if isinstance(session, ProfileSession) else EXEC_PROFILE_DEFAULT
+    results = execute_concurrent(session,
+                                 [(statement, None) for statement in statements],
+                                 concurrency=concurrency,
+                                 raise_on_first_error=False,
+                                 execution_profile=profile)
+    return [(statement, result[1]) for statement, result in zip(statements, results) if not result[0]]
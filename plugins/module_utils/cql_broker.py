@@ -0,0 +1,248 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import binascii
+import collections
+import datetime
+import decimal
+import hashlib
+import re
+import uuid
+
+try:
+    from cassandra import InvalidRequest, Unauthorized
+    from cassandra.cluster import EXEC_PROFILE_DEFAULT
+    from cassandra.query import dict_factory, tuple_factory
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    class InvalidRequest(Exception):
+        pass
+
+    class Unauthorized(Exception):
+        pass
+
+    EXEC_PROFILE_DEFAULT = object()
+
+    def dict_factory(colnames, rows):
+        return [dict(zip(colnames, row)) for row in rows]
+
+    def tuple_factory(colnames, rows):
+        return rows
+
+from ansible.module_utils.six import binary_type, integer_types, text_type
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import read_and_write_sessions
+from ansible_collections.community.cassandra.plugins.module_utils.local_daemon import (
+    DaemonUnavailable,
+    daemon_socket_path,
+    ensure_daemon,
+    send_request,
+)
+
+# A connection broker is a daemon on the managed node holding a connected
+# Cluster, from read_write_cluster(), for one set of connection options.
+# Tasks send it their statements over a private unix socket instead of
+# connecting, authenticating and discovering the cluster themselves, which
+# is most of the run time of a task against a TLS enabled cluster.
+#
+# Statements the server rejects are raised again in the module, with the
+# same exception class for InvalidRequest and Unauthorized and as
+# CqlBrokerError otherwise. Column values travel as JSON: uuids, dates and
+# decimals come back as strings, blobs as hex and sets and tuples as lists.
+
+BROKER_EXCEPTIONS = {
+    "InvalidRequest": InvalidRequest,
+    "Unauthorized": Unauthorized,
+}
+
+# A USE statement would change the keyspace of the session every later
+# task shares
+USE_STATEMENT = re.compile(r"^\s*USE\s", re.IGNORECASE)
+
+
+class CqlBrokerError(Exception):
+    """
+    Raised in the module for a statement the server, or the driver in the
+    broker, rejected with anything but InvalidRequest or Unauthorized.
+    """
+    pass
+
+
+def cql_broker_argument_spec():
+    """
+    Returns the options of the modules that can send their statements
+    through a connection broker, see the cql_broker_options doc fragment.
+    """
+    return dict(
+        connection_backend=dict(type='str', default='direct', choices=['direct', 'broker']),
+        broker_idle_timeout=dict(type='int', default=300),
+    )
+
+
+def broker_key(params, login_host):
+    """
+    Returns what identifies the broker a module may use: the hosts, port,
+    SSL and driver settings from params, with login_host the resolved
+    contact points, and a digest of the credentials. Without login_host the
+    driver connects to its default contact point, 127.0.0.1.
+    """
+    credentials = "{0}\0{1}".format(params.get('login_user') or "", params.get('login_password') or "")
+    return dict(hosts=sorted(login_host or ["127.0.0.1"]),
+                port=params['login_port'],
+                credentials=hashlib.sha256(credentials.encode('utf-8')).hexdigest(),
+                ssl=[params['ssl'], params['ssl_cert_reqs'], params['ssl_ca_certs']],
+                consistency_level=params['consistency_level'],
+                metadata_mode=params.get('metadata_mode'))
+
+
+def encode_value(value):
+    """
+    Returns a column value as something json.dumps() accepts.
+    """
+    if value is None or isinstance(value, (bool, float, text_type) + integer_types):
+        return value
+    if isinstance(value, (binary_type, bytearray)):
+        return binascii.hexlify(value).decode('ascii')
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if hasattr(value, 'items'):
+        return dict((str(encode_value(k)), encode_value(v)) for k, v in value.items())
+    if hasattr(value, '__iter__'):
+        return [encode_value(v) for v in value]
+    return str(value)
+
+
+class CqlBrokerHandler(object):
+    """
+    Request handler of the connection broker. Requests look like
+        {"profile": "read", "query": "SELECT ...", "parameters": [...]}
+    with profile read or write, and are answered with
+        {"columns": [...], "rows": [[...], ...]}
+    or with {"exception": .., "message": ..} when the statement fails.
+    {"ping": true} is answered with {"ok": true} and makes sure the cluster
+    is connected. {"error": ..} means the broker can't be used at all.
+    """
+
+    def __init__(self, cluster_factory):
+        self.cluster = None
+        self.error = None
+        self.error_reported = False
+        try:
+            self.cluster = cluster_factory()
+            session_r, session_w = read_and_write_sessions(self.cluster)
+        except Exception as excep:
+            self.error = "Error connecting to cluster: {0}".format(excep)
+            return
+        self.sessions = {
+            "read": (session_r, session_r.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=tuple_factory)),
+            "write": (session_w, session_w.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=tuple_factory)),
+        }
+
+    @property
+    def alive(self):
+        # A broker that couldn't connect stays up until it has told a
+        # client why, rather than leaving it to wait for the socket
+        if self.error is not None:
+            return not self.error_reported
+        return not self.cluster.is_shutdown
+
+    def handle(self, request):
+        if self.error is not None:
+            self.error_reported = True
+            return {"error": self.error}
+        if request.get("ping"):
+            return {"ok": True}
+        session, profile = self.sessions[request["profile"]]
+        try:
+            if USE_STATEMENT.match(request["query"]):
+                raise CqlBrokerError("USE statements can't be sent through the CQL broker, qualify table names instead")
+            result = session.execute(request["query"], request.get("parameters"), execution_profile=profile)
+            columns = list(result.column_names or [])
+            rows = [[encode_value(value) for value in row] for row in result] if columns else []
+        except Exception as excep:
+            return {"exception": type(excep).__name__, "message": str(excep)}
+        return {"columns": columns, "rows": rows}
+
+    def close(self):
+        if self.cluster is not None:
+            self.cluster.shutdown()
+
+
+class BrokerProfile(object):
+    """
+    What BrokerSession.execution_profile_clone_update() returns: only the
+    row factory of a cloned profile is honoured.
+    """
+
+    def __init__(self, row_factory):
+        self.row_factory = row_factory
+
+
+class BrokerSession(object):
+    """
+    Stands in for the read or write Session of a module, see
+    read_and_write_sessions(), sending every statement to the broker
+    listening on socket_path. Rows are named tuples like the driver's.
+    """
+
+    def __init__(self, socket_path, profile):
+        self.socket_path = socket_path
+        self.profile = profile
+
+    def execute(self, query, parameters=None, execution_profile=None, **kwargs):
+        request = {"profile": self.profile, "query": str(query), "parameters": parameters}
+        try:
+            response = send_request(self.socket_path, request)
+        except (OSError, IOError, ValueError) as excep:
+            raise CqlBrokerError("CQL broker unavailable: {0}".format(excep))
+        if "error" in response:
+            raise CqlBrokerError(response["error"])
+        if "exception" in response:
+            exception = BROKER_EXCEPTIONS.get(response["exception"])
+            if exception is None:
+                raise CqlBrokerError("{0}: {1}".format(response["exception"], response["message"]))
+            raise exception(response["message"])
+        row_factory = getattr(execution_profile, 'row_factory', None)
+        if row_factory in (dict_factory, tuple_factory):
+            return row_factory(response["columns"], [tuple(row) for row in response["rows"]])
+        row = collections.namedtuple("Row", response["columns"], rename=True)
+        return [row(*values) for values in response["rows"]]
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return BrokerProfile(kwargs.get('row_factory'))
+
+
+def broker_sessions(key, cluster_factory, idle_timeout):
+    """
+    Returns the (read, write) BrokerSessions of the broker serving key,
+    starting it, with a Cluster from cluster_factory(), if needed. Raises
+    DaemonUnavailable when the broker can't be started or can't connect.
+    """
+    socket_path = daemon_socket_path("cql", key)
+    try:
+        ensure_daemon(socket_path, lambda: CqlBrokerHandler(cluster_factory), idle_timeout)
+        response = send_request(socket_path, {"ping": True})
+    except (OSError, IOError, ValueError) as excep:
+        raise DaemonUnavailable(str(excep))
+    if "error" in response:
+        raise DaemonUnavailable(response["error"])
+    return BrokerSession(socket_path, "read"), BrokerSession(socket_path, "write")
+
+
+def connect_read_write(module, login_host, cluster_factory):
+    """
+    Returns the (read, write) sessions of a module. With connection_backend
+    broker they go through the broker for the module's connection options,
+    otherwise, or when the broker can't be used, a Cluster from
+    cluster_factory() is connected directly.
+    """
+    if module.params['connection_backend'] == "broker":
+        try:
+            return broker_sessions(broker_key(module.params, login_host),
+                                   cluster_factory,
+                                   module.params['broker_idle_timeout'])
+        except DaemonUnavailable as excep:
+            module.debug("CQL broker unavailable, connecting directly: {0}".format(excep))
+    return read_and_write_sessions(cluster_factory())
@@ -0,0 +1,134 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from ansible.module_utils.common.text.converters import to_bytes
+from ansible.module_utils.six import PY3, text_type
+from ansible_collections.community.cassandra.plugins.module_utils.cql_broker import encode_value
+
+# Writes rows to a file on the managed node one at a time, so exporting a
+# table takes as much memory as a page of its rows however large it is.
+# Rows are sequences of column values in the order of the column names.
+#
+# jsonl files hold one JSON object per row, keyed by column name. csv files
+# start with a header of the column names; nulls are empty cells and
+# collections, user defined types and booleans are written as JSON.
+
+EXPORT_FORMATS = ("jsonl", "csv")
+
+
+def csv_cell(value):
+    '''
+    Returns a column value, from encode_value(), as a csv cell.
+    '''
+    if value is None:
+        return ""
+    if isinstance(value, text_type):
+        return value
+    if isinstance(value, (bool, dict, list)):
+        return json.dumps(value, sort_keys=True)
+    return text_type(value)
+
+
+class JsonLinesWriter(object):
+
+    def __init__(self, stream, column_names, header=True):
+        self.stream = stream
+        self.column_names = column_names
+
+    def write(self, row):
+        line = json.dumps(dict(zip(self.column_names, [encode_value(value) for value in row])), sort_keys=True)
+        self.stream.write(to_bytes(line) + b"\n")
+
+
+class CsvWriter(object):
+
+    def __init__(self, stream, column_names, header=True):
+        self.writer = csv.writer(stream, lineterminator="\n")
+        if header:
+            self.writer.writerow(self.cells(column_names))
+
+    def cells(self, values):
+        if PY3:
+            return values
+        return [to_bytes(value) for value in values]
+
+    def write(self, row):
+        self.writer.writerow(self.cells([csv_cell(encode_value(value)) for value in row]))
+
+
+def _open_stream(fd, file_format):
+    if file_format == "csv" and PY3:
+        return io.open(fd, "w", encoding="utf-8", newline="")
+    return os.fdopen(fd, "wb")
+
+
+def _write_file(path, file_format, write, move=None):
+    '''
+    Calls write(stream) with a stream to a file next to path, moved to
+    path once write() returns, so a failed export never leaves a partial
+    file behind. Returns what write() does. move(src, dest), a module's
+    atomic_move(), gives the file the permissions, owner and SELinux
+    context Ansible gives the files it writes. Without it the file is
+    renamed, keeping the permissions of the file it replaces.
+    '''
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".cassandra-export-")
+    try:
+        with _open_stream(fd, file_format) as stream:
+            result = write(stream)
+        if move is not None:
+            move(tmp_path, path)
+        else:
+            if os.path.exists(path):
+                shutil.copymode(path, tmp_path)
+            os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return result
+
+
+def _writer(stream, column_names, file_format, header):
+    return (CsvWriter if file_format == "csv" else JsonLinesWriter)(stream, column_names, header)
+
+
+def export_rows(rows, column_names, path, file_format, header=True, move=None):
+    '''
+    Writes rows, any iterable such as a paged ResultSet, to path in
+    file_format, jsonl or csv. Without header a csv file has no header
+    line, to be one of the parts given to join_exports(). Returns the
+    number of rows written. See _write_file() for move.
+    '''
+    def write(stream):
+        writer = _writer(stream, column_names, file_format, header)
+        count = 0
+        for row in rows:
+            writer.write(row)
+            count += 1
+        return count
+
+    return _write_file(path, file_format, write, move)
+
+
+def join_exports(parts, column_names, path, file_format, move=None):
+    '''
+    Writes the exports at parts, written by export_rows() without header,
+    one after the other to path, under a single header. See _write_file()
+    for move.
+    '''
+    def write(stream):
+        _writer(stream, column_names, file_format, True)
+        for part in parts:
+            if file_format == "csv" and PY3:
+                with io.open(part, encoding="utf-8", newline="") as part_stream:
+                    shutil.copyfileobj(part_stream, stream)
+            else:
+                with open(part, "rb") as part_stream:
+                    shutil.copyfileobj(part_stream, stream)
+
+    _write_file(path, file_format, write, move)
@@ -0,0 +1,83 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import json
+
+# Builds the statements managing keyspaces and compares their replication
+# settings, shared by cassandra_keyspace and cassandra_keyspaces. Nothing
+# here talks to the cluster.
+
+
+def keyspace_config(replication, durable_writes):
+    '''
+    Returns the replication options of a system_schema.keyspaces row along
+    with its durable_writes, i.e.
+        {
+            "class": "NetworkTopologyStrategy",
+            "dc1": "3",
+            "durable_writes": True
+        }
+    '''
+    config = dict(replication)
+    config['class'] = config['class'].rsplit(".", 1)[-1]
+    config['durable_writes'] = durable_writes is not False
+    return config
+
+
+def legacy_keyspace_config(strategy_class, strategy_options, durable_writes):
+    '''
+    keyspace_config() of a Cassandra 2 system.schema_keyspaces row.
+    '''
+    replication = json.loads(strategy_options)
+    replication['class'] = strategy_class
+    return keyspace_config(replication, durable_writes)
+
+
+def is_keyspace_changed(cfg, replication_factor, durable_writes, data_centres):
+    '''
+    Returns whether the keyspace having cfg, from keyspace_config(), differs
+    from the wanted replication. Raises ValueError for a replication
+    strategy other than SimpleStrategy or NetworkTopologyStrategy.
+    '''
+    keyspace_definition_changed = False
+    if cfg['class'] == "SimpleStrategy":
+        if int(cfg['replication_factor']) != replication_factor or\
+                cfg['durable_writes'] != durable_writes:
+            keyspace_definition_changed = True
+    elif cfg['class'] == "NetworkTopologyStrategy":
+        if cfg['durable_writes'] != durable_writes:
+            keyspace_definition_changed = True
+        else:  # check each dc here
+            for dc in data_centres:
+                if dc in cfg.keys():
+                    if int(data_centres[dc]) != int(cfg[dc]):
+                        keyspace_definition_changed = True
+                else:
+                    keyspace_definition_changed = True
+            # If still false check for removed dc's
+            if keyspace_definition_changed is False:
+                for dc in cfg.keys():
+                    if dc not in data_centres and dc not in ["class", "durable_writes"]:
+                        keyspace_definition_changed = True
+    else:
+        raise ValueError("Unknown Replication strategy: {0}".format(cfg['class']))
+    return keyspace_definition_changed
+
+
+def create_alter_keyspace_cql(keyspace, replication_factor, durable_writes, data_centres, is_alter):
+    if is_alter is False:
+        cql = "CREATE KEYSPACE {0} ".format(keyspace)
+    else:
+        cql = "ALTER KEYSPACE {0} ".format(keyspace)
+    if data_centres is not None:
+        cql += "WITH REPLICATION = { 'class' : 'NetworkTopologyStrategy', "
+        for dc in data_centres:
+            cql += " '{0}' : {1},".format(str(dc), data_centres[dc])
+        cql = cql[:-1] + " }"
+    else:
+        cql += "WITH REPLICATION = {{ 'class' : 'SimpleStrategy', 'replication_factor': {0} }}".format(replication_factor)
+    cql += " AND DURABLE_WRITES = {0}".format(durable_writes)
+    return cql
+
+
+def drop_keyspace_cql(keyspace):
+    return "DROP KEYSPACE %s" % keyspace
@@ -0,0 +1,243 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import binascii
+import csv
+import datetime
+import decimal
+import io
+import json
+import re
+import uuid
+
+from ansible.module_utils.common.text.converters import to_text
+from ansible.module_utils.six import PY3, integer_types, string_types
+
+try:
+    from cassandra.util import Duration
+except Exception:
+    Duration = None
+
+# Reads the rows of a csv or jsonl file one at a time and turns their
+# values into what the driver binds to the columns of a prepared statement,
+# the reverse of cql_export. Column types are the driver's cqltypes classes,
+# as in the column_metadata of a PreparedStatement.
+#
+# Values are given as JSON values, as cql_export writes them: collections,
+# tuples and user defined types as JSON, uuids, timestamps and dates as
+# strings and blobs as hex. In csv files every value is a string and empty
+# values are nulls, as with cqlsh COPY.
+
+INTEGER_TYPES = ("int", "bigint", "smallint", "tinyint", "varint", "counter")
+
+STRING_TYPES = ("ascii", "text", "varchar", "inet")
+
+# Months, days and nanoseconds of the units of a duration as the driver
+# writes them, such as 1mo2d3ns, longest unit names first
+DURATION_UNITS = (("mo", 1, 0, 0), ("ms", 0, 0, 10 ** 6), ("us", 0, 0, 10 ** 3), (u"\u00b5s", 0, 0, 10 ** 3),
+                  ("ns", 0, 0, 1), ("y", 12, 0, 0), ("w", 0, 7, 0), ("d", 0, 1, 0), ("h", 0, 0, 3600 * 10 ** 9),
+                  ("m", 0, 0, 60 * 10 ** 9), ("s", 0, 0, 10 ** 9))
+DURATION = re.compile(r"^-?(?:\d+(?:" + "|".join(unit for unit, months, days, nanoseconds in DURATION_UNITS) + r"))+$",
+                      re.IGNORECASE)
+DURATION_PART = re.compile(r"(\d+)(" + "|".join(unit for unit, months, days, nanoseconds in DURATION_UNITS) + r")",
+                           re.IGNORECASE)
+
+TIMESTAMP = re.compile(r"^(\d{4})-(\d\d)-(\d\d)(?:[T ](\d\d):(\d\d)(?::(\d\d)(?:\.(\d{1,6})\d*)?)?)?"
+                       r"\s*(Z|[+-]\d\d:?\d\d)?$")
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class RowError(ValueError):
+    '''
+    A row of the file that can't be loaded, line being its line number.
+    '''
+
+    def __init__(self, line, msg):
+        super(RowError, self).__init__("line {0}: {1}".format(line, msg))
+        self.line = line
+
+
+def parse_timestamp(value):
+    '''
+    Returns a timestamp, milliseconds since the epoch or an ISO 8601 date
+    and time such as 2024-05-01T10:15:00.250Z, as a naive UTC datetime.
+    '''
+    if isinstance(value, integer_types + (float,)) and not isinstance(value, bool):
+        return EPOCH + datetime.timedelta(milliseconds=value)
+    match = TIMESTAMP.match(value.strip())
+    if not match:
+        raise ValueError("{0} is not a timestamp".format(value))
+    parts = [int(part) if part else 0 for part in match.groups()[:6]]
+    fraction = match.group(7) or ""
+    timestamp = datetime.datetime(*parts, microsecond=int(fraction.ljust(6, "0")) if fraction else 0)
+    offset = match.group(8)
+    if offset and offset != "Z":
+        offset = offset.replace(":", "")
+        minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+        timestamp -= datetime.timedelta(minutes=minutes if offset[0] == "+" else -minutes)
+    return timestamp
+
+
+def parse_duration(value):
+    '''
+    Returns a duration such as 1mo2d3ns, as str() of the driver's Duration
+    gives it, as (months, days, nanoseconds).
+    '''
+    if not isinstance(value, string_types) or not DURATION.match(value.strip()):
+        raise ValueError("{0} is not a duration".format(value))
+    value = value.strip()
+    units = dict((unit, (months, days, nanoseconds)) for unit, months, days, nanoseconds in DURATION_UNITS)
+    total = [0, 0, 0]
+    for count, unit in DURATION_PART.findall(value):
+        for index, size in enumerate(units[unit.lower()]):
+            total[index] += int(count) * size
+    sign = -1 if value.startswith("-") else 1
+    return tuple(sign * part for part in total)
+
+
+def _json(value):
+    if isinstance(value, string_types):
+        return json.loads(value)
+    return value
+
+
+def decode_value(cql_type, value):
+    '''
+    Returns value, read from a file, as the Python value the driver binds
+    to a column of cql_type. Raises ValueError when it isn't one.
+    '''
+    if value is None:
+        return None
+    name = cql_type.typename
+    if name == "frozen" or name.endswith("ReversedType"):
+        return decode_value(cql_type.subtypes[0], value)
+    if name == "tuple":
+        return tuple(decode_value(subtype, item) for subtype, item in zip(cql_type.subtypes, _json(value)))
+    if name in ("list", "set"):
+        items = [decode_value(cql_type.subtypes[0], item) for item in _json(value)]
+        return set(items) if name == "set" else items
+    if name == "map":
+        key_type, value_type = cql_type.subtypes
+        return dict((decode_value(key_type, key), decode_value(value_type, item)) for key, item in _json(value).items())
+    if getattr(cql_type, "fieldnames", None):
+        fields = _json(value)
+        if isinstance(fields, dict):
+            fields = [fields.get(field) for field in cql_type.fieldnames]
+        return tuple(decode_value(subtype, field) for subtype, field in zip(cql_type.subtypes, fields))
+    if name in STRING_TYPES:
+        if not isinstance(value, string_types):
+            raise ValueError("{0} is not a string".format(value))
+        return value
+    if name == "time":
+        if isinstance(value, bool) or not isinstance(value, integer_types + string_types):
+            raise ValueError("{0} is not a time".format(value))
+        return value
+    if name == "duration":
+        return Duration(*parse_duration(value))
+    if name in INTEGER_TYPES:
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError("{0} is not an integer".format(value))
+        return int(value)
+    if name in ("float", "double"):
+        return float(value)
+    if name == "decimal":
+        return decimal.Decimal(str(value))
+    if name == "boolean":
+        if isinstance(value, bool):
+            return value
+        if str(value).strip().lower() not in ("true", "false"):
+            raise ValueError("{0} is not a boolean".format(value))
+        return str(value).strip().lower() == "true"
+    if name in ("uuid", "timeuuid"):
+        return uuid.UUID(value)
+    if name == "timestamp":
+        return parse_timestamp(value)
+    if name == "date":
+        return datetime.datetime.strptime(value.strip(), "%Y-%m-%d").date()
+    if name == "blob":
+        value = value[2:] if value.lower().startswith("0x") else value
+        try:
+            return bytearray(binascii.unhexlify(value))
+        except (TypeError, binascii.Error):
+            raise ValueError("{0} is not hex".format(value))
+    return value
+
+
+def _csv_lines(stream):
+    if PY3:
+        return stream
+    return (line.encode("utf-8") for line in stream)
+
+
+def read_rows(path, file_format, columns=None, header=True):
+    '''
+    Yields (line, {column: value}, None) for every row of the file at path,
+    in file_format, csv or jsonl, reading a line at a time, or (line, None,
+    RowError) for a row that can't be read. csv files start with a header
+    of the column names unless header is false, when columns names them.
+    Otherwise only the columns in columns are kept when given. jsonl rows
+    lacking a column don't have it.
+    '''
+    with io.open(path, encoding="utf-8", newline="" if file_format == "csv" else None) as stream:
+        if file_format == "csv":
+            reader = csv.reader(_csv_lines(stream))
+            names = None if header else columns
+            for row in reader:
+                if names is None:
+                    names = [to_text(name).strip() for name in row]
+                    continue
+                if not row:
+                    continue
+                if len(row) != len(names):
+                    yield reader.line_num, None, RowError(reader.line_num, "{0} values for {1} columns".format(len(row), len(names)))
+                    continue
+                values = dict((name, to_text(value) if value != "" else None) for name, value in zip(names, row))
+                yield reader.line_num, _select(values, columns), None
+        else:
+            for number, line in enumerate(stream, 1):
+                if not line.strip():
+                    continue
+                try:
+                    values = json.loads(line)
+                except ValueError as excep:
+                    yield number, None, RowError(number, "invalid JSON: {0}".format(excep))
+                    continue
+                if not isinstance(values, dict):
+                    yield number, None, RowError(number, "a row must be a JSON object")
+                    continue
+                yield number, _select(values, columns), None
+
+
+def csv_header(path):
+    '''
+    Returns the column names the header of the csv file at path holds.
+    '''
+    with io.open(path, encoding="utf-8", newline="") as stream:
+        for row in csv.reader(_csv_lines(stream)):
+            return [to_text(name).strip() for name in row]
+    return []
+
+
+def _select(values, columns):
+    if not columns:
+        return values
+    return dict((column, values[column]) for column in columns if column in values)
+
+
+def partition_batches(rows, partition_key, batch_size):
+    '''
+    Returns rows, [(line, values, ...)] with values in the order of the
+    statement they're bound to, as [[(line, values, ...)]] batches of up to
+    batch_size rows of the same partition, partition_key being the indexes
+    of its columns in values. Batches are in the order their first row is.
+    '''
+    groups = {}
+    batches = []
+    for row in rows:
+        key = repr(tuple(row[1][index] for index in partition_key))
+        batch = groups.get(key)
+        if batch is None or len(batch) >= batch_size:
+            batch = groups[key] = []
+            batches.append(batch)
+        batch.append(row)
+    return batches
@@ -0,0 +1,247 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Builds the statements managing roles, their permissions and the roles
+# granted to them, shared by cassandra_role and cassandra_roles. Nothing
+# here talks to the cluster.
+
+
+def is_role_changed(role_properties, super_user, login, password,
+                    options, data_centres, update_password):
+    '''
+    Determines whether a role has changed and therefore needs /
+    to be changed with an ALTER ROLE statement.
+    role_properties - Dictionary created from the system_auth.roles keyspace?
+    super_user - User provided boolean value.
+    login - User provided boolean value.
+    password - User provided string value. Not currently dealt with.
+    options - User provided value. Not currently dealt with.
+    data_centres - User provided dictionary value. Not currently dealt with.
+    '''
+    changed = False
+    if role_properties['is_superuser'] != super_user:
+        changed = True
+    elif role_properties['can_login'] != login:
+        changed = True
+    elif update_password is True:
+        changed = True
+    return changed
+
+
+def create_alter_role(module, role, super_user, login, password,
+                      options, data_centres, alter_role):
+    if alter_role is False:
+        cql = "CREATE ROLE '{0}' ".format(role)
+    else:
+        cql = "ALTER ROLE '{0}' ".format(role)
+    cql += "WITH SUPERUSER = {0} ".format(super_user)
+    cql += "AND LOGIN = {0} ".format(login)
+    if password is not None:
+        cql += "AND PASSWORD = '{0}' ".format(password)
+    if options is not None:
+        cql += "AND OPTIONS = {0}".format(str(options))
+    if data_centres is not None:
+        for dc in data_centres:
+            if str(dc.upper()) == "ALL" and len(data_centres) == 1:
+                cql += " AND ACCESS TO ALL DATACENTERS"
+                break
+            else:
+                if len(data_centres) == 1:
+                    cql += " AND ACCESS TO DATACENTERS {{'{0}'}}".format(str(dc))
+                    break
+                else:
+                    cql += " AND ACCESS TO DATACENTERS {{'{0}'}}".format("','".join(data_centres))
+                    break
+    return cql
+
+
+def grant_role(role, grantee):
+    ''' Assign roles to other roles
+    '''
+    cql = "GRANT '{0}' TO '{1}'".format(role,
+                                        grantee)
+    return cql
+
+
+def revoke_role(role, grantee):
+    ''' Revoke a role
+    '''
+    cql = "REVOKE '{0}' FROM '{1}'".format(role,
+                                           grantee)
+    return cql
+
+
+def drop_role(role):
+    cql = "DROP ROLE '{0}'".format(role)
+    return cql
+
+
+def validate_keyspace_permissions(keyspace_permissions):
+    '''
+    All keyspace permissions must exist in the perms list
+    '''
+    perms = [
+        "ALL PERMISSIONS",
+        "CREATE",
+        "ALTER",
+        "AUTHORIZE",
+        "DROP",
+        "MODIFY",
+        "SELECT"
+    ]
+
+    for k in keyspace_permissions.keys():
+        for v in keyspace_permissions[k]:
+            if v not in perms:
+                return False
+    return True
+
+
+def grant_permission(permission, role, keyspace):
+    if keyspace == "all_keyspaces":
+        cql = "GRANT {0} ON ALL KEYSPACES TO '{1}'".format(permission,
+                                                           role)
+    else:
+        cql = "GRANT {0} ON KEYSPACE {1} TO '{2}'".format(permission,
+                                                          keyspace,
+                                                          role)
+    return cql
+
+
+def revoke_permission(permission, role, keyspace):
+    cql = "REVOKE {0} ON KEYSPACE {1} FROM '{2}'".format(permission,
+                                                         keyspace,
+                                                         role)
+    return cql
+
+
+ALL_PERMISSIONS = (
+    "ALTER",
+    "DROP",
+    "SELECT",
+    "MODIFY",
+    "AUTHORIZE",
+    "CREATE"
+)
+
+
+def role_permission_set(role_permissions):
+    '''
+    Indexes the rows of list_role_permissions() into a set of
+    (resource, permission) tuples, i.e. ("<keyspace rhys>", "SELECT").
+    Permissions the role inherits from the roles granted to it are included.
+    '''
+    return set((row['resource'].strip(), row['permission'].strip()) for row in role_permissions)
+
+
+def does_role_have_permission(permission_set,
+                              permission,
+                              keyspace):
+    '''
+    Returns true if the permission is already assigned to the role.
+    permission_set - From role_permission_set()
+    ALTER DROP SELECT MODIFY AUTHORIZE CREATE - The result from "ALL PERMISSIONS"
+    '''
+    if keyspace == "all_keyspaces":
+        resource = "<all keyspaces>"
+    else:
+        resource = "<keyspace {0}>".format(keyspace)
+    if permission == "ALL PERMISSIONS":  # we need to check for CREATE ALTER DROP SELECT MODIFY AUTHORIZE
+        return all((resource, p) in permission_set for p in ALL_PERMISSIONS)
+    return (resource, permission) in permission_set
+
+
+def plan_role_permissions(role_permissions, keyspace_permissions, role):
+    '''
+    role_permissions - Rows like those of LIST ALL OF role, dicts with a
+    role, resource and permission, including the permissions the role
+    inherits from the roles granted to it.
+    keyspace_permissions - Dictionary containing new keyspace permissions
+    role - The Cassandra role name
+
+    Returns - A dictionary structure containing GRANT and remove cql statements
+
+    {
+        "grant": ["GRANT SELECT ON KEYSPACE rhys TO cassandra",
+                  "GRANT ALL PERMISSIONS ON KEYSPACE rhys TO admin"],
+        "revoke": ["REVOKE SELECT ON KEYSPACE rhys FROM app_user",
+                   "REVOKE ALL PERMISSIONS ON ALL KEYSPACES FROM legacy_app"]
+    }
+    '''
+
+    perms_dict = {
+        "grant": set(),
+        "revoke": set(),
+        "temp": set()
+    }
+
+    permission_set = role_permission_set(role_permissions)
+
+    # Permissions to grant
+    if keyspace_permissions is not None:
+        for keyspace in keyspace_permissions.keys():
+            for permission in keyspace_permissions[keyspace]:
+                bool = does_role_have_permission(permission_set,
+                                                 permission,
+                                                 keyspace)
+                perms_dict['temp'].add("{0} {1} {2}".format(permission, keyspace, bool))
+
+                if bool:
+                    pass  # permission is already assigned
+                else:
+                    cql = grant_permission(permission,
+                                           role,
+                                           keyspace)
+                    perms_dict['grant'].add(cql)
+    # If the all_keyspaces key does not exist and there are "<all keyspaces>"
+    # resources present we can revoke all
+    # Permissions to revoke from specific keyspaces, and from all of them
+    # when keyspace_permissions is not provided
+    for permission in role_permissions:
+        if permission['role'] != role:
+            continue  # We don't touch other permissions
+        if permission['resource'] == "<all keyspaces>":
+            if keyspace_permissions is not None and "all_keyspaces" not in keyspace_permissions:
+                cql = "REVOKE ALL PERMISSIONS ON ALL KEYSPACES FROM '{0}'".format(role)
+                perms_dict['revoke'].add(cql)
+        elif permission['resource'].startswith('<keyspace'):
+            ks = permission['resource'].split(' ')[1].replace('>', '').strip()
+            wanted = (keyspace_permissions or {}).get(ks)
+            if wanted is None \
+                    or (permission['permission'] not in wanted and "ALL PERMISSIONS" not in wanted):
+                cql = revoke_permission(permission['permission'],
+                                        role,
+                                        ks)
+                perms_dict['revoke'].add(cql)
+    return perms_dict
+
+
+def plan_role_grants(current_roles, role, roles):
+    '''
+    Builds the cql for granting and revoking roles from users
+    @current_roles - The roles currently granted to role
+    @role - The role to grant or revoke roles from
+    @roles - The list of roles supplied via the module, None to leave them be
+
+    Returns - A dictionary structure containing GRANT
+    and remove cql statements for roles
+    '''
+    roles_dict = {
+        "grant": set(),
+        "revoke": set()
+    }
+    # Revokes first, roles should be an empty list to revoke all
+    if current_roles is not None and roles is not None:
+        for r in current_roles:
+            if r not in roles:
+                cql = revoke_role(r,
+                                  role)
+                roles_dict['revoke'].add(cql)
+    # grants
+    if roles is not None:
+        for r in roles:
+            if r not in current_roles:
+                cql = grant_role(r,
+                                 role)
+                roles_dict['grant'].add(cql)
+    return roles_dict
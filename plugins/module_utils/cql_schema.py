@@ -0,0 +1,362 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import ast
+import re
+from collections import OrderedDict
+
+from ansible.module_utils.six import integer_types, string_types
+
+# Builds the statements creating and altering types, tables, indexes and
+# materialized views, and compares what is wanted with what the
+# system_schema tables hold. Nothing here talks to the cluster.
+#
+# Table options are given as in cassandra_table, either as CQL literals,
+# i.e. "{'class': 'LeveledCompactionStrategy'}" or "'a comment'", or as
+# plain YAML values. Only the options, and the keys of map options, that
+# are given are compared. Altering a map option keeps the keys that aren't
+# given, unless it's given another class.
+
+# Old names of the keys of the compaction and compression maps
+OPTION_KEY_ALIASES = {
+    "chunk_length_kb": "chunk_length_in_kb",
+    "sstable_compression": "class",
+}
+
+# Options compared as they are rather than lowercased
+CASE_SENSITIVE_OPTIONS = ("comment",)
+
+PERCENTILE = re.compile(r"^(\d+(?:\.\d+)?)\s*(?:p|percentile)$", re.IGNORECASE)
+
+JAVA_CLASS = re.compile(r"^[A-Za-z_][\w$]*(\.[A-Za-z_][\w$]*)+$")
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def normalize_type(cql_type):
+    '''
+    Returns cql_type, i.e. "Map<text, VARCHAR>", as system_schema.columns
+    holds it, without spaces to ease comparison: "map<text,text>".
+    '''
+    cql_type = re.sub(r"\s+", "", cql_type).lower()
+    return re.sub(r"\bvarchar\b", "text", cql_type)
+
+
+def referenced_names(cql_type):
+    '''
+    Returns the names appearing in cql_type, user defined types among them.
+    '''
+    return set(IDENTIFIER.findall(cql_type.lower()))
+
+
+def parse_option_value(value):
+    '''
+    Returns the value of a table option given as a CQL literal as a Python
+    value, leaving values that aren't CQL literals as they are.
+    '''
+    if not isinstance(value, string_types):
+        return value
+    try:
+        return ast.literal_eval(value.strip())
+    except (SyntaxError, ValueError):
+        pass
+    if value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    return value
+
+
+def _normalize_scalar(value, case_sensitive=False):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, integer_types + (float,)):
+        value = str(value)
+    value = str(value).strip()
+    try:
+        number = float(value)
+        return str(int(number)) if number.is_integer() else str(number)
+    except ValueError:
+        pass
+    percentile = PERCENTILE.match(value)
+    if percentile:
+        return "{0}p".format(_normalize_scalar(percentile.group(1)))
+    if JAVA_CLASS.match(value):
+        value = value.rsplit(".", 1)[-1]
+    return value if case_sensitive else value.lower()
+
+
+def normalize_option(name, value):
+    '''
+    Returns the value of option name, given or read from system_schema,
+    in a form that compares equal for equivalent settings: numbers as
+    strings, Java classes without their package, 99PERCENTILE as 99p and
+    the keys of maps under their current name.
+    '''
+    value = parse_option_value(value)
+    if isinstance(value, dict):
+        return dict((OPTION_KEY_ALIASES.get(str(key), str(key)), _normalize_scalar(item))
+                    for key, item in value.items())
+    return _normalize_scalar(value, name in CASE_SENSITIVE_OPTIONS)
+
+
+def option_changed(name, wanted, current):
+    '''
+    Returns whether option name, currently current, needs to be altered to
+    be wanted. Only the keys of a map option that are wanted are compared.
+    '''
+    if current is None:
+        return True
+    wanted = normalize_option(name, wanted)
+    current = normalize_option(name, current)
+    if isinstance(wanted, dict):
+        if not isinstance(current, dict):
+            return True
+        return any(current.get(key) != item for key, item in wanted.items())
+    return wanted != current
+
+
+def changed_options(wanted, current):
+    '''
+    Returns the names of the options of wanted, a table_options dict, that
+    differ from current, a system_schema.tables or views row as a dict,
+    in order.
+    '''
+    return [name for name in sorted(wanted or {}) if option_changed(name, wanted[name], current.get(name))]
+
+
+def cql_literal(value):
+    '''
+    Returns value, from parse_option_value(), as a CQL literal.
+    '''
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, integer_types + (float,)):
+        return str(value)
+    if isinstance(value, dict):
+        return "{{{0}}}".format(", ".join("{0}: {1}".format(cql_literal(str(key)), cql_literal(value[key]))
+                                          for key in sorted(value)))
+    return "'{0}'".format(str(value).replace("'", "''"))
+
+
+def _option_key(key):
+    return OPTION_KEY_ALIASES.get(str(key), str(key))
+
+
+def altered_option(wanted, current):
+    '''
+    Returns the value an option, currently current, is altered to for it to
+    be wanted. A map option, such as compaction, has to be given whole, so
+    the keys of current that aren't wanted are kept. They aren't when
+    wanted has another class, whose sub-options differ.
+    '''
+    wanted = parse_option_value(wanted)
+    current = parse_option_value(current)
+    if not isinstance(wanted, dict) or not isinstance(current, dict):
+        return wanted
+    wanted_keys = dict((_option_key(key), item) for key, item in wanted.items())
+    current_keys = dict((_option_key(key), item) for key, item in current.items())
+    if "class" in wanted_keys and "class" in current_keys and \
+            _normalize_scalar(wanted_keys["class"]) != _normalize_scalar(current_keys["class"]):
+        return wanted
+    merged = dict((str(key), item) for key, item in current.items() if _option_key(key) not in wanted_keys)
+    merged.update((str(key), item) for key, item in wanted.items())
+    return merged
+
+
+def options_cql(options, names=None, current=None):
+    '''
+    Returns the "name = value AND ..." of options, or of those in names.
+    With current, the options as they are, map options keep the keys they
+    aren't given, see altered_option().
+    '''
+    names = sorted(options) if names is None else names
+    current = current or {}
+    return " AND ".join("{0} = {1}".format(name, cql_literal(altered_option(options[name], current.get(name))))
+                        for name in names)
+
+
+def alter_options_cql(kind, name, options, names, current=None):
+    '''
+    Returns the statement setting the options names of the table, or
+    materialized view, name to their value in options. current holds the
+    options as they are, a system_schema.tables or views row as a dict.
+    '''
+    return "ALTER {0} {1} WITH {2}".format(kind, name, options_cql(options, names, current))
+
+
+def column_pairs(columns):
+    '''
+    Returns the [(name, type)] of columns as cassandra_table takes them, a
+    list of single key dicts.
+    '''
+    return [(str(name), str(cql_type)) for column in columns or () for name, cql_type in column.items()]
+
+
+def key_layout(primary_key, partition_key, clustering):
+    '''
+    Returns the primary key of a table, or view, given as cassandra_table
+    takes it, as {"partition_key": ["name"], "clustering": [("name", "asc")]}.
+    Raises ValueError when it doesn't add up.
+    '''
+    if not primary_key:
+        raise ValueError("primary_key is required")
+    partition_key = list(partition_key or primary_key[:1])
+    if list(primary_key[:len(partition_key)]) != partition_key:
+        raise ValueError("partition_key list elements do not match primary_key elements")
+    order = dict((str(name).lower(), str(value).lower()) for item in clustering or () for name, value in item.items())
+    layout = {"partition_key": partition_key,
+              "clustering": [(name, order.pop(name.lower(), "asc")) for name in primary_key[len(partition_key):]]}
+    if order:
+        raise ValueError("clustering columns {0} are not in the primary_key".format(", ".join(sorted(order))))
+    return layout
+
+
+def table_layout(columns, primary_key, partition_key, clustering):
+    '''
+    Returns the key_layout() of a table along with its columns, as
+        {
+            "columns": {"name": "type"},
+            "static": ["name"],
+            "partition_key": ["name"],
+            "clustering": [("name", "asc")]
+        }
+    Raises ValueError when the primary key doesn't add up.
+    '''
+    layout = key_layout(primary_key, partition_key, clustering)
+    layout["columns"] = OrderedDict()
+    layout["static"] = []
+    for name, cql_type in column_pairs(columns):
+        parts = cql_type.split()
+        if parts and parts[-1].lower() == "static":
+            layout["static"].append(name)
+            cql_type = " ".join(parts[:-1])
+        layout["columns"][name] = cql_type
+    missing = [name for name in primary_key if name not in layout["columns"]]
+    if missing:
+        raise ValueError("primary_key columns {0} have no type".format(", ".join(missing)))
+    return layout
+
+
+def live_table_layout(column_rows):
+    '''
+    table_layout() of a table, or view, from its system_schema.columns rows.
+    '''
+    layout = {"columns": {}, "static": [], "partition_key": [], "clustering": []}
+    keys = {"partition_key": [], "clustering": []}
+    for row in column_rows:
+        layout["columns"][row['column_name']] = row['type']
+        if row['kind'] == "static":
+            layout["static"].append(row['column_name'])
+        elif row['kind'] in keys:
+            keys[row['kind']].append((row['position'], row['column_name'], row['clustering_order']))
+    layout["partition_key"] = [name for position, name, order in sorted(keys["partition_key"])]
+    layout["clustering"] = [(name, order) for position, name, order in sorted(keys["clustering"])]
+    return layout
+
+
+def layout_conflicts(name, wanted, current):
+    '''
+    Returns what can't be altered to go from the current layout of table
+    name to the wanted one: a changed primary key, clustering order or
+    column type. Columns that aren't wanted are left alone.
+    '''
+    conflicts = []
+    if wanted["partition_key"] != current["partition_key"] or wanted["clustering"] != current["clustering"]:
+        conflicts.append("{0}: the primary key or clustering order differs and can't be altered".format(name))
+    for column, cql_type in sorted(wanted.get("columns", {}).items()):
+        if column in current["columns"] and normalize_type(cql_type) != normalize_type(current["columns"][column]):
+            conflicts.append("{0}: column {1} is {2}, it can't be altered to {3}".format(
+                name, column, current["columns"][column], cql_type))
+    return conflicts
+
+
+def missing_columns(wanted, current):
+    '''
+    Returns the [(name, type)] of the wanted columns the current layout
+    lacks, static columns with their type ending with static.
+    '''
+    return [(column, cql_type + " static" if column in wanted["static"] else cql_type)
+            for column, cql_type in sorted(wanted["columns"].items()) if column not in current["columns"]]
+
+
+def _primary_key_cql(layout):
+    partition_key = layout["partition_key"]
+    key = partition_key[0] if len(partition_key) == 1 else "({0})".format(", ".join(partition_key))
+    return "PRIMARY KEY ({0})".format(", ".join([key] + [name for name, order in layout["clustering"]]))
+
+
+def _with_cql(layout, options):
+    clauses = []
+    if any(order == "desc" for name, order in layout["clustering"]):
+        clauses.append("CLUSTERING ORDER BY ({0})".format(
+            ", ".join("{0} {1}".format(name, order.upper()) for name, order in layout["clustering"])))
+    if options:
+        clauses.append(options_cql(options))
+    return " WITH {0}".format(" AND ".join(clauses)) if clauses else ""
+
+
+def create_table_cql(name, layout, options):
+    columns = ["{0} {1}{2}".format(column, cql_type, " static" if column in layout["static"] else "")
+               for column, cql_type in layout["columns"].items()]
+    return "CREATE TABLE {0} ({1}, {2}){3}".format(name, ", ".join(columns), _primary_key_cql(layout),
+                                                   _with_cql(layout, options))
+
+
+def add_column_cql(name, column, cql_type):
+    return "ALTER TABLE {0} ADD {1} {2}".format(name, column, cql_type)
+
+
+def create_type_cql(name, fields):
+    return "CREATE TYPE {0} ({1})".format(name, ", ".join("{0} {1}".format(field, cql_type) for field, cql_type in fields))
+
+
+def add_field_cql(name, field, cql_type):
+    return "ALTER TYPE {0} ADD {1} {2}".format(name, field, cql_type)
+
+
+def create_index_cql(name, table, target, using=None, options=None):
+    if using is None:
+        return "CREATE INDEX {0} ON {1} ({2})".format(name, table, target)
+    cql = "CREATE CUSTOM INDEX {0} ON {1} ({2}) USING {3}".format(name, table, target, cql_literal(using))
+    if options:
+        cql += " WITH OPTIONS = {0}".format(cql_literal(options))
+    return cql
+
+
+def index_target(target):
+    '''
+    Returns an index target as system_schema.indexes holds it, values(x)
+    and x being the same index.
+    '''
+    target = re.sub(r"\s+", "", target).lower()
+    match = re.match(r"^values\((.+)\)$", target)
+    return match.group(1) if match else target
+
+
+def create_view_cql(name, base_table, columns, layout, options):
+    key_columns = layout["partition_key"] + [column for column, order in layout["clustering"]]
+    return "CREATE MATERIALIZED VIEW {0} AS SELECT {1} FROM {2} WHERE {3} {4}{5}".format(
+        name,
+        ", ".join(columns) if columns else "*",
+        base_table,
+        " AND ".join("{0} IS NOT NULL".format(column) for column in key_columns),
+        _primary_key_cql(layout),
+        _with_cql(layout, options))
+
+
+def type_levels(types):
+    '''
+    Returns the level of every type of types, {name: [field types]}, as
+    {name: level}: 1 for a type using no other type of types, otherwise
+    one more than the highest level of those it uses.
+    '''
+    levels = {}
+
+    def level(name, seen):
+        if name not in levels:
+            used = [other for cql_type in types[name] for other in referenced_names(cql_type)
+                    if other in types and other != name and other not in seen]
+            levels[name] = 1 + max([level(other, seen | set([name])) for other in used] or [0])
+        return levels[name]
+
+    for name in types:
+        level(name, set())
+    return levels
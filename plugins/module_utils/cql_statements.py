@@ -0,0 +1,106 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import re
+
+# Splits CQL scripts into statements the way cqlsh reads them, so they can
+# be sent through the driver one by one.
+
+BEGIN_BATCH = re.compile(r"^BEGIN\s+(UNLOGGED\s+|COUNTER\s+)?BATCH\b", re.IGNORECASE)
+
+APPLY_BATCH = re.compile(r"\bAPPLY\s+BATCH$", re.IGNORECASE)
+
+# Commands of the cqlsh shell rather than of CQL, the server rejects them
+CQLSH_COMMANDS = re.compile(r"^(CAPTURE|CLEAR|CLS|CONSISTENCY|COPY|EXIT|EXPAND|HELP|LOGIN|PAGING|QUIT|"
+                            r"SERIAL\s+CONSISTENCY|SHOW|SOURCE|TRACING)\b", re.IGNORECASE)
+
+READ_STATEMENT = re.compile(r"^(SELECT|DESC|DESCRIBE|LIST)\b", re.IGNORECASE)
+
+
+def _quoted_end(text, start):
+    '''
+    Returns the index following the string, or quoted identifier, opening
+    at start, a doubled quote being an escaped one.
+    '''
+    quote = text[start]
+    i = start + 1
+    while i < len(text):
+        if text[i] == quote:
+            if text[i + 1:i + 2] == quote:
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(text)
+
+
+def _split(text):
+    '''
+    Returns ([statement], rest), the terminated statements of text and
+    what follows the last of them, see split_statements().
+    '''
+    statements = []
+    current = []
+    i = 0
+    while i < len(text):
+        two = text[i:i + 2]
+        if two in ("--", "//"):
+            end = text.find("\n", i)
+            i = len(text) if end == -1 else end
+        elif two == "/*":
+            end = text.find("*/", i + 2)
+            current.append(" ")
+            i = len(text) if end == -1 else end + 2
+        elif two == "$$":
+            end = text.find("$$", i + 2)
+            end = len(text) if end == -1 else end + 2
+            current.append(text[i:end])
+            i = end
+        elif text[i] in ("'", '"'):
+            end = _quoted_end(text, i)
+            current.append(text[i:end])
+            i = end
+        elif text[i] == ";":
+            statement = "".join(current).strip()
+            if BEGIN_BATCH.match(statement) and not APPLY_BATCH.search(statement):
+                current.append(";")
+            else:
+                if statement:
+                    statements.append(statement)
+                current = []
+            i += 1
+        else:
+            current.append(text[i])
+            i += 1
+    return statements, "".join(current).strip()
+
+
+def split_statements(text):
+    '''
+    Returns the statements of text, a CQL script, without their terminating
+    semicolon or comments. Semicolons in strings, quoted identifiers,
+    $$ strings and between BEGIN BATCH and APPLY BATCH don't end a
+    statement. The last statement doesn't need a semicolon.
+    '''
+    statements, rest = _split(text)
+    if rest:
+        statements.append(rest)
+    return statements
+
+
+def is_terminated(text):
+    '''
+    Returns whether every statement of text, a CQL script, ends with a
+    semicolon, so that more statements can follow it.
+    '''
+    return not _split(text)[1]
+
+
+def is_cqlsh_command(statement):
+    return CQLSH_COMMANDS.match(statement) is not None
+
+
+def is_read_statement(statement):
+    '''
+    Returns whether statement only reads, and so doesn't change anything.
+    '''
+    return READ_STATEMENT.match(statement) is not None
@@ -0,0 +1,113 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import hashlib
+import json
+import os
+import tempfile
+
+# Splits the token ring of a cluster into the ranges a table is scanned by,
+# one range query "token(pk) > start AND token(pk) <= end" at a time, and
+# records which ranges a scan has finished in a checkpoint file so that an
+# interrupted scan can resume.
+#
+# A range is a (start, end) pair of integer tokens, start excluded and end
+# included, as the driver's token map holds them: every token of the ring
+# ends the range its node is the primary replica of.
+
+# The lowest and highest token of the partitioners whose tokens are
+# integers. No partition has the lowest token, so it can start a range.
+PARTITIONER_BOUNDS = {
+    "Murmur3Partitioner": (-2 ** 63, 2 ** 63 - 1),
+    "RandomPartitioner": (-1, 2 ** 127),
+}
+
+
+def partitioner_bounds(partitioner):
+    '''
+    Returns the (lowest, highest) token of partitioner, the class name the
+    cluster's metadata has. Raises ValueError for other partitioners, such
+    as ByteOrderedPartitioner, whose tokens aren't integers.
+    '''
+    name = partitioner.rsplit(".", 1)[-1]
+    if name not in PARTITIONER_BOUNDS:
+        raise ValueError("Token range scans aren't supported with {0}".format(name))
+    return PARTITIONER_BOUNDS[name]
+
+
+def ring_ranges(ring, lowest, highest):
+    '''
+    Returns the ranges between the tokens of ring, in token order, covering
+    every token from lowest to highest. The range wrapping around the end
+    of the ring is split in two at highest.
+    '''
+    ring = sorted(set(ring))
+    if not ring:
+        return [(lowest, highest)]
+    ranges = []
+    if ring[0] != lowest:
+        ranges.append((lowest, ring[0]))
+    ranges.extend(zip(ring, ring[1:]))
+    if ring[-1] != highest:
+        ranges.append((ring[-1], highest))
+    return ranges
+
+
+def split_range(start, end, parts):
+    '''
+    Returns the range from start to end as parts smaller ranges of about
+    the same size, fewer when it doesn't hold parts tokens.
+    '''
+    parts = max(1, min(parts, end - start))
+    bounds = [start + (end - start) * i // parts for i in range(parts)] + [end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def scan_ranges(ring, partitioner, splits_per_range=1):
+    '''
+    Returns the ranges, in token order, a table of a cluster with ring, its
+    tokens, and partitioner is scanned by, every range between two tokens
+    being split in splits_per_range.
+    '''
+    lowest, highest = partitioner_bounds(partitioner)
+    return [sub_range for start, end in ring_ranges(ring, lowest, highest)
+            for sub_range in split_range(start, end, splits_per_range)]
+
+
+def scan_fingerprint(*settings):
+    '''
+    Returns a fingerprint of the settings of a scan, its table, columns,
+    ranges and so on, that a checkpoint has to match to be resumed.
+    '''
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_checkpoint(path, fingerprint):
+    '''
+    Returns the {range index: result} of the ranges the checkpoint at path
+    records as done, or {} when there is no checkpoint, or it records a scan
+    with another fingerprint.
+    '''
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(checkpoint, dict) or checkpoint.get("fingerprint") != fingerprint:
+        return {}
+    return dict((int(index), result) for index, result in checkpoint.get("done", {}).items())
+
+
+def save_checkpoint(path, fingerprint, done):
+    '''
+    Records done, {range index: result}, in the checkpoint at path. The
+    file is replaced atomically so an interrupted write never loses the
+    previous checkpoint.
+    '''
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".checkpoint-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"fingerprint": fingerprint, "done": dict((str(index), result) for index, result in done.items())}, f)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,110 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+try:
+    from cassandra import InvalidRequest
+except Exception:
+    class InvalidRequest(Exception):
+        pass
+
+# Reads what nodetool reads over JMX from the system tables instead, over a
+# CQL session the caller keeps open between polls.
+
+LOCAL_QUERY = "SELECT * FROM system.local WHERE key='local'"
+PEERS_V2_QUERY = "SELECT * FROM system.peers_v2"
+PEERS_QUERY = "SELECT * FROM system.peers"
+
+
+def _address_key(address):
+    # Sorts IPv4 addresses numerically, anything else after them
+    try:
+        return (0, tuple(int(part) for part in address.split(".")), address)
+    except ValueError:
+        return (1, (), address)
+
+
+def _str(value):
+    return "" if value is None else str(value)
+
+
+def _rows(local, peers, is_up):
+    # (row, address, up) of every node, the one answering the query being up
+    rows = ([(local, True)] if local is not None else []) + \
+        [(peer, is_up.get(_str(peer.host_id))) for peer in peers]
+    for row, up in rows:
+        address = _str(getattr(row, 'broadcast_address', None) or getattr(row, 'peer', None)
+                       or getattr(row, 'listen_address', None))
+        yield row, address, bool(up)
+
+
+def local_and_peers(session):
+    '''
+    Returns the system.local row of the node answering the query and the
+    rows of its system.peers_v2 table, or system.peers before Cassandra 4.0.
+    '''
+    local = list(session.execute(LOCAL_QUERY))
+    try:
+        peers = list(session.execute(PEERS_V2_QUERY))
+    except InvalidRequest:
+        peers = list(session.execute(PEERS_QUERY))
+    return (local[0] if local else None), peers
+
+
+def host_states(hosts):
+    '''
+    Returns {host_id: is_up} from the driver's Host objects.
+    '''
+    return dict((_str(host.host_id), host.is_up) for host in hosts if host.host_id is not None)
+
+
+def cql_cluster_status(local, peers, is_up):
+    '''
+    Builds the cluster_up_down() dict of the nodetool status output from
+    system.local and peers rows, with is_up a dict of the driver's view of
+    which hosts, keyed by host id, are up. The node answering the query is
+    up, a host the driver doesn't know about is down.
+    The system tables don't know about load, ownership or the state of
+    nodes that are being added, so load and owns are "?" and state is
+    always N. tokens is the number of tokens.
+    '''
+    cluster_status = {}
+    for row, address, up in _rows(local, peers, is_up):
+        dc = cluster_status.setdefault(_str(row.data_center), {"up": [], "down": [], "nodes": []})
+        node = {
+            "address": address,
+            "load": "?",
+            "tokens": str(len(row.tokens or ())),
+            "owns": "?",
+            "host_id": _str(row.host_id),
+            "rack": _str(row.rack),
+            "status": "U" if up else "D",
+            "state": "N",
+        }
+        dc["nodes"].append(node)
+    for dc in cluster_status.values():
+        dc["nodes"].sort(key=lambda node: _address_key(node["address"]))
+        for node in dc["nodes"]:
+            dc["up" if node["status"] == "U" else "down"].append(node["address"])
+    return cluster_status
+
+
+def cql_schema_versions(local, peers, is_up):
+    '''
+    Returns the schema versions of the nodes from system.local and peers
+    rows, like parse_describecluster() does from nodetool describecluster,
+    i.e.
+        {
+            "d4f18346-f81f-3786-aed4-40e03558b299": ["127.0.0.1", "127.0.0.2"]
+        }
+    is_up is a dict of the driver's view of which hosts, keyed by host id,
+    are up. The schema version of a peer that isn't up is stale, so like
+    the unreachable nodes of describecluster it is left out.
+    '''
+    versions = {}
+    for row, address, up in _rows(local, peers, is_up):
+        if not up or row.schema_version is None:
+            continue
+        versions.setdefault(_str(row.schema_version), []).append(address)
+    for addresses in versions.values():
+        addresses.sort(key=_address_key)
+    return versions
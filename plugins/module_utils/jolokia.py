@@ -0,0 +1,186 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import base64
+import json
+import shlex
+import socket
+
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+
+STORAGE_SERVICE = "org.apache.cassandra.db:type=StorageService"
+STORAGE_PROXY = "org.apache.cassandra.db:type=StorageProxy"
+
+# nodetool gettimeout/settimeout type -> StorageService attribute
+TIMEOUT_ATTRIBUTES = {
+    "misc": "RpcTimeout",
+    "read": "ReadRpcTimeout",
+    "range": "RangeRpcTimeout",
+    "write": "WriteRpcTimeout",
+    "counterwrite": "CounterWriteRpcTimeout",
+    "cascontention": "CasContentionTimeout",
+    "truncate": "TruncateRpcTimeout",
+    "internodeconnect": "InternodeTcpConnectTimeoutInMS",
+    "internodeuser": "InternodeTcpUserTimeoutInMS",
+    "internodestreaminguser": "InternodeStreamingTcpUserTimeoutInMS",
+}
+
+
+def _running(value):
+    return "running" if value else "not running"
+
+
+# nodetool sub-command -> (mbean, attribute, formatter of the value read).
+# Formatters reproduce nodetool's own output so modules can't tell the
+# difference between the two backends.
+NODETOOL_READS = {
+    "version": (STORAGE_SERVICE, "ReleaseVersion",
+                lambda v, args: "ReleaseVersion: {0}".format(v)),
+    "getcompactionthroughput": (STORAGE_SERVICE, "CompactionThroughputMbPerSec",
+                                lambda v, args: "Current compaction throughput: {0} MB/s".format(v)),
+    "getstreamthroughput": (STORAGE_SERVICE, "StreamThroughputMbPerSec",
+                            lambda v, args: "Current stream throughput: {0} Mb/s".format(float(v) if "-d" in args else v)),
+    "gettraceprobability": (STORAGE_SERVICE, "TraceProbability",
+                            lambda v, args: "Current trace probability: {0}".format(v)),
+    "statushandoff": (STORAGE_PROXY, "HintedHandoffEnabled",
+                      lambda v, args: "Hinted handoff is {0}".format(_running(v))),
+    "statusbinary": (STORAGE_SERVICE, "NativeTransportRunning",
+                     lambda v, args: _running(v)),
+    "statusgossip": (STORAGE_SERVICE, "GossipRunning",
+                     lambda v, args: _running(v)),
+    "statusbackup": (STORAGE_SERVICE, "IncrementalBackupsEnabled",
+                     lambda v, args: _running(v)),
+}
+
+# nodetool sub-command -> (mbean, attribute, value to write from the args)
+NODETOOL_WRITES = {
+    "setcompactionthroughput": (STORAGE_SERVICE, "CompactionThroughputMbPerSec", lambda args: int(args[0])),
+    "setstreamthroughput": (STORAGE_SERVICE, "StreamThroughputMbPerSec", lambda args: int(args[0])),
+    "settraceprobability": (STORAGE_SERVICE, "TraceProbability", lambda args: float(args[0])),
+    "enablehandoff": (STORAGE_PROXY, "HintedHandoffEnabled", lambda args: True),
+    "disablehandoff": (STORAGE_PROXY, "HintedHandoffEnabled", lambda args: False),
+    "enablebackup": (STORAGE_SERVICE, "IncrementalBackupsEnabled", lambda args: True),
+    "disablebackup": (STORAGE_SERVICE, "IncrementalBackupsEnabled", lambda args: False),
+}
+
+# nodetool sub-command -> (mbean, operation)
+NODETOOL_EXECS = {
+    "enablebinary": (STORAGE_SERVICE, "startNativeTransport"),
+    "disablebinary": (STORAGE_SERVICE, "stopNativeTransport"),
+    "enablegossip": (STORAGE_SERVICE, "startGossiping"),
+    "disablegossip": (STORAGE_SERVICE, "stopGossiping"),
+}
+
+# Keep-alive connections, shared by all JolokiaClient instances of the
+# module process and keyed by (scheme, netloc).
+_CONNECTIONS = {}
+
+
+class JolokiaError(Exception):
+    pass
+
+
+class JolokiaClient(object):
+    """
+    Minimal Jolokia (https://jolokia.org) client reading, writing and
+    executing MBean attributes and operations over a pooled keep-alive HTTP
+    connection.
+    """
+
+    def __init__(self, url, username=None, password=None, timeout=30):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise JolokiaError("Unsupported Jolokia url: {0}".format(url))
+        self.scheme = parsed.scheme
+        self.netloc = parsed.netloc
+        self.path = parsed.path or "/jolokia/"
+        if not self.path.endswith("/"):
+            self.path += "/"
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        if username is not None:
+            credentials = "{0}:{1}".format(username, password or "").encode('utf-8')
+            self.headers["Authorization"] = "Basic {0}".format(base64.b64encode(credentials).decode('ascii'))
+
+    def _connection(self, fresh=False):
+        key = (self.scheme, self.netloc)
+        if fresh and key in _CONNECTIONS:
+            _CONNECTIONS.pop(key).close()
+        if key not in _CONNECTIONS:
+            if self.scheme == "https":
+                _CONNECTIONS[key] = http_client.HTTPSConnection(self.netloc, timeout=self.timeout)
+            else:
+                _CONNECTIONS[key] = http_client.HTTPConnection(self.netloc, timeout=self.timeout)
+        return _CONNECTIONS[key]
+
+    def request(self, payload):
+        """
+        POSTs one Jolokia request and returns the "value" of the response.
+        A pooled connection the server has closed in the meantime is
+        replaced transparently, once.
+        """
+        body = json.dumps(payload)
+        for attempt in (1, 2):
+            conn = self._connection(fresh=attempt == 2)
+            try:
+                conn.request("POST", self.path, body, self.headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http_client.HTTPException, socket.error) as excep:
+                conn.close()
+                if attempt == 2:
+                    raise JolokiaError("Jolokia request failed: {0}".format(excep))
+        if response.status != 200:
+            raise JolokiaError("Jolokia returned HTTP {0}".format(response.status))
+        try:
+            result = json.loads(data.decode('utf-8'))
+        except ValueError:
+            raise JolokiaError("Jolokia returned invalid JSON")
+        if result.get("status") != 200:
+            raise JolokiaError(result.get("error", "Jolokia request failed with status {0}".format(result.get("status"))))
+        return result.get("value")
+
+    def read(self, mbean, attribute):
+        return self.request({"type": "read", "mbean": mbean, "attribute": attribute})
+
+    def write(self, mbean, attribute, value):
+        return self.request({"type": "write", "mbean": mbean, "attribute": attribute, "value": value})
+
+    def execute(self, mbean, operation, *arguments):
+        return self.request({"type": "exec", "mbean": mbean, "operation": operation, "arguments": list(arguments)})
+
+
+def jolokia_nodetool_cmd(client, sub_command):
+    """
+    Runs sub_command as a direct MBean read, write or operation, returning
+    (rc, stdout, stderr) like nodetool would. Returns None when
+    sub_command has no MBean equivalent here and has to go to nodetool.
+    Raises JolokiaError if the agent can't be used.
+    """
+    args = shlex.split(sub_command)
+    if not args:
+        return None
+    name, args = args[0], [a for a in args[1:] if a != "--"]
+    if name == "gettimeout" and len(args) == 1 and args[0] in TIMEOUT_ATTRIBUTES:
+        value = client.read(STORAGE_SERVICE, TIMEOUT_ATTRIBUTES[args[0]])
+        return 0, "Current timeout for type {0}: {1} ms".format(args[0], value), ""
+    if name == "settimeout" and len(args) == 2 and args[0] in TIMEOUT_ATTRIBUTES and args[1].lstrip("-").isdigit():
+        client.write(STORAGE_SERVICE, TIMEOUT_ATTRIBUTES[args[0]], int(args[1]))
+        return 0, "", ""
+    if name in NODETOOL_READS and all(a == "-d" for a in args):
+        mbean, attribute, formatter = NODETOOL_READS[name]
+        return 0, formatter(client.read(mbean, attribute), args), ""
+    if name in NODETOOL_WRITES and len(args) == (0 if name.startswith(("enable", "disable")) else 1):
+        mbean, attribute, value = NODETOOL_WRITES[name]
+        try:
+            value = value(args)
+        except ValueError:
+            return None  # Let nodetool report the bad argument
+        client.write(mbean, attribute, value)
+        return 0, "", ""
+    if name in NODETOOL_EXECS and not args:
+        mbean, operation = NODETOOL_EXECS[name]
+        client.execute(mbean, operation)
+        return 0, "", ""
+    return None
@@ -0,0 +1,216 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import socket
+import stat
+import tempfile
+import time
+
+
+class DaemonUnavailable(Exception):
+    """
+    Raised when a local helper daemon can't be reached or started. Callers
+    are expected to catch this and fall back to their non-daemon code path.
+    """
+    pass
+
+
+def runtime_dir():
+    """
+    Returns the private, per-user directory holding the sockets, lock files
+    and caches of the helper daemons started by this collection on the
+    managed node. The directory is created with mode 0700 and refused if
+    somebody else owns it or it is readable by anyone else.
+    """
+    path = os.path.join(tempfile.gettempdir(), "ansible-cassandra-{0}".format(os.getuid()))
+    try:
+        os.mkdir(path, 0o700)
+    except OSError as excep:
+        if excep.errno != errno.EEXIST:
+            raise DaemonUnavailable("Unable to create {0}: {1}".format(path, excep))
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise DaemonUnavailable("Refusing to use insecure runtime directory {0}".format(path))
+    return path
+
+
+def runtime_file(kind, key, extension):
+    """
+    Returns the path of a file of the given kind, i.e. "nodetool", in
+    runtime_dir() for the given key. The key is any JSON serialisable value
+    (typically host, port and credentials); only a digest of it ends up in
+    the file name so credentials never appear on the filesystem.
+    """
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+    return os.path.join(runtime_dir(), "{0}-{1}.{2}".format(kind, digest, extension))
+
+
+def daemon_socket_path(kind, key):
+    """
+    Returns the unix socket path for a daemon of the given kind serving the
+    given key, see runtime_file().
+    """
+    return runtime_file(kind, key, "sock")
+
+
+def send_request(socket_path, payload, connect_timeout=5):
+    """
+    Sends one JSON request to the daemon listening on socket_path and
+    returns the decoded JSON response. There is no timeout once the request
+    has been sent - the daemon may be running something long, like a
+    nodetool compact.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(connect_timeout)
+        sock.connect(socket_path)
+        sock.settimeout(None)
+        sock.sendall(json.dumps(payload).encode('utf-8') + b"\n")
+        response = _read_line(sock)
+    finally:
+        sock.close()
+    if not response:
+        raise DaemonUnavailable("Empty response from {0}".format(socket_path))
+    return json.loads(response.decode('utf-8'))
+
+
+def _read_line(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def _can_connect(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1)
+        sock.connect(socket_path)
+        return True
+    except (OSError, socket.error):
+        return False
+    finally:
+        sock.close()
+
+
+def bind_listener(socket_path):
+    """
+    Binds a unix socket only the current user can connect to.
+    """
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        listener.bind(socket_path)
+    except Exception:
+        listener.close()
+        raise
+    finally:
+        os.umask(old_umask)
+    listener.listen(16)
+    return listener
+
+
+def serve(listener, socket_path, handler, idle_timeout):
+    """
+    Answers requests on listener, one connection at a time, until no request
+    has arrived for idle_timeout seconds or handler.alive turns False.
+
+    handler must provide;
+        - handle(request) - returns the response dict for a request dict
+        - alive - False once the handler can't serve any further requests
+        - close() - releases whatever the handler holds on to
+    """
+    listener.settimeout(idle_timeout)
+    try:
+        while handler.alive:
+            try:
+                conn, addr = listener.accept()
+            except socket.timeout:
+                break
+            try:
+                conn.settimeout(None)
+                line = _read_line(conn)
+                if not line:
+                    continue
+                try:
+                    response = handler.handle(json.loads(line.decode('utf-8')))
+                except Exception as excep:
+                    response = {"error": "{0}: {1}".format(type(excep).__name__, excep)}
+                conn.sendall(json.dumps(response).encode('utf-8') + b"\n")
+            except (OSError, socket.error):
+                pass  # The client went away, nothing to answer
+            finally:
+                conn.close()
+    finally:
+        listener.close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+        handler.close()
+
+
+def _daemonize(socket_path, handler_factory, idle_timeout):
+    """
+    Double forks so the daemon outlives the Ansible module process and is
+    re-parented to init. The grandchild binds the socket before building
+    its handler - the handler may take a while to start (a JVM, a cluster
+    connection), and clients can already connect and queue in the meantime.
+    Never returns in the children.
+    """
+    pid = os.fork()
+    if pid != 0:
+        os.waitpid(pid, 0)
+        return
+    try:
+        os.setsid()
+        if os.fork() != 0:
+            os._exit(0)
+        # Ansible waits for the module's stdout/stderr to be closed - don't
+        # keep them open for the lifetime of the daemon.
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.chdir("/")
+        listener = bind_listener(socket_path)
+        serve(listener, socket_path, handler_factory(), idle_timeout)
+    except BaseException:
+        pass
+    finally:
+        os._exit(0)
+
+
+def ensure_daemon(socket_path, handler_factory, idle_timeout, startup_timeout=10):
+    """
+    Makes sure a daemon is listening on socket_path, starting one with
+    handler_factory() as its request handler if needed. A lock file
+    serialises concurrent tasks so that only one of them starts the daemon.
+    Raises DaemonUnavailable if the socket doesn't come up.
+    """
+    if _can_connect(socket_path):
+        return
+    with open(socket_path + ".lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            if _can_connect(socket_path):
+                return
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)  # Stale socket of a daemon that died
+            _daemonize(socket_path, handler_factory, idle_timeout)
+            deadline = time.time() + startup_timeout
+            while time.time() < deadline:
+                if _can_connect(socket_path):
+                    return
+                time.sleep(0.05)
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    raise DaemonUnavailable("Daemon on {0} did not start".format(socket_path))
@@ -1,6 +1,28 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
+import os
+import shlex
 import socket
+import traceback
+from multiprocessing.pool import ThreadPool
+
+from ansible_collections.community.cassandra.plugins.module_utils.jolokia import (
+    JolokiaClient,
+    JolokiaError,
+    jolokia_nodetool_cmd,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.local_daemon import DaemonUnavailable
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_session import (
+    NodeToolSession,
+    nodetool_daemon_cmd,
+    session_launcher,
+    split_nodetool_flags,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.version_cache import (
+    read_cached_version,
+    version_fingerprint,
+    write_cached_version,
+)
 
 
 def cassandra_version_at_least(version_string, minimum_version):
@@ -19,13 +41,102 @@ def cassandra_version_at_least(version_string, minimum_version):
     return parts(version_string) >= parts(minimum_version)
 
 
+class HostResult(Exception):
+    """
+    Carries the result of one host out of run_module, see HostModule.
+    """
+
+    def __init__(self, result, failed):
+        Exception.__init__(self, result.get('msg'))
+        self.result = result
+        self.failed = failed
+
+
+class HostModule(object):
+    """
+    Stands in for the AnsibleModule when a module runs against one of
+    several hosts, see nodetool_fan_out. params is a private copy with host
+    set to that host, and exit_json/fail_json raise HostResult instead of
+    ending the module process. Everything else is the real AnsibleModule.
+    """
+
+    def __init__(self, module, host):
+        self.module = module
+        self.params = dict(module.params)
+        self.params['host'] = host
+        self.params['hosts'] = None
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+    def exit_json(self, **kwargs):
+        raise HostResult(kwargs, False)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs['msg'] = msg
+        raise HostResult(kwargs, True)
+
+
+def _run_on_host(module, run_module, host):
+    try:
+        run_module(HostModule(module, host))
+    except HostResult as excep:
+        return host, excep.result, excep.failed
+    except Exception as excep:
+        return host, {'msg': str(excep), 'exception': traceback.format_exc()}, True
+    return host, {'msg': "Module ended without a result"}, True
+
+
+def nodetool_fan_out(module, run_module):
+    """
+    Calls run_module(module), which must end with module.exit_json or
+    module.fail_json. When the hosts option is set, run_module runs once per
+    host instead, up to max_parallel hosts at a time in a thread pool, and
+    the module returns the per host results under hosts. changed is True if
+    any host changed, and the module fails if any host failed.
+    """
+    hosts = module.params['hosts']
+    if not hosts:
+        run_module(module)
+        return
+    pool = ThreadPool(max(1, min(module.params['max_parallel'], len(hosts))))
+    try:
+        host_results = pool.map(lambda host: _run_on_host(module, run_module, host), hosts)
+    finally:
+        pool.close()
+        pool.join()
+    result = dict(changed=False, hosts={})
+    failed_hosts = []
+    for host, host_result, failed in host_results:
+        if failed:
+            host_result['failed'] = True
+            failed_hosts.append(host)
+        result['changed'] = result['changed'] or bool(host_result.get('changed'))
+        result['hosts'][host] = host_result
+    if failed_hosts:
+        msg = "Failed on {0} of {1} hosts: {2}".format(len(failed_hosts), len(hosts), ", ".join(failed_hosts))
+        module.fail_json(msg=msg, **result)
+    result['msg'] = "Succeeded on {0} hosts".format(len(hosts))
+    module.exit_json(**result)
+
+
 class NodeToolCmd(object):
     """
     This is a generic NodeToolCmd class for building nodetool commands
+
+    With batch=True and nodetool_backend session every command of the
+    object, including the version detection, runs in one nodetool session
+    JVM sharing a single JMX connection (see NodeToolSession) instead of a
+    nodetool fork each. Falls back to forking nodetool when the session
+    can't be started.
     """
 
-    def __init__(self, module):
+    def __init__(self, module, batch=False):
+        if module.params['hosts']:
+            module.fail_json(msg="This module does not support the hosts option")
         self.module = module
+        self.batch = batch and module.params['nodetool_backend'] == "session"
+        self.session = None
         self.host = module.params['host']
         self.port = module.params['port']
         self.password = module.params['password']
@@ -35,15 +146,49 @@ class NodeToolCmd(object):
         self.nodetool_flags = module.params['nodetool_flags']
         self.debug = module.params['debug']
         self.cassandra_version = module.params['cassandra_version']
+        self.nodetool_backend = module.params['nodetool_backend']
+        self.nodetool_daemon_idle_timeout = module.params['nodetool_daemon_idle_timeout']
+        self.jolokia_url = module.params['jolokia_url']
         if self.host is None:
             self.host = socket.getfqdn()
+        if self.jolokia_url is None:
+            self.jolokia_url = "http://{0}:8778/jolokia/".format(self.host)
+        self.version_cache_ttl = module.params['version_cache_ttl']
+        # provided, hit, miss or disabled - returned by modules as version_cache
+        self.version_cache = "provided"
         if self.cassandra_version is None:
-            (rc, out, err) = self.nodetool_cmd("version")
-            if rc == 0:
-                what_is_the_version = ".".join(out.split(': ')[1].split(".")[:2]).strip()
-                module.params['cassandra_version'] = what_is_the_version
+            module.params['cassandra_version'] = self.detect_cassandra_version()
+
+    def detect_cassandra_version(self):
+        '''
+        Returns the "MAJOR.MINOR" version of the Cassandra node, from the
+        node-local cache when possible, otherwise from nodetool version.
+        '''
+        fingerprint = None
+        if self.version_cache_ttl > 0:
+            nodetool_bin = self.module.get_bin_path("nodetool")
+            if self.nodetool_path:
+                nodetool_bin = os.path.join(self.nodetool_path, "nodetool")
+            fingerprint = version_fingerprint(nodetool_bin)
+            try:
+                version = read_cached_version(self.host, self.port, fingerprint)
+            except DaemonUnavailable:
+                fingerprint = None
             else:
-                module.fail_json(msg="Unable to determine Cassandra version: {0}".format(out), stderr=err)
+                if version is not None:
+                    self.version_cache = "hit"
+                    return version
+        self.version_cache = "disabled" if fingerprint is None else "miss"
+        (rc, out, err) = self.nodetool_cmd("version")
+        if rc != 0:
+            self.module.fail_json(msg="Unable to determine Cassandra version: {0}".format(out), stderr=err)
+        version = ".".join(out.split(': ')[1].split(".")[:2]).strip()
+        if fingerprint is not None:
+            try:
+                write_cached_version(self.host, self.port, version, self.version_cache_ttl, fingerprint)
+            except DaemonUnavailable:
+                pass
+        return version
 
     def execute_command(self, cmd):
         return self.module.run_command(cmd)
@@ -68,8 +213,102 @@ class NodeToolCmd(object):
         cmd += " {0}".format(sub_command)
         if self.debug:
             self.module.debug(cmd)
+        if self.nodetool_backend == "daemon":
+            try:
+                return self.daemon_cmd(sub_command)
+            except DaemonUnavailable as excep:
+                if self.debug:
+                    self.module.debug("nodetool daemon unavailable, forking nodetool: {0}".format(excep))
+        elif self.nodetool_backend == "jolokia":
+            try:
+                response = self.jolokia_cmd(sub_command)
+                if response is not None:
+                    return response
+            except JolokiaError as excep:
+                if self.debug:
+                    self.module.debug("Jolokia request failed, forking nodetool: {0}".format(excep))
+        if self.batch:
+            try:
+                return self.session_cmd(sub_command)
+            except DaemonUnavailable as excep:
+                self.batch = False
+                if self.debug:
+                    self.module.debug("nodetool session unavailable, forking nodetool: {0}".format(excep))
         return self.execute_command(cmd)
 
+    def jolokia_cmd(self, sub_command):
+        '''
+        Runs sub_command as a direct MBean read or write through the Jolokia
+        agent at jolokia_url. Returns None for sub-commands without an MBean
+        equivalent. Raises JolokiaError when the agent can't be used.
+        '''
+        client = JolokiaClient(self.jolokia_url, self.username, self.password)
+        return jolokia_nodetool_cmd(client, sub_command)
+
+    def nodetool_args(self, sub_command):
+        '''
+        The argument list equivalent of the command line built by
+        nodetool_cmd, minus the nodetool executable and JVM flags.
+        '''
+        jvm_flags, args = split_nodetool_flags(self.nodetool_flags)
+        args += ["-h", self.host, "-p", str(self.port)]
+        if self.username is not None:
+            args += ["-u", self.username]
+            if self.password_file is not None:
+                args += ["-pwf", self.password_file]
+            elif self.password is not None:
+                args += ["-pw", self.password]
+        return args + shlex.split(sub_command)
+
+    def session_launcher(self):
+        '''
+        Returns the command starting a nodetool session JVM. Raises
+        DaemonUnavailable when there is no suitable JVM on the node.
+        '''
+        launcher = session_launcher(self.nodetool_path,
+                                    self.nodetool_flags,
+                                    self.module.get_bin_path("nodetool"))
+        if launcher is None:
+            raise DaemonUnavailable("No nodetool session launcher available")
+        return launcher
+
+    def session_cmd(self, sub_command):
+        '''
+        Runs sub_command in the nodetool session JVM of this object,
+        starting it on first use. The JVM exits with the module process.
+        Raises DaemonUnavailable when the session can't be used.
+        '''
+        if self.session is None or not self.session.alive:
+            session = NodeToolSession(self.session_launcher())
+            session.start()
+            self.session = session
+        try:
+            return self.session.run(self.nodetool_args(sub_command))
+        except ValueError as excep:
+            raise DaemonUnavailable(str(excep))
+
+    def close(self):
+        '''
+        Stops the nodetool session JVM, if any.
+        '''
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def daemon_cmd(self, sub_command):
+        '''
+        Sends sub_command to the long-lived nodetool daemon for this
+        host, port and set of credentials, starting it if necessary.
+        Raises DaemonUnavailable when the daemon can't be used, i.e. there
+        is no suitable JVM on the node.
+        '''
+        launcher = self.session_launcher()
+        key = [self.host, self.port, self.username, self.password, self.password_file]
+        return nodetool_daemon_cmd(launcher,
+                                   key,
+                                   self.nodetool_args(sub_command),
+                                   self.nodetool_daemon_idle_timeout)
+
 
 class NodeToolCommandSimple(NodeToolCmd):
 
@@ -202,8 +441,8 @@ class NodeToolGetSetCommand(NodeToolCmd):
         - set_cmd
     """
 
-    def __init__(self, module, get_cmd, set_cmd):
-        NodeToolCmd.__init__(self, module)
+    def __init__(self, module, get_cmd, set_cmd, batch=False):
+        NodeToolCmd.__init__(self, module, batch)
         self.get_cmd = get_cmd
         self.set_cmd = set_cmd
 
@@ -214,6 +453,33 @@ class NodeToolGetSetCommand(NodeToolCmd):
         return self.nodetool_cmd(self.set_cmd)
 
 
+class NodeToolBatch(NodeToolCmd):
+
+    """
+    Inherits from the NodeToolCmd class. Queues nodetool sub-commands and
+    runs them one after another, in a single nodetool session with
+    nodetool_backend session. Adds the following methods;
+
+        - add
+        - run
+    """
+
+    def __init__(self, module):
+        NodeToolCmd.__init__(self, module, batch=True)
+        self.sub_commands = []
+
+    def add(self, sub_command):
+        self.sub_commands.append(sub_command)
+
+    def run(self):
+        '''
+        Runs and empties the queue. Returns a list with the (rc, stdout,
+        stderr) of every queued sub-command, in the order they were added.
+        '''
+        sub_commands, self.sub_commands = self.sub_commands, []
+        return [self.nodetool_cmd(sub_command) for sub_command in sub_commands]
+
+
 class NodeToolCommandKeyspaceTableNumJobs(NodeToolCmd):
 
     """
@@ -0,0 +1,607 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import io
+import re
+
+from ansible.module_utils.six import text_type
+
+# Parsers for the text output of nodetool. Patterns are compiled once at
+# import time and every parser scans its input line by line, in a single
+# pass, so the cost stays linear in the size of the cluster.
+
+_INFO_LINE_RE = re.compile(r'^([^:]+?)\s*:\s?(.*)$')
+_CACHE_ENTRIES_RE = re.compile(r'entries (\d+)')
+# Second letter is the node state (N/L/J/M upstream, plus DSE's S for
+# a drained-but-still-running node). Match any state letter so unknown
+# or DSE-specific codes aren't silently dropped from the parsed output.
+_STATUS_NODE_RE = re.compile(r'^[UD][A-Z]\s+')
+_RING_NODE_RE = re.compile(r'^(\S+)\s+(\S+)\s+(Up|Down|\?)\s+(\S+)\s+(.+?)\s+(\S+%|\?)\s+(-?\d+)\s*$')
+_SCHEMA_VERSION_RE = re.compile(
+    r'^\s*(\{?[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\}?|UNREACHABLE): \[(.*)\]\s*$')
+_KEY_VALUE_RE = re.compile(r'^\s*([^:]+?)\s*:\s*(.*?)\s*$')
+_PENDING_TASKS_RE = re.compile(r'^pending tasks: (\d+)')
+_PENDING_TABLE_RE = re.compile(r'^- (\S+): (\d+)\s*$')
+_REMAINING_TIME_RE = re.compile(r'^Active compaction remaining time\s*:\s*(\S+)')
+_TPSTATS_POOL_RE = re.compile(r'^(\S+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*$')
+_TPSTATS_DROPPED_RE = re.compile(r'^(\S+)\s+(\d+)(?:\s|$)')
+_TABLESTATS_TABLE_RE = re.compile(r'^\s*Table(?: \(index\))?: (.+?)\s*$')
+_LAST_INT_RE = re.compile(r'(?<!\S)(\d+)\s*\Z')
+_CURRENT_VALUE_RE = re.compile(r'^Current [^:]+: (\S+)', re.MULTILINE)
+_THROUGHPUT_RE = re.compile(r'(\d+(?:\.\d+)?) (?:Mb|MB|MiB)/s')
+
+# nodetool's status columns are fixed-width, padded to the widest value seen
+# in each column (Cassandra's own TableBuilder.printTo: every cell, even an
+# empty one, is left-justified to the column's max width) -- so a column's
+# start offset in the header line applies identically to every data line
+# below it. Column order/labels vary by cluster type: legacy "token-per-node"
+# clusters print Owns/Host ID before Token, vnodes clusters print
+# Tokens/Owns/Host ID in that order (see Cassandra's Status.java,
+# addNodesHeader()) -- search for known labels instead of assuming one order.
+_NODE_STATUS_COLUMN_LABELS = ["Address", "Load", "Tokens", "Owns (effective)",
+                              "Owns", "Host ID", "Token", "Rack"]
+
+# compactionstats columns, in the order nodetool prints them
+_COMPACTION_COLUMNS = [("id", "id"), ("compaction type", "compaction_type"), ("keyspace", "keyspace"),
+                       ("table", "table"), ("completed", "completed"), ("total", "total"),
+                       ("unit", "unit"), ("progress", "progress")]
+
+
+def _number(value):
+    '''
+    Returns value as an int or a float when it is one, otherwise unchanged.
+    '''
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return value if number != number else number  # Keep NaN as a string
+
+
+def _lines(stdout):
+    # Iterates over the lines of stdout without building a list of them.
+    # stdout may also be a list of strings, concatenated as they are.
+    if not isinstance(stdout, (str, text_type)):
+        stdout = ''.join(stdout)
+    for line in io.StringIO(text_type(stdout)):
+        yield line.rstrip("\r\n")
+
+
+def column_slicer(offsets):
+    '''
+    Compiles the start offsets of fixed-width columns, as found in a header
+    line, into a (names, slices) tuple for column_values(). offsets is a
+    dict or a list of (name, start) pairs.
+    '''
+    if isinstance(offsets, dict):
+        offsets = offsets.items()
+    offsets = sorted(offsets, key=lambda kv: kv[1])
+    ends = [start for name, start in offsets[1:]] + [None]
+    return (tuple(name for name, start in offsets),
+            tuple(slice(start, end) for (name, start), end in zip(offsets, ends)))
+
+
+def column_values(line, slicer):
+    '''
+    Returns the stripped values of a fixed-width line as a dict, using a
+    slicer from column_slicer().
+    '''
+    names, slices = slicer
+    return dict(zip(names, [line[s].strip() for s in slices]))
+
+
+def parse_info(stdout):
+    '''
+    Parses nodetool info into a dict keyed by the labels nodetool prints, i.e.
+        {
+            "ID": "f4ee490c-df8e-4a8d-9236-320903697fbf",
+            "Gossip active": "true",
+            "Load": "145.17 KiB",
+            "Key Cache": "entries 10, size 896 bytes, capacity 24 MiB, ...",
+            ...
+        }
+    Labels appearing more than once, like Token with -T, map to a list.
+    '''
+    info = {}
+    for line in stdout.splitlines():
+        match = _INFO_LINE_RE.match(line)
+        if match is None:
+            continue
+        label, value = match.group(1), match.group(2).strip()
+        if label in info:
+            if not isinstance(info[label], list):
+                info[label] = [info[label]]
+            info[label].append(value)
+        else:
+            info[label] = value
+    return info
+
+
+def info_cache_entries(info):
+    '''
+    Returns the number of entries of the key, row and counter caches from
+    parsed nodetool info output, i.e.
+        {
+            "key_cache_entries": 10,
+            "row_cache_entries": 0,
+            "counter_cache_entries": 0
+        }
+    A cache missing from the output is None.
+    '''
+    entries = {}
+    for label, key in (("Key Cache", "key_cache_entries"),
+                       ("Row Cache", "row_cache_entries"),
+                       ("Counter Cache", "counter_cache_entries")):
+        match = _CACHE_ENTRIES_RE.search(info.get(label, ""))
+        entries[key] = int(match.group(1)) if match else None
+    return entries
+
+
+def node_status_column_offsets(header_line):
+    found = {}
+    for label in _NODE_STATUS_COLUMN_LABELS:
+        idx = header_line.find(label)
+        if idx == -1:
+            continue
+        # "Owns"/"Token" are substrings of "Owns (effective)"/"Tokens" --
+        # don't let the short label re-claim a spot the long one already has.
+        if label == "Owns" and found.get("Owns (effective)") == idx:
+            continue
+        if label == "Token" and found.get("Tokens") == idx:
+            continue
+        found[label] = idx
+    if "Address" not in found or "Load" not in found or "Host ID" not in found or "Rack" not in found:
+        return None
+    return {
+        "address": found["Address"],
+        "load": found["Load"],
+        "owns": found.get("Owns (effective)", found.get("Owns")),
+        "tokens": found.get("Tokens", found.get("Token")),
+        "host_id": found["Host ID"],
+        "rack": found["Rack"],
+    }
+
+
+def node_status_columns(line, offsets):
+    return column_values(line, column_slicer(offsets))
+
+
+# Header line -> slicer, or None for unrecognised headers. Status headers
+# only change with the width of the widest value of a column, so polling
+# the same cluster keeps hitting the same few entries.
+_NODE_STATUS_SLICERS = {}
+_NODE_STATUS_SLICERS_MAX = 64
+
+
+def node_status_slicer(header_line):
+    '''
+    Returns the column_slicer() for the node lines below a nodetool status
+    header line, or None if the header isn't recognised.
+    '''
+    try:
+        return _NODE_STATUS_SLICERS[header_line]
+    except KeyError:
+        pass
+    offsets = node_status_column_offsets(header_line)
+    slicer = None
+    if offsets is not None:
+        # "tokens"/"owns" may be missing - slice(None, 0) yields ""
+        slicer = column_slicer([(k, v) for k, v in offsets.items() if v is not None])
+        missing = tuple(k for k, v in offsets.items() if v is None)
+        slicer = (slicer[0] + missing, slicer[1] + (slice(0, 0),) * len(missing))
+    if len(_NODE_STATUS_SLICERS) >= _NODE_STATUS_SLICERS_MAX:
+        _NODE_STATUS_SLICERS.clear()
+    _NODE_STATUS_SLICERS[header_line] = slicer
+    return slicer
+
+
+def cluster_up_down(stdout):
+    '''
+    Extract the Data Centres from the nodetool status stdout
+    Returns a dict in the following format...
+        {
+            "datacenter1":
+                "up": [ "1.1.1.1",
+                        "1.1.1.2",
+                        "1.1.1.3",
+                        "1.1.1.4",
+                        "1.1.1.5" ],
+                "down": [ "1.1.1.6" ],
+                "nodes": [ { "address": "1.1.1.1", "status": "U", "state": "N", ... }, ... ]
+            "datacenter2":
+                "up": [ "1.1.2.1",
+                        "1.1.2.2",
+                        "1.1.2.3",
+                        "1.1.2.4",
+                        "1.1.2.5",
+                        "1.1.2.6" ],
+                "down": [],
+                "nodes": [ ... ]
+        }
+    Lines are sliced into columns with the slicer compiled from the header
+    of their datacenter, one line at a time.
+    '''
+    cluster_up_down = {}
+    names = slices = None
+    node_match = _STATUS_NODE_RE.match
+
+    for line in _lines(stdout):
+        if line.startswith("Datacenter:"):
+            data_center = line.split(":", 1)[1].strip()
+            dc = cluster_up_down[data_center] = {
+                "up": [],
+                "down": [],
+                "nodes": []
+            }
+            up, down, nodes = dc["up"], dc["down"], dc["nodes"]
+            names = slices = None  # re-derive for this datacenter's own header
+            continue
+
+        if line.startswith("--") and "Address" in line:
+            slicer = node_status_slicer(line)
+            names, slices = slicer if slicer is not None else (None, None)
+            continue
+
+        if names is None or not node_match(line):
+            continue
+
+        node = dict(zip(names, [line[s].strip() for s in slices]))
+        node["status"] = status = line[0]
+        node["state"] = line[1]
+        if status == "U":
+            up.append(node["address"])
+        else:
+            down.append(node["address"])
+        nodes.append(node)
+    return cluster_up_down
+
+
+def find_nodes(stdout, targets):
+    '''
+    Returns {target: node} for the nodes of nodetool status stdout whose
+    address or host id is one of targets, node being a dict like those of
+    cluster_up_down() plus the name of its "datacenter". Targets missing
+    from the output are missing from the result.
+    Only the address and host id of the other node lines are looked at,
+    and scanning stops as soon as every target has been found.
+    '''
+    wanted = set(targets)
+    found = {}
+    data_center = names = slices = None
+    node_match = _STATUS_NODE_RE.match
+
+    for line in _lines(stdout):
+        if line.startswith("Datacenter:"):
+            data_center = line.split(":", 1)[1].strip()
+            names = slices = None
+            continue
+
+        if line.startswith("--") and "Address" in line:
+            slicer = node_status_slicer(line)
+            names, slices = slicer if slicer is not None else (None, None)
+            if names is not None:
+                address = slices[names.index("address")]
+                host_id = slices[names.index("host_id")]
+            continue
+
+        if names is None or not node_match(line):
+            continue
+
+        keys = [key for key in (line[address].strip(), line[host_id].strip()) if key in wanted]
+        if not keys:
+            continue
+        node = dict(zip(names, [line[s].strip() for s in slices]))
+        node["status"] = line[0]
+        node["state"] = line[1]
+        node["datacenter"] = data_center
+        for key in keys:
+            found[key] = node
+            wanted.discard(key)
+        if not wanted:
+            break
+    return found
+
+
+def parse_ring(stdout):
+    '''
+    Parses nodetool ring into a list of token entries, one per line, i.e.
+        [
+            {
+                "datacenter": "datacenter1",
+                "address": "127.0.0.1",
+                "rack": "rack1",
+                "status": "Up",
+                "state": "Normal",
+                "load": "108.7 KiB",
+                "owns": "100.00%",
+                "token": "-9148356270196374298"
+            },
+            ...
+        ]
+    '''
+    ring = []
+    data_center = None
+    for line in stdout.splitlines():
+        if line.startswith("Datacenter:"):
+            data_center = line.split(":", 1)[1].strip()
+            continue
+        match = _RING_NODE_RE.match(line)
+        if match is None:
+            continue
+        address, rack, status, state, load, owns, token = match.groups()
+        ring.append({
+            "datacenter": data_center,
+            "address": address,
+            "rack": rack,
+            "status": status,
+            "state": state,
+            "load": load,
+            "owns": owns,
+            "token": token,
+        })
+    return ring
+
+
+def parse_describecluster(stdout):
+    '''
+    Parses nodetool describecluster, i.e.
+        {
+            "name": "Test Cluster",
+            "snitch": "org.apache.cassandra.locator.SimpleSnitch",
+            "dynamic_endpoint_snitch": "enabled",
+            "partitioner": "org.apache.cassandra.dht.Murmur3Partitioner",
+            "schema_versions": {
+                "d4f18346-f81f-3786-aed4-40e03558b299": ["127.0.0.1"]
+            },
+            "unreachable": []
+        }
+    '''
+    cluster = {
+        "name": None,
+        "snitch": None,
+        "dynamic_endpoint_snitch": None,
+        "partitioner": None,
+        "schema_versions": {},
+        "unreachable": [],
+    }
+    labels = {
+        "Name": "name",
+        "Snitch": "snitch",
+        "DynamicEndPointSnitch": "dynamic_endpoint_snitch",
+        "Partitioner": "partitioner",
+    }
+    for line in stdout.splitlines():
+        match = _SCHEMA_VERSION_RE.match(line)
+        if match is not None:
+            version, hosts = match.groups()
+            hosts = [h for h in hosts.split(", ") if h]
+            if version == "UNREACHABLE":
+                cluster["unreachable"].extend(hosts)
+            else:
+                cluster["schema_versions"][version] = hosts
+            continue
+        match = _KEY_VALUE_RE.match(line)
+        if match is not None and match.group(1) in labels and cluster[labels[match.group(1)]] is None:
+            cluster[labels[match.group(1)]] = match.group(2)
+    return cluster
+
+
+def parse_compactionstats(stdout):
+    '''
+    Parses nodetool compactionstats, i.e.
+        {
+            "pending_tasks": 2,
+            "pending": {"keyspace1.standard1": 2},
+            "compactions": [
+                {
+                    "id": "e2bff090-6d8a-11ec-a6a3-2f5d5e9f7e5d",
+                    "compaction_type": "Compaction",
+                    "keyspace": "keyspace1",
+                    "table": "standard1",
+                    "completed": 15611862,
+                    "total": 64806010,
+                    "unit": "bytes",
+                    "progress": "24.09%"
+                }
+            ],
+            "remaining_time": "0h00m04s"
+        }
+    '''
+    stats = {
+        "pending_tasks": None,
+        "pending": {},
+        "compactions": [],
+        "remaining_time": None,
+    }
+    slicer = None
+    for line in stdout.splitlines():
+        if not line.strip():
+            continue
+        match = _PENDING_TASKS_RE.match(line)
+        if match is not None:
+            stats["pending_tasks"] = int(match.group(1))
+            continue
+        match = _PENDING_TABLE_RE.match(line)
+        if match is not None:
+            stats["pending"][match.group(1)] = int(match.group(2))
+            continue
+        match = _REMAINING_TIME_RE.match(line)
+        if match is not None:
+            stats["remaining_time"] = match.group(1)
+            continue
+        if line.startswith("id ") and "compaction type" in line:
+            offsets = []
+            position = 0
+            for label, name in _COMPACTION_COLUMNS:
+                position = line.find(label, position)
+                if position == -1:
+                    break
+                offsets.append((name, position))
+                position += len(label)
+            slicer = column_slicer(offsets) if position != -1 else None
+            continue
+        if slicer is not None:
+            compaction = column_values(line, slicer)
+            compaction["completed"] = _number(compaction["completed"])
+            compaction["total"] = _number(compaction["total"])
+            stats["compactions"].append(compaction)
+    return stats
+
+
+def parse_tpstats(stdout):
+    '''
+    Parses nodetool tpstats, i.e.
+        {
+            "thread_pools": {
+                "ReadStage": {
+                    "active": 0,
+                    "pending": 0,
+                    "completed": 3,
+                    "blocked": 0,
+                    "all_time_blocked": 0
+                },
+                ...
+            },
+            "dropped": {"READ": 0, "MUTATION": 0, ...}
+        }
+    '''
+    stats = {"thread_pools": {}, "dropped": {}}
+    section = None
+    for line in stdout.splitlines():
+        if line.startswith("Pool Name"):
+            section = "thread_pools"
+            continue
+        if line.startswith("Message type"):
+            section = "dropped"
+            continue
+        if section == "thread_pools":
+            match = _TPSTATS_POOL_RE.match(line)
+            if match is not None:
+                name, active, pending, completed, blocked, all_time_blocked = match.groups()
+                stats["thread_pools"][name] = {
+                    "active": int(active),
+                    "pending": int(pending),
+                    "completed": int(completed),
+                    "blocked": int(blocked),
+                    "all_time_blocked": int(all_time_blocked),
+                }
+        elif section == "dropped":
+            match = _TPSTATS_DROPPED_RE.match(line)
+            if match is not None:
+                stats["dropped"][match.group(1)] = int(match.group(2))
+    return stats
+
+
+def parse_tablestats(stdout):
+    '''
+    Parses nodetool tablestats, i.e.
+        {
+            "system": {
+                "stats": {"Read Count": 0, "Read Latency": "NaN ms", ...},
+                "tables": {
+                    "local": {"SSTable count": 1, "Space used (live)": 10735, ...},
+                    ...
+                }
+            },
+            ...
+        }
+    Values that are plain numbers are returned as such, everything else as
+    printed by nodetool.
+    '''
+    keyspaces = {}
+    keyspace = None
+    table = None
+    for line in stdout.splitlines():
+        match = _TABLESTATS_TABLE_RE.match(line)
+        if match is not None and keyspace is not None:
+            table = keyspace["tables"].setdefault(match.group(1), {})
+            continue
+        match = _KEY_VALUE_RE.match(line)
+        if match is None:
+            continue
+        label, value = match.groups()
+        if label == "Keyspace":
+            keyspace = keyspaces.setdefault(value, {"stats": {}, "tables": {}})
+            table = None
+        elif table is not None:
+            table[label] = _number(value)
+        elif keyspace is not None:
+            keyspace["stats"][label] = _number(value)
+    return keyspaces
+
+
+def parse_last_int(stdout):
+    '''
+    Returns the integer the output ends with, like the MaximumPoolSize
+    printed last by getconcurrency, or None.
+    '''
+    match = _LAST_INT_RE.search(stdout)
+    return int(match.group(1)) if match else None
+
+
+def parse_current_value(stdout):
+    '''
+    Returns the value of get* commands printing "Current <what>: <value>
+    [unit]", i.e. "5000" for "Current timeout for type read: 5000 ms", or
+    None.
+    '''
+    match = _CURRENT_VALUE_RE.search(stdout)
+    return match.group(1) if match else None
+
+
+def parse_throughput(stdout):
+    '''
+    Returns the throughput printed by get*streamthroughput as a float, or
+    None.
+    '''
+    match = _THROUGHPUT_RE.search(stdout)
+    return float(match.group(1)) if match else None
+
+
+def parse_getfullquerylog(nodetool_output):
+    """
+    This function passed the output from nodetool getfullquerylog and
+    returns it in a Python dictionary.
+    i.e.
+    enabled             false
+    log_dir
+    archive_command
+    roll_cycle          HOURLY
+    block               true
+    max_log_size        17179869184
+    max_queue_weight    268435456
+    max_archive_retries 10
+
+    Is transformed to...
+
+    { 'max_queue_weight': 268435456,
+      'max_log_size': 17179869184,
+      'enabled': False,
+      'roll_cycle': 'HOURLY',
+      'archive_command': None,
+      'log_dir': None,
+      'max_archive_retries': 10,
+      'block': True}
+
+    """
+    bool_list = ['enabled', 'block']
+    int_list = ['max_log_size', 'max_queue_weight', 'max_archive_retries']
+    d = dict()
+
+    for line in nodetool_output.splitlines():
+        config_pair = line.split(None, 1)
+        if not config_pair:
+            continue
+        key = config_pair[0]
+        if len(config_pair) == 1:
+            d[key] = None
+        elif key in bool_list:
+            d[key] = config_pair[1].strip().lower() == "true"
+        elif key in int_list:
+            d[key] = int(config_pair[1])
+        else:
+            d[key] = config_pair[1].strip()
+    return d
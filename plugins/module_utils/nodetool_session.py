@@ -0,0 +1,365 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import glob
+import hashlib
+import os
+import select
+import shlex
+import subprocess
+import time
+
+from ansible_collections.community.cassandra.plugins.module_utils.local_daemon import (
+    DaemonUnavailable,
+    daemon_socket_path,
+    ensure_daemon,
+    runtime_dir,
+    send_request,
+)
+
+# A small Java program that runs nodetool commands inside one long-lived JVM.
+# It reads one command per line from stdin (arguments separated by NUL) and
+# answers each with a "<rc> <stdout bytes> <stderr bytes>" header followed by
+# the raw stdout and stderr. JMX connections are cached per host, port and
+# credentials and health-checked before re-use, so only the first command
+# pays for the JVM startup and the JMX handshake.
+#
+# Requires the NodeTool(INodeProbeFactory, Output) entry point that Cassandra
+# 4.0 introduced and a JDK that can launch single-file source programs
+# (Java 11+). Anything else fails at startup and callers fall back to forking
+# nodetool.
+SESSION_CLASS = "AnsibleNodeToolSession"
+SESSION_SOURCE = r'''
+import java.io.*;
+import java.nio.charset.StandardCharsets;
+import java.util.HashMap;
+import java.util.Map;
+import org.apache.cassandra.tools.INodeProbeFactory;
+import org.apache.cassandra.tools.NodeProbe;
+import org.apache.cassandra.tools.NodeTool;
+import org.apache.cassandra.tools.Output;
+
+public class AnsibleNodeToolSession
+{
+    static final class KeptNodeProbe extends NodeProbe
+    {
+        KeptNodeProbe(String host, int port) throws IOException { super(host, port); }
+        KeptNodeProbe(String host, int port, String username, String password) throws IOException { super(host, port, username, password); }
+        @Override public void close() { }
+        void reallyClose() { try { super.close(); } catch (Exception e) { } }
+    }
+
+    static final class CachingNodeProbeFactory implements INodeProbeFactory
+    {
+        private final Map<String, KeptNodeProbe> probes = new HashMap<>();
+
+        public NodeProbe create(String host, int port) throws IOException
+        {
+            return create(host, port, null, null);
+        }
+
+        public NodeProbe create(String host, int port, String username, String password) throws IOException
+        {
+            String key = host + "\u0000" + port + "\u0000" + username + "\u0000" + password;
+            KeptNodeProbe probe = probes.remove(key);
+            if (probe != null)
+            {
+                try { probe.getReleaseVersion(); }
+                catch (RuntimeException e) { probe.reallyClose(); probe = null; }
+            }
+            if (probe == null)
+                probe = username == null ? new KeptNodeProbe(host, port) : new KeptNodeProbe(host, port, username, password);
+            probes.put(key, probe);
+            return probe;
+        }
+    }
+
+    public static void main(String[] argv) throws IOException
+    {
+        OutputStream protocol = new FileOutputStream(FileDescriptor.out);
+        PrintStream idleErr = System.err;
+        // Nothing but protocol frames may reach fd 1.
+        System.setOut(idleErr);
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        CachingNodeProbeFactory factory = new CachingNodeProbeFactory();
+        Class<?> preload = NodeTool.class;
+        protocol.write("READY\n".getBytes(StandardCharsets.UTF_8));
+        protocol.flush();
+        String line;
+        while ((line = in.readLine()) != null)
+        {
+            String[] args = line.isEmpty() ? new String[0] : line.split("\u0000", -1);
+            ByteArrayOutputStream out = new ByteArrayOutputStream();
+            ByteArrayOutputStream err = new ByteArrayOutputStream();
+            PrintStream outStream = new PrintStream(out, true, "UTF-8");
+            PrintStream errStream = new PrintStream(err, true, "UTF-8");
+            int rc;
+            System.setOut(outStream);
+            System.setErr(errStream);
+            try
+            {
+                rc = new NodeTool(factory, new Output(outStream, errStream)).execute(args);
+            }
+            catch (Throwable t)
+            {
+                t.printStackTrace(errStream);
+                rc = 2;
+            }
+            finally
+            {
+                System.setOut(idleErr);
+                System.setErr(idleErr);
+            }
+            outStream.flush();
+            errStream.flush();
+            byte[] o = out.toByteArray();
+            byte[] e = err.toByteArray();
+            protocol.write((rc + " " + o.length + " " + e.length + "\n").getBytes(StandardCharsets.UTF_8));
+            protocol.write(o);
+            protocol.write(e);
+            protocol.flush();
+        }
+        // JMX leaves non-daemon threads behind, exit explicitly once stdin
+        // is closed, whether by close() or by the death of the parent.
+        System.exit(0);
+    }
+}
+'''
+
+# How long a launcher that failed to start is remembered as unusable
+SESSION_UNAVAILABLE_TTL = 3600
+
+
+def split_nodetool_flags(nodetool_flags):
+    """
+    nodetool_flags mixes JVM system properties (-D...), which the nodetool
+    wrapper script hands to java, with genuine nodetool options. Returns
+    them as a tuple of two lists, (jvm_flags, nodetool_args).
+    """
+    jvm_flags = []
+    nodetool_args = []
+    for flag in shlex.split(nodetool_flags or ""):
+        if flag.startswith("-D"):
+            jvm_flags.append(flag)
+        else:
+            nodetool_args.append(flag)
+    return jvm_flags, nodetool_args
+
+
+def _is_cassandra_home(path):
+    return bool(glob.glob(os.path.join(path, "apache-cassandra-*.jar"))
+                or glob.glob(os.path.join(path, "lib", "apache-cassandra-*.jar")))
+
+
+def cassandra_home(nodetool_path, nodetool_bin=None):
+    """
+    Locates the directory containing the Cassandra jars, trying the parent
+    of nodetool_path (tarball installs), the parent of the nodetool found
+    on the PATH, $CASSANDRA_HOME and finally /usr/share/cassandra, where
+    the deb and rpm packages put them.
+    """
+    candidates = []
+    for bin_path in (nodetool_path, os.path.dirname(nodetool_bin or "")):
+        if bin_path:
+            candidates.append(os.path.dirname(os.path.abspath(bin_path.rstrip("/"))))
+    if os.environ.get("CASSANDRA_HOME"):
+        candidates.append(os.environ["CASSANDRA_HOME"])
+    candidates.append("/usr/share/cassandra")
+    for candidate in candidates:
+        if _is_cassandra_home(candidate):
+            return candidate
+    return None
+
+
+def java_executable():
+    java_home = os.environ.get("JAVA_HOME")
+    if java_home and os.access(os.path.join(java_home, "bin", "java"), os.X_OK):
+        return os.path.join(java_home, "bin", "java")
+    for path in os.environ.get("PATH", "").split(os.pathsep):
+        candidate = os.path.join(path, "java")
+        if os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+def _launcher_marker(launcher):
+    digest = hashlib.sha256("\0".join(launcher).encode('utf-8')).hexdigest()[:24]
+    return os.path.join(runtime_dir(), "nodetool-session-{0}.unavailable".format(digest))
+
+
+def session_launcher(nodetool_path, nodetool_flags, nodetool_bin=None):
+    """
+    Returns the command starting a nodetool session JVM, or None when there
+    is no java, no Cassandra installation to take the classpath from, or
+    the very same command failed to start recently.
+    """
+    home = cassandra_home(nodetool_path, nodetool_bin)
+    java = java_executable()
+    if home is None or java is None:
+        return None
+    classpath = []
+    conf_dirs = [d for d in (os.path.join(home, "conf"), "/etc/cassandra") if os.path.isdir(d)]
+    classpath.extend(conf_dirs[:1])
+    classpath.append(os.path.join(home, "*"))
+    classpath.append(os.path.join(home, "lib", "*"))
+    jvm_flags, nodetool_args = split_nodetool_flags(nodetool_flags)
+    if conf_dirs and os.path.exists(os.path.join(conf_dirs[0], "logback-tools.xml")):
+        jvm_flags.append("-Dlogback.configurationFile=logback-tools.xml")
+    try:
+        source = os.path.join(runtime_dir(), SESSION_CLASS + ".java")
+        current = None
+        if os.path.exists(source):
+            with open(source) as f:
+                current = f.read()
+        if current != SESSION_SOURCE:
+            with open(source + ".tmp", "w") as f:
+                f.write(SESSION_SOURCE)
+            os.rename(source + ".tmp", source)
+        launcher = [java] + jvm_flags + ["-cp", os.pathsep.join(classpath), source]
+        marker = _launcher_marker(launcher)
+    except (OSError, IOError, DaemonUnavailable):
+        return None
+    if os.path.exists(marker) and time.time() - os.path.getmtime(marker) < SESSION_UNAVAILABLE_TTL:
+        return None
+    return launcher
+
+
+class NodeToolSession(object):
+    """
+    A nodetool session JVM, started from a launcher command (see
+    session_launcher), that runs nodetool argument lists one after another.
+    """
+
+    def __init__(self, launcher, startup_timeout=60):
+        self.launcher = launcher
+        self.startup_timeout = startup_timeout
+        self.process = None
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """
+        Starts the JVM and waits for it to report it is ready. Raises
+        DaemonUnavailable, and remembers the launcher as unusable for a
+        while, if it doesn't.
+        """
+        log_path = os.path.join(runtime_dir(), "nodetool-session.log")
+        with open(log_path, "ab") as log:
+            self.process = subprocess.Popen(self.launcher,
+                                            stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE,
+                                            stderr=log,
+                                            bufsize=0,
+                                            close_fds=True)
+        deadline = time.time() + self.startup_timeout
+        while True:
+            remaining = deadline - time.time()
+            ready = remaining > 0 and select.select([self.process.stdout], [], [], remaining)[0]
+            line = self.process.stdout.readline() if ready else b""
+            if line.strip() == b"READY":
+                return
+            if not line:
+                self.close()
+                try:
+                    with open(_launcher_marker(self.launcher), "w"):
+                        pass
+                except (OSError, IOError):
+                    pass
+                raise DaemonUnavailable("nodetool session failed to start, see {0}".format(log_path))
+
+    def run(self, args):
+        """
+        Runs one nodetool argument list, i.e. ["-h", "127.0.0.1", "-p",
+        "7199", "status"], and returns (rc, stdout, stderr) like
+        AnsibleModule.run_command does.
+        """
+        for arg in args:
+            if "\0" in arg or "\n" in arg:
+                raise ValueError("nodetool arguments can't contain NUL or newline characters")
+        try:
+            self.process.stdin.write("\0".join(args).encode('utf-8') + b"\n")
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().split()
+            rc, out_len, err_len = [int(h) for h in header]
+            out = self._read_exactly(out_len)
+            err = self._read_exactly(err_len)
+        except (OSError, IOError, ValueError):
+            self.close()
+            raise DaemonUnavailable("nodetool session terminated unexpectedly")
+        return rc, out.decode('utf-8', 'replace'), err.decode('utf-8', 'replace')
+
+    def _read_exactly(self, length):
+        data = b""
+        while len(data) < length:
+            chunk = self.process.stdout.read(length - len(data))
+            if not chunk:
+                raise IOError("Short read from nodetool session")
+            data += chunk
+        return data
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except (OSError, IOError):
+            pass
+        for i in range(50):
+            if self.process.poll() is not None:
+                break
+            time.sleep(0.1)
+        else:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class NodeToolDaemonHandler(object):
+    """
+    Request handler of the nodetool daemon. Requests look like
+    {"args": [...]} and are answered with {"rc": .., "out": .., "err": ..},
+    or {"error": ..} if the session JVM isn't usable.
+    """
+
+    def __init__(self, launcher):
+        self.session = NodeToolSession(launcher)
+        self.error = None
+        try:
+            self.session.start()
+        except DaemonUnavailable as excep:
+            self.error = str(excep)
+
+    @property
+    def alive(self):
+        return self.error is None and self.session.alive
+
+    def handle(self, request):
+        if self.error is not None:
+            return {"error": self.error}
+        try:
+            rc, out, err = self.session.run(request["args"])
+        except DaemonUnavailable as excep:
+            self.error = str(excep)
+            return {"error": self.error}
+        return {"rc": rc, "out": out, "err": err}
+
+    def close(self):
+        self.session.close()
+
+
+def nodetool_daemon_cmd(launcher, key, args, idle_timeout):
+    """
+    Runs a nodetool argument list through the daemon serving key, starting
+    the daemon first if needed. Returns (rc, stdout, stderr), or raises
+    DaemonUnavailable.
+    """
+    socket_path = daemon_socket_path("nodetool", [key, launcher])
+    try:
+        ensure_daemon(socket_path, lambda: NodeToolDaemonHandler(launcher), idle_timeout)
+        response = send_request(socket_path, {"args": args})
+    except (OSError, IOError, ValueError) as excep:
+        raise DaemonUnavailable(str(excep))
+    if "error" in response:
+        raise DaemonUnavailable(response["error"])
+    return response["rc"], response["out"], response["err"]
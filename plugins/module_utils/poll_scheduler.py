@@ -0,0 +1,141 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import random
+import time
+
+
+def poll_scheduler_argument_spec():
+    """
+    Returns the options shared by the modules polling the cluster until it
+    reaches some state. poll and interval keep their historical meaning,
+    the others default to the historical fixed interval behaviour.
+    """
+    return dict(
+        poll=dict(type='int', default=None),
+        interval=dict(type='int', default=30),
+        backoff=dict(type='float', default=1.0),
+        max_interval=dict(type='int', default=None),
+        fast_interval=dict(type='int', default=None),
+        jitter=dict(type='float', default=0.0),
+        timeout=dict(type='int', default=None),
+    )
+
+
+class PollScheduler(object):
+    """
+    Decides when to poll again. The delay between two polls starts at
+    interval and is multiplied by backoff after every poll, up to
+    max_interval. A state transition resets it to fast_interval, since a
+    cluster that has just changed is likely to change again shortly.
+    jitter randomises every delay by up to that fraction of it. Polling
+    stops after poll attempts or once timeout seconds have elapsed,
+    whichever comes first. The duration of every attempt and the sleep
+    that followed it are recorded in timings.
+
+    Usage:
+
+        scheduler = PollScheduler(...)
+        while scheduler.attempt():
+            ... poll ...
+            scheduler.record(rc=rc)
+            if done:
+                break
+            scheduler.wait(transition=changed)
+    """
+
+    def __init__(self, poll=None, interval=30, backoff=1.0, max_interval=None,
+                 fast_interval=None, jitter=0.0, timeout=None,
+                 clock=time.time, sleep=time.sleep, rand=random.random):
+        if poll is None and timeout is None:
+            poll = 1  # With a timeout and no poll only the timeout limits polling
+        if (poll is not None and poll < 1) or interval < 0 or backoff < 1 or not 0 <= jitter <= 1:
+            raise ValueError("poll must be at least 1, interval positive, backoff at least 1 and jitter between 0 and 1")
+        self.poll = poll
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval if max_interval is not None else max(interval, 0)
+        self.fast_interval = fast_interval
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self.rand = rand
+        self.started = clock()
+        self.deadline = None if timeout is None else self.started + timeout
+        self.iterations = 0
+        self.timings = []
+        self.timed_out = False
+        self._delay = interval
+        self._attempt_started = None
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(poll=params['poll'],
+                   interval=params['interval'],
+                   backoff=params['backoff'],
+                   max_interval=params['max_interval'],
+                   fast_interval=params['fast_interval'],
+                   jitter=params['jitter'],
+                   timeout=params['timeout'])
+
+    def elapsed(self):
+        return round(self.clock() - self.started, 3)
+
+    def _exhausted(self):
+        return self.poll is not None and self.iterations >= self.poll
+
+    def attempt(self):
+        """
+        Starts the next attempt, returning False when there is none left.
+        The first attempt is always made, even with a zero timeout.
+        """
+        if self._exhausted() or self.timed_out:
+            return False
+        self.iterations += 1
+        self._attempt_started = self.clock()
+        return True
+
+    def record(self, **details):
+        """
+        Records the duration of the current attempt, along with details
+        such as its return code.
+        """
+        timing = dict(iteration=self.iterations,
+                      duration=round(self.clock() - self._attempt_started, 3),
+                      sleep=0.0)
+        timing.update(details)
+        self.timings.append(timing)
+        return timing
+
+    def next_delay(self, transition=False):
+        """
+        Returns the delay before the next attempt and advances the backoff.
+        """
+        if transition and self.fast_interval is not None:
+            self._delay = self.fast_interval
+        delay = min(self._delay, self.max_interval)
+        self._delay = min(self._delay * self.backoff, self.max_interval)
+        if self.jitter:
+            delay *= 1 + self.jitter * (2 * self.rand() - 1)
+        return max(delay, 0)
+
+    def wait(self, transition=False):
+        """
+        Sleeps until the next attempt is due, if there is going to be one.
+        The sleep is cut short at the deadline so that a last attempt is
+        made then rather than not at all. Returns the seconds slept.
+        """
+        if self._exhausted():
+            return 0.0
+        delay = self.next_delay(transition)
+        if self.deadline is not None:
+            remaining = self.deadline - self.clock()
+            if remaining <= 0:
+                self.timed_out = True
+                return 0.0
+            delay = min(delay, remaining)
+        delay = round(delay, 3)
+        if delay:
+            self.sleep(delay)
+        if self.timings and self.timings[-1]["iteration"] == self.iterations:
+            self.timings[-1]["sleep"] = delay
+        return delay
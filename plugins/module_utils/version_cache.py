@@ -0,0 +1,98 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+import json
+import os
+import tempfile
+import time
+
+from ansible_collections.community.cassandra.plugins.module_utils.local_daemon import (
+    runtime_dir,
+    runtime_file,
+)
+
+CASSANDRA_DAEMON_CLASS = b"org.apache.cassandra.service.CassandraDaemon"
+
+
+def cassandra_pids():
+    """
+    Returns the sorted pids of the Cassandra daemons running on this host,
+    found by looking for CassandraDaemon in /proc/<pid>/cmdline. Returns an
+    empty list where there is no /proc.
+    """
+    pids = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return pids
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join("/proc", entry, "cmdline"), "rb") as f:
+                cmdline = f.read()
+        except (IOError, OSError):
+            continue  # Gone in the meantime, or not ours to look at
+        if CASSANDRA_DAEMON_CLASS in cmdline:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def version_fingerprint(nodetool_bin):
+    """
+    Returns what a cached version is only valid for - the running Cassandra
+    daemons and the nodetool executable. A restart changes the pids and a
+    package upgrade replaces nodetool, either one invalidating the cache.
+    """
+    fingerprint = {"pids": cassandra_pids(), "nodetool": None}
+    if nodetool_bin is not None:
+        try:
+            path = os.path.realpath(nodetool_bin)
+            st = os.stat(path)
+            fingerprint["nodetool"] = [path, st.st_mtime, st.st_size]
+        except OSError:
+            pass
+    return fingerprint
+
+
+def _cache_path(host, port):
+    return runtime_file("version", [host, port], "json")
+
+
+def read_cached_version(host, port, fingerprint):
+    """
+    Returns the Cassandra version cached for host and port, or None if there
+    is none, it has expired or was cached for a different fingerprint.
+    Raises DaemonUnavailable when there is no usable runtime directory.
+    """
+    try:
+        with open(_cache_path(host, port)) as f:
+            entry = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get("expires", 0) < time.time():
+        return None
+    if entry.get("fingerprint") != fingerprint:
+        return None
+    return entry.get("version")
+
+
+def write_cached_version(host, port, version, ttl, fingerprint):
+    """
+    Caches version for host and port for ttl seconds. The file is replaced
+    atomically so concurrent tasks never read a partial entry. Failing to
+    write the cache is not an error.
+    Raises DaemonUnavailable when there is no usable runtime directory.
+    """
+    entry = {"version": version, "expires": time.time() + ttl, "fingerprint": fingerprint}
+    path = _cache_path(host, port)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=runtime_dir(), prefix=".version-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    except (IOError, OSError):
+        pass
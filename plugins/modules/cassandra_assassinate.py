@@ -46,6 +46,14 @@ msg:
   description: A short description of what happened.
   returned: success
   type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
@@ -76,6 +84,7 @@ def main():
     out = ''
     err = ''
     result = {}
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.run_command()
     out = out.strip()
@@ -46,26 +46,28 @@ cassandra_backup:
   description: The return state of the executed command.
   returned: success
   type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 __metaclass__ = type
 
 
-from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeTool3PairCommand
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import (
+    NodeTool3PairCommand,
+    nodetool_fan_out,
+)
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
 
 
-def main():
-    argument_spec = cassandra_common_argument_spec()
-    argument_spec.update(
-        state=dict(required=True, choices=['enabled', 'disabled'])
-    )
-    module = AnsibleModule(
-        argument_spec=argument_spec,
-        supports_check_mode=True,
-    )
-
+def run_module(module):
     status_cmd = 'statusbackup'
     enable_cmd = 'enablebackup'
     disable_cmd = 'disablebackup'
@@ -78,6 +80,7 @@ def main():
     out = ''
     err = ''
     result = {}
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.status_command()
     out = out.strip()
@@ -137,5 +140,17 @@ def main():
     module.exit_json(**result)
 
 
+def main():
+    argument_spec = cassandra_common_argument_spec()
+    argument_spec.update(
+        state=dict(required=True, choices=['enabled', 'disabled'])
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+    nodetool_fan_out(module, run_module)
+
+
 if __name__ == '__main__':
     main()
@@ -79,45 +79,29 @@ msg:
   description: A brief description of what happened.
   returned: success
   type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 __metaclass__ = type
 
 
-from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolGetSetCommand
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import (
+    NodeToolGetSetCommand,
+    nodetool_fan_out,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import parse_last_int
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
 
 
-def main():
-
-    cs_choices = [
-        "AntiEntropyStage",
-        "CounterMutationStage",
-        "GossipStage",
-        "ImmediateStage",
-        "InternalResponseStage",
-        "MigrationStage",
-        "MiscStage",
-        "MutationStage",
-        "ReadStage",
-        "RequestResponseStage",
-        "TracingStage",
-        "ViewMutationStage"
-    ]
-
-    argument_spec = cassandra_common_argument_spec()
-    argument_spec.update(
-        concurrency_type=dict(type='str', choices=["default", "compactors", "viewbuilders"], default="default"),
-        concurrency_stage=dict(type='str', choices=cs_choices),
-        value=dict(type='int', required=True)
-    )
-    module = AnsibleModule(
-        argument_spec=argument_spec,
-        supports_check_mode=True,
-        required_if=[["concurrency_type", "default", ["concurrency_stage"]]]
-    )
-
+def run_module(module):
     concurrency_type = module.params['concurrency_type']
     concurrency_stage = module.params['concurrency_stage']
     value = module.params['value']
@@ -129,12 +113,13 @@ def main():
         get_cmd = "{0} -- {1} ".format("getconcurrency", concurrency_stage)
         set_cmd = "{0} -- {1} {2}".format("setconcurrency", concurrency_stage, value)
 
-    n = NodeToolGetSetCommand(module, get_cmd, set_cmd)
+    n = NodeToolGetSetCommand(module, get_cmd, set_cmd, batch=True)
 
     rc = None
     out = ''
     err = ''
     result = {}
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.get_command()
     out = out.strip()
@@ -146,14 +131,9 @@ def main():
             result['stderr'] = err
 
     # Matches the last int in the output
-    try:
-        current_value = out.split()[-1:][0]
-        if current_value.isdigit():
-            current_value = int(current_value)
-        else:
-            raise IndexError
-    except IndexError as ie:
-        module.fail_json(msg="Failure parsing {0} output: {1}".format(get_cmd, str(ie)), **result)
+    current_value = parse_last_int(out)
+    if current_value is None:
+        module.fail_json(msg="Failure parsing {0} output: {1}".format(get_cmd, out), **result)
 
     if current_value == value:
         if rc != 0:  # should probably move this above
@@ -190,5 +170,36 @@ def main():
     module.exit_json(**result)
 
 
+def main():
+
+    cs_choices = [
+        "AntiEntropyStage",
+        "CounterMutationStage",
+        "GossipStage",
+        "ImmediateStage",
+        "InternalResponseStage",
+        "MigrationStage",
+        "MiscStage",
+        "MutationStage",
+        "ReadStage",
+        "RequestResponseStage",
+        "TracingStage",
+        "ViewMutationStage"
+    ]
+
+    argument_spec = cassandra_common_argument_spec()
+    argument_spec.update(
+        concurrency_type=dict(type='str', choices=["default", "compactors", "viewbuilders"], default="default"),
+        concurrency_stage=dict(type='str', choices=cs_choices),
+        value=dict(type='int', required=True)
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+        required_if=[["concurrency_type", "default", ["concurrency_stage"]]]
+    )
+    nodetool_fan_out(module, run_module)
+
+
 if __name__ == '__main__':
     main()
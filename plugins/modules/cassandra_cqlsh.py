@@ -17,6 +17,9 @@ requirements:
 description:
     - Run cql commands via the clqsh shell.
     - Run commands inline or using a cql file.
+    - Run several cql files, or those of a directory, one after the other in a
+      single cqlsh session, optionally recording those applied in a ledger table
+      so that they are skipped when run again.
     - Attempts to parse returned data into a format that Ansible can use.
 options:
   cqlsh_host:
@@ -57,6 +60,33 @@ options:
     description:
       - cqlsh command to execute.
     type: str
+  files:
+    description:
+      - Paths to cql files to run, in the order given.
+      - The statements of every file run in a single cqlsh session, so a
+        USE statement in a file applies to the files after it too.
+      - Files are named by their base name in the results and the ledger.
+    type: list
+    elements: path
+  directory:
+    description:
+      - Run the cql files of this directory matching pattern, sorted by name.
+      - Files are named by their path relative to the directory.
+    type: path
+  pattern:
+    description:
+      - Glob pattern matching the files of directory to run.
+    type: str
+    default: "*.cql"
+  ledger:
+    description:
+      - Table recording the files run with files or directory, created when
+        missing. Qualify it with its keyspace unless keyspace is set.
+      - A file is recorded with the sha256 checksum of its content once it
+        ran without errors. Files recorded with the same checksum are skipped.
+      - The module fails, running nothing, when a file recorded in the ledger
+        has changed since.
+    type: str
   encoding:
     description:
       - Specify a non-default encoding for output.
@@ -149,6 +179,11 @@ EXAMPLES = '''
   community.cassandra.cassandra_cqlsh:
     execute: "SELECT json * FROM my_keyspace.my_table WHERE partition = 'key' LIMIT 10"
 
+- name: Run the cql files of a directory once each, in one cqlsh session
+  community.cassandra.cassandra_cqlsh:
+    directory: /path/to/migrations
+    ledger: my_keyspace.applied_files
+
 - name: Use a different python
   community.cassandra.cassandra_cqlsh:
     execute: "SELECT json * FROM my_keyspace.my_table WHERE partition = 'key' LIMIT 10"
@@ -161,6 +196,21 @@ file:
   description: CQL file that was executed successfully.
   returned: When a cql file is used.
   type: str
+files:
+  description:
+    - Status of every file run with files or directory, in the order they ran.
+    - status is applied, failed, not_run when cqlsh stopped before the file or
+      skipped when the ledger records it.
+    - seconds is how long the file took to run, null when unknown.
+  returned: When files or directory is used.
+  type: list
+  elements: dict
+  sample:
+    - file: 001_tables.cql
+      checksum: 9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08
+      status: applied
+      seconds: 1.284
+      errors: []
 msg:
   description: A message indicating what has happened.
   returned: always
@@ -192,9 +242,27 @@ rc:
 '''
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.text.converters import to_bytes, to_text
+import glob
+import hashlib
 import json
+import os
+import re
+import tempfile
 __metaclass__ = type
 
+from ansible_collections.community.cassandra.plugins.module_utils.cql_statements import is_terminated
+
+# Before every file, and after the last one, the script running several files
+# selects the time on the server, giving how long each file took from the
+# output and which files cqlsh got to.
+MARKER = "ansible_file_"
+MARKER_CQL = "SELECT toUnixTimestamp(now()) AS " + MARKER + "{0} FROM system.local;"
+MARKER_VALUE = re.compile(MARKER + r"(\d+)\s*(?:\|\s*|\n\s*-+\s*\n\s*)(-?\d+)")
+MARKER_RESULT = re.compile(r"\n? " + MARKER + r"\d+\n-+\n +-?\d+\n\n\(1 rows\)\n")
+
+LEDGER_COLUMNS = "file text PRIMARY KEY, checksum text, applied_at timestamp, seconds double"
+
 
 def add_arg_to_cmd(cmd_list, param_name, param_value, is_bool=False):
     """
@@ -255,6 +323,273 @@ def transform_output(output, transform_type, split_char):
     return output
 
 
+def find_files(files=None, directory=None, pattern="*.cql"):
+    '''
+    Returns [(name, path)] of the cql files to run, in the order they run:
+    files in the order given, named by their base name, or those of
+    directory matching pattern, named by their path relative to directory,
+    sorted by name. Raises ValueError when a file is missing or two files
+    have the same name.
+    '''
+    if directory is not None:
+        if not os.path.isdir(directory):
+            raise ValueError("{0} is not a directory".format(directory))
+        found = sorted((os.path.relpath(path, directory), path)
+                       for path in glob.glob(os.path.join(directory, pattern)) if os.path.isfile(path))
+    else:
+        found = [(os.path.basename(path), path) for path in files]
+        for name, path in found:
+            if not os.path.isfile(path):
+                raise ValueError("{0} is not a file".format(path))
+    names = [name for name, path in found]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        raise ValueError("Several files are named {0}".format(", ".join(duplicates)))
+    return found
+
+
+def file_checksum(path):
+    '''
+    Returns the sha256 checksum of the content of the file at path.
+    '''
+    checksum = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def read_cql(path):
+    '''
+    Returns the content of the cql file at path with \\n line endings.
+    '''
+    with open(path, "rb") as f:
+        return re.sub(r"\r\n?", "\n", to_text(f.read(), errors="surrogate_or_strict"))
+
+
+def build_script(texts):
+    '''
+    Returns (script, spans), a cqlsh script running the cql of texts one
+    after the other, each preceded by a marker, and the (first, end) lines
+    of every text in the script. A statement ending on line n is reported
+    by cqlsh at line n + 1, so errors reported at lines first + 1 to end
+    belong to the text. The last statement of a text is terminated when it
+    isn't already.
+    '''
+    lines = []
+    spans = []
+    for index, text in enumerate(texts):
+        lines.append(MARKER_CQL.format(index))
+        first = len(lines) + 1
+        text = text.rstrip("\n")
+        if text:
+            lines.extend(text.split("\n"))
+        if not is_terminated(text):
+            lines.append(";")
+        spans.append((first, len(lines) + 1))
+    lines.append(MARKER_CQL.format(len(texts)))
+    return "\n".join(lines) + "\n", spans
+
+
+def parse_markers(output):
+    '''
+    Returns {index: milliseconds}, the server time printed by the markers
+    in output.
+    '''
+    return dict((int(index), int(value)) for index, value in MARKER_VALUE.findall(output))
+
+
+def strip_markers(output):
+    '''
+    Returns output without the results of the markers.
+    '''
+    return MARKER_RESULT.sub("", output)
+
+
+def script_errors(errors, script_path, spans):
+    '''
+    Returns ({text index: [error]}, [error]), the errors cqlsh printed to
+    errors while running the script at script_path, with their line in the
+    text they come from, and those of no text.
+    '''
+    prefix = re.compile(r"^" + re.escape(script_path) + r":(\d+):(.*)$")
+    by_text = {}
+    others = []
+    for line in errors.splitlines():
+        match = prefix.match(line)
+        if not match:
+            continue
+        number, message = int(match.group(1)), match.group(2).strip()
+        for index, (first, end) in enumerate(spans):
+            if first < number <= end:
+                by_text.setdefault(index, []).append("line {0}: {1}".format(number - first, message))
+                break
+        else:
+            others.append(message)
+    return by_text, others
+
+
+def file_results(entries, spans, rc, output, errors, script_path):
+    '''
+    Returns [{file, checksum, status, seconds, errors}] for the files of
+    entries, [(name, checksum)], run by the script at script_path, from the
+    rc, output and errors of cqlsh, and the errors of no file. A file
+    failed when it has errors or cqlsh stopped while running it, and
+    wasn't run when its marker isn't in the output. Without any marker, as
+    when cqlsh couldn't connect, files weren't run unless cqlsh succeeded.
+    '''
+    markers = parse_markers(output)
+    by_file, others = script_errors(errors, script_path, spans)
+    results = []
+    for index, (name, checksum) in enumerate(entries):
+        seconds = None
+        if index in markers and index + 1 in markers:
+            seconds = (markers[index + 1] - markers[index]) / 1000.0
+        if by_file.get(index) or (index in markers and index + 1 not in markers):
+            status = "failed"
+        elif (markers and index not in markers) or (not markers and rc != 0):
+            status = "not_run"
+        else:
+            status = "applied"
+        results.append(dict(file=name, checksum=checksum, status=status, seconds=seconds,
+                            errors=by_file.get(index, [])))
+    return results, others
+
+
+def cql_string(value):
+    return "'{0}'".format(value.replace("'", "''"))
+
+
+def ledger_script(ledger):
+    '''
+    Returns the cqlsh script creating the ledger table when missing and
+    selecting the files it records.
+    '''
+    return ("CREATE TABLE IF NOT EXISTS {0} ({1});\n"
+            "SELECT JSON file, checksum FROM {0};\n").format(ledger, LEDGER_COLUMNS)
+
+
+def record_script(ledger, results):
+    '''
+    Returns the cqlsh script recording the applied files of results in the
+    ledger table.
+    '''
+    return "".join("INSERT INTO {0} (file, checksum, applied_at, seconds) VALUES ({1}, {2}, toTimestamp(now()), {3});\n"
+                   .format(ledger, cql_string(result['file']), cql_string(result['checksum']),
+                           "null" if result['seconds'] is None else result['seconds'])
+                   for result in results if result['status'] == "applied")
+
+
+def cqlsh_command(params, file=None, execute=None):
+    '''
+    Returns the cqlsh command line running file or execute with the
+    connection and output options of params.
+    '''
+    args = [
+        params['cqlsh_cmd'],
+        params['cqlsh_host'],
+        params['cqlsh_port'],
+    ]
+
+    args = add_arg_to_cmd(args, "--username", params['username'])
+    args = add_arg_to_cmd(args, "--password", params['password'])
+    args = add_arg_to_cmd(args, "--keyspace", params['keyspace'])
+    args = add_arg_to_cmd(args, "--file", file)
+    args = add_arg_to_cmd(args, "--execute", execute)
+    args = add_arg_to_cmd(args, "--encoding", params['encoding'])
+    args = add_arg_to_cmd(args, "--cqlshrc", params['cqlshrc'])
+    args = add_arg_to_cmd(args, "--protocol-version", params['protocol_version'])
+    args = add_arg_to_cmd(args, "--connect-timeout", params['connect_timeout'])
+    args = add_arg_to_cmd(args, "--request-timeout", params['request_timeout'])
+    args = add_arg_to_cmd(args, "--tty", None, params['tty'])
+    args = add_arg_to_cmd(args, "--debug", None, params['debug'])
+    args = add_arg_to_cmd(args, "--no-compact", None, params['no_compact'])
+    args = add_arg_to_cmd(args, "--ssl", None, params['ssl'])
+
+    additional_args = params['additional_args']
+    if additional_args is not None:
+        for key, value in additional_args.items():
+            if isinstance(value, bool):
+                args.append(" --{0}".format(key))
+            elif isinstance(value, str) or isinstance(value, int):
+                args.append(" --{0} {1}".format(key, value))
+
+    return " ".join(str(item) for item in args)
+
+
+def run_script(module, script):
+    '''
+    Runs script, cql statements, with cqlsh through a file in the module's
+    temporary directory. Returns (rc, out, err, cmd, script_path).
+    '''
+    fd, script_path = tempfile.mkstemp(dir=module.tmpdir, prefix="cqlsh-", suffix=".cql")
+    with os.fdopen(fd, "wb") as f:
+        f.write(to_bytes(script, errors="surrogate_or_strict"))
+    cmd = cqlsh_command(module.params, file=script_path)
+    rc, out, err = module.run_command(cmd, check_rc=False)
+    return rc, out, err, cmd, script_path
+
+
+def run_files(module):
+    '''
+    Runs the files or the directory of the module's parameters in a single
+    cqlsh session, skipping those the ledger records, and exits.
+    '''
+    params = module.params
+    ledger = params['ledger']
+    result = dict(changed=False)
+    try:
+        found = find_files(params['files'], params['directory'], params['pattern'])
+    except ValueError as excep:
+        module.fail_json(msg=str(excep))
+    checksums = dict((name, file_checksum(path)) for name, path in found)
+
+    applied = {}
+    if ledger is not None and found:
+        rc, out, err, cmd, script_path = run_script(module, ledger_script(ledger))
+        if rc != 0:
+            module.fail_json(msg="Reading the ledger {0} failed".format(ledger), out=out, err=err, rc=rc, cmd=cmd)
+        applied = dict((row['file'], row['checksum']) for row in transform_output(out, "json", None))
+        changed_files = [name for name, path in found if name in applied and applied[name] != checksums[name]]
+        if changed_files:
+            module.fail_json(msg="Files changed since the ledger recorded them: {0}".format(", ".join(changed_files)))
+
+    pending = [(name, path) for name, path in found if applied.get(name) != checksums[name]]
+    results = dict((name, dict(file=name, checksum=checksums[name], status="skipped", seconds=None, errors=[]))
+                   for name, path in found if applied.get(name) == checksums[name])
+    out = err = ''
+    if pending:
+        script, spans = build_script([read_cql(path) for name, path in pending])
+        rc, out, err, cmd, script_path = run_script(module, script)
+        if params['debug']:
+            result.update(out=out, err=err, rc=rc, cmd=cmd)
+        ran, others = file_results([(name, checksums[name]) for name, path in pending], spans, rc, out, err, script_path)
+        results.update((file_result['file'], file_result) for file_result in ran)
+        result['changed'] = True
+        if ledger is not None and any(file_result['status'] == "applied" for file_result in ran):
+            record_rc, record_out, record_err, record_cmd, record_path = run_script(module, record_script(ledger, ran))
+            if record_rc != 0:
+                result['files'] = [results[name] for name, path in found]
+                module.fail_json(msg="Recording the applied files in the ledger {0} failed".format(ledger),
+                                 ledger_err=record_err, **result)
+        if rc != 0 or others or any(file_result['status'] != "applied" for file_result in ran):
+            result['files'] = [results[name] for name, path in found]
+            failed = [file_result['file'] for file_result in ran if file_result['status'] != "applied"]
+            module.fail_json(msg="module execution failed{0}".format(
+                ": {0} not applied".format(", ".join(failed)) if failed else ""),
+                errors=others, **result)
+
+    result['files'] = [results[name] for name, path in found]
+    counts = [(status, len([name for name in results if results[name]['status'] == status])) for status in ("applied", "skipped")]
+    result['msg'] = ", ".join("{0} {1}".format(count, status) for status, count in counts)
+    try:
+        result['transformed_output'] = transform_output(strip_markers(out), params['transform'], params['split_char'])
+    except Exception as excep:
+        result['msg'] += ", error tranforming output: {0}".format(str(excep))
+        result['transformed_output'] = None
+    module.exit_json(**result)
+
+
 def main():
     argument_spec = dict(
         cqlsh_host=dict(type='str', default='localhost', aliases=['login_host']),
@@ -264,6 +599,10 @@ def main():
         keyspace=dict(type='str', no_log=False),
         file=dict(type='str'),
         execute=dict(type='str'),
+        files=dict(type='list', elements='path'),
+        directory=dict(type='path'),
+        pattern=dict(type='str', default='*.cql'),
+        ledger=dict(type='str'),
         encoding=dict(type='str', default='utf-8'),
         cqlshrc=dict(type='str'),
         cqlversion=dict(type='str'),
@@ -281,43 +620,20 @@ def main():
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
+        mutually_exclusive=[['file', 'execute', 'files', 'directory']],
         supports_check_mode=False,
     )
 
-    args = [
-        module.params['cqlsh_cmd'],
-        module.params['cqlsh_host'],
-        module.params['cqlsh_port'],
-    ]
-
-    args = add_arg_to_cmd(args, "--username", module.params['username'])
-    args = add_arg_to_cmd(args, "--password", module.params['password'])
-    args = add_arg_to_cmd(args, "--keyspace", module.params['keyspace'])
-    args = add_arg_to_cmd(args, "--file", module.params['file'])
-    args = add_arg_to_cmd(args, "--execute", module.params['execute'])
-    args = add_arg_to_cmd(args, "--encoding", module.params['encoding'])
-    args = add_arg_to_cmd(args, "--cqlshrc", module.params['cqlshrc'])
-    args = add_arg_to_cmd(args, "--protocol-version", module.params['protocol_version'])
-    args = add_arg_to_cmd(args, "--connect-timeout", module.params['connect_timeout'])
-    args = add_arg_to_cmd(args, "--request-timeout", module.params['request_timeout'])
-    args = add_arg_to_cmd(args, "--tty", None, module.params['tty'])
-    args = add_arg_to_cmd(args, "--debug", None, module.params['debug'])
-    args = add_arg_to_cmd(args, "--no-compact", None, module.params['no_compact'])
-    args = add_arg_to_cmd(args, "--ssl", None, module.params['ssl'])
-
-    additional_args = module.params['additional_args']
-    if additional_args is not None:
-        for key, value in additional_args.items():
-            if isinstance(value, bool):
-                args.append(" --{0}".format(key))
-            elif isinstance(value, str) or isinstance(value, int):
-                args.append(" --{0} {1}".format(key, value))
+    if module.params['files'] is not None or module.params['directory'] is not None:
+        run_files(module)
+    elif module.params['ledger'] is not None:
+        module.fail_json(msg="ledger requires files or directory")
 
     rc = None
     out = ''
     err = ''
     result = {}
-    cmd = " ".join(str(item) for item in args)
+    cmd = cqlsh_command(module.params, module.params['file'], module.params['execute'])
 
     (rc, out, err) = module.run_command(cmd, check_rc=False)
 
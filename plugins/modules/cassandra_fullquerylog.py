@@ -114,6 +114,14 @@ fullquerylog_config:
   sample: >
     { 'max_queue_weight': 268435456, 'max_log_size': 17179869184, 'enabled': True, 'roll_cycle': 'HOURLY',
       'archive_command': None, 'log_dir': None, 'max_archive_retries': 10, 'block': True}
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
@@ -128,6 +136,7 @@ __metaclass__ = type
 
 
 from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeTool4PairCommand
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import parse_getfullquerylog
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
 
 
@@ -144,53 +153,6 @@ def escape_param(param):
     return escaped
 
 
-# TODO - This could go in a shared fucntion file and be unit tested
-def parse_getfullquerylog(nodetool_output):
-    """
-    This function passed the output from nodetool getfullquerylog and
-    returns it in a Python dictionary.
-    i.e.
-    enabled             false
-    log_dir
-    archive_command
-    roll_cycle          HOURLY
-    block               true
-    max_log_size        17179869184
-    max_queue_weight    268435456
-    max_archive_retries 10
-
-    Is transformed to...
-
-    { 'max_queue_weight': 268435456,
-      'max_log_size': 17179869184,
-      'enabled': True,
-      'roll_cycle': 'HOURLY',
-      'archive_command': None,
-      'log_dir': None,
-      'max_archive_retries': 10,
-      'block': True}
-
-    """
-    bool_list = ['enabled', 'block']
-    int_list = ['max_log_size', 'max_queue_weight', 'max_archive_retries']
-    d = dict()
-
-    for line in nodetool_output.split('\n'):
-        config_pair = line.split()
-        if len(config_pair) > 0:
-            if config_pair[0] in bool_list:
-                cast_function = bool
-            elif config_pair[0] in int_list:
-                cast_function = int
-            else:
-                cast_function = str
-            try:
-                d[config_pair[0]] = cast_function(config_pair[1])
-            except IndexError:
-                d[config_pair[0]] = None
-    return d
-
-
 def fullqueryconfig_diff(config_dict, module):
     """
     Compare requested state from module with the actual config
@@ -260,6 +222,7 @@ def main():
     out = ''
     err = ''
     result = {}
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.status_command()
     # Parse the output into a dict
@@ -39,45 +39,39 @@ cassandra_interdcstreamthroughput:
   description: The return state of the executed command.
   returned: success
   type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 __metaclass__ = type
 
 
-from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolGetSetCommand, cassandra_version_at_least
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import (
+    NodeToolGetSetCommand,
+    cassandra_version_at_least,
+    nodetool_fan_out,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import parse_throughput
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
-import re
-
-
-# Helper functions from ChatGPT
-def extract_throughput(string):
-    match = re.search(r'(\d+(?:\.\d+)?) Mb/s', string)
-    if match:
-        return float(match.group(1))
-    else:
-        return None
 
 
 def compare_throughputs(string1, string2):
-    throughput1 = extract_throughput(string1)
-    throughput2 = extract_throughput(string2)
+    throughput1 = parse_throughput(string1)
+    throughput2 = parse_throughput(string2)
     if throughput1 is not None and throughput2 is not None:
         return throughput1 == throughput2
     else:
         return False
 
 
-def main():
-    argument_spec = cassandra_common_argument_spec()
-    argument_spec.update(
-        value=dict(type='int', required=True)
-    )
-    module = AnsibleModule(
-        argument_spec=argument_spec,
-        supports_check_mode=True,
-    )
-
+def run_module(module):
     set_cmd = "setinterdcstreamthroughput {0}".format(module.params['value'])
     get_cmd = "getinterdcstreamthroughput"
 
@@ -96,6 +90,7 @@ def main():
     out = ''
     err = ''
     result = {}
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.get_command()
     out = out.strip()
@@ -137,5 +132,17 @@ def main():
     module.exit_json(**result)
 
 
+def main():
+    argument_spec = cassandra_common_argument_spec()
+    argument_spec.update(
+        value=dict(type='int', required=True)
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+    nodetool_fan_out(module, run_module)
+
+
 if __name__ == '__main__':
     main()
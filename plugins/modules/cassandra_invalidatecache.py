@@ -63,14 +63,22 @@ msg:
   description: A short description of what happened.
   returned: success
   type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import re
 __metaclass__ = type
 
 
 from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolCommandSimple
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import info_cache_entries, parse_info
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
 
 
@@ -101,30 +109,15 @@ def parse_cache_info(info, module, fake_counter):
       "counter_cache_entries": 0
     }
 
-    TODO - This should be placed into common code and unit tested
     """
-    key_cache_entries = None
-    row_cache_entries = None
-    counter_cache_entries = None
-    try:
-        if fake_counter:
-            key_cache_entries = 100
-            row_cache_entries = 100
-            counter_cache_entries = 100
-        else:
-            p = re.compile(r"Key Cache .*: entries \d+")
-            key_cache_entries = int(p.search(info).group(0).split()[-1:][0])
-            p = re.compile(r"Row Cache .*: entries \d+")
-            row_cache_entries = int(p.search(info).group(0).split()[-1:][0])
-            p = re.compile(r"Counter Cache .*: entries \d+")
-            counter_cache_entries = int(p.search(info).group(0).split()[-1:][0])
-    except Exception as excep:
-        module.fail_json(msg="Error parsing info output: {0}".format(excep))
-    if key_cache_entries is None or row_cache_entries is None or counter_cache_entries is None:
+    if fake_counter:
+        return {"key_cache_entries": 100,
+                "row_cache_entries": 100,
+                "counter_cache_entries": 100}
+    cache_entries = info_cache_entries(parse_info(info))
+    if None in cache_entries.values():
         module.fail_json(msg="Unable to get cache info")
-    return {"key_cache_entries": key_cache_entries,
-            "row_cache_entries": row_cache_entries,
-            "counter_cache_entries": counter_cache_entries}
+    return cache_entries
 
 
 def main():
@@ -145,6 +138,7 @@ def main():
 
     cmd = "info"
     n = NodeToolCommandSimple(module, cmd)
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.run_command()
     out = out.strip()
@@ -170,7 +164,7 @@ def main():
             rc = None
             out = ''
             err = ''
-            result = {}
+            result = dict(version_cache=result['version_cache'])
 
             if module.check_mode is False:
                 (rc, out, err) = n.run_command()
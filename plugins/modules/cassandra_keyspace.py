@@ -85,6 +85,17 @@ options:
     type: dict
     aliases:
       - data_centers
+  metadata_mode:
+    description:
+      - The cluster metadata the driver downloads when connecting.
+      - C(full) downloads the schema and token metadata of the whole cluster, the driver's default.
+      - C(lazy) downloads none. The module reads what it needs from the schema tables,
+        which connects much faster to clusters with many keyspaces and tables.
+    type: str
+    default: full
+    choices:
+      - full
+      - lazy
   consistency_level:
     description:
       - Consistency level to perform cassandra queries with.
@@ -106,6 +117,9 @@ options:
         - LOCAL_SERIAL
         - LOCAL_ONE
 
+extends_documentation_fragment:
+  - community.cassandra.cql_broker_options
+
 requirements:
   - cassandra-driver
 '''
@@ -161,14 +175,11 @@ msg:
 '''
 
 __metaclass__ = type
-import re
 import socket
 import os.path
 
 try:
-    from cassandra.cluster import Cluster, AuthenticationFailed
-    from cassandra.cluster import EXEC_PROFILE_DEFAULT
-    from cassandra.cluster import ExecutionProfile
+    from cassandra.cluster import AuthenticationFailed
     from cassandra.auth import PlainTextAuthProvider
     from cassandra import ConsistencyLevel
     HAS_CASSANDRA_DRIVER = True
@@ -205,6 +216,20 @@ except Exception:
 
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cql_broker import (
+    connect_read_write,
+    cql_broker_argument_spec,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    read_write_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_keyspaces import (
+    create_alter_keyspace_cql,
+    drop_keyspace_cql,
+    is_keyspace_changed,
+    keyspace_config,
+    legacy_keyspace_config,
+)
 
 try:
     from ssl import SSLContext, PROTOCOL_TLS
@@ -218,7 +243,7 @@ except Exception:
 # =========================================
 
 
-# Does the keyspace exists on the cluster? TODO Better to use cluster.metadata.keyspaces here?
+# Does the keyspace exists on the cluster?
 def keyspace_exists(session, keyspace):
     server_version = session.execute("SELECT release_version FROM system.local WHERE key='local'")[0]
     if int(server_version.release_version[0]) >= 3:
@@ -233,107 +258,40 @@ def keyspace_exists(session, keyspace):
     return keyspace_exists
 
 
-def get_keyspace(cluster, keyspace):
-    return cluster.metadata.keyspaces[keyspace].export_as_string()
-
-
 def create_alter_keyspace(module, session, keyspace, replication_factor, durable_writes, data_centres, is_alter):
-    if is_alter is False:
-        cql = "CREATE KEYSPACE {0} ".format(keyspace)
-    else:
-        cql = "ALTER KEYSPACE {0} ".format(keyspace)
-    if data_centres is not None:
-        cql += "WITH REPLICATION = { 'class' : 'NetworkTopologyStrategy', "
-        for dc in data_centres:
-            cql += " '{0}' : {1},".format(str(dc), data_centres[dc])
-        cql = cql[:-1] + " }"
-    else:
-        cql += "WITH REPLICATION = {{ 'class' : 'SimpleStrategy', 'replication_factor': {0} }}".format(replication_factor)
-    cql += " AND DURABLE_WRITES = {0}".format(durable_writes)
+    cql = create_alter_keyspace_cql(keyspace, replication_factor, durable_writes, data_centres, is_alter)
     session.execute(cql)
     return cql
 
 
 def drop_keyspace(session, keyspace):
-    cql = "DROP KEYSPACE %s" % keyspace
-    session.execute(cql)
+    session.execute(drop_keyspace_cql(keyspace))
     return True
 
 
-def get_keyspace_config(module, cluster, keyspace):
-    cql = get_keyspace(cluster, keyspace)
-    dict_regexp = re.compile(r'{(.*)}')
-    durable_writes_regexp = re.compile('DURABLE_WRITES = (True|False);')
-    repl_settings = re.search(dict_regexp, cql).group(0)
-    try:
-        dw = re.search(durable_writes_regexp, cql).group(0)
-    except AttributeError as excep:
-        dw = "true"  # default to true
-    keyspace_config = eval(repl_settings)
-    keyspace_config['durable_writes'] = bool(dw.lower())
-    return keyspace_config
+def get_keyspace_config(module, session, keyspace):
+    '''
+    Returns the keyspace_config() of keyspace, read from the schema tables
+    rather than the driver's metadata.
+    '''
+    server_version = session.execute("SELECT release_version FROM system.local WHERE key='local'")[0]
+    if int(server_version.release_version[0]) >= 3:
+        cql = "SELECT replication, durable_writes FROM system_schema.keyspaces WHERE keyspace_name = %s"
+        row = session.execute(cql, [keyspace])[0]
+        return keyspace_config(row.replication, row.durable_writes)
+    cql = "SELECT strategy_class, strategy_options, durable_writes FROM system.schema_keyspaces WHERE keyspace_name = %s"
+    row = session.execute(cql, [keyspace])[0]
+    return legacy_keyspace_config(row.strategy_class, row.strategy_options, row.durable_writes)
 
 
-def keyspace_is_changed(module, cluster, keyspace, replication_factor,
+def keyspace_is_changed(module, session, keyspace, replication_factor,
                         durable_writes, data_centres):
-    cfg = get_keyspace_config(module, cluster, keyspace)
-    keyspace_definition_changed = False
-    if cfg['class'] == "SimpleStrategy":
-        if int(cfg['replication_factor']) != replication_factor or\
-                cfg['durable_writes'] != durable_writes:
-            keyspace_definition_changed = True
-    elif cfg['class'] == "NetworkTopologyStrategy":
-        # ls = [cfg, keyspace, replication_factor, durable_writes, data_centres]
-        # module.fail_json(msg=str(ls))
-        if cfg['durable_writes'] != durable_writes:
-            keyspace_definition_changed = True
-        else:  # check each dc here
-            for dc in data_centres:
-                if dc in cfg.keys():
-                    if int(data_centres[dc]) != int(cfg[dc]):
-                        keyspace_definition_changed = True
-                else:
-                    keyspace_definition_changed = True
-            # If still false check for removed dc's
-            if keyspace_definition_changed is False:
-                for dc in cfg.keys():
-                    if dc not in data_centres and dc not in ["class", "durable_writes"]:
-                        keyspace_definition_changed = True
-    else:
-        module.fail_json("Unknown Replication strategy: {0}".format(cfg['class']))
-    return keyspace_definition_changed
-
-
-def get_read_and_write_sessions(login_host,
-                                login_port,
-                                auth_provider,
-                                ssl_context,
-                                consistency_level):
-    profile = ExecutionProfile(
-        consistency_level=ConsistencyLevel.name_to_value[consistency_level])
-    if consistency_level in ["ANY", "EACH_QUORUM"]:  # Not supported for reads
-        cluster_r = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context)  # Will be LOCAL_ONE
-    else:
-        cluster_r = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context,
-                            execution_profiles={EXEC_PROFILE_DEFAULT: profile})
-    if consistency_level in ["SERIAL", "LOCAL_SERIAL"]:  # Not supported for writes
-        cluster_w = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context)  # Will be LOCAL_ONE
-    else:
-        cluster_w = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context,
-                            execution_profiles={EXEC_PROFILE_DEFAULT: profile})
-    return (cluster_r, cluster_w)  # Return a tuple of sessions for C* (read, write)
+    cfg = get_keyspace_config(module, session, keyspace)
+    try:
+        return is_keyspace_changed(cfg, replication_factor, durable_writes, data_centres)
+    except ValueError as excep:
+        module.fail_json(msg=str(excep))
+
 
 ############################################
 
@@ -358,10 +316,12 @@ def main():
             replication_factor=dict(type='int', default=1),
             durable_writes=dict(type='bool', default=True),
             data_centres=dict(type='dict', aliases=['data_centers']),
+            metadata_mode=dict(type='str', default='full', choices=['full', 'lazy']),
             consistency_level=dict(type='str',
                                    required=False,
                                    default="LOCAL_ONE",
-                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+                                   choices=list(ConsistencyLevel.name_to_value.keys())),
+            **cql_broker_argument_spec()),
         supports_check_mode=True
     )
 
@@ -433,15 +393,15 @@ def main():
             if ssl_cert_reqs in ('CERT_REQUIRED', 'CERT_OPTIONAL'):
                 ssl_context.load_verify_locations(module.params['ssl_ca_certs'])
 
-        sessions = get_read_and_write_sessions(login_host,
-                                               login_port,
-                                               auth_provider,
-                                               ssl_context,
-                                               consistency_level)
+        def cluster_factory():
+            return read_write_cluster(login_host,
+                                      login_port,
+                                      auth_provider,
+                                      ssl_context,
+                                      consistency_level,
+                                      module.params['metadata_mode'])
 
-        cluster = sessions[1]  # maintain cluster object for comptbility
-        session_r = sessions[0].connect()
-        session_w = sessions[1].connect()
+        session_r, session_w = connect_read_write(module, login_host, cluster_factory)
 
     except AuthenticationFailed as excep:
         module.fail_json(msg="Authentication failed: {0}".format(excep))
@@ -453,7 +413,7 @@ def main():
             if module.check_mode:
                 if state == "present":
                     if keyspace_is_changed(module,
-                                           cluster,
+                                           session_r,
                                            keyspace,
                                            replication_factor,
                                            durable_writes,
@@ -467,7 +427,7 @@ def main():
             else:
                 if state == "present":
                     if keyspace_is_changed(module,
-                                           cluster,
+                                           session_r,
                                            keyspace,
                                            replication_factor,
                                            durable_writes,
@@ -0,0 +1,401 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+
+
+DOCUMENTATION = r'''
+---
+module: cassandra_keyspaces
+short_description: Manage many keyspaces on your Cassandra cluster at once.
+description:
+  - Manage many keyspaces, and their replication, in a single task.
+  - The replication of every existing keyspace is read with one query and compared with I(keyspaces) in memory.
+  - The resulting CREATE, ALTER and DROP KEYSPACE statements are sent one after another without waiting
+    for schema agreement in between. The module waits for the nodes to agree on the schema once, after the last one.
+  - As with M(community.cassandra.cassandra_keyspace), migrating a keyspace between replication strategies
+    is not supported.
+  - Use M(community.cassandra.cassandra_keyspace) to manage a single keyspace.
+author: Rhys Campbell (@rhysmeister)
+options:
+  login_user:
+    description: The Cassandra user to login with.
+    type: str
+  login_password:
+    description: The Cassandra password to login with.
+    type: str
+  ssl:
+    description: Uses SSL encryption if basic SSL encryption is enabled on Cassandra cluster (without client/server verification)
+    type: bool
+    default: False
+  ssl_cert_reqs:
+    description: SSL verification mode.
+    type: str
+    choices:
+      - 'CERT_NONE'
+      - 'CERT_OPTIONAL'
+      - 'CERT_REQUIRED'
+    default: 'CERT_NONE'
+  ssl_ca_certs:
+    description:
+        The SSL CA chain or certificate location to confirm supplied certificate validity
+        (required when ssl_cert_reqs is set to CERT_OPTIONAL or CERT_REQUIRED)
+    type: str
+    default: ''
+  login_host:
+    description: The Cassandra hostname.
+    type: list
+    elements: str
+  login_port:
+    description: The Cassandra port.
+    type: int
+    default: 9042
+  keyspaces:
+    description:
+      - The keyspaces to manage. Keyspaces that aren't listed are left alone.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description: The name of the keyspace to create or manage.
+        type: str
+        required: true
+      state:
+        description: The desired state of the keyspace.
+        type: str
+        choices:
+          - "present"
+          - "absent"
+        default: "present"
+      replication_factor:
+        description:
+          - The total number of copies of your keyspace data.
+          - The keyspace is created with SimpleStrategy.
+          - If data_centres is set this parameter is ignored.
+        type: int
+        default: 1
+      durable_writes:
+        description:
+          - Enable durable writes for the keyspace.
+        type: bool
+        default: true
+      data_centres:
+        description:
+          - The keyspace will be created with NetworkTopologyStrategy.
+          - Specify your data centres, along with replication_factor, as key-value pairs.
+        type: dict
+        aliases:
+          - data_centers
+  schema_agreement_wait:
+    description:
+      - The number of seconds to wait, once all the statements have been sent, for the nodes to agree on the schema.
+      - The module fails if they don't. C(0) doesn't wait.
+    type: int
+    default: 30
+  consistency_level:
+    description:
+      - Consistency level to perform cassandra queries with.
+      - Not all consistency levels are supported by read or write connections.\
+        When a level is not supported then LOCAL_ONE, the default is used.
+      - Consult the README.md on GitHub for further details.
+    type: str
+    default: "LOCAL_ONE"
+    choices:
+        - ANY
+        - ONE
+        - TWO
+        - THREE
+        - QUORUM
+        - ALL
+        - LOCAL_QUORUM
+        - EACH_QUORUM
+        - SERIAL
+        - LOCAL_SERIAL
+        - LOCAL_ONE
+
+requirements:
+  - cassandra-driver
+'''
+
+EXAMPLES = r'''
+- name: Create the application keyspaces
+  community.cassandra.cassandra_keyspaces:
+    keyspaces:
+      - name: app
+        data_centres:
+          london: 3
+          paris: 3
+      - name: app_audit
+        replication_factor: 3
+        durable_writes: false
+      - name: legacy_app
+        state: absent
+
+- name: Create keyspaces from a list, waiting up to 2 minutes for schema agreement
+  community.cassandra.cassandra_keyspaces:
+    keyspaces: "{{ service_keyspaces }}"
+    schema_agreement_wait: 120
+'''
+
+
+RETURN = '''
+changed:
+  description: Whether any keyspace has changed.
+  returned: on success
+  type: bool
+keyspaces:
+  description: The changes made to each keyspace of I(keyspaces), in the order they were given.
+  returned: always
+  type: list
+  elements: dict
+  sample: [
+    {
+      "keyspace": "app",
+      "changed": true,
+      "cql": [
+        "CREATE KEYSPACE app WITH REPLICATION = { 'class' : 'NetworkTopologyStrategy',  'london' : 3, 'paris' : 3 } AND DURABLE_WRITES = True"
+      ]
+    }
+  ]
+schema_agreement:
+  description: Whether the nodes agreed on the schema after the changes.
+  returned: changed and not check mode
+  type: bool
+failed_statements:
+  description: The statements that failed, with the keyspace they belong to and the error.
+  returned: on error
+  type: list
+  elements: dict
+msg:
+  description: Exceptions encountered during module execution.
+  returned: on error
+  type: str
+'''
+
+__metaclass__ = type
+
+try:
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra import AuthenticationFailed, InvalidRequest
+    from cassandra import ConsistencyLevel
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    class InvalidRequest(Exception):
+        pass
+
+    # This is here for ansible-test import (when cassandra-driver is not installed)
+    class ConsistencyLevel:
+        ANY = "ANY"
+        ONE = "ONE"
+        TWO = "TWO"
+        THREE = "THREE"
+        QUORUM = "QUORUM"
+        ALL = "ALL"
+        LOCAL_QUORUM = "LOCAL_QUORUM"
+        EACH_QUORUM = "EACH_QUORUM"
+        SERIAL = "SERIAL"
+        LOCAL_SERIAL = "LOCAL_SERIAL"
+        LOCAL_ONE = "LOCAL_ONE"
+
+    ConsistencyLevel.name_to_value = {
+        "ANY": ConsistencyLevel.ANY,
+        "ONE": ConsistencyLevel.ONE,
+        "TWO": ConsistencyLevel.TWO,
+        "THREE": ConsistencyLevel.THREE,
+        "QUORUM": ConsistencyLevel.QUORUM,
+        "ALL": ConsistencyLevel.ALL,
+        "LOCAL_QUORUM": ConsistencyLevel.LOCAL_QUORUM,
+        "EACH_QUORUM": ConsistencyLevel.EACH_QUORUM,
+        "SERIAL": ConsistencyLevel.SERIAL,
+        "LOCAL_SERIAL": ConsistencyLevel.LOCAL_SERIAL,
+        "LOCAL_ONE": ConsistencyLevel.LOCAL_ONE,
+    }
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_ssl_context,
+    read_and_write_sessions,
+    read_write_cluster,
+    wait_for_schema_agreement,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_keyspaces import (
+    create_alter_keyspace_cql,
+    drop_keyspace_cql,
+    is_keyspace_changed,
+    keyspace_config,
+    legacy_keyspace_config,
+)
+
+# =========================================
+# Cassandra module specific support methods
+# =========================================
+
+
+def load_keyspaces(session):
+    '''
+    Returns the keyspace_config() of every keyspace, keyed by name, from a
+    single query on system_schema.keyspaces, or on system.schema_keyspaces
+    for Cassandra 2.
+    '''
+    try:
+        rows = session.execute("SELECT keyspace_name, replication, durable_writes FROM system_schema.keyspaces")
+        return dict((row.keyspace_name, keyspace_config(row.replication, row.durable_writes)) for row in rows)
+    except InvalidRequest:
+        pass
+    rows = session.execute("SELECT keyspace_name, strategy_class, strategy_options, durable_writes FROM system.schema_keyspaces")
+    return dict((row.keyspace_name,
+                 legacy_keyspace_config(row.strategy_class, row.strategy_options, row.durable_writes)) for row in rows)
+
+
+def plan_keyspaces(specs, keyspaces):
+    '''
+    Compares specs, the keyspaces option, with the existing keyspaces, from
+    load_keyspaces(), and returns the statements for every spec, in order,
+    as [{"keyspace": "app", "cql": [...]}]. Raises ValueError for an
+    existing keyspace with an unknown replication strategy.
+    '''
+    plans = []
+    for spec in specs:
+        name = spec['name']
+        cql = []
+        existing = keyspaces.get(name)
+        if spec['state'] == "absent":
+            if existing is not None:
+                cql.append(drop_keyspace_cql(name))
+        elif existing is None:
+            cql.append(create_alter_keyspace_cql(name, spec['replication_factor'], spec['durable_writes'],
+                                                 spec['data_centres'], False))
+        else:
+            try:
+                changed = is_keyspace_changed(existing, spec['replication_factor'], spec['durable_writes'],
+                                              spec['data_centres'])
+            except ValueError as excep:
+                raise ValueError("Keyspace {0}: {1}".format(name, excep))
+            if changed:
+                cql.append(create_alter_keyspace_cql(name, spec['replication_factor'], spec['durable_writes'],
+                                                     spec['data_centres'], True))
+        plans.append({"keyspace": name, "cql": cql})
+    return plans
+
+
+def apply_plans(session, plans):
+    '''
+    Runs the statements of plans one after another, carrying on past the
+    ones that fail. Returns the [{keyspace, cql, error}] of those.
+    '''
+    failed = []
+    for plan in plans:
+        for cql in plan['cql']:
+            try:
+                session.execute(cql)
+            except Exception as excep:
+                failed.append({"keyspace": plan['keyspace'], "cql": cql, "error": str(excep)})
+    return failed
+
+
+def keyspace_summary(plans):
+    return [{"keyspace": plan['keyspace'], "changed": len(plan['cql']) > 0, "cql": plan['cql']} for plan in plans]
+
+
+############################################
+
+
+def main():
+    keyspace_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+        replication_factor=dict(type='int', default=1),
+        durable_writes=dict(type='bool', default=True),
+        data_centres=dict(type='dict', aliases=['data_centers']),
+    )
+    module = AnsibleModule(
+        argument_spec=dict(
+            login_user=dict(type='str'),
+            login_password=dict(type='str', no_log=True),
+            ssl=dict(type='bool', default=False),
+            ssl_cert_reqs=dict(type='str',
+                               required=False,
+                               default='CERT_NONE',
+                               choices=['CERT_NONE',
+                                        'CERT_OPTIONAL',
+                                        'CERT_REQUIRED']),
+            ssl_ca_certs=dict(type='str', default=''),
+            login_host=dict(type='list', elements='str'),
+            login_port=dict(type='int', default=9042),
+            keyspaces=dict(type='list', elements='dict', required=True, options=keyspace_spec),
+            schema_agreement_wait=dict(type='int', default=30),
+            consistency_level=dict(type='str',
+                                   required=False,
+                                   default="LOCAL_ONE",
+                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+        supports_check_mode=True
+    )
+
+    if HAS_CASSANDRA_DRIVER is False:
+        msg = ("This module requires the cassandra-driver python"
+               " driver. You can probably install it with pip"
+               " install cassandra-driver.")
+        module.fail_json(msg=msg)
+
+    specs = module.params['keyspaces']
+    names = [spec['name'] for spec in specs]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg="Keyspaces can only be listed once: {0}".format(", ".join(duplicates)))
+
+    try:
+        auth_provider = None
+        if module.params['login_user'] is not None:
+            auth_provider = PlainTextAuthProvider(
+                username=module.params['login_user'],
+                password=module.params['login_password']
+            )
+        ssl_context = cql_ssl_context(module,
+                                      module.params['ssl'],
+                                      module.params['ssl_cert_reqs'],
+                                      module.params['ssl_ca_certs'])
+        # The driver waits for schema agreement after each statement
+        # otherwise, here it is waited for once, after the last one
+        cluster = read_write_cluster(module.params['login_host'],
+                                     module.params['login_port'],
+                                     auth_provider,
+                                     ssl_context,
+                                     module.params['consistency_level'],
+                                     "lazy",
+                                     max_schema_agreement_wait=0)
+        session_r, session_w = read_and_write_sessions(cluster)
+    except AuthenticationFailed as auth_failed:
+        module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
+    except Exception as excep:
+        module.fail_json(msg="Error connecting to cluster: {0}".format(excep))
+
+    try:
+        plans = plan_keyspaces(specs, load_keyspaces(session_r))
+        summary = keyspace_summary(plans)
+        result = dict(
+            changed=any(keyspace['changed'] for keyspace in summary),
+            keyspaces=summary,
+        )
+        if result['changed'] and not module.check_mode:
+            failed = apply_plans(session_w, plans)
+            result['schema_agreement'] = wait_for_schema_agreement(cluster, module.params['schema_agreement_wait'])
+            if failed:
+                module.fail_json(msg="{0} statements failed".format(len(failed)),
+                                 failed_statements=failed,
+                                 **result)
+            if not result['schema_agreement']:
+                module.fail_json(msg="The nodes did not agree on the schema within {0} seconds".format(
+                                 module.params['schema_agreement_wait']),
+                                 **result)
+        module.exit_json(**result)
+
+    except Exception as excep:
+        module.fail_json(msg="An error occured: {0}".format(excep))
+
+
+if __name__ == '__main__':
+    main()
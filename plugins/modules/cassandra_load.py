@@ -0,0 +1,561 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+
+
+DOCUMENTATION = r'''
+---
+module: cassandra_load
+short_description: Load the rows of a csv or JSON Lines file into a table.
+description:
+  - Reads the rows of a file on the managed node, a chunk at a time, and writes them to a table with a
+    prepared INSERT, many of them in flight at once.
+  - Values are given as M(community.cassandra.cassandra_query) and M(community.cassandra.cassandra_scan)
+    export them. Collections, tuples and user defined types are JSON, uuids, timestamps and dates are
+    strings and blobs are hex. Timestamps are milliseconds since the epoch or ISO 8601 date and times,
+    UTC unless they have an offset. Durations are written like 1mo2d3ns. Text, ascii, varchar and inet
+    values must be strings.
+  - A value that doesn't fit its column makes the row fail, like a row that can't be read.
+  - In csv files empty values are nulls, as with cqlsh COPY. Columns a JSON Lines row doesn't have aren't written.
+  - Rows that fail are retried on their own. Rows that can't be read, or still fail, are reported by line.
+  - In check mode the rows are read and checked but not written.
+author: Rhys Campbell (@rhysmeister)
+options:
+  login_user:
+    description: The Cassandra user to login with.
+    type: str
+  login_password:
+    description: The Cassandra password to login with.
+    type: str
+  ssl:
+    description: Uses SSL encryption if basic SSL encryption is enabled on Cassandra cluster (without client/server verification)
+    type: bool
+    default: False
+  ssl_cert_reqs:
+    description: SSL verification mode.
+    type: str
+    choices:
+      - 'CERT_NONE'
+      - 'CERT_OPTIONAL'
+      - 'CERT_REQUIRED'
+    default: 'CERT_NONE'
+  ssl_ca_certs:
+    description:
+        The SSL CA chain or certificate location to confirm supplied certificate validity
+        (required when ssl_cert_reqs is set to CERT_OPTIONAL or CERT_REQUIRED)
+    type: str
+    default: ''
+  login_host:
+    description: The Cassandra hostname.
+    type: list
+    elements: str
+  login_port:
+    description: The Cassandra port.
+    type: int
+    default: 9042
+  keyspace:
+    description: The keyspace of the table.
+    type: str
+    required: true
+  table:
+    description: The table to load the rows into.
+    type: str
+    required: true
+  src:
+    description: Path of the file, on the managed node, to load.
+    type: path
+    required: true
+  format:
+    description:
+      - The format of I(src).
+      - C(jsonl) holds a JSON object per row, keyed by column name.
+      - C(csv) holds a line per row, after a header of the column names unless I(header) is false.
+    type: str
+    choices:
+      - jsonl
+      - csv
+    default: jsonl
+  header:
+    description:
+      - Whether the first line of a csv file names its columns. When false I(columns) does, in order.
+    type: bool
+    default: true
+  columns:
+    description:
+      - The columns to load, which have to include the primary key.
+      - By default those of the header of a csv file, or all the columns of the table for a jsonl file.
+    type: list
+    elements: str
+  batch_size:
+    description:
+      - The number of rows of the same partition written together in an unlogged batch.
+      - Rows are grouped within a chunk of the file, so rows of a partition need to be close to each other
+        to be batched. 1 writes every row on its own.
+    type: int
+    default: 1
+  concurrency:
+    description:
+      - The number of writes in flight at once.
+    type: int
+    default: 32
+  retries:
+    description:
+      - The number of times a row that failed is written again on its own, waiting longer each time.
+    type: int
+    default: 3
+  max_errors:
+    description:
+      - The number of rows that can fail, or not be read, before the load stops. -1 for no limit.
+      - The module fails whenever a row did.
+    type: int
+    default: 0
+  timeout:
+    description:
+      - The number of seconds to wait for each write.
+    type: float
+    default: 10
+  consistency_level:
+    description:
+      - Consistency level to perform cassandra queries with.
+      - Not all consistency levels are supported by read or write connections.\
+        When a level is not supported then LOCAL_ONE, the default is used.
+      - Consult the README.md on GitHub for further details.
+    type: str
+    default: "LOCAL_ONE"
+    choices:
+        - ANY
+        - ONE
+        - TWO
+        - THREE
+        - QUORUM
+        - ALL
+        - LOCAL_QUORUM
+        - EACH_QUORUM
+        - SERIAL
+        - LOCAL_SERIAL
+        - LOCAL_ONE
+
+requirements:
+  - cassandra-driver
+'''
+
+EXAMPLES = r'''
+- name: Load reference data
+  community.cassandra.cassandra_load:
+    keyspace: shop
+    table: products
+    src: /opt/seed/products.csv
+    format: csv
+
+- name: Load events, batching the rows of a partition
+  community.cassandra.cassandra_load:
+    keyspace: audit
+    table: events
+    src: /var/tmp/events.jsonl
+    batch_size: 20
+    concurrency: 64
+    consistency_level: LOCAL_QUORUM
+    max_errors: 100
+'''
+
+
+RETURN = '''
+changed:
+  description: Whether any row was written.
+  returned: always
+  type: bool
+rows:
+  description: The number of rows written, or in check mode that would be.
+  returned: always
+  type: int
+  sample: 250000
+rows_failed:
+  description: The number of rows that couldn't be read or written.
+  returned: always
+  type: int
+  sample: 0
+rows_retried:
+  description: The number of times rows were written again after failing.
+  returned: always
+  type: int
+  sample: 12
+batches:
+  description: The number of writes, batches or single rows, made.
+  returned: always
+  type: int
+  sample: 12500
+seconds:
+  description: The time taken by the load.
+  returned: always
+  type: float
+  sample: 31.2
+rows_per_second:
+  description: The rows written per second.
+  returned: always
+  type: float
+  sample: 8012.8
+errors:
+  description: The first errors, with the line of the row.
+  returned: always
+  type: list
+  elements: dict
+  sample: [{"line": 12, "msg": "line 12: column price: abc is not a decimal"}]
+msg:
+  description: Exceptions encountered during module execution.
+  returned: on error
+  type: str
+'''
+
+__metaclass__ = type
+
+import time
+
+try:
+    from cassandra.cluster import EXEC_PROFILE_DEFAULT
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra import AuthenticationFailed
+    from cassandra.metadata import protect_name
+    from cassandra.query import BatchStatement, BatchType, UNSET_VALUE
+    from cassandra import ConsistencyLevel
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    # This is here for ansible-test import (when cassandra-driver is not installed)
+    class ConsistencyLevel:
+        ANY = "ANY"
+        ONE = "ONE"
+        TWO = "TWO"
+        THREE = "THREE"
+        QUORUM = "QUORUM"
+        ALL = "ALL"
+        LOCAL_QUORUM = "LOCAL_QUORUM"
+        EACH_QUORUM = "EACH_QUORUM"
+        SERIAL = "SERIAL"
+        LOCAL_SERIAL = "LOCAL_SERIAL"
+        LOCAL_ONE = "LOCAL_ONE"
+
+    ConsistencyLevel.name_to_value = {
+        "ANY": ConsistencyLevel.ANY,
+        "ONE": ConsistencyLevel.ONE,
+        "TWO": ConsistencyLevel.TWO,
+        "THREE": ConsistencyLevel.THREE,
+        "QUORUM": ConsistencyLevel.QUORUM,
+        "ALL": ConsistencyLevel.ALL,
+        "LOCAL_QUORUM": ConsistencyLevel.LOCAL_QUORUM,
+        "EACH_QUORUM": ConsistencyLevel.EACH_QUORUM,
+        "SERIAL": ConsistencyLevel.SERIAL,
+        "LOCAL_SERIAL": ConsistencyLevel.LOCAL_SERIAL,
+        "LOCAL_ONE": ConsistencyLevel.LOCAL_ONE,
+    }
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    ProfileSession,
+    cql_ssl_context,
+    execute_concurrently,
+    read_and_write_sessions,
+    read_write_cluster,
+    table_metadata,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_load import (
+    RowError,
+    csv_header,
+    decode_value,
+    partition_batches,
+    read_rows,
+)
+
+# Chunks of the file hold this many times concurrency * batch_size rows
+CHUNK_FACTOR = 4
+
+# Seconds waited before the first retry, doubled for every other
+RETRY_DELAY = 0.5
+
+# The number of errors returned
+MAX_REPORTED_ERRORS = 10
+
+# =========================================
+# Cassandra module specific support methods
+# =========================================
+
+
+def insert_cql(keyspace, table, columns):
+    return "INSERT INTO {0}.{1} ({2}) VALUES ({3})".format(
+        protect_name(keyspace),
+        protect_name(table),
+        ", ".join(protect_name(column) for column in columns),
+        ", ".join("?" for column in columns))
+
+
+def load_columns(cluster, keyspace, table, columns, src, file_format):
+    '''
+    Returns the columns of keyspace.table loaded from src: columns when
+    given, else those of the header of a csv file or every column of the
+    table. Raises ValueError when the table doesn't exist, lacks one of
+    them or one of its primary key columns isn't loaded.
+    '''
+    table_meta = table_metadata(cluster, keyspace, table)
+    if table_meta is None:
+        raise ValueError("Table {0}.{1} does not exist".format(keyspace, table))
+    if not columns:
+        columns = csv_header(src) if file_format == 'csv' else list(table_meta.columns)
+    unknown = [column for column in columns if column not in table_meta.columns]
+    if unknown:
+        raise ValueError("Table {0}.{1} has no column {2}".format(keyspace, table, ", ".join(unknown)))
+    missing = [column.name for column in table_meta.primary_key if column.name not in columns]
+    if missing:
+        raise ValueError("The primary key column {0} is not loaded".format(", ".join(missing)))
+    return columns
+
+
+class RowLoader(object):
+    '''
+    Writes rows, from read_rows(), to a table with prepared, the statement
+    from insert_cql() for columns, a chunk at a time with up to concurrency
+    writes in flight, rows of a partition being batched by up to
+    batch_size. Keeps count of what was written and of what failed.
+    '''
+
+    def __init__(self, session, prepared, columns, column_types, concurrency, batch_size=1, retries=3,
+                 max_errors=0, check_mode=False):
+        self.session = session
+        self.prepared = prepared
+        self.columns = columns
+        self.column_types = column_types
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.max_errors = max_errors
+        self.check_mode = check_mode
+        self.rows = 0
+        self.rows_failed = 0
+        self.rows_retried = 0
+        self.batches = 0
+        self.errors = []
+        self.stopped_at = None
+
+    def fail(self, line, error):
+        self.rows_failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "msg": str(error)})
+
+    def stopped(self):
+        return 0 <= self.max_errors < self.rows_failed
+
+    def bind_values(self, line, row):
+        '''
+        Returns (values, statement), the values of row, {column: value}, in
+        the order of columns, UNSET_VALUE for those it lacks, and prepared
+        bound to them. Raises RowError, also when a value can't be
+        serialized for its column.
+        '''
+        values = []
+        for column, cql_type in zip(self.columns, self.column_types):
+            if column not in row:
+                values.append(UNSET_VALUE)
+                continue
+            try:
+                values.append(decode_value(cql_type, row[column]))
+            except Exception as excep:
+                raise RowError(line, "column {0}: {1}".format(column, excep))
+        for index in self.prepared.routing_key_indexes or ():
+            if values[index] is None or values[index] is UNSET_VALUE:
+                raise RowError(line, "partition key column {0} has no value".format(self.columns[index]))
+        try:
+            return values, self.prepared.bind(values)
+        except Exception as excep:
+            raise RowError(line, excep)
+
+    def statement(self, rows):
+        if len(rows) == 1:
+            return rows[0][2]
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for line, values, bound in rows:
+            batch.add(bound)
+        return batch
+
+    def write(self, batches):
+        '''
+        Writes batches, [[(line, values, statement)]], returning the
+        [((line, values, statement), exception)] of the rows of those that
+        failed.
+        '''
+        statements = [self.statement(rows) for rows in batches]
+        rows_of = dict((id(statement), rows) for statement, rows in zip(statements, batches))
+        self.batches += len(statements)
+        return [(row, excep)
+                for statement, excep in execute_concurrently(self.session, statements, self.concurrency)
+                for row in rows_of[id(statement)]]
+
+    def load_chunk(self, chunk):
+        '''
+        Writes chunk, [(line, values, statement)], retrying the rows that
+        fail on their own.
+        '''
+        if self.check_mode:
+            self.rows += len(chunk)
+            return
+        failed = self.write(partition_batches(chunk, self.prepared.routing_key_indexes or (), self.batch_size))
+        for attempt in range(self.retries):
+            if not failed:
+                break
+            time.sleep(RETRY_DELAY * 2 ** attempt)
+            self.rows_retried += len(failed)
+            failed = self.write([[row] for row, excep in failed])
+        self.rows += len(chunk) - len(failed)
+        for row, excep in failed:
+            self.fail(row[0], RowError(row[0], excep))
+
+    def load(self, rows):
+        '''
+        Loads rows, (line, {column: value}, error) as read_rows() yields
+        them, a chunk at a time, until they're all loaded or too many
+        failed.
+        '''
+        chunk_size = self.concurrency * self.batch_size * CHUNK_FACTOR
+        chunk = []
+        for line, row, error in rows:
+            if error is None:
+                try:
+                    chunk.append((line,) + self.bind_values(line, row))
+                except RowError as excep:
+                    error = excep
+            if error is not None:
+                self.fail(line, error)
+            if len(chunk) >= chunk_size:
+                self.load_chunk(chunk)
+                chunk = []
+            if self.stopped():
+                self.stopped_at = line
+                return
+        if chunk:
+            self.load_chunk(chunk)
+
+
+############################################
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            login_user=dict(type='str'),
+            login_password=dict(type='str', no_log=True),
+            ssl=dict(type='bool', default=False),
+            ssl_cert_reqs=dict(type='str',
+                               required=False,
+                               default='CERT_NONE',
+                               choices=['CERT_NONE',
+                                        'CERT_OPTIONAL',
+                                        'CERT_REQUIRED']),
+            ssl_ca_certs=dict(type='str', default=''),
+            login_host=dict(type='list', elements='str'),
+            login_port=dict(type='int', default=9042),
+            keyspace=dict(type='str', required=True, no_log=False),
+            table=dict(type='str', required=True),
+            src=dict(type='path', required=True),
+            format=dict(type='str', default='jsonl', choices=['jsonl', 'csv']),
+            header=dict(type='bool', default=True),
+            columns=dict(type='list', elements='str'),
+            batch_size=dict(type='int', default=1),
+            concurrency=dict(type='int', default=32),
+            retries=dict(type='int', default=3),
+            max_errors=dict(type='int', default=0),
+            timeout=dict(type='float', default=10),
+            consistency_level=dict(type='str',
+                                   required=False,
+                                   default="LOCAL_ONE",
+                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+        supports_check_mode=True
+    )
+
+    if HAS_CASSANDRA_DRIVER is False:
+        msg = ("This module requires the cassandra-driver python"
+               " driver. You can probably install it with pip"
+               " install cassandra-driver.")
+        module.fail_json(msg=msg)
+
+    for option in ('batch_size', 'concurrency'):
+        if module.params[option] < 1:
+            module.fail_json(msg="{0} must be at least 1".format(option))
+    if module.params['retries'] < 0:
+        module.fail_json(msg="retries can't be negative")
+    if module.params['format'] == 'csv' and not module.params['header'] and not module.params['columns']:
+        module.fail_json(msg="columns is required for a csv file without header")
+
+    keyspace = module.params['keyspace']
+    table = module.params['table']
+    src = module.params['src']
+    file_format = module.params['format']
+    header = module.params['header'] or file_format != 'csv'
+
+    try:
+        auth_provider = None
+        if module.params['login_user'] is not None:
+            auth_provider = PlainTextAuthProvider(
+                username=module.params['login_user'],
+                password=module.params['login_password']
+            )
+        ssl_context = cql_ssl_context(module,
+                                      module.params['ssl'],
+                                      module.params['ssl_cert_reqs'],
+                                      module.params['ssl_ca_certs'])
+        cluster = read_write_cluster(module.params['login_host'],
+                                     module.params['login_port'],
+                                     auth_provider,
+                                     ssl_context,
+                                     module.params['consistency_level'],
+                                     "lazy")
+        session_r, session_w = read_and_write_sessions(cluster)
+    except AuthenticationFailed as auth_failed:
+        module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
+    except Exception as excep:
+        module.fail_json(msg="Error connecting to cluster: {0}".format(excep))
+
+    try:
+        try:
+            columns = load_columns(cluster, keyspace, table, module.params['columns'], src, file_format)
+        except ValueError as excep:
+            module.fail_json(msg=str(excep))
+
+        prepared = session_w.prepare(insert_cql(keyspace, table, columns))
+        writer = ProfileSession(session_w.session,
+                                session_w.execution_profile_clone_update(EXEC_PROFILE_DEFAULT,
+                                                                         request_timeout=module.params['timeout']))
+        loader = RowLoader(writer, prepared, columns, [column.type for column in prepared.column_metadata],
+                           module.params['concurrency'],
+                           batch_size=module.params['batch_size'],
+                           retries=module.params['retries'],
+                           max_errors=module.params['max_errors'],
+                           check_mode=module.check_mode)
+        start = time.time()
+        loader.load(read_rows(src, file_format, module.params['columns'], header))
+        seconds = time.time() - start
+        result = dict(
+            changed=loader.rows > 0 and not module.check_mode,
+            rows=loader.rows,
+            rows_failed=loader.rows_failed,
+            rows_retried=loader.rows_retried,
+            batches=loader.batches,
+            seconds=round(seconds, 3),
+            rows_per_second=round(loader.rows / seconds, 1) if seconds > 0 else 0.0,
+            errors=loader.errors,
+        )
+        if loader.rows_failed:
+            msg = "{0} rows failed".format(loader.rows_failed)
+            if loader.stopped_at is not None:
+                msg += ", the load stopped at line {0}".format(loader.stopped_at)
+            module.fail_json(msg="{0}: {1}".format(msg, loader.errors[0]['msg']), **result)
+        module.exit_json(**result)
+    except (IOError, OSError) as excep:
+        module.fail_json(msg="Error reading {0}: {1}".format(src, excep))
+    except Exception as excep:
+        module.fail_json(msg="An error occured: {0}".format(excep))
+    finally:
+        cluster.shutdown()
+
+
+if __name__ == '__main__':
+    main()
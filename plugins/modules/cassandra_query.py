@@ -0,0 +1,542 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+
+
+DOCUMENTATION = r'''
+---
+module: cassandra_query
+short_description: Run CQL statements through the Python driver.
+description:
+  - Run CQL statements, given inline, in a file or as a list, over a single connection made with the
+    cassandra-driver, rather than through the cqlsh shell as M(community.cassandra.cassandra_cqlsh) does.
+  - Rows are returned as a list of dicts, one per row, keyed by column name.
+  - Statements run in order and the module stops at the first one that fails.
+  - SELECT, DESCRIBE and LIST statements are read with the read consistency level, any other with the write
+    one, see the README.md on GitHub. Any statement other than those marks the task as changed.
+  - Commands of the cqlsh shell, such as CONSISTENCY, COPY or SOURCE, aren't CQL and are refused.
+  - With I(dest) the rows of the last statement are written to a file on the managed node, a page at a time,
+    rather than returned, so that large tables can be exported.
+author: Rhys Campbell (@rhysmeister)
+options:
+  login_user:
+    description: The Cassandra user to login with.
+    type: str
+  login_password:
+    description: The Cassandra password to login with.
+    type: str
+  ssl:
+    description: Uses SSL encryption if basic SSL encryption is enabled on Cassandra cluster (without client/server verification)
+    type: bool
+    default: False
+  ssl_cert_reqs:
+    description: SSL verification mode.
+    type: str
+    choices:
+      - 'CERT_NONE'
+      - 'CERT_OPTIONAL'
+      - 'CERT_REQUIRED'
+    default: 'CERT_NONE'
+  ssl_ca_certs:
+    description:
+        The SSL CA chain or certificate location to confirm supplied certificate validity
+        (required when ssl_cert_reqs is set to CERT_OPTIONAL or CERT_REQUIRED)
+    type: str
+    default: ''
+  login_host:
+    description: The Cassandra hostname.
+    type: list
+    elements: str
+  login_port:
+    description: The Cassandra port.
+    type: int
+    default: 9042
+  keyspace:
+    description:
+      - The keyspace unqualified table names refer to.
+    type: str
+  query:
+    description:
+      - One or more CQL statements, separated by semicolons.
+      - Mutually exclusive with I(file) and I(statements).
+    type: str
+  file:
+    description:
+      - Path to a file of CQL statements, separated by semicolons, on the managed node.
+      - Mutually exclusive with I(query) and I(statements).
+    type: path
+  parameters:
+    description:
+      - The values bound to the placeholders of I(query) when it holds a single statement.
+      - A list for positional placeholders, a dict for named ones.
+    type: raw
+  statements:
+    description:
+      - The statements to run, each with its own bind parameters, consistency level and timeout.
+      - Mutually exclusive with I(query) and I(file).
+    type: list
+    elements: dict
+    suboptions:
+      query:
+        description: The CQL statement.
+        type: str
+        required: true
+      parameters:
+        description: The values bound to the placeholders of the statement, a list or a dict.
+        type: raw
+      consistency_level:
+        description: The consistency level of the statement, overriding I(consistency_level).
+        type: str
+        choices:
+          - ANY
+          - ONE
+          - TWO
+          - THREE
+          - QUORUM
+          - ALL
+          - LOCAL_QUORUM
+          - EACH_QUORUM
+          - SERIAL
+          - LOCAL_SERIAL
+          - LOCAL_ONE
+      timeout:
+        description: The number of seconds to wait for the statement, overriding I(timeout).
+        type: float
+  prepare:
+    description:
+      - Statements with parameters are prepared, once per distinct statement, and their parameters bound
+        on the server. Placeholders are then C(?) or C(:name).
+      - When false the parameters are bound in the module and placeholders are C(%s) or C(%(name)s).
+    type: bool
+    default: true
+  timeout:
+    description:
+      - The number of seconds to wait for each statement.
+      - With I(dest) this is the time allowed for each page of rows.
+    type: float
+    default: 10
+  fetch_size:
+    description:
+      - The number of rows fetched from the cluster at a time.
+    type: int
+    default: 5000
+  dest:
+    description:
+      - Path of a file, on the managed node, the rows of the last statement, which has to be a SELECT, are written to.
+      - The rows are written as they are fetched, a page of I(fetch_size) rows at a time, and aren't returned.
+      - The file is replaced once all the rows are written, and is only readable by the user the module runs as.
+    type: path
+  format:
+    description:
+      - The format of I(dest).
+      - C(jsonl) writes a JSON object per row, keyed by column name.
+      - C(csv) writes a header of the column names, then a line per row. Nulls are empty and collections,
+        user defined types and booleans are written as JSON.
+    type: str
+    choices:
+      - jsonl
+      - csv
+    default: jsonl
+  consistency_level:
+    description:
+      - Consistency level to perform cassandra queries with.
+      - Not all consistency levels are supported by read or write connections.\
+        When a level is not supported then LOCAL_ONE, the default is used.
+      - Consult the README.md on GitHub for further details.
+    type: str
+    default: "LOCAL_ONE"
+    choices:
+        - ANY
+        - ONE
+        - TWO
+        - THREE
+        - QUORUM
+        - ALL
+        - LOCAL_QUORUM
+        - EACH_QUORUM
+        - SERIAL
+        - LOCAL_SERIAL
+        - LOCAL_ONE
+
+requirements:
+  - cassandra-driver
+'''
+
+EXAMPLES = r'''
+- name: Read rows
+  community.cassandra.cassandra_query:
+    query: "SELECT userid, email FROM killrvideo.users WHERE userid = ?"
+    parameters:
+      - "{{ userid }}"
+  register: users
+
+- name: Run a migration file
+  community.cassandra.cassandra_query:
+    file: /opt/app/migrations/001_users.cql
+    keyspace: killrvideo
+    timeout: 60
+
+- name: Run statements with their own consistency level
+  community.cassandra.cassandra_query:
+    statements:
+      - query: "INSERT INTO killrvideo.users (userid, email) VALUES (:userid, :email)"
+        parameters:
+          userid: 8bbd9a2e-6b1e-4d3a-8a5e-0a0b3d8b1c7d
+          email: alice@example.com
+        consistency_level: QUORUM
+      - query: "SELECT count(*) FROM killrvideo.users"
+        timeout: 120
+
+- name: Export a large table
+  community.cassandra.cassandra_query:
+    query: "SELECT * FROM audit.events"
+    dest: /var/tmp/events.csv
+    format: csv
+    fetch_size: 10000
+  register: export
+
+'''
+
+
+RETURN = '''
+changed:
+  description: Whether any statement other than a SELECT, DESCRIBE or LIST ran, or I(dest) was written.
+  returned: always
+  type: bool
+rows:
+  description: The rows of the last statement, as dicts keyed by column name.
+  returned: on success, unless dest is set
+  type: list
+  elements: dict
+  sample: [{"userid": "8bbd9a2e-6b1e-4d3a-8a5e-0a0b3d8b1c7d", "email": "alice@example.com"}]
+results:
+  description: The statements run, in order, with their rows, or with I(dest) the rows_written by the last one.
+  returned: always
+  type: list
+  elements: dict
+  sample: [{"query": "SELECT email FROM killrvideo.users LIMIT 1", "rows": [{"email": "alice@example.com"}]}]
+export:
+  description: What was written to I(dest).
+  returned: when dest is set
+  type: dict
+  contains:
+    dest:
+      description: The path written to.
+      type: str
+    format:
+      description: The format of the file.
+      type: str
+    rows:
+      description: The number of rows written.
+      type: int
+    bytes:
+      description: The size of the file.
+      type: int
+    seconds:
+      description: The time taken to fetch and write the rows.
+      type: float
+  sample: {"dest": "/var/tmp/events.csv", "format": "csv", "rows": 250000, "bytes": 31457280, "seconds": 42.1}
+failed_statement:
+  description: The statement that failed.
+  returned: on error
+  type: str
+msg:
+  description: Exceptions encountered during module execution.
+  returned: on error
+  type: str
+'''
+
+__metaclass__ = type
+
+import os
+import time
+
+try:
+    from cassandra.cluster import EXEC_PROFILE_DEFAULT
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra import AuthenticationFailed
+    from cassandra.query import SimpleStatement, dict_factory
+    from cassandra import ConsistencyLevel
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    # This is here for ansible-test import (when cassandra-driver is not installed)
+    class ConsistencyLevel:
+        ANY = "ANY"
+        ONE = "ONE"
+        TWO = "TWO"
+        THREE = "THREE"
+        QUORUM = "QUORUM"
+        ALL = "ALL"
+        LOCAL_QUORUM = "LOCAL_QUORUM"
+        EACH_QUORUM = "EACH_QUORUM"
+        SERIAL = "SERIAL"
+        LOCAL_SERIAL = "LOCAL_SERIAL"
+        LOCAL_ONE = "LOCAL_ONE"
+
+    ConsistencyLevel.name_to_value = {
+        "ANY": ConsistencyLevel.ANY,
+        "ONE": ConsistencyLevel.ONE,
+        "TWO": ConsistencyLevel.TWO,
+        "THREE": ConsistencyLevel.THREE,
+        "QUORUM": ConsistencyLevel.QUORUM,
+        "ALL": ConsistencyLevel.ALL,
+        "LOCAL_QUORUM": ConsistencyLevel.LOCAL_QUORUM,
+        "EACH_QUORUM": ConsistencyLevel.EACH_QUORUM,
+        "SERIAL": ConsistencyLevel.SERIAL,
+        "LOCAL_SERIAL": ConsistencyLevel.LOCAL_SERIAL,
+        "LOCAL_ONE": ConsistencyLevel.LOCAL_ONE,
+    }
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.common.text.converters import to_text
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_ssl_context,
+    read_and_write_sessions,
+    read_write_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_broker import encode_value
+from ansible_collections.community.cassandra.plugins.module_utils.cql_export import (
+    EXPORT_FORMATS,
+    export_rows,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_statements import (
+    is_cqlsh_command,
+    is_read_statement,
+    split_statements,
+)
+
+# =========================================
+# Cassandra module specific support methods
+# =========================================
+
+
+class StatementRunner(object):
+    '''
+    Runs statements on the read or write session, from
+    read_and_write_sessions(), returning their rows as dicts. Statements
+    with parameters are prepared once per distinct statement when prepare
+    is set. Rows are fetched fetch_size at a time. Exports are moved into
+    place with move, see cql_export.
+    '''
+
+    def __init__(self, session_r, session_w, prepare, timeout, fetch_size=5000, move=None):
+        self.sessions = {
+            True: (session_r, session_r.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=dict_factory)),
+            False: (session_w, session_w.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=dict_factory)),
+        }
+        self.prepare = prepare
+        self.timeout = timeout
+        self.fetch_size = fetch_size
+        self.move = move
+        self.prepared = {}
+
+    def statement(self, session, query, parameters, consistency_level):
+        '''
+        Returns the (statement, parameters) to execute query with.
+        '''
+        if parameters is not None and self.prepare:
+            if query not in self.prepared:
+                self.prepared[query] = session.prepare(query)
+            statement = self.prepared[query].bind(parameters)
+            parameters = None
+        else:
+            statement = SimpleStatement(query)
+        if consistency_level is not None:
+            statement.consistency_level = ConsistencyLevel.name_to_value[consistency_level]
+        statement.fetch_size = self.fetch_size
+        return statement, parameters
+
+    def execute(self, query, parameters=None, consistency_level=None, timeout=None):
+        '''
+        Runs query and returns its ResultSet, which fetches the pages
+        following the first as it is iterated over.
+        '''
+        session, profile = self.sessions[is_read_statement(query)]
+        statement, parameters = self.statement(session, query, parameters, consistency_level)
+        return session.execute(statement, parameters,
+                               timeout=self.timeout if timeout is None else timeout,
+                               execution_profile=profile)
+
+    def run(self, query, parameters=None, consistency_level=None, timeout=None):
+        '''
+        Runs query and returns its rows, read through every page.
+        '''
+        result = self.execute(query, parameters, consistency_level, timeout)
+        if not result.column_names:
+            return []
+        return [dict((column, encode_value(value)) for column, value in row.items()) for row in result]
+
+    def export(self, path, file_format, query, parameters=None, consistency_level=None, timeout=None):
+        '''
+        Runs query and writes its rows to path in file_format as they are
+        fetched. Returns the {dest, format, rows, bytes, seconds} written.
+        '''
+        start = time.time()
+        result = self.execute(query, parameters, consistency_level, timeout)
+        columns = list(result.column_names or [])
+        count = export_rows(([row[column] for column in columns] for row in result), columns, path, file_format, move=self.move)
+        return {
+            "dest": path,
+            "format": file_format,
+            "rows": count,
+            "bytes": os.path.getsize(path),
+            "seconds": round(time.time() - start, 3),
+        }
+
+
+def read_statements(params):
+    '''
+    Returns the statements to run from the query, file or statements
+    options as [{query, parameters, consistency_level, timeout}]. Raises
+    ValueError for a cqlsh command, or parameters with several statements.
+    '''
+    if params['statements'] is not None:
+        statements = [dict(item, query=item['query'].strip().rstrip(";")) for item in params['statements']]
+    else:
+        if params['file'] is not None:
+            with open(params['file'], 'rb') as cql_file:
+                text = to_text(cql_file.read(), errors='surrogate_or_strict')
+        else:
+            text = params['query']
+        queries = split_statements(text)
+        if params['parameters'] is not None and len(queries) != 1:
+            raise ValueError("parameters can only be used with a single statement, got {0}".format(len(queries)))
+        statements = [dict(query=query, parameters=params['parameters'], consistency_level=None, timeout=None)
+                      for query in queries]
+    for statement in statements:
+        if is_cqlsh_command(statement['query']):
+            raise ValueError("{0} is a cqlsh command rather than CQL".format(statement['query'].split()[0]))
+    return statements
+
+
+def run_statements(runner, statements, dest=None, file_format="jsonl"):
+    '''
+    Runs statements in order, stopping at the first one that fails.
+    Returns (results, failed, export): the [{query, rows}] of those that
+    ran, the (query, exception) that failed, or None, and what
+    runner.export() wrote to dest of the rows of the last statement, or
+    None. The last statement's result then has rows_written, not rows.
+    '''
+    results = []
+    export = None
+    for index, statement in enumerate(statements):
+        arguments = (statement['query'], statement['parameters'], statement['consistency_level'], statement['timeout'])
+        try:
+            if dest is not None and index == len(statements) - 1:
+                export = runner.export(dest, file_format, *arguments)
+                results.append({"query": statement['query'], "rows_written": export['rows']})
+            else:
+                results.append({"query": statement['query'], "rows": runner.run(*arguments)})
+        except Exception as excep:
+            return results, (statement['query'], excep), None
+    return results, None, export
+
+
+############################################
+
+
+def main():
+    statement_spec = dict(
+        query=dict(type='str', required=True),
+        parameters=dict(type='raw'),
+        consistency_level=dict(type='str', choices=list(ConsistencyLevel.name_to_value.keys())),
+        timeout=dict(type='float'),
+    )
+    module = AnsibleModule(
+        argument_spec=dict(
+            login_user=dict(type='str'),
+            login_password=dict(type='str', no_log=True),
+            ssl=dict(type='bool', default=False),
+            ssl_cert_reqs=dict(type='str',
+                               required=False,
+                               default='CERT_NONE',
+                               choices=['CERT_NONE',
+                                        'CERT_OPTIONAL',
+                                        'CERT_REQUIRED']),
+            ssl_ca_certs=dict(type='str', default=''),
+            login_host=dict(type='list', elements='str'),
+            login_port=dict(type='int', default=9042),
+            keyspace=dict(type='str', no_log=False),
+            query=dict(type='str'),
+            file=dict(type='path'),
+            parameters=dict(type='raw'),
+            statements=dict(type='list', elements='dict', options=statement_spec),
+            prepare=dict(type='bool', default=True),
+            timeout=dict(type='float', default=10),
+            fetch_size=dict(type='int', default=5000),
+            dest=dict(type='path'),
+            format=dict(type='str', default='jsonl', choices=list(EXPORT_FORMATS)),
+            consistency_level=dict(type='str',
+                                   required=False,
+                                   default="LOCAL_ONE",
+                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+        mutually_exclusive=[['query', 'file', 'statements'], ['parameters', 'statements']],
+        required_one_of=[['query', 'file', 'statements']],
+        supports_check_mode=False
+    )
+
+    if HAS_CASSANDRA_DRIVER is False:
+        msg = ("This module requires the cassandra-driver python"
+               " driver. You can probably install it with pip"
+               " install cassandra-driver.")
+        module.fail_json(msg=msg)
+
+    try:
+        statements = read_statements(module.params)
+    except (IOError, OSError, ValueError) as excep:
+        module.fail_json(msg=str(excep))
+    dest = module.params['dest']
+    if dest is not None and not (statements and is_read_statement(statements[-1]['query'])):
+        module.fail_json(msg="dest needs the last statement to be a SELECT")
+    if module.params['fetch_size'] < 1:
+        module.fail_json(msg="fetch_size must be at least 1")
+
+    try:
+        auth_provider = None
+        if module.params['login_user'] is not None:
+            auth_provider = PlainTextAuthProvider(
+                username=module.params['login_user'],
+                password=module.params['login_password']
+            )
+        ssl_context = cql_ssl_context(module,
+                                      module.params['ssl'],
+                                      module.params['ssl_cert_reqs'],
+                                      module.params['ssl_ca_certs'])
+        cluster = read_write_cluster(module.params['login_host'],
+                                     module.params['login_port'],
+                                     auth_provider,
+                                     ssl_context,
+                                     module.params['consistency_level'],
+                                     "lazy")
+        session_r, session_w = read_and_write_sessions(cluster)
+        if module.params['keyspace'] is not None:
+            session_r.set_keyspace(module.params['keyspace'])
+    except AuthenticationFailed as auth_failed:
+        module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
+    except Exception as excep:
+        module.fail_json(msg="Error connecting to cluster: {0}".format(excep))
+
+    runner = StatementRunner(session_r, session_w, module.params['prepare'], module.params['timeout'],
+                             module.params['fetch_size'], module.atomic_move)
+    results, failed, export = run_statements(runner, statements, dest, module.params['format'])
+    result = dict(
+        changed=export is not None or any(not is_read_statement(item['query']) for item in results),
+        results=results,
+    )
+    if failed is not None:
+        module.fail_json(msg="Statement {0} failed: {1}".format(len(results) + 1, failed[1]),
+                         failed_statement=failed[0],
+                         **result)
+    if export is not None:
+        result['export'] = export
+    else:
+        result['rows'] = results[-1]['rows'] if results else []
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
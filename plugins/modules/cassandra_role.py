@@ -108,6 +108,17 @@ options:
       - Additional debug output.
     type: bool
     default: false
+  metadata_mode:
+    description:
+      - The cluster metadata the driver downloads when connecting.
+      - C(full) downloads the schema and token metadata of the whole cluster, the driver's default.
+      - C(lazy) downloads none. The module reads what it needs from the schema tables,
+        which connects much faster to clusters with many keyspaces and tables.
+    type: str
+    default: full
+    choices:
+      - full
+      - lazy
   consistency_level:
     description:
       - Consistency level to perform cassandra queries with.
@@ -128,6 +139,9 @@ options:
         - SERIAL
         - LOCAL_SERIAL
         - LOCAL_ONE
+
+extends_documentation_fragment:
+  - community.cassandra.cql_broker_options
 '''
 
 EXAMPLES = r'''
@@ -206,9 +220,7 @@ __metaclass__ = type
 import os.path
 
 try:
-    from cassandra.cluster import Cluster
     from cassandra.cluster import EXEC_PROFILE_DEFAULT
-    from cassandra.cluster import ExecutionProfile
     from cassandra.auth import PlainTextAuthProvider
     from cassandra import AuthenticationFailed
     from cassandra.query import dict_factory
@@ -248,6 +260,21 @@ except Exception:
 
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cql_broker import (
+    connect_read_write,
+    cql_broker_argument_spec,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    read_write_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_roles import (
+    create_alter_role,
+    drop_role,
+    is_role_changed,
+    plan_role_grants,
+    plan_role_permissions,
+    validate_keyspace_permissions,
+)
 
 try:
     from ssl import SSLContext, PROTOCOL_TLS
@@ -278,55 +305,6 @@ def get_role_properties(session, role):
     return role_properties[0]
 
 
-def is_role_changed(role_properties, super_user, login, password,
-                    options, data_centres, update_password):
-    '''
-    Determines whether a role has changed and therefore needs /
-    to be changed with an ALTER ROLE statement.
-    role_properties - Dictionary created from the system_auth.roles keyspace?
-    super_user - User provided boolean value.
-    login - User provided boolean value.
-    password - User provided string value. Not currently dealt with.
-    options - User provided value. Not currently dealt with.
-    data_centres - User provided dictionary value. Not currently dealt with.
-    '''
-    changed = False
-    if role_properties['is_superuser'] != super_user:
-        changed = True
-    elif role_properties['can_login'] != login:
-        changed = True
-    elif update_password is True:
-        changed = True
-    return changed
-
-
-def create_alter_role(module, role, super_user, login, password,
-                      options, data_centres, alter_role):
-    if alter_role is False:
-        cql = "CREATE ROLE '{0}' ".format(role)
-    else:
-        cql = "ALTER ROLE '{0}' ".format(role)
-    cql += "WITH SUPERUSER = {0} ".format(super_user)
-    cql += "AND LOGIN = {0} ".format(login)
-    if password is not None:
-        cql += "AND PASSWORD = '{0}' ".format(password)
-    if options is not None:
-        cql += "AND OPTIONS = {0}".format(str(options))
-    if data_centres is not None:
-        for dc in data_centres:
-            if str(dc.upper()) == "ALL" and len(data_centres) == 1:
-                cql += " AND ACCESS TO ALL DATACENTERS"
-                break
-            else:
-                if len(data_centres) == 1:
-                    cql += " AND ACCESS TO DATACENTERS {{'{0}'}}".format(str(dc))
-                    break
-                else:
-                    cql += " AND ACCESS TO DATACENTERS {{'{0}'}}".format("','".join(data_centres))
-                    break
-    return cql
-
-
 def create_role(role):
     ''' Used for creating roles that are assigned to other users
     '''
@@ -334,68 +312,6 @@ def create_role(role):
     return cql
 
 
-def grant_role(role, grantee):
-    ''' Assign roles to other roles
-    '''
-    cql = "GRANT '{0}' TO '{1}'".format(role,
-                                        grantee)
-    return cql
-
-
-def revoke_role(role, grantee):
-    ''' Revoke a role
-    '''
-    cql = "REVOKE '{0}' FROM '{1}'".format(role,
-                                           grantee)
-    return cql
-
-
-def drop_role(role):
-    cql = "DROP ROLE '{0}'".format(role)
-    return cql
-
-
-def validate_keyspace_permissions(keyspace_permissions):
-    '''
-    All keyspace permissions must exist in the perms list
-    '''
-    perms = [
-        "ALL PERMISSIONS",
-        "CREATE",
-        "ALTER",
-        "AUTHORIZE",
-        "DROP",
-        "MODIFY",
-        "SELECT"
-    ]
-
-    invalid_dict = {}
-
-    for k in keyspace_permissions.keys():
-        for v in keyspace_permissions[k]:
-            if v not in perms:
-                return False
-    return True
-
-
-def grant_permission(permission, role, keyspace):
-    if keyspace == "all_keyspaces":
-        cql = "GRANT {0} ON ALL KEYSPACES TO '{1}'".format(permission,
-                                                           role)
-    else:
-        cql = "GRANT {0} ON KEYSPACE {1} TO '{2}'".format(permission,
-                                                          keyspace,
-                                                          role)
-    return cql
-
-
-def revoke_permission(permission, role, keyspace):
-    cql = "REVOKE {0} ON KEYSPACE {1} FROM '{2}'".format(permission,
-                                                         keyspace,
-                                                         role)
-    return cql
-
-
 def list_role_permissions(session, role):
     '''
     Returned by LIST ALL OF cassandra;
@@ -427,57 +343,23 @@ def list_role_permissions(session, role):
     return role_permissions
 
 
-def does_role_have_permission(role_permissions,
-                              permission,
-                              keyspace):
-    '''
-    Returns true if the permission is already assigned to the role.
-    ALTER DROP SELECT MODIFY AUTHORIZE CREATE - The result from "ALL PERMISSIONS"
-    '''
-    match_count = 0  # When 6 then the permission is matched
-    matched = False
-    all_permissions = [
-        "ALTER",
-        "DROP",
-        "SELECT",
-        "MODIFY",
-        "AUTHORIZE",
-        "CREATE"
-    ]
-    if keyspace == "all_keyspaces":
-        resource = "<all keyspaces>"
-    else:
-        resource = "<keyspace {0}>".format(keyspace)
-    for row in role_permissions:
-        if permission == "ALL PERMISSIONS":  # we need to check for CREATE ALTER DROP SELECT MODIFY AUTHORIZE
-            if row['permission'].strip() in all_permissions and row['resource'].strip() == resource:
-                match_count += 1
-        else:  # specific permission check
-            if row['permission'].strip() == permission and row['resource'].strip() == resource:
-                match_count = len(all_permissions)  # specific permission match straight away
-    if match_count == len(all_permissions):
-        matched = True
-    return matched
-
-
 def build_role_grants(session,
                       role,
-                      roles):
+                      roles,
+                      role_permissions=None):
     '''
     Builds the cql for granting and revoking roles from users
     @session - Cassandra connection
     @role - The role to grant or revoke roles from
     @roles - The list of roles supplied via the module
+    @role_permissions - The list_role_permissions() rows of the role, if
+    already fetched
 
     Returns - A dictionary structure containing GRANT
     and remove cql statements for roles
     '''
-    roles_dict = {
-        "grant": set(),
-        "revoke": set()
-    }
-
-    role_permissions = list_role_permissions(session, role)
+    if role_permissions is None:
+        role_permissions = list_role_permissions(session, role)
 
     current_roles = set()
     for permission in role_permissions:
@@ -485,30 +367,19 @@ def build_role_grants(session,
             current_roles.add(permission['role'])
         else:
             pass  # We don't touch other perms here
-    # Revokes first, roles should be an empty list to revoke all
-    if current_roles is not None and roles is not None:
-        for r in current_roles:
-            if r not in roles:
-                cql = revoke_role(r,
-                                  role)
-                roles_dict['revoke'].add(cql)
-    # grants
-    if roles is not None:
-        for r in roles:
-            if r not in current_roles:
-                cql = grant_role(r,
-                                 role)
-                roles_dict['grant'].add(cql)
-    return roles_dict
+    return plan_role_grants(current_roles, role, roles)
 
 
 def build_role_permissions(session,
                            keyspace_permissions,
-                           role):
+                           role,
+                           role_permissions=None):
     '''
     session - Cassandra cluster session.
     keyspace_permissions - Dictionary containing new keyspace permissions
     role - The Cassandra role name
+    role_permissions - The list_role_permissions() rows of the role, if
+    already fetched. Otherwise they are fetched, once.
 
     Returns - A dictionary structure containing GRANT and remove cql statements
 
@@ -521,118 +392,22 @@ def build_role_permissions(session,
 
     '''
 
-    perms_dict = {
-        "grant": set(),
-        "revoke": set(),
-        "temp": set()
-    }
-
-    # Permissions to grant
-    if keyspace_permissions is not None:
-        for keyspace in keyspace_permissions.keys():
-            for permission in keyspace_permissions[keyspace]:
-                role_permissions = list_role_permissions(session,
-                                                         role)
-                bool = does_role_have_permission(role_permissions,
-                                                 permission,
-                                                 keyspace)
-                perms_dict['temp'].add("{0} {1} {2}".format(permission, keyspace, bool))
-
-                if bool:
-                    pass  # permission is already assigned
-                else:
-                    cql = grant_permission(permission,
-                                           role,
-                                           keyspace)
-                    perms_dict['grant'].add(cql)
-    # If the all_keyspaces key does not exist and there are "<all keyspaces>"
-    # resources present we can revoke all
-    # Permissions to revoke from specific keyspaces
-    role_permissions = list_role_permissions(session, role)  # need to reset resultset
-    for permission in role_permissions:
-        if keyspace_permissions is not None:
-            for keyspace in keyspace_permissions.keys():
-                if permission['resource'] == "<all keyspaces>"\
-                        and "all_keyspaces" not in keyspace_permissions.keys()\
-                        and permission['role'] == role:
-                    cql = "REVOKE ALL PERMISSIONS ON ALL KEYSPACES FROM '{0}'".format(role)
-                    if cql not in perms_dict['revoke']:  # only do this the once
-                        perms_dict['revoke'].add(cql)
-                elif permission['resource'] == "<all keyspaces>" \
-                        and "ALL PERMISSIONS" in keyspace_permissions[keyspace]\
-                        and permission['role'] == role:
-                    # No revokes needed
-                    pass
-                elif permission['resource'].startswith('<keyspace') \
-                        and permission['role'] == role:
-                    ks = permission['resource'].split(' ')[1].replace('>', '').strip()
-                    if ks in keyspace_permissions.keys() \
-                            and permission['permission'] not in keyspace_permissions[ks] \
-                            and "ALL PERMISSIONS" not in keyspace_permissions[ks]:
-                        cql = revoke_permission(permission['permission'],
-                                                role,
-                                                ks)
-                        perms_dict['revoke'].add(cql)
-            # This is for the case when the keyspace permission has not been provided
-            if permission['resource'].startswith('<keyspace') \
-                    and permission['role'] == role \
-                    and permission['resource'].split(' ')[1].replace('>', '') not in keyspace_permissions.keys():
-                cql = revoke_permission(permission['permission'],
-                                        role,
-                                        ks)
-                perms_dict['revoke'].add(cql)
-        else:
-            current_roles = set()
-            if permission['resource'].startswith('<keyspace') \
-                    and permission['role'] == role:  # We don't touch other permissions
-                ks = permission['resource'].split(' ')[1].replace('>', '')
-                cql = revoke_permission(permission['permission'],
-                                        role,
-                                        ks)
-                perms_dict['revoke'].add(cql)
-    return perms_dict
+    if role_permissions is None:
+        role_permissions = list(list_role_permissions(session, role))
+    return plan_role_permissions(role_permissions, keyspace_permissions, role)
 
 
 def process_role_permissions(session,
                              keyspace_permissions,
-                             role):
+                             role,
+                             role_permissions=None):
     cql_dict = build_role_permissions(session,
                                       keyspace_permissions,
-                                      role)
+                                      role,
+                                      role_permissions)
     return cql_dict
 
 
-def get_read_and_write_sessions(login_host,
-                                login_port,
-                                auth_provider,
-                                ssl_context,
-                                consistency_level):
-    profile = ExecutionProfile(
-        consistency_level=ConsistencyLevel.name_to_value[consistency_level])
-    if consistency_level in ["ANY", "EACH_QUORUM"]:  # Not supported for reads
-        cluster_r = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context)  # Will be LOCAL_ONE
-    else:
-        cluster_r = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context,
-                            execution_profiles={EXEC_PROFILE_DEFAULT: profile})
-    if consistency_level in ["SERIAL", "LOCAL_SERIAL"]:  # Not supported for writes
-        cluster_w = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context)  # Will be LOCAL_ONE
-    else:
-        cluster_w = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context,
-                            execution_profiles={EXEC_PROFILE_DEFAULT: profile})
-    return (cluster_r, cluster_w)  # Return a tuple of sessions for C* (read, write)
-
 ############################################
 
 
@@ -662,10 +437,12 @@ def main():
             roles=dict(type='list', elements='str'),
             update_password=dict(type='bool', default=False),
             debug=dict(type='bool', default=False),
+            metadata_mode=dict(type='str', default='full', choices=['full', 'lazy']),
             consistency_level=dict(type='str',
                                    required=False,
                                    default="LOCAL_ONE",
-                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+                                   choices=list(ConsistencyLevel.name_to_value.keys())),
+            **cql_broker_argument_spec()),
         supports_check_mode=True
     )
 
@@ -741,14 +518,15 @@ def main():
             if ssl_cert_reqs in ('CERT_REQUIRED', 'CERT_OPTIONAL'):
                 ssl_context.load_verify_locations(module.params['ssl_ca_certs'])
 
-        sessions = get_read_and_write_sessions(login_host,
-                                               login_port,
-                                               auth_provider,
-                                               ssl_context,
-                                               consistency_level)
+        def cluster_factory():
+            return read_write_cluster(login_host,
+                                      login_port,
+                                      auth_provider,
+                                      ssl_context,
+                                      consistency_level,
+                                      module.params['metadata_mode'])
 
-        session_r = sessions[0].connect()
-        session_w = sessions[1].connect()
+        session_r, session_w = connect_read_write(module, login_host, cluster_factory)
 
     except AuthenticationFailed as auth_failed:
         module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
@@ -864,9 +642,12 @@ def main():
                         result['changed'] = False
 
         if state == "present":
+            # Fetched once, for both the permissions and the roles
+            role_permissions = list(list_role_permissions(session_r, role))
             cql_dict = process_role_permissions(session_r,
                                                 keyspace_permissions,
-                                                role)
+                                                role,
+                                                role_permissions)
             if len(cql_dict['grant']) > 0 or len(cql_dict['revoke']) > 0:
                 for r in cql_dict['revoke']:
                     if not module.check_mode:
@@ -880,7 +661,8 @@ def main():
             # Process roles
             roles_dict = build_role_grants(session_r,
                                            role,
-                                           roles)
+                                           roles,
+                                           role_permissions)
 
             if len(roles_dict['grant']) > 0 or len(roles_dict['revoke']) > 0:
                 result['roles'] = roles_dict
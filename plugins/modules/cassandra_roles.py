@@ -0,0 +1,509 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+
+
+DOCUMENTATION = r'''
+---
+module: cassandra_roles
+short_description: Manage many roles on your Cassandra cluster at once.
+description:
+  - Manage many roles, their keyspace permissions and the roles granted to them, in a single task.
+  - All existing roles and permissions are read with two queries, compared with I(roles) in memory,
+    and the resulting CREATE, ALTER, GRANT, REVOKE and DROP statements are run concurrently.
+  - Statements run in four steps, creating and altering roles first, then revoking, then granting and
+    finally dropping roles. A role whose statement failed is skipped in the later steps.
+  - Use M(community.cassandra.cassandra_role) to manage a single role.
+author: Rhys Campbell (@rhysmeister)
+options:
+  login_user:
+    description: The Cassandra user to login with.
+    type: str
+  login_password:
+    description: The Cassandra password to login with.
+    type: str
+  ssl:
+    description: Uses SSL encryption if basic SSL encryption is enabled on Cassandra cluster (without client/server verification)
+    type: bool
+    default: False
+  ssl_cert_reqs:
+    description: SSL verification mode.
+    type: str
+    choices:
+      - 'CERT_NONE'
+      - 'CERT_OPTIONAL'
+      - 'CERT_REQUIRED'
+    default: 'CERT_NONE'
+  ssl_ca_certs:
+    description:
+        The SSL CA chain or certificate location to confirm supplied certificate validity
+        (required when ssl_cert_reqs is set to CERT_OPTIONAL or CERT_REQUIRED)
+    type: str
+    default: ''
+  login_host:
+    description: The Cassandra hostname.
+    type: list
+    elements: str
+  login_port:
+    description: The Cassandra port.
+    type: int
+    default: 9042
+  roles:
+    description:
+      - The roles to manage. Roles that aren't listed are left alone.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description: The name of the role to create or manage.
+        type: str
+        required: true
+      state:
+        description: The desired state of the role.
+        type: str
+        choices:
+          - "present"
+          - "absent"
+        default: "present"
+      super_user:
+        description:
+          - If the user is a super user or not.
+        type: bool
+        default: false
+      login:
+        description:
+          - True allows the role to log in.
+        type: bool
+        default: true
+      password:
+        description:
+          - The password for the role.
+        type: str
+      update_password:
+        description:
+          - Passwords are not handled by default. With this set to true, passwords are always overridden.
+          - The role will always be considered changed if this is set to true.
+        type: bool
+        default: false
+      options:
+        description:
+          - Reserved for use with authentication plug-ins. Refer to the authenticator documentation for details.
+        type: dict
+      data_centres:
+        description:
+          - Only relevant if a network_authorizer has been configured.
+          - Specify data centres as keys of this dict.
+        type: dict
+        aliases:
+          - data_centers
+      keyspace_permissions:
+        description:
+          - Grant privileges on keyspace objects, as in M(community.cassandra.cassandra_role).
+          - Specify keyspaces as keys of this dict, and the permissions as a list.
+          - Valid permissions at keyspace level are as follows; ALL PERMISSIONS, CREATE, ALTER, AUTHORIZE, DROP, MODIFY, SELECT
+          - A special key 'all_keyspaces' can be supplied to assign permissions to all keyspaces.
+          - When not set the permissions of the role are left alone. Keyspace permissions that aren't listed are revoked, all_keyspaces included.
+        type: dict
+      roles:
+        description:
+          - One or more roles to grant to this role.
+          - When not set, the default, no action is perform on roles.
+          - Set to an empty list to revoke all roles.
+        type: list
+        elements: str
+  concurrency:
+    description:
+      - The maximum number of statements in flight at once.
+    type: int
+    default: 32
+  consistency_level:
+    description:
+      - Consistency level to perform cassandra queries with.
+      - Not all consistency levels are supported by read or write connections.\
+        When a level is not supported then LOCAL_ONE, the default is used.
+      - Consult the README.md on GitHub for further details.
+    type: str
+    default: "LOCAL_ONE"
+    choices:
+        - ANY
+        - ONE
+        - TWO
+        - THREE
+        - QUORUM
+        - ALL
+        - LOCAL_QUORUM
+        - EACH_QUORUM
+        - SERIAL
+        - LOCAL_SERIAL
+        - LOCAL_ONE
+
+requirements:
+  - cassandra-driver
+'''
+
+EXAMPLES = r'''
+- name: Manage the service roles
+  community.cassandra.cassandra_roles:
+    login_user: admin
+    login_password: secret
+    roles:
+      - name: app_reader
+        login: false
+        keyspace_permissions:
+          app:
+            - SELECT
+      - name: app_user
+        password: 'secretZHB78'
+        roles:
+          - app_reader
+      - name: legacy_app
+        state: absent
+
+- name: Create roles from a list, 64 statements at a time
+  community.cassandra.cassandra_roles:
+    roles: "{{ service_roles }}"
+    concurrency: 64
+'''
+
+
+RETURN = '''
+changed:
+  description: Whether any role has changed.
+  returned: on success
+  type: bool
+roles:
+  description: The changes made to each role of I(roles), in the order they were given.
+  returned: always
+  type: list
+  elements: dict
+  sample: [
+    {
+      "role": "app_user",
+      "changed": true,
+      "cql": [
+        "CREATE ROLE 'app_user' WITH SUPERUSER = False AND LOGIN = True AND PASSWORD = '********' ",
+        "GRANT 'app_reader' TO 'app_user'"
+      ]
+    }
+  ]
+failed_statements:
+  description: The statements that failed, with the role they belong to and the error.
+  returned: on error
+  type: list
+  elements: dict
+msg:
+  description: Exceptions encountered during module execution.
+  returned: on error
+  type: str
+'''
+
+__metaclass__ = type
+
+try:
+    from cassandra.cluster import EXEC_PROFILE_DEFAULT
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra import AuthenticationFailed
+    from cassandra.query import dict_factory
+    from cassandra import ConsistencyLevel
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    # This is here for ansible-test import (when cassandra-driver is not installed)
+    class ConsistencyLevel:
+        ANY = "ANY"
+        ONE = "ONE"
+        TWO = "TWO"
+        THREE = "THREE"
+        QUORUM = "QUORUM"
+        ALL = "ALL"
+        LOCAL_QUORUM = "LOCAL_QUORUM"
+        EACH_QUORUM = "EACH_QUORUM"
+        SERIAL = "SERIAL"
+        LOCAL_SERIAL = "LOCAL_SERIAL"
+        LOCAL_ONE = "LOCAL_ONE"
+
+    ConsistencyLevel.name_to_value = {
+        "ANY": ConsistencyLevel.ANY,
+        "ONE": ConsistencyLevel.ONE,
+        "TWO": ConsistencyLevel.TWO,
+        "THREE": ConsistencyLevel.THREE,
+        "QUORUM": ConsistencyLevel.QUORUM,
+        "ALL": ConsistencyLevel.ALL,
+        "LOCAL_QUORUM": ConsistencyLevel.LOCAL_QUORUM,
+        "EACH_QUORUM": ConsistencyLevel.EACH_QUORUM,
+        "SERIAL": ConsistencyLevel.SERIAL,
+        "LOCAL_SERIAL": ConsistencyLevel.LOCAL_SERIAL,
+        "LOCAL_ONE": ConsistencyLevel.LOCAL_ONE,
+    }
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_ssl_context,
+    execute_concurrently,
+    read_and_write_sessions,
+    read_write_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_roles import (
+    create_alter_role,
+    drop_role,
+    is_role_changed,
+    plan_role_grants,
+    plan_role_permissions,
+    validate_keyspace_permissions,
+)
+
+# The order statements are run in, all of one step running concurrently
+STEPS = ("role", "revoke", "grant", "drop")
+
+# =========================================
+# Cassandra module specific support methods
+# =========================================
+
+
+def load_roles(session):
+    '''
+    Returns every role, keyed by name, as a dict of its system_auth.roles
+    row with member_of as a set, paging through the table.
+    '''
+    cql = "SELECT role, can_login, is_superuser, member_of FROM system_auth.roles"
+    dict_factory_profile = session.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=dict_factory)
+    roles = {}
+    for row in session.execute(cql, execution_profile=dict_factory_profile):
+        row['member_of'] = set(row['member_of'] or ())
+        roles[row['role']] = row
+    return roles
+
+
+def permission_resource(resource):
+    '''
+    Returns a system_auth.role_permissions resource, data or data/<keyspace>,
+    the way LIST ALL shows it, or None for a resource other than a keyspace.
+    '''
+    if resource == "data":
+        return "<all keyspaces>"
+    parts = resource.split("/")
+    if len(parts) == 2 and parts[0] == "data":
+        return "<keyspace {0}>".format(parts[1])
+    return None
+
+
+def load_permissions(session):
+    '''
+    Returns the keyspace permissions granted directly to every role, as
+    {role: [(resource, permission)]} with resource as LIST ALL shows it.
+    '''
+    cql = "SELECT role, resource, permissions FROM system_auth.role_permissions"
+    permissions = {}
+    for row in session.execute(cql):
+        resource = permission_resource(row.resource)
+        if resource is None:
+            continue
+        granted = permissions.setdefault(row.role, [])
+        for permission in row.permissions or ():
+            granted.append((resource, permission))
+    return permissions
+
+
+def role_permission_rows(role, roles, permissions):
+    '''
+    Returns what LIST ALL OF role would, the permissions of role and of
+    every role granted to it, directly or not, from load_roles() and
+    load_permissions().
+    '''
+    rows = []
+    seen = set()
+    pending = [role]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        for resource, permission in permissions.get(name, ()):
+            rows.append({"role": name, "resource": resource, "permission": permission})
+        if name in roles:
+            pending.extend(roles[name]['member_of'])
+    return rows
+
+
+def plan_roles(specs, roles, permissions):
+    '''
+    Compares specs, the roles option, with the existing roles and
+    permissions and returns the statements for every spec, in order, as
+        [
+            {
+                "role": "app_user",
+                "cql": {"role": [...], "revoke": [...], "grant": [...], "drop": [...]}
+            }
+        ]
+    '''
+    plans = []
+    for spec in specs:
+        name = spec['name']
+        cql = dict((step, []) for step in STEPS)
+        existing = roles.get(name)
+        if spec['state'] == "absent":
+            if existing is not None:
+                cql['drop'].append(drop_role(name))
+        else:
+            if existing is None:
+                cql['role'].append(create_alter_role(None, name, spec['super_user'], spec['login'],
+                                                     spec['password'], spec['options'],
+                                                     spec['data_centres'], False))
+            elif is_role_changed(existing, spec['super_user'], spec['login'], spec['password'],
+                                 spec['options'], spec['data_centres'], spec['update_password']):
+                cql['role'].append(create_alter_role(None, name, spec['super_user'], spec['login'],
+                                                     spec['password'], spec['options'],
+                                                     spec['data_centres'], True))
+            if spec['keyspace_permissions'] is not None:
+                perms_dict = plan_role_permissions(role_permission_rows(name, roles, permissions),
+                                                   spec['keyspace_permissions'],
+                                                   name)
+                cql['revoke'].extend(sorted(perms_dict['revoke']))
+                cql['grant'].extend(sorted(perms_dict['grant']))
+            if spec['roles'] is not None:
+                current_roles = existing['member_of'] if existing is not None else set()
+                roles_dict = plan_role_grants(current_roles, name, spec['roles'])
+                cql['revoke'].extend(sorted(roles_dict['revoke']))
+                cql['grant'].extend(sorted(roles_dict['grant']))
+        plans.append({"role": name, "cql": cql})
+    return plans
+
+
+def apply_plans(session, plans, concurrency):
+    '''
+    Runs the statements of plans, one step after another and concurrently
+    within a step, skipping the roles a statement already failed for.
+    Returns the [{role, cql, error}] of the statements that failed.
+    '''
+    failed = []
+    failed_roles = set()
+    for step in STEPS:
+        owner = {}
+        for plan in plans:
+            if plan['role'] not in failed_roles:
+                for cql in plan['cql'][step]:
+                    owner[cql] = plan['role']
+        if not owner:
+            continue
+        statements = [cql for plan in plans for cql in plan['cql'][step] if cql in owner]
+        for cql, excep in execute_concurrently(session, statements, concurrency):
+            failed.append({"role": owner[cql], "cql": cql, "error": str(excep)})
+            failed_roles.add(owner[cql])
+    return failed
+
+
+def role_summary(plans):
+    summary = []
+    for plan in plans:
+        cql = [statement for step in STEPS for statement in plan['cql'][step]]
+        summary.append({"role": plan['role'], "changed": len(cql) > 0, "cql": cql})
+    return summary
+
+
+############################################
+
+
+def main():
+    role_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(type='str', default='present', choices=['present', 'absent']),
+        super_user=dict(type='bool', default=False),
+        login=dict(type='bool', default=True),
+        password=dict(type='str', no_log=True),
+        update_password=dict(type='bool', default=False),
+        options=dict(type='dict'),
+        data_centres=dict(type='dict', aliases=['data_centers']),
+        keyspace_permissions=dict(type='dict', no_log=False),
+        roles=dict(type='list', elements='str'),
+    )
+    module = AnsibleModule(
+        argument_spec=dict(
+            login_user=dict(type='str'),
+            login_password=dict(type='str', no_log=True),
+            ssl=dict(type='bool', default=False),
+            ssl_cert_reqs=dict(type='str',
+                               required=False,
+                               default='CERT_NONE',
+                               choices=['CERT_NONE',
+                                        'CERT_OPTIONAL',
+                                        'CERT_REQUIRED']),
+            ssl_ca_certs=dict(type='str', default=''),
+            login_host=dict(type='list', elements='str'),
+            login_port=dict(type='int', default=9042),
+            roles=dict(type='list', elements='dict', required=True, options=role_spec),
+            concurrency=dict(type='int', default=32),
+            consistency_level=dict(type='str',
+                                   required=False,
+                                   default="LOCAL_ONE",
+                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+        supports_check_mode=True
+    )
+
+    if HAS_CASSANDRA_DRIVER is False:
+        msg = ("This module requires the cassandra-driver python"
+               " driver. You can probably install it with pip"
+               " install cassandra-driver.")
+        module.fail_json(msg=msg)
+
+    specs = module.params['roles']
+    names = [spec['name'] for spec in specs]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg="Roles can only be listed once: {0}".format(", ".join(duplicates)))
+    for spec in specs:
+        if spec['keyspace_permissions'] is not None and not validate_keyspace_permissions(spec['keyspace_permissions']):
+            module.fail_json(msg=("Invalid permission provided in the "
+                                  "keyspace_permission parameter of role {0}.".format(spec['name'])))
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg="concurrency must be at least 1")
+
+    try:
+        auth_provider = None
+        if module.params['login_user'] is not None:
+            auth_provider = PlainTextAuthProvider(
+                username=module.params['login_user'],
+                password=module.params['login_password']
+            )
+        ssl_context = cql_ssl_context(module,
+                                      module.params['ssl'],
+                                      module.params['ssl_cert_reqs'],
+                                      module.params['ssl_ca_certs'])
+        # Only the system_auth tables are read, the schema and token
+        # metadata of the cluster aren't needed
+        cluster = read_write_cluster(module.params['login_host'],
+                                     module.params['login_port'],
+                                     auth_provider,
+                                     ssl_context,
+                                     module.params['consistency_level'],
+                                     "lazy")
+        session_r, session_w = read_and_write_sessions(cluster)
+    except AuthenticationFailed as auth_failed:
+        module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
+    except Exception as excep:
+        module.fail_json(msg="Error connecting to cluster: {0}".format(excep))
+
+    try:
+        plans = plan_roles(specs, load_roles(session_r), load_permissions(session_r))
+        summary = role_summary(plans)
+        result = dict(
+            changed=any(role['changed'] for role in summary),
+            roles=summary,
+        )
+        if not module.check_mode:
+            failed = apply_plans(session_w, plans, module.params['concurrency'])
+            if failed:
+                module.fail_json(msg="{0} statements failed".format(len(failed)),
+                                 failed_statements=failed,
+                                 **result)
+        module.exit_json(**result)
+
+    except Exception as excep:
+        module.fail_json(msg="An error occured: {0}".format(excep))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,538 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+
+
+DOCUMENTATION = r'''
+---
+module: cassandra_scan
+short_description: Count or export the rows of a table by token range.
+description:
+  - Scans a whole table, to count its rows or to export them to a file on the managed node, as many range
+    queries, one per token range, run in parallel rather than as a single SELECT.
+  - Each range query reads only the partitions one node and its replicas own and is sent to a replica
+    of those in the local datacenter, so no coordinator has to gather the whole table and the scan uses
+    every local node.
+  - With I(checkpoint) a scan that fails, or is interrupted, can be run again to scan only the
+    ranges it didn't finish.
+  - Only the Murmur3Partitioner and the RandomPartitioner are supported.
+author: Rhys Campbell (@rhysmeister)
+options:
+  login_user:
+    description: The Cassandra user to login with.
+    type: str
+  login_password:
+    description: The Cassandra password to login with.
+    type: str
+  ssl:
+    description: Uses SSL encryption if basic SSL encryption is enabled on Cassandra cluster (without client/server verification)
+    type: bool
+    default: False
+  ssl_cert_reqs:
+    description: SSL verification mode.
+    type: str
+    choices:
+      - 'CERT_NONE'
+      - 'CERT_OPTIONAL'
+      - 'CERT_REQUIRED'
+    default: 'CERT_NONE'
+  ssl_ca_certs:
+    description:
+        The SSL CA chain or certificate location to confirm supplied certificate validity
+        (required when ssl_cert_reqs is set to CERT_OPTIONAL or CERT_REQUIRED)
+    type: str
+    default: ''
+  login_host:
+    description: The Cassandra hostname.
+    type: list
+    elements: str
+  login_port:
+    description: The Cassandra port.
+    type: int
+    default: 9042
+  keyspace:
+    description: The keyspace of the table.
+    type: str
+    required: true
+  table:
+    description: The table to scan.
+    type: str
+    required: true
+  columns:
+    description:
+      - The columns exported to I(dest), all of them by default.
+      - Only used with I(dest).
+    type: list
+    elements: str
+  dest:
+    description:
+      - Path of a file, on the managed node, the rows are exported to rather than counted.
+      - Each range is written to its own file in the directory I(dest) followed by C(.parts), and those files
+        are joined, in token order, once every range is done.
+      - The file is only readable by the user the module runs as.
+    type: path
+  format:
+    description:
+      - The format of I(dest), see M(community.cassandra.cassandra_query).
+    type: str
+    choices:
+      - jsonl
+      - csv
+    default: jsonl
+  splits_per_range:
+    description:
+      - The number of range queries the range between two tokens of the ring is scanned by.
+      - Clusters with a few tokens per node need more to spread the scan and keep each query short.
+    type: int
+    default: 1
+  concurrency:
+    description:
+      - The number of range queries in flight at once.
+    type: int
+    default: 8
+  fetch_size:
+    description:
+      - The number of rows fetched from the cluster at a time.
+    type: int
+    default: 5000
+  timeout:
+    description:
+      - The number of seconds to wait for each page of a range query.
+    type: float
+    default: 60
+  retries:
+    description:
+      - The number of times a failed range query is retried, against another replica when there is one.
+    type: int
+    default: 2
+  checkpoint:
+    description:
+      - Path of a file, on the managed node, recording the ranges done.
+      - When it records a scan of the same table, columns, I(dest), I(format) and ranges, the ranges it records
+        aren't scanned again.
+      - It is written every few seconds, and when the scan fails, and removed once the scan is done.
+    type: path
+  consistency_level:
+    description:
+      - Consistency level to perform cassandra queries with.
+      - Not all consistency levels are supported by read or write connections.\
+        When a level is not supported then LOCAL_ONE, the default is used.
+      - Consult the README.md on GitHub for further details.
+    type: str
+    default: "LOCAL_ONE"
+    choices:
+        - ANY
+        - ONE
+        - TWO
+        - THREE
+        - QUORUM
+        - ALL
+        - LOCAL_QUORUM
+        - EACH_QUORUM
+        - SERIAL
+        - LOCAL_SERIAL
+        - LOCAL_ONE
+
+requirements:
+  - cassandra-driver
+'''
+
+EXAMPLES = r'''
+- name: Count the rows of a table
+  community.cassandra.cassandra_scan:
+    keyspace: audit
+    table: events
+    concurrency: 16
+  register: events
+
+- name: Export a table, resuming where a previous run stopped
+  community.cassandra.cassandra_scan:
+    keyspace: audit
+    table: events
+    columns:
+      - event_id
+      - occurred_at
+      - payload
+    dest: /var/tmp/events.jsonl
+    checkpoint: /var/tmp/events.checkpoint
+    splits_per_range: 4
+'''
+
+
+RETURN = '''
+changed:
+  description: Whether I(dest) was written.
+  returned: always
+  type: bool
+rows:
+  description: The number of rows counted, or exported.
+  returned: on success
+  type: int
+  sample: 1250000
+ranges:
+  description: The number of token ranges the table was scanned by.
+  returned: always
+  type: int
+  sample: 768
+ranges_resumed:
+  description: The number of ranges the checkpoint recorded as done, which weren't scanned again.
+  returned: always
+  type: int
+  sample: 0
+ranges_failed:
+  description: The number of ranges that failed, after their retries.
+  returned: on error
+  type: int
+seconds:
+  description: The time taken by the scan.
+  returned: on success
+  type: float
+  sample: 42.5
+rows_per_second:
+  description: The rows scanned per second by this run.
+  returned: on success
+  type: float
+  sample: 29411.8
+export:
+  description: What was written to I(dest).
+  returned: when dest is set
+  type: dict
+  sample: {"dest": "/var/tmp/events.jsonl", "format": "jsonl", "rows": 1250000, "bytes": 157286400}
+msg:
+  description: Exceptions encountered during module execution.
+  returned: on error
+  type: str
+'''
+
+__metaclass__ = type
+
+import os
+import shutil
+import time
+from multiprocessing.pool import ThreadPool
+
+try:
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra import AuthenticationFailed
+    from cassandra.metadata import protect_name
+    from cassandra.policies import HostDistance
+    from cassandra import ConsistencyLevel
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    # This is here for ansible-test import (when cassandra-driver is not installed)
+    class ConsistencyLevel:
+        ANY = "ANY"
+        ONE = "ONE"
+        TWO = "TWO"
+        THREE = "THREE"
+        QUORUM = "QUORUM"
+        ALL = "ALL"
+        LOCAL_QUORUM = "LOCAL_QUORUM"
+        EACH_QUORUM = "EACH_QUORUM"
+        SERIAL = "SERIAL"
+        LOCAL_SERIAL = "LOCAL_SERIAL"
+        LOCAL_ONE = "LOCAL_ONE"
+
+    ConsistencyLevel.name_to_value = {
+        "ANY": ConsistencyLevel.ANY,
+        "ONE": ConsistencyLevel.ONE,
+        "TWO": ConsistencyLevel.TWO,
+        "THREE": ConsistencyLevel.THREE,
+        "QUORUM": ConsistencyLevel.QUORUM,
+        "ALL": ConsistencyLevel.ALL,
+        "LOCAL_QUORUM": ConsistencyLevel.LOCAL_QUORUM,
+        "EACH_QUORUM": ConsistencyLevel.EACH_QUORUM,
+        "SERIAL": ConsistencyLevel.SERIAL,
+        "LOCAL_SERIAL": ConsistencyLevel.LOCAL_SERIAL,
+        "LOCAL_ONE": ConsistencyLevel.LOCAL_ONE,
+    }
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_ssl_context,
+    read_and_write_sessions,
+    read_write_cluster,
+    table_metadata,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_export import (
+    EXPORT_FORMATS,
+    export_rows,
+    join_exports,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_token_ranges import (
+    load_checkpoint,
+    save_checkpoint,
+    scan_fingerprint,
+    scan_ranges,
+)
+
+# Seconds between two writes of the checkpoint
+CHECKPOINT_INTERVAL = 5
+
+# =========================================
+# Cassandra module specific support methods
+# =========================================
+
+
+class TableScanner(object):
+    '''
+    Scans one range of a table at a time, counting its rows, or with
+    parts_dir writing them to a file of their own there. Range queries are
+    sent to the local replicas of the range in turn.
+    '''
+
+    def __init__(self, cluster, session, keyspace, table, partition_key, ranges, columns=None,
+                 parts_dir=None, file_format="jsonl", fetch_size=5000, timeout=60, retries=2):
+        self.cluster = cluster
+        self.session = session
+        self.keyspace = keyspace
+        self.ranges = ranges
+        self.parts_dir = parts_dir
+        self.file_format = file_format
+        self.timeout = timeout
+        self.retries = retries
+        token = "token({0})".format(", ".join(protect_name(column) for column in partition_key))
+        if parts_dir is None:
+            selected = "count(*)"
+        else:
+            selected = ", ".join(protect_name(column) for column in columns) if columns else "*"
+        self.query = "SELECT {0} FROM {1}.{2} WHERE {3} > ? AND {3} <= ?".format(
+            selected, protect_name(keyspace), protect_name(table), token)
+        self.statement = session.prepare(self.query)
+        self.statement.fetch_size = fetch_size
+        self.column_names = [column[2] for column in self.statement.result_metadata or ()]
+
+    def part_path(self, index):
+        return os.path.join(self.parts_dir, "{0:06d}".format(index))
+
+    def replicas(self, index):
+        '''
+        Returns the hosts to try range index on, its local replicas that
+        are up, starting from a different one for every range, then None
+        for any host the load balancing policy picks.
+        '''
+        token_map = self.cluster.metadata.token_map
+        end = token_map.token_class(self.ranges[index][1])
+        hosts = [host for host in token_map.get_replicas(self.keyspace, end)
+                 if host.is_up is not False and self.cluster.profile_manager.distance(host) == HostDistance.LOCAL]
+        hosts.sort(key=lambda host: str(host.endpoint))
+        if hosts:
+            offset = index % len(hosts)
+            hosts = hosts[offset:] + hosts[:offset]
+        return hosts + [None]
+
+    def scan_range(self, index, host):
+        result = self.session.execute(self.statement.bind(self.ranges[index]), timeout=self.timeout, host=host)
+        if self.parts_dir is None:
+            return result.one()[0]
+        return export_rows(result, self.column_names, self.part_path(index), self.file_format, header=False)
+
+    def scan(self, index):
+        '''
+        Scans range index, retrying it against the next replica when it
+        fails. Returns (index, rows, None) or (index, None, exception).
+        '''
+        hosts = self.replicas(index)
+        error = None
+        for attempt in range(self.retries + 1):
+            try:
+                return index, self.scan_range(index, hosts[min(attempt, len(hosts) - 1)]), None
+            except Exception as excep:
+                error = excep
+        return index, None, error
+
+
+def run_scan(scanner, pending, done, concurrency, checkpoint=None, fingerprint=None):
+    '''
+    Scans the ranges pending, up to concurrency at once, adding the rows of
+    each one done to done, {range index: rows}, and saving done to the
+    checkpoint every CHECKPOINT_INTERVAL seconds and when ranges failed.
+    Returns the [(index, exception)] of the ranges that failed.
+    '''
+    failed = []
+    saved = time.time()
+    pool = ThreadPool(max(1, min(concurrency, len(pending))))
+    try:
+        for index, rows, error in pool.imap_unordered(scanner.scan, pending):
+            if error is None:
+                done[index] = rows
+            else:
+                failed.append((index, error))
+            if checkpoint is not None and time.time() - saved >= CHECKPOINT_INTERVAL:
+                save_checkpoint(checkpoint, fingerprint, done)
+                saved = time.time()
+    finally:
+        pool.close()
+        pool.join()
+    if checkpoint is not None and failed:
+        save_checkpoint(checkpoint, fingerprint, done)
+    return sorted(failed, key=lambda item: item[0])
+
+
+def resumed_ranges(checkpoint, fingerprint, scanner):
+    '''
+    Returns the {range index: rows} the checkpoint records as done, less
+    the exported ranges whose file is missing.
+    '''
+    done = load_checkpoint(checkpoint, fingerprint) if checkpoint is not None else {}
+    if scanner.parts_dir is not None:
+        done = dict((index, rows) for index, rows in done.items() if os.path.exists(scanner.part_path(index)))
+    return dict((index, rows) for index, rows in done.items() if 0 <= index < len(scanner.ranges))
+
+
+############################################
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            login_user=dict(type='str'),
+            login_password=dict(type='str', no_log=True),
+            ssl=dict(type='bool', default=False),
+            ssl_cert_reqs=dict(type='str',
+                               required=False,
+                               default='CERT_NONE',
+                               choices=['CERT_NONE',
+                                        'CERT_OPTIONAL',
+                                        'CERT_REQUIRED']),
+            ssl_ca_certs=dict(type='str', default=''),
+            login_host=dict(type='list', elements='str'),
+            login_port=dict(type='int', default=9042),
+            keyspace=dict(type='str', required=True, no_log=False),
+            table=dict(type='str', required=True),
+            columns=dict(type='list', elements='str'),
+            dest=dict(type='path'),
+            format=dict(type='str', default='jsonl', choices=list(EXPORT_FORMATS)),
+            splits_per_range=dict(type='int', default=1),
+            concurrency=dict(type='int', default=8),
+            fetch_size=dict(type='int', default=5000),
+            timeout=dict(type='float', default=60),
+            retries=dict(type='int', default=2),
+            checkpoint=dict(type='path'),
+            consistency_level=dict(type='str',
+                                   required=False,
+                                   default="LOCAL_ONE",
+                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+        supports_check_mode=False
+    )
+
+    if HAS_CASSANDRA_DRIVER is False:
+        msg = ("This module requires the cassandra-driver python"
+               " driver. You can probably install it with pip"
+               " install cassandra-driver.")
+        module.fail_json(msg=msg)
+
+    for option in ('splits_per_range', 'concurrency', 'fetch_size'):
+        if module.params[option] < 1:
+            module.fail_json(msg="{0} must be at least 1".format(option))
+    if module.params['retries'] < 0:
+        module.fail_json(msg="retries can't be negative")
+
+    keyspace = module.params['keyspace']
+    table = module.params['table']
+    dest = module.params['dest']
+    checkpoint = module.params['checkpoint']
+
+    try:
+        auth_provider = None
+        if module.params['login_user'] is not None:
+            auth_provider = PlainTextAuthProvider(
+                username=module.params['login_user'],
+                password=module.params['login_password']
+            )
+        ssl_context = cql_ssl_context(module,
+                                      module.params['ssl'],
+                                      module.params['ssl_cert_reqs'],
+                                      module.params['ssl_ca_certs'])
+        cluster = read_write_cluster(module.params['login_host'],
+                                     module.params['login_port'],
+                                     auth_provider,
+                                     ssl_context,
+                                     module.params['consistency_level'],
+                                     "tokens")
+        session_r, session_w = read_and_write_sessions(cluster)
+    except AuthenticationFailed as auth_failed:
+        module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
+    except Exception as excep:
+        module.fail_json(msg="Error connecting to cluster: {0}".format(excep))
+
+    try:
+        table_meta = table_metadata(cluster, keyspace, table)
+        if table_meta is None:
+            module.fail_json(msg="Table {0}.{1} does not exist".format(keyspace, table))
+        token_map = cluster.metadata.token_map
+        if token_map is None:
+            module.fail_json(msg="The cluster's token ring is unknown")
+        try:
+            ranges = scan_ranges([token.value for token in token_map.ring],
+                                 cluster.metadata.partitioner,
+                                 module.params['splits_per_range'])
+        except ValueError as excep:
+            module.fail_json(msg=str(excep))
+
+        parts_dir = None
+        if dest is not None:
+            parts_dir = dest + ".parts"
+            if not os.path.isdir(parts_dir):
+                os.makedirs(parts_dir)
+        scanner = TableScanner(cluster, session_r, keyspace, table,
+                               [column.name for column in table_meta.partition_key],
+                               ranges,
+                               columns=module.params['columns'],
+                               parts_dir=parts_dir,
+                               file_format=module.params['format'],
+                               fetch_size=module.params['fetch_size'],
+                               timeout=module.params['timeout'],
+                               retries=module.params['retries'])
+        fingerprint = scan_fingerprint(keyspace, table, module.params['columns'], dest,
+                                       module.params['format'], ranges)
+        done = resumed_ranges(checkpoint, fingerprint, scanner)
+        resumed = sum(done.values())
+
+        start = time.time()
+        pending = [index for index in range(len(ranges)) if index not in done]
+        failed = run_scan(scanner, pending, done, module.params['concurrency'], checkpoint, fingerprint)
+        seconds = time.time() - start
+        result = dict(
+            changed=False,
+            ranges=len(ranges),
+            ranges_resumed=len(ranges) - len(pending),
+        )
+        if failed:
+            index, error = failed[0]
+            msg = "{0} of {1} token ranges failed, the first ({2}, {3}]: {4}".format(
+                len(failed), len(ranges), ranges[index][0], ranges[index][1], error)
+            if checkpoint is not None:
+                msg += ". Run again to scan only those not done."
+            elif parts_dir is not None:
+                shutil.rmtree(parts_dir, ignore_errors=True)
+            module.fail_json(msg=msg, ranges_failed=len(failed), **result)
+
+        result['rows'] = sum(done.values())
+        result['seconds'] = round(seconds, 3)
+        result['rows_per_second'] = round((result['rows'] - resumed) / seconds, 1) if seconds > 0 else 0.0
+        if dest is not None:
+            join_exports([scanner.part_path(index) for index in range(len(ranges))],
+                         scanner.column_names,
+                         dest,
+                         module.params['format'],
+                         move=module.atomic_move)
+            shutil.rmtree(parts_dir)
+            result['changed'] = True
+            result['export'] = dict(dest=dest, format=module.params['format'], rows=result['rows'],
+                                    bytes=os.path.getsize(dest))
+        if checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        module.exit_json(**result)
+    except Exception as excep:
+        module.fail_json(msg="An error occured: {0}".format(excep))
+    finally:
+        cluster.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -12,16 +12,21 @@ DOCUMENTATION = '''
 module: cassandra_schema
 author: Rhys Campbell (@rhysmeister)
 short_description: Validates the schema version as seen from the node.
-requirements: [ nodetool ]
+requirements:
+  - nodetool
+  - cassandra-driver, with I(backend=cql)
 description:
     - Validates the schema version as seen from the node.
     - Ensure that all nodes are have the same schema version.
     - Can poll multiple times to wait for the schema version to converge.
     - Can also specify a schema version if required.
-    - Schema version is obtained through the usage of the nodetool describecluster command.
+    - Schema version is obtained through the usage of the nodetool describecluster command,
+      or from the system tables over CQL with I(backend=cql).
 
 extends_documentation_fragment:
   - community.cassandra.nodetool_module_options
+  - community.cassandra.poll_options
+  - community.cassandra.cql_connection_options
 
 options:
   uuid:
@@ -30,16 +35,18 @@ options:
     type: str
     aliases:
       - is
-  poll:
+  backend:
     description:
-      - The maximum number of times to call nodetool describecluster.
-    type: int
-    default: 1
-  interval:
-    description:
-      - The number of seconds to wait between poll executions.
-    type: int
-    default: 30
+      - How the schema versions are obtained.
+      - C(nodetool) runs nodetool describecluster.
+      - C(cql) reads the schema_version of system.local and system.peers_v2 (or system.peers) over a single
+        CQL connection kept open between polls, see the I(cql_*) options. Nodes the driver sees as down
+        are left out, like the unreachable nodes of nodetool describecluster.
+    type: str
+    choices:
+      - nodetool
+      - cql
+    default: nodetool
 '''
 
 EXAMPLES = '''
@@ -54,6 +61,14 @@ EXAMPLES = '''
   community.cassandra.cassandra_schema:
     poll: 5
     interval: 30
+
+- name: Wait up to 2 minutes for schema agreement after a DDL change, over CQL
+  community.cassandra.cassandra_schema:
+    backend: cql
+    interval: 1
+    backoff: 2
+    max_interval: 10
+    timeout: 120
 '''
 
 RETURN = '''
@@ -65,16 +80,67 @@ rc:
   description: Return code of the last executed command.
   returned: always
   type: int
+schema_status:
+  description: The hosts having each schema version, keyed by schema version.
+  returned: success
+  type: dict
+  sample:
+    1176b7ac-8993-395d-85fd-41b89ef49fbb:
+      - 127.0.0.1
+      - 127.0.0.2
+schema_count_total:
+  description: The number of distinct schema versions.
+  returned: success
+  type: int
+iterations:
+  description: The number of times the schema versions were queried, when more than once.
+  returned: when more than 1
+  type: int
+elapsed:
+  description: Seconds spent polling.
+  returned: always
+  type: float
+timed_out:
+  description: Whether polling was stopped by I(timeout).
+  returned: always
+  type: bool
+poll_timings:
+  description:
+    - Timings of every poll, to help tune the polling options.
+    - C(duration) is the number of seconds the query took and C(sleep) the wait that followed it.
+  returned: always
+  type: list
+  elements: dict
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import re
-import time
 __metaclass__ = type
 
 
 from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolCmd
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import parse_describecluster
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_connection_argument_spec,
+    topology_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_topology import (
+    cql_schema_versions,
+    host_states,
+    local_and_peers,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.poll_scheduler import (
+    PollScheduler,
+    poll_scheduler_argument_spec,
+)
 
 
 class NodeToolStatusCommand(NodeToolCmd):
@@ -83,6 +149,7 @@ class NodeToolStatusCommand(NodeToolCmd):
     Inherits from the NodeToolCmd class. Adds the following methods;
 
         - status_command
+        - poll
 
     """
 
@@ -93,85 +160,110 @@ class NodeToolStatusCommand(NodeToolCmd):
     def status_command(self):
         return self.nodetool_cmd(self.status_cmd)
 
+    def poll(self):
+        '''
+        Returns (rc, out, err, schema_versions), schema_versions being None
+        when nodetool failed.
+        '''
+        (rc, out, err) = self.status_command()
+        return rc, out, err, cluster_schema(out) if rc == 0 else None
+
+
+class CqlSchemaCommand(object):
+
+    """
+    Reads the schema versions of the nodes from the system tables, over one
+    CQL connection kept open between polls. Offers the poll method of
+    NodeToolStatusCommand.
+    """
 
-def nodetool_status_poll(module):
+    version_cache = None
+
+    def __init__(self, module):
+        self.cluster = topology_cluster(module)
+        self.session = None
+
+    def poll(self):
+        try:
+            if self.session is None:
+                self.session = self.cluster.connect()
+            local, peers = local_and_peers(self.session)
+            versions = cql_schema_versions(local, peers, host_states(self.cluster.metadata.all_hosts()))
+        except Exception as excep:
+            return 1, "", "Error reading schema versions: {0}".format(excep), None
+        return 0, "", "", versions
+
+    def close(self):
+        self.cluster.shutdown()
+
+
+def schema_command(module):
+    if module.params.get('backend') == "cql":
+        return CqlSchemaCommand(module)
+    return NodeToolStatusCommand(module)
+
+
+def nodetool_status_poll(module, scheduler=None):
     '''
-    Calls NodeToolStatusCommand(module, status_cmd) a maximum of poll times
-    with the indicated interval. Returns as soon all nodes are up or the
-    previous limits are reached.
+    Queries the schema versions of the nodes for as long as the poll
+    scheduler allows. Returns as soon as all nodes agree on one version or
+    the scheduler's limits are reached.
     '''
-    cluster_status = None  # Last cluster status
+    schema_status = None  # Last schema versions
     cluster_schema_list = []
-    iterations = 0
     return_codes = []
     stdout_list = []
     stderr_list = []
-    down_running_total = None
-    poll = module.params['poll']
-    interval = module.params['interval']
-
-    while iterations < poll:
-        down_running_total = 0  # reset between iterations
-        iterations += 1
-        n = NodeToolStatusCommand(module)
-        (rc, out, err) = n.status_command()
+    schema_count_total = None
+    if scheduler is None:
+        scheduler = PollScheduler.from_params(module.params)
+    n = schema_command(module)
+    version_cache = n.version_cache
+    last_versions = None
+
+    while scheduler.attempt():
+        (rc, out, err, polled_status) = n.poll()
         stdout_list.append(out.strip())
         stderr_list.append(err.strip())
         return_codes.append(rc)
         if rc == 0:
-            schema_status = cluster_schema(out)
+            schema_status = polled_status
             cluster_schema_list.append(schema_status)
-            schema_count_total = len(cluster_schema_list)
+            schema_count_total = len(schema_status)
+            versions = sorted(schema_status.keys())
+            transition = last_versions is not None and versions != last_versions
+            last_versions = versions
+            scheduler.record(rc=rc, versions=schema_count_total, transition=transition)
             if schema_count_total == 1:
                 break  # The cluster has one schema... we're good
-            else:
-                if iterations == poll:
-                    break
-                else:
-                    time.sleep(interval)  # Something is wrong, check again in a bit but
+            scheduler.wait(transition)  # Something is wrong, check again in a bit
         else:
-            if iterations == poll:
-                break
-            else:
-                time.sleep(interval)
-    return schema_status, cluster_schema_list, iterations, \
-        return_codes, stdout_list, stderr_list, schema_count_total
+            scheduler.record(rc=rc)
+            scheduler.wait()
+    n.close()
+    return schema_status, cluster_schema_list, scheduler.iterations, \
+        return_codes, stdout_list, stderr_list, schema_count_total, version_cache, scheduler
 
 
 def cluster_schema(stdout):
     '''
-    Extract the scheam version output from the nodetool describecluster stdout
+    Extract the schema versions from the nodetool describecluster stdout
     Returns a dict in the following format...
         {
-            "d4f18346-f81f-3786-aed4-40e03558b299:" [127.0.0.1]
+            "d4f18346-f81f-3786-aed4-40e03558b299": ["127.0.0.1"]
         }
-    # TODO do something about UNREACHABLE nodes???
+    Unreachable nodes are not included.
     '''
-    cluster_up_down = {}
-    schema_version_line = False
-    schema_version_lines = []
-    return_dict = {}
-
-    # match the scmea id and the list of hosts
-    regex = r"(\{){0,1}[0-9a-fA-F]{8}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{4}\-[0-9a-fA-F]{12}(\}){0,1}: \[.*\]"
-
-    matches = re.finditer(regex, stdout, re.MULTILINE)
-
-    for matchNum, match in enumerate(matches, start=1):
-
-        uuid, host_list = match.group().split(":")
-        return_dict[uuid.strip()] = host_list[:-1][1:].split(", ")
-        # Should do something about UNREACHABLE entries
-
-    return return_dict
+    return parse_describecluster(stdout)["schema_versions"]
 
 
 def main():
     argument_spec = cassandra_common_argument_spec()
+    argument_spec.update(poll_scheduler_argument_spec())
+    argument_spec.update(cql_connection_argument_spec())
     argument_spec.update(
         uuid=dict(type='str', aliases=['is']),
-        poll=dict(type='int', default=1),
-        interval=dict(type='int', default=30)
+        backend=dict(type='str', default="nodetool", choices=["nodetool", "cql"]),
     )
     module = AnsibleModule(
         argument_spec=argument_spec,
@@ -181,15 +273,25 @@ def main():
     uuid = module.params['uuid']
     debug = module.params['debug']
 
+    try:
+        scheduler = PollScheduler.from_params(module.params)
+    except ValueError as excep:
+        module.fail_json(msg=str(excep))
+
     schema_status, cluster_schema_list, iterations, \
-        return_codes, stdout_list, stderr_list, schema_count_total \
-        = nodetool_status_poll(module)
+        return_codes, stdout_list, stderr_list, schema_count_total, version_cache, scheduler \
+        = nodetool_status_poll(module, scheduler)
 
     result = {}
+    result['version_cache'] = version_cache
 
     result['schema_status'] = schema_status
+    result['schema_count_total'] = schema_count_total
     if iterations > 1:
         result['iterations'] = iterations
+    result['elapsed'] = scheduler.elapsed()
+    result['timed_out'] = scheduler.timed_out
+    result['poll_timings'] = scheduler.timings
 
     if debug:
         result['cluster_schema_list'] = cluster_schema_list
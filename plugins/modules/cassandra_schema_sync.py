@@ -0,0 +1,799 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+
+
+DOCUMENTATION = r'''
+---
+module: cassandra_schema_sync
+short_description: Brings keyspaces, types, tables, indexes and views in line with a schema document.
+description:
+  - Compares I(keyspaces), a schema document, with the live schema and runs the statements needed to
+    make them match.
+  - The live schema of the listed keyspaces is read with six queries on the system_schema tables,
+    whatever the number of tables, and compared in memory.
+  - Existing objects are altered rather than recreated. Missing columns and user defined type fields are
+    added and changed table or view options are altered. Columns, fields and options that aren't listed
+    are left alone, as are objects that aren't listed.
+  - What can't be altered, a changed primary key, clustering order, column or field type, index target
+    or replication strategy, is reported in I(conflicts) and the module fails without changing anything.
+  - "The statements are run in dependency order, one step after another: keyspaces, types (one step per
+    level of types using other types), tables, indexes and views, then the drops in reverse order.
+    The module waits for schema agreement once after each step, rather than after every statement."
+  - In check mode the plan is returned without being run.
+  - Requires Cassandra 3.0 or later.
+author: Rhys Campbell (@rhysmeister)
+options:
+  login_user:
+    description: The Cassandra user to login with.
+    type: str
+  login_password:
+    description: The Cassandra password to login with.
+    type: str
+  ssl:
+    description: Uses SSL encryption if basic SSL encryption is enabled on Cassandra cluster (without client/server verification)
+    type: bool
+    default: False
+  ssl_cert_reqs:
+    description: SSL verification mode.
+    type: str
+    choices:
+      - 'CERT_NONE'
+      - 'CERT_OPTIONAL'
+      - 'CERT_REQUIRED'
+    default: 'CERT_NONE'
+  ssl_ca_certs:
+    description:
+        The SSL CA chain or certificate location to confirm supplied certificate validity
+        (required when ssl_cert_reqs is set to CERT_OPTIONAL or CERT_REQUIRED)
+    type: str
+    default: ''
+  login_host:
+    description: The Cassandra hostname.
+    type: list
+    elements: str
+  login_port:
+    description: The Cassandra port.
+    type: int
+    default: 9042
+  keyspaces:
+    description:
+      - The schema document, the keyspaces to manage along with their objects.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description: The name of the keyspace.
+        type: str
+        required: true
+      state:
+        description:
+          - The desired state of the keyspace. With C(absent) the objects of the keyspace are ignored.
+        type: str
+        choices:
+          - "present"
+          - "absent"
+        default: "present"
+      replication_factor:
+        description:
+          - The replication factor of a keyspace with SimpleStrategy.
+          - When neither this nor I(data_centres) are set the replication of an existing keyspace is left alone,
+            a new keyspace is created with a replication factor of 1.
+        type: int
+      durable_writes:
+        description:
+          - Enable durable writes for the keyspace.
+          - When not set durable writes are left alone, and enabled for a new keyspace.
+        type: bool
+      data_centres:
+        description:
+          - The replication factor of every data centre of a keyspace with NetworkTopologyStrategy.
+        type: dict
+        aliases:
+          - data_centers
+      types:
+        description: The user defined types of the keyspace.
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description: The name of the type.
+            type: str
+            required: true
+          state:
+            description: The desired state of the type.
+            type: str
+            choices:
+              - "present"
+              - "absent"
+            default: "present"
+          fields:
+            description:
+              - "The fields of the type, as a list of <field name>: <data type> pairs."
+            type: list
+            elements: dict
+      tables:
+        description: The tables of the keyspace.
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description: The name of the table.
+            type: str
+            required: true
+          state:
+            description: The desired state of the table.
+            type: str
+            choices:
+              - "present"
+              - "absent"
+            default: "present"
+          columns:
+            description:
+              - "The columns of the table, as a list of <column name>: <data type> pairs, as in M(community.cassandra.cassandra_table)."
+              - End the data type with C(static) for a static column.
+            type: list
+            elements: dict
+          primary_key:
+            description: The primary key columns.
+            type: list
+            elements: str
+          partition_key:
+            description:
+              - The partition key columns, the first ones of I(primary_key).
+              - Defaults to the first column of I(primary_key).
+            type: list
+            elements: str
+          clustering:
+            description:
+              - "The clustering order of the clustering columns, as a list of <column name>: <ASC|DESC> pairs."
+            type: list
+            elements: dict
+          table_options:
+            description:
+              - The table options, as in M(community.cassandra.cassandra_table), either as CQL literals or plain values.
+              - Only the options given, and the keys given of map options such as compaction, are compared.
+              - Altering a map option keeps the keys it isn't given, unless it's given another class.
+            type: dict
+          indexes:
+            description: The secondary indexes of the table.
+            type: list
+            elements: dict
+            suboptions:
+              name:
+                description: The name of the index.
+                type: str
+                required: true
+              state:
+                description: The desired state of the index.
+                type: str
+                choices:
+                  - "present"
+                  - "absent"
+                default: "present"
+              target:
+                description:
+                  - The indexed column, or C(keys(column)), C(entries(column)) or C(full(column)) for collections.
+                type: str
+              using:
+                description: The class of a custom index, i.e. C(org.apache.cassandra.index.sasi.SASIIndex).
+                type: str
+              options:
+                description: The options of a custom index.
+                type: dict
+      views:
+        description: The materialized views of the keyspace.
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description: The name of the view.
+            type: str
+            required: true
+          state:
+            description: The desired state of the view.
+            type: str
+            choices:
+              - "present"
+              - "absent"
+            default: "present"
+          base_table:
+            description: The table the view selects from.
+            type: str
+          columns:
+            description: The columns selected. All of them when not set.
+            type: list
+            elements: str
+          primary_key:
+            description: The primary key columns of the view.
+            type: list
+            elements: str
+          partition_key:
+            description: The partition key columns of the view, the first ones of I(primary_key).
+            type: list
+            elements: str
+          clustering:
+            description:
+              - "The clustering order of the clustering columns, as a list of <column name>: <ASC|DESC> pairs."
+            type: list
+            elements: dict
+          table_options:
+            description: The options of the view, compared as those of tables.
+            type: dict
+  schema_agreement_wait:
+    description:
+      - The number of seconds to wait after each step for the nodes to agree on the schema.
+      - The module fails, without running the later steps, if they don't.
+    type: int
+    default: 30
+  consistency_level:
+    description:
+      - Consistency level to perform cassandra queries with.
+      - Not all consistency levels are supported by read or write connections.\
+        When a level is not supported then LOCAL_ONE, the default is used.
+      - Consult the README.md on GitHub for further details.
+    type: str
+    default: "LOCAL_ONE"
+    choices:
+        - ANY
+        - ONE
+        - TWO
+        - THREE
+        - QUORUM
+        - ALL
+        - LOCAL_QUORUM
+        - EACH_QUORUM
+        - SERIAL
+        - LOCAL_SERIAL
+        - LOCAL_ONE
+
+requirements:
+  - cassandra-driver
+'''
+
+EXAMPLES = r'''
+- name: Bring the killrvideo schema in line
+  community.cassandra.cassandra_schema_sync:
+    keyspaces:
+      - name: killrvideo
+        data_centres:
+          london: 3
+        types:
+          - name: video_metadata
+            fields:
+              - height: int
+              - width: int
+              - encoding: text
+        tables:
+          - name: videos
+            columns:
+              - videoid: uuid
+              - userid: uuid
+              - name: text
+              - tags: "set<text>"
+              - metadata: "set<frozen<video_metadata>>"
+              - added_date: timestamp
+            primary_key:
+              - videoid
+            table_options:
+              compaction: "{'class': 'LeveledCompactionStrategy'}"
+              gc_grace_seconds: 86400
+            indexes:
+              - name: videos_by_name
+                target: name
+        views:
+          - name: videos_by_user
+            base_table: videos
+            primary_key:
+              - userid
+              - videoid
+
+- name: Show what would be run
+  community.cassandra.cassandra_schema_sync:
+    keyspaces: "{{ app_schema }}"
+  check_mode: yes
+  register: schema_plan
+'''
+
+
+RETURN = '''
+changed:
+  description: Whether the schema has been, or in check mode would be, changed.
+  returned: on success
+  type: bool
+plan:
+  description: The steps run, or that would be run in check mode, in order, each followed by a schema agreement wait.
+  returned: always
+  type: list
+  elements: dict
+  sample: [
+    {
+      "step": "types",
+      "cql": ["CREATE TYPE killrvideo.video_metadata (height int, width int, encoding text)"]
+    },
+    {
+      "step": "tables",
+      "cql": ["ALTER TABLE killrvideo.videos ADD metadata set<frozen<video_metadata>>"]
+    }
+  ]
+conflicts:
+  description: The differences between the document and the live schema that can't be altered.
+  returned: on error
+  type: list
+  elements: str
+failed_statement:
+  description: The step and statement that failed, with the error.
+  returned: on error
+  type: dict
+msg:
+  description: Exceptions encountered during module execution.
+  returned: on error
+  type: str
+'''
+
+__metaclass__ = type
+
+try:
+    from cassandra.cluster import EXEC_PROFILE_DEFAULT
+    from cassandra.auth import PlainTextAuthProvider
+    from cassandra import AuthenticationFailed
+    from cassandra.query import dict_factory
+    from cassandra import ConsistencyLevel
+    HAS_CASSANDRA_DRIVER = True
+except Exception:
+    HAS_CASSANDRA_DRIVER = False
+
+    # This is here for ansible-test import (when cassandra-driver is not installed)
+    class ConsistencyLevel:
+        ANY = "ANY"
+        ONE = "ONE"
+        TWO = "TWO"
+        THREE = "THREE"
+        QUORUM = "QUORUM"
+        ALL = "ALL"
+        LOCAL_QUORUM = "LOCAL_QUORUM"
+        EACH_QUORUM = "EACH_QUORUM"
+        SERIAL = "SERIAL"
+        LOCAL_SERIAL = "LOCAL_SERIAL"
+        LOCAL_ONE = "LOCAL_ONE"
+
+    ConsistencyLevel.name_to_value = {
+        "ANY": ConsistencyLevel.ANY,
+        "ONE": ConsistencyLevel.ONE,
+        "TWO": ConsistencyLevel.TWO,
+        "THREE": ConsistencyLevel.THREE,
+        "QUORUM": ConsistencyLevel.QUORUM,
+        "ALL": ConsistencyLevel.ALL,
+        "LOCAL_QUORUM": ConsistencyLevel.LOCAL_QUORUM,
+        "EACH_QUORUM": ConsistencyLevel.EACH_QUORUM,
+        "SERIAL": ConsistencyLevel.SERIAL,
+        "LOCAL_SERIAL": ConsistencyLevel.LOCAL_SERIAL,
+        "LOCAL_ONE": ConsistencyLevel.LOCAL_ONE,
+    }
+
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_ssl_context,
+    read_and_write_sessions,
+    read_write_cluster,
+    wait_for_schema_agreement,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_keyspaces import (
+    create_alter_keyspace_cql,
+    is_keyspace_changed,
+    keyspace_config,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_schema import (
+    add_column_cql,
+    add_field_cql,
+    alter_options_cql,
+    changed_options,
+    column_pairs,
+    create_index_cql,
+    create_table_cql,
+    create_type_cql,
+    create_view_cql,
+    index_target,
+    key_layout,
+    layout_conflicts,
+    live_table_layout,
+    missing_columns,
+    normalize_type,
+    table_layout,
+    type_levels,
+)
+
+# Every query reads the whole schema of the listed keyspaces, keyspace_name
+# being the partition key of the system_schema tables
+SCHEMA_QUERIES = (
+    ("keyspaces", "SELECT keyspace_name, replication, durable_writes FROM system_schema.keyspaces"),
+    ("types", "SELECT keyspace_name, type_name, field_names, field_types FROM system_schema.types"),
+    ("tables", "SELECT * FROM system_schema.tables"),
+    ("columns", "SELECT keyspace_name, table_name, column_name, kind, position, type, clustering_order FROM system_schema.columns"),
+    ("indexes", "SELECT keyspace_name, table_name, index_name, options FROM system_schema.indexes"),
+    ("views", "SELECT * FROM system_schema.views"),
+)
+
+# =========================================
+# Cassandra module specific support methods
+# =========================================
+
+
+def load_schema(session, names):
+    '''
+    Returns the live schema of the keyspaces names that exist, keyed by
+    keyspace, as
+        {
+            "config": keyspace_config(),
+            "types": {name: [(field, type)]},
+            "tables": {name: {"options": row, "layout": live_table_layout()}},
+            "indexes": {name: {"table": table, "target": target, "class_name": class_name}},
+            "views": {name: {"options": row, "layout": live_table_layout()}}
+        }
+    with one query per system_schema table.
+    '''
+    dict_factory_profile = session.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=dict_factory)
+    rows = {}
+    for kind, cql in SCHEMA_QUERIES:
+        rows[kind] = list(session.execute(cql + " WHERE keyspace_name IN %s", [tuple(names)],
+                                          execution_profile=dict_factory_profile))
+    schema = {}
+    for row in rows["keyspaces"]:
+        schema[row['keyspace_name']] = {"config": keyspace_config(row['replication'], row['durable_writes']),
+                                        "types": {}, "tables": {}, "indexes": {}, "views": {}}
+    columns = {}
+    for row in rows["columns"]:
+        columns.setdefault((row['keyspace_name'], row['table_name']), []).append(row)
+    for row in rows["types"]:
+        schema[row['keyspace_name']]["types"][row['type_name']] = list(zip(row['field_names'], row['field_types']))
+    for kind, name_column in (("tables", "table_name"), ("views", "view_name")):
+        for row in rows[kind]:
+            schema[row['keyspace_name']][kind][row[name_column]] = {
+                "options": row,
+                "layout": live_table_layout(columns.get((row['keyspace_name'], row[name_column]), ())),
+            }
+    for row in rows["indexes"]:
+        options = row['options'] or {}
+        schema[row['keyspace_name']]["indexes"][row['index_name']] = {
+            "table": row['table_name'],
+            "target": options.get('target'),
+            "class_name": options.get('class_name'),
+        }
+    return schema
+
+
+def keyspace_cql(spec, current):
+    '''
+    Returns the (statement, conflict) bringing the replication and durable
+    writes of the keyspace, with config current or None, in line with spec.
+    '''
+    name = spec['name']
+    replication_factor = spec['replication_factor'] or 1
+    durable_writes = spec['durable_writes']
+    data_centres = spec['data_centres']
+    if current is None:
+        return create_alter_keyspace_cql(name, replication_factor, durable_writes is not False, data_centres, False), None
+    if durable_writes is None:
+        durable_writes = current['durable_writes']
+    if spec['replication_factor'] is None and data_centres is None:
+        if durable_writes != current['durable_writes']:
+            return "ALTER KEYSPACE {0} WITH DURABLE_WRITES = {1}".format(name, durable_writes), None
+        return None, None
+    strategy = "SimpleStrategy" if data_centres is None else "NetworkTopologyStrategy"
+    if current['class'] != strategy:
+        return None, "{0}: the replication strategy is {1}, migrating it to {2} isn't supported".format(
+            name, current['class'], strategy)
+    if is_keyspace_changed(current, replication_factor, durable_writes, data_centres):
+        return create_alter_keyspace_cql(name, replication_factor, durable_writes, data_centres, True), None
+    return None, None
+
+
+class SchemaPlan(object):
+    '''
+    The statements of each step, see steps(), and the conflicts found.
+    '''
+
+    def __init__(self):
+        self.keyspaces = []
+        self.types = {}
+        self.tables = []
+        self.indexes_and_views = []
+        self.drop_indexes_and_views = []
+        self.drop_tables = []
+        self.drop_types = {}
+        self.drop_keyspaces = []
+        self.conflicts = []
+
+    def steps(self):
+        '''
+        Returns the non empty steps, in the order they are run, as
+        [{"step": "tables", "cql": [...]}].
+        '''
+        steps = [("keyspaces", self.keyspaces)]
+        steps.extend(("types", self.types[level]) for level in sorted(self.types))
+        steps.extend([("tables", self.tables),
+                      ("indexes_and_views", self.indexes_and_views),
+                      ("drop_indexes_and_views", self.drop_indexes_and_views),
+                      ("drop_tables", self.drop_tables)])
+        steps.extend(("drop_types", self.drop_types[level]) for level in sorted(self.drop_types, reverse=True))
+        steps.append(("drop_keyspaces", self.drop_keyspaces))
+        return [{"step": step, "cql": cql} for step, cql in steps if cql]
+
+
+def plan_types(plan, keyspace, specs, current):
+    # The levels of the wanted types, using the live fields of the others
+    field_types = dict((name, [cql_type for field, cql_type in fields]) for name, fields in current.items())
+    for spec in specs:
+        if spec['state'] == "present":
+            field_types[spec['name']] = [cql_type for field, cql_type in column_pairs(spec['fields'])]
+    levels = type_levels(field_types)
+    for spec in specs:
+        name = "{0}.{1}".format(keyspace, spec['name'])
+        fields = current.get(spec['name'])
+        if spec['state'] == "absent":
+            if fields is not None:
+                plan.drop_types.setdefault(levels[spec['name']], []).append("DROP TYPE {0}".format(name))
+        elif fields is None:
+            plan.types.setdefault(levels[spec['name']], []).append(create_type_cql(name, column_pairs(spec['fields'])))
+        else:
+            fields = dict(fields)
+            for field, cql_type in column_pairs(spec['fields']):
+                if field not in fields:
+                    plan.types.setdefault(levels[spec['name']], []).append(add_field_cql(name, field, cql_type))
+                elif normalize_type(cql_type) != normalize_type(fields[field]):
+                    plan.conflicts.append("{0}: field {1} is {2}, it can't be altered to {3}".format(
+                        name, field, fields[field], cql_type))
+
+
+def plan_indexes(plan, keyspace, table, specs, current):
+    for spec in specs:
+        index = current.get(spec['name'])
+        if spec['state'] == "absent":
+            if index is not None:
+                plan.drop_indexes_and_views.append("DROP INDEX {0}.{1}".format(keyspace, spec['name']))
+            continue
+        if not spec['target']:
+            raise ValueError("Index {0}.{1}: target is required".format(keyspace, spec['name']))
+        if index is None:
+            plan.indexes_and_views.append(create_index_cql(spec['name'], "{0}.{1}".format(keyspace, table),
+                                                           spec['target'], spec['using'], spec['options']))
+        elif index['table'] != table or index_target(index['target'] or "") != index_target(spec['target']):
+            plan.conflicts.append("{0}.{1}: the index is on {2}({3}), it can't be altered to {4}({5})".format(
+                keyspace, spec['name'], index['table'], index['target'], table, spec['target']))
+
+
+def plan_tables(plan, keyspace, specs, current, indexes):
+    for spec in specs:
+        name = "{0}.{1}".format(keyspace, spec['name'])
+        table = current.get(spec['name'])
+        if spec['state'] == "absent":
+            if table is not None:
+                plan.drop_tables.append("DROP TABLE {0}".format(name))
+            continue
+        try:
+            layout = table_layout(spec['columns'], spec['primary_key'], spec['partition_key'], spec['clustering'])
+        except ValueError as excep:
+            raise ValueError("Table {0}: {1}".format(name, excep))
+        if table is None:
+            plan.tables.append(create_table_cql(name, layout, spec['table_options']))
+        else:
+            plan.conflicts.extend(layout_conflicts(name, layout, table['layout']))
+            for column, cql_type in missing_columns(layout, table['layout']):
+                plan.tables.append(add_column_cql(name, column, cql_type))
+            options = changed_options(spec['table_options'], table['options'])
+            if options:
+                plan.tables.append(alter_options_cql("TABLE", name, spec['table_options'], options, table['options']))
+        plan_indexes(plan, keyspace, spec['name'], spec['indexes'] or (), indexes)
+
+
+def plan_views(plan, keyspace, specs, current):
+    for spec in specs:
+        name = "{0}.{1}".format(keyspace, spec['name'])
+        view = current.get(spec['name'])
+        if spec['state'] == "absent":
+            if view is not None:
+                plan.drop_indexes_and_views.append("DROP MATERIALIZED VIEW {0}".format(name))
+            continue
+        if not spec['base_table']:
+            raise ValueError("View {0}: base_table is required".format(name))
+        try:
+            layout = key_layout(spec['primary_key'], spec['partition_key'], spec['clustering'])
+        except ValueError as excep:
+            raise ValueError("View {0}: {1}".format(name, excep))
+        if view is None:
+            plan.indexes_and_views.append(create_view_cql(name, "{0}.{1}".format(keyspace, spec['base_table']),
+                                                          spec['columns'], layout, spec['table_options']))
+        else:
+            plan.conflicts.extend(layout_conflicts(name, layout, view['layout']))
+            options = changed_options(spec['table_options'], view['options'])
+            if options:
+                plan.indexes_and_views.append(alter_options_cql("MATERIALIZED VIEW", name, spec['table_options'],
+                                                                options, view['options']))
+
+
+def plan_schema(specs, schema):
+    '''
+    Compares specs, the keyspaces option, with schema, from load_schema(),
+    and returns the SchemaPlan bringing the live schema in line. Raises
+    ValueError for a document that doesn't add up.
+    '''
+    plan = SchemaPlan()
+    for spec in specs:
+        keyspace = spec['name']
+        current = schema.get(keyspace)
+        if spec['state'] == "absent":
+            if current is not None:
+                plan.drop_keyspaces.append("DROP KEYSPACE {0}".format(keyspace))
+            continue
+        cql, conflict = keyspace_cql(spec, current['config'] if current else None)
+        if cql:
+            plan.keyspaces.append(cql)
+        if conflict:
+            plan.conflicts.append(conflict)
+        current = current or {"types": {}, "tables": {}, "indexes": {}, "views": {}}
+        plan_types(plan, keyspace, spec['types'] or (), current['types'])
+        plan_tables(plan, keyspace, spec['tables'] or (), current['tables'], current['indexes'])
+        plan_views(plan, keyspace, spec['views'] or (), current['views'])
+    return plan
+
+
+def apply_steps(session, steps, agreed):
+    '''
+    Runs steps, from SchemaPlan.steps(), in order, calling agreed() after
+    each one to wait for schema agreement. Stops at the first statement
+    that fails, or when agreed() returns False, and returns
+    {step, cql, error} then, otherwise None.
+    '''
+    for step in steps:
+        for cql in step['cql']:
+            try:
+                session.execute(cql)
+            except Exception as excep:
+                return {"step": step['step'], "cql": cql, "error": str(excep)}
+        if not agreed():
+            return {"step": step['step'], "cql": None, "error": "The nodes did not agree on the schema"}
+    return None
+
+
+############################################
+
+
+def main():
+    state = dict(type='str', default='present', choices=['present', 'absent'])
+    columns_spec = dict(
+        primary_key=dict(type='list', elements='str', no_log=False),
+        partition_key=dict(type='list', elements='str', no_log=False),
+        clustering=dict(type='list', elements='dict'),
+        table_options=dict(type='dict'),
+    )
+    index_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(state),
+        target=dict(type='str'),
+        using=dict(type='str'),
+        options=dict(type='dict'),
+    )
+    table_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(state),
+        columns=dict(type='list', elements='dict'),
+        indexes=dict(type='list', elements='dict', options=index_spec),
+        **columns_spec
+    )
+    view_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(state),
+        base_table=dict(type='str'),
+        columns=dict(type='list', elements='str'),
+        **columns_spec
+    )
+    type_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(state),
+        fields=dict(type='list', elements='dict'),
+    )
+    keyspace_spec = dict(
+        name=dict(type='str', required=True),
+        state=dict(state),
+        replication_factor=dict(type='int'),
+        durable_writes=dict(type='bool'),
+        data_centres=dict(type='dict', aliases=['data_centers']),
+        types=dict(type='list', elements='dict', options=type_spec),
+        tables=dict(type='list', elements='dict', options=table_spec),
+        views=dict(type='list', elements='dict', options=view_spec),
+    )
+    module = AnsibleModule(
+        argument_spec=dict(
+            login_user=dict(type='str'),
+            login_password=dict(type='str', no_log=True),
+            ssl=dict(type='bool', default=False),
+            ssl_cert_reqs=dict(type='str',
+                               required=False,
+                               default='CERT_NONE',
+                               choices=['CERT_NONE',
+                                        'CERT_OPTIONAL',
+                                        'CERT_REQUIRED']),
+            ssl_ca_certs=dict(type='str', default=''),
+            login_host=dict(type='list', elements='str'),
+            login_port=dict(type='int', default=9042),
+            keyspaces=dict(type='list', elements='dict', required=True, options=keyspace_spec),
+            schema_agreement_wait=dict(type='int', default=30),
+            consistency_level=dict(type='str',
+                                   required=False,
+                                   default="LOCAL_ONE",
+                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+        supports_check_mode=True
+    )
+
+    if HAS_CASSANDRA_DRIVER is False:
+        msg = ("This module requires the cassandra-driver python"
+               " driver. You can probably install it with pip"
+               " install cassandra-driver.")
+        module.fail_json(msg=msg)
+
+    specs = module.params['keyspaces']
+    names = [spec['name'] for spec in specs]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg="Keyspaces can only be listed once: {0}".format(", ".join(duplicates)))
+    if not names:
+        module.exit_json(changed=False, plan=[])
+
+    try:
+        auth_provider = None
+        if module.params['login_user'] is not None:
+            auth_provider = PlainTextAuthProvider(
+                username=module.params['login_user'],
+                password=module.params['login_password']
+            )
+        ssl_context = cql_ssl_context(module,
+                                      module.params['ssl'],
+                                      module.params['ssl_cert_reqs'],
+                                      module.params['ssl_ca_certs'])
+        # The schema is read from the system_schema tables and agreement
+        # is waited for after each step rather than after each statement
+        cluster = read_write_cluster(module.params['login_host'],
+                                     module.params['login_port'],
+                                     auth_provider,
+                                     ssl_context,
+                                     module.params['consistency_level'],
+                                     "lazy",
+                                     max_schema_agreement_wait=0)
+        session_r, session_w = read_and_write_sessions(cluster)
+    except AuthenticationFailed as auth_failed:
+        module.fail_json(msg="Authentication failed: {0}".format(auth_failed))
+    except Exception as excep:
+        module.fail_json(msg="Error connecting to cluster: {0}".format(excep))
+
+    try:
+        try:
+            plan = plan_schema(specs, load_schema(session_r, names))
+        except ValueError as excep:
+            module.fail_json(msg=str(excep))
+        steps = plan.steps()
+        result = dict(
+            changed=len(steps) > 0,
+            plan=steps,
+        )
+        if plan.conflicts:
+            module.fail_json(msg="The schema can't be brought in line without recreating objects",
+                             conflicts=plan.conflicts,
+                             **dict(result, changed=False))
+        if steps and not module.check_mode:
+            failed = apply_steps(session_w, steps,
+                                 lambda: wait_for_schema_agreement(cluster, module.params['schema_agreement_wait']))
+            if failed:
+                module.fail_json(msg="Step {0} failed: {1}".format(failed['step'], failed['error']),
+                                 failed_statement=failed,
+                                 **result)
+        module.exit_json(**result)
+
+    except Exception as excep:
+        module.fail_json(msg="An error occured: {0}".format(excep))
+
+
+if __name__ == '__main__':
+    main()
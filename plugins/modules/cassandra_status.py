@@ -14,14 +14,20 @@ author: Rhys Campbell (@rhysmeister)
 short_description: Validates the status of the cluster as seen from the node.
 requirements:
   - nodetool
+  - cassandra-driver, with I(backend=cql)
 description:
     - Validates the status of the cluster as seen from the C* node.
     - Ensure that all nodes are in a UP/NORMAL state or tolerate a few down nodes.
     - Optionally poll multiple times to allow the cluster state to stablise.
+    - With I(wait_for), only wait for a few nodes, like one that was just restarted, to reach I(wait_for_state).
+    - The wait between polls can grow exponentially and shrink again as soon as the cluster state changes,
+      see I(backoff) and I(fast_interval).
     - Cluster status is obtained thtough the usage of the nodetool status command.
 
 extends_documentation_fragment:
   - community.cassandra.nodetool_module_options
+  - community.cassandra.poll_options
+  - community.cassandra.cql_connection_options
 
 options:
   down:
@@ -31,16 +37,65 @@ options:
     default: 0
     aliases:
       - d
-  poll:
+  backend:
     description:
-      - The maximum number of times to call nodetool status to query cluster status.
-    type: int
-    default: 1
-  interval:
+      - How the cluster status is obtained.
+      - C(nodetool) runs nodetool status.
+      - C(cql) reads the nodes from the system.local and system.peers_v2 (or system.peers) tables,
+        and whether they are up from the driver, over a single CQL connection kept open
+        between polls, see the I(cql_*) options. Saves the cost of a nodetool run on every poll.
+      - The system tables have no load and ownership, nor the state of nodes that are being added, so with
+        C(cql) the load and owns of nodes are C(?) and their state is always C(N). tokens is the number of tokens.
+        I(resolve_ip) and I(keyspace) are ignored.
+    type: str
+    choices:
+      - nodetool
+      - cql
+    default: nodetool
+  debug_history:
+    description:
+      - What I(debug) returns of the polls.
+      - C(full) returns the output and parsed status of every poll, in C(stdout_list), C(stderr_list) and
+        C(cluster_status_list).
+      - C(delta) returns the parsed status of the first poll and only the nodes whose status or state
+        changed in the following ones, in C(cluster_status_history). Only the last I(debug_history_size)
+        outputs are returned in C(stdout_list) and C(stderr_list). Use it when polling large clusters many times.
+    type: str
+    choices:
+      - full
+      - delta
+    default: full
+  debug_history_size:
     description:
-      - The number of seconds to wait between poll executions.
+      - The number of outputs returned with I(debug_history=delta), the most recent ones.
     type: int
-    default: 30
+    default: 5
+  wait_for:
+    description:
+      - Addresses or host ids of the nodes to wait for, instead of checking the whole cluster.
+      - Polling stops as soon as all of them are in the I(wait_for_state) state. The module fails
+        if they aren't by the time polling ends.
+      - I(down) is ignored and C(cluster_status) isn't returned. The other nodes of the nodetool status
+        output are skipped without being parsed.
+      - With I(debug), only the output of the last poll is returned.
+      - Addresses are host names with I(resolve_ip=true).
+    type: list
+    elements: str
+  wait_for_state:
+    description:
+      - The status and state the I(wait_for) nodes must all be in, as printed by nodetool status.
+      - For example C(UN) for Up/Normal or C(UJ) for Up/Joining.
+    type: str
+    default: UN
+    choices:
+      - UN
+      - UJ
+      - UL
+      - UM
+      - DN
+      - DJ
+      - DL
+      - DM
   resolve_ip:
     description:
       - Resolve node ip address to domain names.
@@ -62,6 +117,30 @@ EXAMPLES = '''
     poll: 3
     interval: 60
 
+- name: Wait up to 10 minutes for a restarted node, polling every 2 seconds at first
+  community.cassandra.cassandra_status:
+    interval: 2
+    backoff: 1.5
+    max_interval: 30
+    fast_interval: 2
+    jitter: 0.1
+    timeout: 600
+
+- name: Wait for the node that was just restarted to be Up/Normal again
+  community.cassandra.cassandra_status:
+    wait_for:
+      - "{{ ansible_default_ipv4.address }}"
+    interval: 2
+    timeout: 600
+
+- name: Poll the cluster status over CQL
+  community.cassandra.cassandra_status:
+    backend: cql
+    cql_username: cassandra
+    cql_password: cassandra
+    poll: 20
+    interval: 5
+
 - name: Ensure down nodes are no more than 1
   community.cassandra.cassandra_status:
     down: 1
@@ -76,11 +155,107 @@ rc:
   description: Return code of the last executed command.
   returned: always
   type: int
+iterations:
+  description: The number of times nodetool status was run.
+  returned: always
+  type: int
+elapsed:
+  description: Seconds spent polling.
+  returned: always
+  type: float
+timed_out:
+  description: Whether polling was stopped by I(timeout).
+  returned: always
+  type: bool
+poll_timings:
+  description:
+    - Timings of every poll, to help tune the polling options.
+    - C(duration) is the number of seconds nodetool status took and C(sleep) the wait that followed it.
+  returned: always
+  type: list
+  elements: dict
+  sample:
+    - iteration: 1
+      duration: 1.532
+      sleep: 2.0
+      rc: 0
+      down: 1
+      transition: false
+    - iteration: 2
+      duration: 1.498
+      sleep: 0.0
+      rc: 0
+      down: 0
+      transition: true
+cluster_status_history:
+  description:
+    - The parsed status of the first poll, then the nodes that changed status or state at every following poll.
+    - Polls without any change are left out.
+  returned: with I(debug=true) and I(debug_history=delta)
+  type: dict
+  sample:
+    first:
+      iteration: 1
+      cluster_status:
+        london:
+          up:
+            - 127.0.0.1
+          down:
+            - 127.0.0.2
+          nodes:
+            - address: 127.0.0.1
+              host_id: d384e6b9-d9fa-45b6-9779-112b0a7e5801
+              load: 66.2 KiB
+              owns: 33.7%
+              rack: rack1
+              state: N
+              status: U
+              tokens: "1"
+            - address: 127.0.0.2
+              host_id: d384e6b9-d9fa-45b6-9779-112b0a7e5802
+              load: 66.2 KiB
+              owns: 33.7%
+              rack: rack1
+              state: N
+              status: D
+              tokens: "1"
+    deltas:
+      - iteration: 4
+        changed:
+          - address: 127.0.0.2
+            datacenter: london
+            status: U
+            state: N
+        removed: []
+wait_for_nodes:
+  description:
+    - The I(wait_for) nodes as last seen in the nodetool status output, keyed by I(wait_for) entry.
+    - Nodes missing from the output are null.
+  returned: when I(wait_for) is set
+  type: dict
+  sample:
+    127.0.0.2:
+      address: 127.0.0.2
+      datacenter: london
+      host_id: d384e6b9-d9fa-45b6-9779-112b0a7e5802
+      load: 66.2 KiB
+      owns: 33.7%
+      rack: rack1
+      state: N
+      status: U
+      tokens: "1"
+pending:
+  description: The I(wait_for) nodes that aren't in the I(wait_for_state) state.
+  returned: when I(wait_for) is set
+  type: list
+  elements: str
+  sample:
+    - 127.0.0.2
 cluster_status:
   description:
     - Cassandra cluster information grouped by datacenter.
     - Each key is a datacenter name.
-  returned: success
+  returned: success, when I(wait_for) isn't set
   type: dict
   sample:
     london:
@@ -165,16 +340,40 @@ cluster_status:
               description:
                 - Number of tokens assigned to the node.
               type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import re
-import time
+from collections import deque
 __metaclass__ = type
 
 
 from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolCmd
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import (
+    cluster_up_down,
+    find_nodes,
+)
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    cql_connection_argument_spec,
+    topology_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_topology import (
+    cql_cluster_status,
+    host_states,
+    local_and_peers,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.poll_scheduler import (
+    PollScheduler,
+    poll_scheduler_argument_spec,
+)
 
 
 class NodeToolStatusCommand(NodeToolCmd):
@@ -183,6 +382,8 @@ class NodeToolStatusCommand(NodeToolCmd):
     Inherits from the NodeToolCmd class. Adds the following methods;
 
         - status_command
+        - poll
+        - poll_nodes
 
     """
 
@@ -197,173 +398,284 @@ class NodeToolStatusCommand(NodeToolCmd):
     def status_command(self):
         return self.nodetool_cmd(self.status_cmd)
 
+    def poll(self):
+        '''
+        Returns (rc, out, err, cluster_status), cluster_status being None
+        when nodetool failed.
+        '''
+        (rc, out, err) = self.status_command()
+        return rc, out, err, cluster_up_down(out) if rc == 0 else None
+
+    def poll_nodes(self, targets):
+        '''
+        Returns (rc, out, err, nodes), nodes being the find_nodes() of targets.
+        '''
+        (rc, out, err) = self.status_command()
+        return rc, out, err, find_nodes(out, targets) if rc == 0 else None
+
 
-def nodetool_status_poll(module):
+class CqlStatusCommand(object):
+
+    """
+    Reads the cluster status from the system tables and the driver's view of
+    which nodes are up, over one CQL connection kept open between polls.
+    Offers the poll methods of NodeToolStatusCommand.
+    """
+
+    version_cache = None
+
+    def __init__(self, module):
+        self.cluster = topology_cluster(module)
+        self.session = None
+
+    def poll(self):
+        try:
+            if self.session is None:
+                self.session = self.cluster.connect()
+            local, peers = local_and_peers(self.session)
+            cluster_status = cql_cluster_status(local, peers, host_states(self.cluster.metadata.all_hosts()))
+        except Exception as excep:
+            return 1, "", "Error reading cluster status: {0}".format(excep), None
+        return 0, "", "", cluster_status
+
+    def poll_nodes(self, targets):
+        (rc, out, err, cluster_status) = self.poll()
+        if rc != 0:
+            return rc, out, err, None
+        found = {}
+        for dc, dc_status in cluster_status.items():
+            for node in dc_status['nodes']:
+                for key in (node['address'], node['host_id']):
+                    if key in targets:
+                        found[key] = dict(node, datacenter=dc)
+        return rc, out, err, found
+
+    def close(self):
+        self.cluster.shutdown()
+
+
+def status_command(module):
+    if module.params.get('backend') == "cql":
+        return CqlStatusCommand(module)
+    return NodeToolStatusCommand(module)
+
+
+def cluster_state(cluster_status):
+    '''
+    Returns what identifies the state of the cluster between two polls, the
+    nodes that aren't Up/Normal along with their status and state.
     '''
-    Calls NodeToolStatusCommand(module, status_cmd) a maximum of poll times
-    with the indicated interval. Returns as soon all nodes are up or the
-    previous limits are reached.
+    return frozenset(
+        (node['address'], node['status'], node['state'])
+        for dc in cluster_status.values()
+        for node in dc['nodes']
+        if node['status'] != "U" or node['state'] != "N"
+    )
+
+
+def cluster_status_delta(previous, current):
+    '''
+    Returns the nodes whose status or state differ between two cluster
+    statuses, new nodes included, as {"changed": [...], "removed": [...]}.
+    Changed nodes are {"address", "datacenter", "status", "state"} dicts.
+    '''
+    def by_address(cluster_status):
+        return dict((node['address'], (dc, node))
+                    for dc, dc_status in cluster_status.items()
+                    for node in dc_status['nodes'])
+
+    before = by_address(previous)
+    changed = []
+    for address, (dc, node) in by_address(current).items():
+        old = before.pop(address, (None, None))[1]
+        if old is None or (old['status'], old['state']) != (node['status'], node['state']):
+            changed.append(dict(address=address, datacenter=dc, status=node['status'], state=node['state']))
+    return dict(changed=sorted(changed, key=lambda node: node['address']), removed=sorted(before))
+
+
+class StatusHistory(object):
+    '''
+    What is kept of the polls for the debug output.
+
+    full keeps every output and parsed cluster status, as always. delta
+    keeps the first cluster status and only the nodes that changed in the
+    following ones, along with the last size outputs. last, used without
+    debug, keeps only the last output.
+    '''
+
+    def __init__(self, mode="full", size=None):
+        self.mode = mode
+        if mode == "last":
+            size = 1
+        elif mode == "full":
+            size = None
+        self.stdout = deque(maxlen=size)
+        self.stderr = deque(maxlen=size)
+        self.snapshots = []
+        self.first = None
+        self.deltas = []
+        self._previous = None
+
+    def add_output(self, out, err):
+        self.stdout.append(out.strip())
+        self.stderr.append(err.strip())
+
+    def add_status(self, iteration, cluster_status):
+        if self.mode == "full":
+            self.snapshots.append(cluster_status)
+        elif self.mode == "delta":
+            if self._previous is None:
+                self.first = dict(iteration=iteration, cluster_status=cluster_status)
+            else:
+                delta = cluster_status_delta(self._previous, cluster_status)
+                if delta['changed'] or delta['removed']:
+                    delta['iteration'] = iteration
+                    self.deltas.append(delta)
+            self._previous = cluster_status
+
+    def debug_result(self):
+        result = {}
+        if self.mode == "delta":
+            result['cluster_status_history'] = dict(first=self.first, deltas=self.deltas)
+        else:
+            result['cluster_status_list'] = self.snapshots
+        if self.stderr:
+            result['stderr_list'] = list(self.stderr)
+        if self.stdout:
+            result['stdout_list'] = list(self.stdout)
+        return result
+
+
+def nodetool_status_poll(module, scheduler=None, history=None):
+    '''
+    Calls NodeToolStatusCommand(module, status_cmd) for as long as the poll
+    scheduler allows. Returns as soon all nodes are up or the scheduler's
+    limits are reached. The polls are recorded in history, which keeps
+    everything by default.
     '''
     cluster_status = None  # Last cluster status
-    cluster_status_list = []
-    iterations = 0
     return_codes = []
-    stdout_list = []
-    stderr_list = []
     down_running_total = None
-    poll = module.params['poll']
-    interval = module.params['interval']
-
-    while iterations < poll:
+    if scheduler is None:
+        scheduler = PollScheduler.from_params(module.params)
+    if history is None:
+        history = StatusHistory()
+    n = status_command(module)
+    version_cache = n.version_cache
+    last_state = None
+
+    while scheduler.attempt():
         down_running_total = 0  # reset between iterations
-        iterations += 1
-        n = NodeToolStatusCommand(module)
-        (rc, out, err) = n.status_command()
-        stdout_list.append(out.strip())
-        stderr_list.append(err.strip())
+        (rc, out, err, polled_status) = n.poll()
+        history.add_output(out, err)
         return_codes.append(rc)
         if rc == 0:
-            cluster_status = cluster_up_down(out)
-            cluster_status_list.append(cluster_status)
+            cluster_status = polled_status
+            history.add_status(scheduler.iterations, cluster_status)
             for dc in cluster_status.keys():
                 down_running_total += len(cluster_status[dc]['down'])
+            state = cluster_state(cluster_status)
+            transition = last_state is not None and state != last_state
+            last_state = state
+            scheduler.record(rc=rc, down=down_running_total, transition=transition)
             if down_running_total == 0:
                 break  # No down nodes, we're good
-            else:
-                time.sleep(interval)  # Something is wrong, check again in a bit but
+            scheduler.wait(transition)  # Something is wrong, check again in a bit
         else:
-            if iterations == poll:
-                break
-            else:
-                time.sleep(interval)
-    return cluster_status, cluster_status_list, iterations, \
-        return_codes, stdout_list, stderr_list, down_running_total
-
-
-# nodetool's status columns are fixed-width, padded to the widest value seen
-# in each column (Cassandra's own TableBuilder.printTo: every cell, even an
-# empty one, is left-justified to the column's max width) -- so a column's
-# start offset in the header line applies identically to every data line
-# below it. Column order/labels vary by cluster type: legacy "token-per-node"
-# clusters print Owns/Host ID before Token, vnodes clusters print
-# Tokens/Owns/Host ID in that order (see Cassandra's Status.java,
-# addNodesHeader()) -- search for known labels instead of assuming one order.
-_NODE_STATUS_COLUMN_LABELS = ["Address", "Load", "Tokens", "Owns (effective)",
-                              "Owns", "Host ID", "Token", "Rack"]
-
-
-def node_status_column_offsets(header_line):
-    found = {}
-    for label in _NODE_STATUS_COLUMN_LABELS:
-        idx = header_line.find(label)
-        if idx == -1:
-            continue
-        # "Owns"/"Token" are substrings of "Owns (effective)"/"Tokens" --
-        # don't let the short label re-claim a spot the long one already has.
-        if label == "Owns" and found.get("Owns (effective)") == idx:
-            continue
-        if label == "Token" and found.get("Tokens") == idx:
-            continue
-        found[label] = idx
-    if "Address" not in found or "Load" not in found or "Host ID" not in found or "Rack" not in found:
-        return None
-    return {
-        "address": found["Address"],
-        "load": found["Load"],
-        "owns": found.get("Owns (effective)", found.get("Owns")),
-        "tokens": found.get("Tokens", found.get("Token")),
-        "host_id": found["Host ID"],
-        "rack": found["Rack"],
-    }
-
-
-def node_status_columns(line, offsets):
-    ordered = sorted(offsets.items(), key=lambda kv: kv[1])
-    values = {}
-    for i, (name, start) in enumerate(ordered):
-        end = ordered[i + 1][1] if i + 1 < len(ordered) else len(line)
-        values[name] = line[start:end].strip()
-    return values
-
-
-def cluster_up_down(stdout):
+            scheduler.record(rc=rc)
+            scheduler.wait()
+    n.close()
+    return cluster_status, history.snapshots, scheduler.iterations, \
+        return_codes, list(history.stdout), list(history.stderr), down_running_total, version_cache, scheduler
+
+
+def nodetool_wait_for(module, scheduler=None):
     '''
-    Extract the Data Centres from the nodetool status stdout
-    Returns a dict in the following format...
-        {
-            "up": [All up nodes in cluster],
-            "down": [All down nodes in cluster],
-            "datacenter1":
-                "up": [ "1.1.1.1",
-                        "1.1.1.2",
-                        "1.1.1.3",
-                        "1.1.1.4",
-                        "1.1.1.5" ],
-                "down": [ "1.1.1.6" ],
-            "datacenter2":
-                "up": [ "1.1.2.1",
-                        "1.1.2.2",
-                        "1.1.2.3",
-                        "1.1.2.4",
-                        "1.1.2.5",
-                        "1.1.2.6" ],
-                "down": []
-        }
+    Calls NodeToolStatusCommand(module, status_cmd) until the wait_for nodes
+    are all in the wait_for_state state or the scheduler's limits are
+    reached. Only the last output and parsed nodes are kept, so memory use
+    doesn't grow with the number of polls.
+    Returns (wait_for_nodes, pending, iterations, return_codes, stdout,
+    stderr, version_cache, scheduler).
     '''
-    cluster_up_down = {}
-    # Second letter is the node state (N/L/J/M upstream, plus DSE's S for
-    # a drained-but-still-running node). Match any state letter so unknown
-    # or DSE-specific codes aren't silently dropped from the parsed output.
-    node_re = re.compile(r'^[UD][A-Z]\s+')
-    column_offsets = None
-
-    for line in ''.join(stdout).splitlines():
-        if line.startswith("Datacenter:"):
-            data_center = line.split(":", 1)[1].strip()
-            cluster_up_down[data_center] = {
-                "up": [],
-                "down": [],
-                "nodes": []
-            }
-            column_offsets = None  # re-derive for this datacenter's own header
-            continue
-
-        if line.strip().startswith("--") and "Address" in line:
-            column_offsets = node_status_column_offsets(line)
-            continue
-
-        if column_offsets is None or not node_re.match(line):
-            continue
-
-        status = line[0]
-        state = line[1]
-        cols = node_status_columns(line, column_offsets)
-
-        if status == "U":
-            cluster_up_down[data_center]["up"].append(cols["address"])
-
-        if status == "D":
-            cluster_up_down[data_center]["down"].append(cols["address"])
-
-        cluster_up_down[data_center]["nodes"].append({
-            "address": cols["address"],
-            "load": cols["load"],
-            "tokens": cols["tokens"],
-            "owns": cols["owns"],
-            "host_id": cols["host_id"],
-            "rack": cols["rack"],
-            "status": status,
-            "state": state,
-        })
-    return cluster_up_down
+    targets = module.params['wait_for']
+    wanted = module.params['wait_for_state']
+    nodes = dict((target, None) for target in targets)
+    pending = list(targets)
+    return_codes = []
+    out = err = ""
+    if scheduler is None:
+        scheduler = PollScheduler.from_params(module.params)
+    n = status_command(module)
+    version_cache = n.version_cache
+    last_state = None
+
+    while scheduler.attempt():
+        (rc, out, err, found) = n.poll_nodes(targets)
+        return_codes.append(rc)
+        if rc == 0:
+            nodes = dict((target, found.get(target)) for target in targets)
+            state = dict((target, node['status'] + node['state'] if node else None)
+                         for target, node in nodes.items())
+            pending = [target for target in targets if state[target] != wanted]
+            transition = last_state is not None and state != last_state
+            last_state = state
+            scheduler.record(rc=rc, pending=len(pending), transition=transition)
+            if not pending:
+                break
+            scheduler.wait(transition)
+        else:
+            scheduler.record(rc=rc)
+            scheduler.wait()
+    n.close()
+    return nodes, pending, scheduler.iterations, return_codes, \
+        out.strip(), err.strip(), version_cache, scheduler
+
+
+def wait_for_main(module, scheduler):
+    wanted = module.params['wait_for_state']
+
+    nodes, pending, iterations, return_codes, out, err, version_cache, scheduler \
+        = nodetool_wait_for(module, scheduler)
+
+    result = {}
+    result['version_cache'] = version_cache
+    result['wait_for_nodes'] = nodes
+    result['pending'] = pending
+    result['iterations'] = iterations
+    result['elapsed'] = scheduler.elapsed()
+    result['timed_out'] = scheduler.timed_out
+    result['poll_timings'] = scheduler.timings
+
+    if module.params['debug']:
+        result['return_codes'] = return_codes
+        result['stdout_list'] = [out]
+        result['stderr_list'] = [err]
+
+    if return_codes[-1] != 0:
+        result['msg'] = "nodetool error: " + (err if err != "" else out)
+        result['rc'] = return_codes[-1]
+        module.fail_json(**result)
+    if pending:
+        result['msg'] = "{0} of {1} nodes are not in the {2} state: {3}".format(
+            len(pending), len(nodes), wanted, ", ".join(pending))
+        module.fail_json(**result)
+    result['msg'] = "All nodes are in the {0} state".format(wanted)
+    module.exit_json(**result)
 
 
 def main():
     argument_spec = cassandra_common_argument_spec()
+    argument_spec.update(poll_scheduler_argument_spec())
+    argument_spec.update(cql_connection_argument_spec())
     argument_spec.update(
         down=dict(type='int', default=0, aliases=["d"]),
-        poll=dict(type='int', default=1),
-        interval=dict(type='int', default=30),
+        backend=dict(type='str', default="nodetool", choices=["nodetool", "cql"]),
+        debug_history=dict(type='str', default="full", choices=["full", "delta"]),
+        debug_history_size=dict(type='int', default=5),
+        wait_for=dict(type='list', elements='str', default=None),
+        wait_for_state=dict(type='str', default="UN",
+                            choices=["UN", "UJ", "UL", "UM", "DN", "DJ", "DL", "DM"]),
         resolve_ip=dict(type='bool', default=False),
         keyspace=dict(type='str', required=False, no_log=False),
     )
@@ -375,22 +687,36 @@ def main():
     down = module.params['down']
     debug = module.params['debug']
 
+    try:
+        scheduler = PollScheduler.from_params(module.params)
+    except ValueError as excep:
+        module.fail_json(msg=str(excep))
+
+    if module.params['debug_history_size'] < 1:
+        module.fail_json(msg="debug_history_size must be at least 1")
+
+    if module.params['wait_for']:
+        wait_for_main(module, scheduler)
+
+    history = StatusHistory(module.params['debug_history'] if debug else "last",
+                            module.params['debug_history_size'])
+
     cluster_status, cluster_status_list, iterations, \
-        return_codes, stdout_list, stderr_list, down_running_total \
-        = nodetool_status_poll(module)
+        return_codes, stdout_list, stderr_list, down_running_total, version_cache, scheduler \
+        = nodetool_status_poll(module, scheduler, history)
 
     result = {}
+    result['version_cache'] = version_cache
 
     result['cluster_status'] = cluster_status
     result['iterations'] = iterations
+    result['elapsed'] = scheduler.elapsed()
+    result['timed_out'] = scheduler.timed_out
+    result['poll_timings'] = scheduler.timings
 
     if debug:
-        result['cluster_status_list'] = cluster_status_list
+        result.update(history.debug_result())
         result['return_codes'] = return_codes
-        if stderr_list:
-            result['stderr_list'] = stderr_list
-        if stdout_list:
-            result['stdout_list'] = stdout_list
 
     # Needs rethink
     if return_codes[-1] == 0:  # Last execution successful
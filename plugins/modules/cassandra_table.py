@@ -11,7 +11,9 @@ module: cassandra_table
 short_description: Create or drop tables on a Cassandra Keyspace.
 description:
    - Create or drop tables on a Cassandra Keyspace.
-   - No alter functionality. If a table with the same name already exists then no changes are made.
+   - When the table already exists its I(table_options) are compared with those in system_schema.tables
+     and the ones that differ are changed with a single ALTER TABLE. Requires Cassandra 3.0 or later.
+   - No other alter functionality. Changes to the columns or keys of an existing table are not made.
 author: Rhys Campbell (@rhysmeister)
 options:
   login_user:
@@ -87,7 +89,10 @@ options:
     elements: dict
   table_options:
     description:
-      - Options for the table
+      - "Options for the table, as CQL literals, i.e. C({'class': 'LeveledCompactionStrategy'}) or C('A comment')."
+      - Only the options given, and the keys given of map options such as compaction, compression or caching,
+        are compared with those of an existing table.
+      - Altering a map option keeps the keys it isn't given, unless it's given another class.
     type: dict
   is_type:
     description:
@@ -99,6 +104,17 @@ options:
       - Debug flag
     type: bool
     default: false
+  metadata_mode:
+    description:
+      - The cluster metadata the driver downloads when connecting.
+      - C(full) downloads the schema and token metadata of the whole cluster, the driver's default.
+      - C(lazy) downloads none. The module reads what it needs from the schema tables,
+        which connects much faster to clusters with many keyspaces and tables.
+    type: str
+    default: full
+    choices:
+      - full
+      - lazy
   consistency_level:
     description:
       - Consistency level to perform cassandra queries with.
@@ -119,6 +135,9 @@ options:
         - SERIAL
         - LOCAL_SERIAL
         - LOCAL_ONE
+
+extends_documentation_fragment:
+  - community.cassandra.cql_broker_options
 '''
 
 EXAMPLES = r'''
@@ -263,14 +282,14 @@ EXAMPLES = r'''
 
 RETURN = '''
 changed:
-  description: Whether the module has created or dropped
+  description: Whether the module has created, altered or dropped
   returned: on success
   type: bool
 cql:
-  description: The cql used to create or drop the table
+  description: The cql used to create, alter or drop the table
   returned: changed
   type: str
-  sample: "DROP TABLE users"
+  sample: "ALTER TABLE myapp.users WITH compaction = {'class': 'LeveledCompactionStrategy'}"
 msg:
   description: Exceptions encountered during module execution.
   returned: on error
@@ -281,16 +300,18 @@ __metaclass__ = type
 import os.path
 
 try:
-    from cassandra.cluster import Cluster
     from cassandra.cluster import EXEC_PROFILE_DEFAULT
-    from cassandra.cluster import ExecutionProfile
     from cassandra.auth import PlainTextAuthProvider
-    from cassandra import AuthenticationFailed
+    from cassandra import AuthenticationFailed, InvalidRequest
     from cassandra import ConsistencyLevel
+    from cassandra.query import dict_factory
     HAS_CASSANDRA_DRIVER = True
 except Exception:
     HAS_CASSANDRA_DRIVER = False
 
+    class InvalidRequest(Exception):
+        pass
+
     # This is here for ansible-test import (when cassandra-driver is not installed)
     class ConsistencyLevel:
         ANY = "ANY"
@@ -327,6 +348,17 @@ except Exception:
     HAS_SSL_LIBRARY = False
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.community.cassandra.plugins.module_utils.cql_broker import (
+    connect_read_write,
+    cql_broker_argument_spec,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    read_write_cluster,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.cql_schema import (
+    alter_options_cql,
+    changed_options,
+)
 
 # =========================================
 # Cassandra module specific support methods
@@ -429,36 +461,33 @@ def drop_table(keyspace_name,
     return cql
 
 
-def get_read_and_write_sessions(login_host,
-                                login_port,
-                                auth_provider,
-                                ssl_context,
-                                consistency_level):
-    profile = ExecutionProfile(
-        consistency_level=ConsistencyLevel.name_to_value[consistency_level])
-    if consistency_level in ["ANY", "EACH_QUORUM"]:  # Not supported for reads
-        cluster_r = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context)  # Will be LOCAL_ONE
-    else:
-        cluster_r = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context,
-                            execution_profiles={EXEC_PROFILE_DEFAULT: profile})
-    if consistency_level in ["SERIAL", "LOCAL_SERIAL"]:  # Not supported for writes
-        cluster_w = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context)  # Will be LOCAL_ONE
-    else:
-        cluster_w = Cluster(login_host,
-                            port=login_port,
-                            auth_provider=auth_provider,
-                            ssl_context=ssl_context,
-                            execution_profiles={EXEC_PROFILE_DEFAULT: profile})
-    return (cluster_r, cluster_w)  # Return a tuple of sessions for C* (read, write)
+def get_table_options(session, keyspace_name, table_name):
+    '''
+    Returns the system_schema.tables row of the table as a dict, or None
+    on Cassandra 2 which doesn't have system_schema.
+    '''
+    cql = "SELECT * FROM system_schema.tables WHERE keyspace_name = %s AND table_name = %s"
+    dict_factory_profile = session.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=dict_factory)
+    try:
+        rows = list(session.execute(cql, [keyspace_name, table_name], execution_profile=dict_factory_profile))
+    except InvalidRequest:
+        return None
+    return rows[0] if rows else None
+
+
+def alter_table_options(session, keyspace_name, table_name, table_options):
+    '''
+    Returns the ALTER TABLE setting the table_options that differ from those
+    of the existing table, or None when they don't.
+    '''
+    current = get_table_options(session, keyspace_name, table_name)
+    if current is None:
+        return None
+    changed = changed_options(table_options, current)
+    if not changed:
+        return None
+    return alter_options_cql("TABLE", "{0}.{1}".format(keyspace_name, table_name), table_options, changed, current)
+
 
 ############################################
 
@@ -493,10 +522,12 @@ def main():
             table_options=dict(type='dict', default=None),
             is_type=dict(type='bool', default=False),
             debug=dict(type='bool', default=False),
+            metadata_mode=dict(type='str', default='full', choices=['full', 'lazy']),
             consistency_level=dict(type='str',
                                    required=False,
                                    default="LOCAL_ONE",
-                                   choices=list(ConsistencyLevel.name_to_value.keys()))),
+                                   choices=list(ConsistencyLevel.name_to_value.keys())),
+            **cql_broker_argument_spec()),
         supports_check_mode=True
     )
 
@@ -566,14 +597,15 @@ def main():
             if ssl_cert_reqs in ('CERT_REQUIRED', 'CERT_OPTIONAL'):
                 ssl_context.load_verify_locations(module.params['ssl_ca_certs'])
 
-        sessions = get_read_and_write_sessions(login_host,
-                                               login_port,
-                                               auth_provider,
-                                               ssl_context,
-                                               consistency_level)
+        def cluster_factory():
+            return read_write_cluster(login_host,
+                                      login_port,
+                                      auth_provider,
+                                      ssl_context,
+                                      consistency_level,
+                                      module.params['metadata_mode'])
 
-        session_r = sessions[0].connect()
-        session_w = sessions[1].connect()
+        session_r, session_w = connect_read_write(module, login_host, cluster_factory)
 
     except AuthenticationFailed as excep:
         module.fail_json(msg="Authentication failed: {0}".format(excep))
@@ -583,7 +615,15 @@ def main():
     try:
         if table_exists(session_r, keyspace_name, table_name):
             if state == "present":
-                result['changed'] = False
+                if table_options and not is_type:
+                    cql = alter_table_options(session_r, keyspace_name, table_name, table_options)
+                if cql is not None:
+                    if not module.check_mode:
+                        session_w.execute(cql)
+                    result['changed'] = True
+                    result['cql'] = cql
+                else:
+                    result['changed'] = False
             else:
                 cql = drop_table(keyspace_name, table_name)
                 if not module.check_mode:
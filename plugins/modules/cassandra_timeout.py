@@ -62,42 +62,40 @@ cassandra_timeout:
   description: The return state of the executed command.
   returned: success
   type: str
+version_cache:
+  description:
+    - How the Cassandra version used by nodetool was obtained.
+    - C(provided) when I(cassandra_version) is set, C(hit) when read from the cache on the managed node,
+      C(miss) when discovered with C(nodetool version) and cached, C(disabled) when discovered with the cache disabled.
+  returned: success
+  type: str
+  sample: hit
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 __metaclass__ = type
 
 
-from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolGetSetCommand
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import (
+    NodeToolGetSetCommand,
+    nodetool_fan_out,
+)
 from ansible_collections.community.cassandra.plugins.module_utils.cassandra_common_options import cassandra_common_argument_spec
 
 
-def main():
-
-    timeout_type_choices = ['read', 'range', 'write', 'counterwrite', 'cascontention', 'truncate',
-                            'internodeconnect', 'internodeuser', 'internodestreaminguser', 'misc']
-
-    argument_spec = cassandra_common_argument_spec()
-    argument_spec.update(
-        timeout=dict(type='int', required=True),
-        timeout_type=dict(type='str', choices=timeout_type_choices, default='read')
-    )
-    module = AnsibleModule(
-        argument_spec=argument_spec,
-        supports_check_mode=True,
-    )
-
+def run_module(module):
     timeout = module.params['timeout']
     timeout_type = module.params['timeout_type']
     set_cmd = "settimeout {0} {1}".format(timeout_type, timeout)
     get_cmd = "gettimeout {0}".format(timeout_type)
 
-    n = NodeToolGetSetCommand(module, get_cmd, set_cmd)
+    n = NodeToolGetSetCommand(module, get_cmd, set_cmd, batch=True)
 
     rc = None
     out = ''
     err = ''
     result = {}
+    result['version_cache'] = n.version_cache
 
     (rc, out, err) = n.get_command()
     out = out.strip()
@@ -139,5 +137,22 @@ def main():
     module.exit_json(**result)
 
 
+def main():
+
+    timeout_type_choices = ['read', 'range', 'write', 'counterwrite', 'cascontention', 'truncate',
+                            'internodeconnect', 'internodeuser', 'internodestreaminguser', 'misc']
+
+    argument_spec = cassandra_common_argument_spec()
+    argument_spec.update(
+        timeout=dict(type='int', required=True),
+        timeout_type=dict(type='str', choices=timeout_type_choices, default='read')
+    )
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        supports_check_mode=True,
+    )
+    nodetool_fan_out(module, run_module)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,19 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import shutil
+import tempfile
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def runtime_tmp(monkeypatch, tmp_path_factory):
+    # Unix socket paths are limited to ~100 characters, too short for
+    # pytest's tmp_path, so use a short private temp dir instead. pytest's
+    # own base temp dir is settled first so tmp_path isn't put in it.
+    tmp_path_factory.getbasetemp()
+    path = tempfile.mkdtemp(prefix="nt", dir="/tmp")
+    monkeypatch.setattr(tempfile, "tempdir", path)
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
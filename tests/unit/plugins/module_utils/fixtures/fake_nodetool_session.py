@@ -0,0 +1,29 @@
+# Speaks the same stdin/stdout protocol as the AnsibleNodeToolSession Java
+# program, so the Python side can be tested without a JVM or Cassandra.
+# Every answer includes the pid, letting tests tell whether commands shared
+# one session process.
+import os
+import sys
+
+
+def main():
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    stdout.write(b"some JVM warning\nREADY\n")
+    stdout.flush()
+    for line in iter(stdin.readline, b""):
+        args = line.rstrip(b"\n").decode("utf-8").split("\0")
+        if "fail" in args:
+            rc, out, err = 1, b"", b"error: command failed\n"
+        elif args[-1] == "version":
+            rc, out, err = 0, b"ReleaseVersion: 4.1.3\n", b""
+        else:
+            rc, out, err = 0, "pid={0} args={1}\n".format(os.getpid(), " ".join(args)).encode("utf-8"), b""
+        stdout.write("{0} {1} {2}\n".format(rc, len(out), len(err)).encode("utf-8"))
+        stdout.write(out)
+        stdout.write(err)
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
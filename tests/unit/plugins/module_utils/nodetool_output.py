@@ -0,0 +1,180 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Builders of synthetic nodetool output for clusters of any size, laid out
+# the way nodetool's TableBuilder pads its columns.
+
+
+def _table(rows):
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return ["  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)) for row in rows]
+
+
+def _address(dc, i):
+    return "10.{0}.{1}.{2}".format(dc, i // 250, i % 250 + 1)
+
+
+def _host_id(dc, i):
+    return "{0:08x}-{1:04x}-4000-8000-{2:012x}".format(dc, i % 65536, i)
+
+
+def status_output(nodes, datacenters=1, down=0):
+    '''
+    nodetool status of a vnodes cluster with nodes nodes in every one of
+    datacenters datacenters, the last down nodes of each being down.
+    '''
+    lines = []
+    for dc in range(datacenters):
+        lines += ["Datacenter: dc{0}".format(dc + 1),
+                  "===============",
+                  "Status=Up/Down",
+                  "|/ State=Normal/Leaving/Joining/Moving"]
+        rows = [["--", "Address", "Load", "Tokens", "Owns (effective)", "Host ID", "Rack"]]
+        for i in range(nodes):
+            rows.append(["DN" if i >= nodes - down else "UN",
+                         _address(dc, i),
+                         "{0}.{1} GiB".format(100 + i % 50, i % 10),
+                         "16",
+                         "{0:.1f}%".format(300.0 / nodes),
+                         _host_id(dc, i),
+                         "rack{0}".format(i % 3 + 1)])
+        lines += _table(rows)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def ring_output(nodes, tokens_per_node=16):
+    lines = ["", "Datacenter: dc1", "==========",
+             "Address     Rack        Status State   Load            Owns                Token",
+             "                                                                          9136546071155492468"]
+    token = -9223372036854775808
+    step = 18446744073709551615 // (nodes * tokens_per_node)
+    for t in range(nodes * tokens_per_node):
+        i = t % nodes
+        lines.append("{0:<11} {1:<11} {2:<6} {3:<7} {4:<15} {5:<19} {6}".format(
+            _address(0, i), "rack{0}".format(i % 3 + 1), "Up", "Normal",
+            "{0}.5 GiB".format(100 + i % 50), "{0:.2f}%".format(100.0 / nodes), token))
+        token += step
+    return "\n".join(lines) + "\n"
+
+
+def describecluster_output(nodes, schema_versions=1, unreachable=0):
+    lines = ["Cluster Information:",
+             "\tName: Test Cluster",
+             "\tSnitch: org.apache.cassandra.locator.GossipingPropertyFileSnitch",
+             "\tDynamicEndPointSnitch: enabled",
+             "\tPartitioner: org.apache.cassandra.dht.Murmur3Partitioner",
+             "\tSchema versions:"]
+    reachable = nodes - unreachable
+    for v in range(schema_versions):
+        hosts = [_address(0, i) for i in range(reachable) if i % schema_versions == v]
+        lines.append("\t\t{0:08x}-f81f-3786-aed4-40e03558b299: [{1}]".format(v, ", ".join(hosts)))
+        lines.append("")
+    if unreachable:
+        lines.append("\t\tUNREACHABLE: [{0}]".format(", ".join(_address(0, i) for i in range(reachable, nodes))))
+        lines.append("")
+    lines += ["Stats for all nodes:",
+              "\tLive: {0}".format(reachable),
+              "\tJoining: 0",
+              "\tMoving: 0",
+              "\tLeaving: 0",
+              "\tUnreachable: {0}".format(unreachable),
+              "",
+              "Data Centers: ",
+              "\tdc1 #Nodes: {0} #Down: {1}".format(nodes, unreachable)]
+    return "\n".join(lines) + "\n"
+
+
+def info_output():
+    return "\n".join([
+        "ID                     : f4ee490c-df8e-4a8d-9236-320903697fbf",
+        "Gossip active          : true",
+        "Native Transport active: true",
+        "Load                   : 145.17 KiB",
+        "Generation No          : 1638800353",
+        "Uptime (seconds)       : 225798",
+        "Heap Memory (MB)       : 258.26 / 495.00",
+        "Off Heap Memory (MB)   : 0.00",
+        "Data Center            : datacenter1",
+        "Rack                   : rack1",
+        "Exceptions             : 10",
+        "Key Cache              : entries 10, size 896 bytes, capacity 24 MiB, 48 hits, 62 requests, "
+        "0.774 recent hit rate, 14400 save period in seconds",
+        "Row Cache              : entries 0, size 0 bytes, capacity 0 bytes, 0 hits, 0 requests, "
+        "NaN recent hit rate, 0 save period in seconds",
+        "Counter Cache          : entries 0, size 0 bytes, capacity 12 MiB, 0 hits, 0 requests, "
+        "NaN recent hit rate, 7200 save period in seconds",
+        "Percent Repaired       : 100.0%",
+        "Token                  : (invoke with -T/--tokens to see all 16 tokens)",
+    ]) + "\n"
+
+
+def compactionstats_output(compactions):
+    lines = ["pending tasks: {0}".format(compactions)]
+    for c in range(compactions):
+        lines.append("- keyspace{0}.table{0}: 1".format(c))
+    lines.append("")
+    if compactions:
+        rows = [["id", "compaction type", "keyspace", "table", "completed", "total", "unit", "progress"]]
+        for c in range(compactions):
+            rows.append(["e2bff090-6d8a-11ec-a6a3-{0:012x}".format(c),
+                         "Anticompaction after repair" if c % 5 == 0 else "Compaction",
+                         "keyspace{0}".format(c),
+                         "table{0}".format(c),
+                         str(1000 * c),
+                         str(64806010),
+                         "bytes",
+                         "{0:.2f}%".format(100000.0 * c / 64806010)])
+        lines += _table(rows)
+    lines.append("Active compaction remaining time :   0h00m04s")
+    return "\n".join(lines) + "\n"
+
+
+THREAD_POOLS = ["AntiEntropyStage", "CacheCleanupExecutor", "CompactionExecutor", "CounterMutationStage",
+                "GossipStage", "HintsDispatcher", "InternalResponseStage", "MemtableFlushWriter",
+                "MemtablePostFlush", "MemtableReclaimMemory", "MigrationStage", "MiscStage",
+                "MutationStage", "Native-Transport-Requests", "PendingRangeCalculator",
+                "PerDiskMemtableFlushWriter_0", "ReadRepairStage", "ReadStage", "RequestResponseStage",
+                "Sampler", "SecondaryIndexManagement", "ValidationExecutor", "ViewBuildExecutor"]
+
+MESSAGE_TYPES = ["READ_RSP", "VALIDATION_REQ", "SCHEMA_PULL_RSP", "MUTATION_REQ", "READ_REQ",
+                 "HINT_REQ", "RANGE_REQ", "COUNTER_MUTATION_REQ", "BATCH_STORE_REQ"]
+
+
+def tpstats_output():
+    rows = [["Pool Name", "Active", "Pending", "Completed", "Blocked", "All time blocked"]]
+    for i, pool in enumerate(THREAD_POOLS):
+        rows.append([pool, str(i % 3), str(i % 2), str(1000 * i), "0", str(i % 4)])
+    lines = _table(rows) + [""]
+    lines.append("Message type           Dropped                  Latency waiting in queue (micros)")
+    lines.append("                                             50%               95%               99%               Max")
+    for i, message_type in enumerate(MESSAGE_TYPES):
+        lines.append("{0:<22} {1:<24} 0.0               0.0               0.0               0.0".format(message_type, i))
+    return "\n".join(lines) + "\n"
+
+
+def tablestats_output(keyspaces, tables):
+    lines = ["Total number of tables: {0}".format(keyspaces * tables), "----------------"]
+    for k in range(keyspaces):
+        lines += ["Keyspace : keyspace{0}".format(k),
+                  "\tRead Count: {0}".format(k * 10),
+                  "\tRead Latency: NaN ms",
+                  "\tWrite Count: {0}".format(k * 20),
+                  "\tWrite Latency: 0.015 ms",
+                  "\tPending Flushes: 0"]
+        for t in range(tables):
+            lines += ["\t\tTable: table{0}".format(t),
+                      "\t\tSSTable count: {0}".format(t % 7),
+                      "\t\tSpace used (live): {0}".format(10735 * t),
+                      "\t\tSpace used (total): {0}".format(10735 * t),
+                      "\t\tSSTable Compression Ratio: 0.49",
+                      "\t\tNumber of partitions (estimate): {0}".format(t * 3),
+                      "\t\tMemtable cell count: 0",
+                      "\t\tLocal read count: {0}".format(t),
+                      "\t\tLocal read latency: NaN ms",
+                      "\t\tBloom filter false positives: 0",
+                      "\t\tCompacted partition maximum bytes: 372",
+                      "\t\tDropped Mutations: 0",
+                      ""]
+        lines.append("----------------")
+    return "\n".join(lines) + "\n"
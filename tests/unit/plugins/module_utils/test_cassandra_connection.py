@@ -0,0 +1,240 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import ConsistencyLevel, DriverException
+from cassandra.cluster import EXEC_PROFILE_DEFAULT
+from cassandra.metadata import ColumnMetadata, KeyspaceMetadata, Metadata, TableMetadata
+
+from ansible_collections.community.cassandra.plugins.module_utils import cassandra_connection
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import (
+    EXEC_PROFILE_WRITE,
+    ProfileSession,
+    execute_concurrently,
+    keyspace_metadata,
+    read_and_write_sessions,
+    read_write_cluster,
+    read_write_profiles,
+    table_metadata,
+    wait_for_schema_agreement,
+)
+
+
+class TestReadWriteProfiles:
+
+    @pytest.mark.parametrize("level, read, write", [
+        ("QUORUM", ConsistencyLevel.QUORUM, ConsistencyLevel.QUORUM),
+        ("ANY", ConsistencyLevel.LOCAL_ONE, ConsistencyLevel.ANY),
+        ("EACH_QUORUM", ConsistencyLevel.LOCAL_ONE, ConsistencyLevel.EACH_QUORUM),
+        ("SERIAL", ConsistencyLevel.SERIAL, ConsistencyLevel.LOCAL_ONE),
+        ("LOCAL_SERIAL", ConsistencyLevel.LOCAL_SERIAL, ConsistencyLevel.LOCAL_ONE),
+    ])
+    def test_unsupported_levels_fall_back(self, level, read, write):
+        profiles = read_write_profiles(level)
+        assert profiles[EXEC_PROFILE_DEFAULT].consistency_level == read
+        assert profiles[EXEC_PROFILE_WRITE].consistency_level == write
+
+    def test_one_cluster_has_both_profiles(self):
+        cluster = read_write_cluster(["127.0.0.1"], 9042, None, None, "LOCAL_QUORUM")
+        assert cluster.profile_manager.profiles[EXEC_PROFILE_WRITE].consistency_level == ConsistencyLevel.LOCAL_QUORUM
+        assert cluster.profile_manager.default.consistency_level == ConsistencyLevel.LOCAL_QUORUM
+
+
+class TestMetadataMode:
+
+    def test_full(self):
+        cluster = read_write_cluster(["127.0.0.1"], 9042, None, None, "LOCAL_ONE")
+        assert cluster.schema_metadata_enabled
+        assert cluster.token_metadata_enabled
+
+    def test_lazy(self):
+        cluster = read_write_cluster(["127.0.0.1"], 9042, None, None, "LOCAL_ONE", metadata_mode="lazy")
+        assert not cluster.schema_metadata_enabled
+        assert not cluster.token_metadata_enabled
+
+    def test_tokens(self):
+        cluster = read_write_cluster(["127.0.0.1"], 9042, None, None, "LOCAL_ONE", metadata_mode="tokens")
+        assert not cluster.schema_metadata_enabled
+        assert cluster.token_metadata_enabled
+
+    def test_keyspace_is_fetched_on_demand(self):
+        class FakeMetadataCluster(object):
+            def __init__(self):
+                self.metadata = self
+                self.keyspaces = {}
+                self.refreshed = []
+
+            def refresh_keyspace_metadata(self, keyspace):
+                self.refreshed.append(keyspace)
+                if keyspace == "ks1":
+                    self.keyspaces[keyspace] = "ks1 metadata"
+
+        cluster = FakeMetadataCluster()
+        assert keyspace_metadata(cluster, "ks1") == "ks1 metadata"
+        assert keyspace_metadata(cluster, "ks1") == "ks1 metadata"
+        assert keyspace_metadata(cluster, "missing") is None
+        assert cluster.refreshed == ["ks1", "missing"]
+
+    def test_table_is_fetched_on_demand(self):
+        class LazyMetadataCluster(object):
+            """
+            Refreshes metadata as the driver does with schema metadata
+            disabled: a keyspace comes without its tables, which are only
+            fetched one at a time.
+            """
+
+            def __init__(self, tables):
+                self.metadata = Metadata()
+                self.tables = tables
+                self.refreshed = []
+
+            def refresh_keyspace_metadata(self, keyspace):
+                if keyspace == "ks":
+                    self.metadata._update_keyspace(KeyspaceMetadata("ks", True, "SimpleStrategy", {"replication_factor": "1"}))
+
+            def refresh_table_metadata(self, keyspace, table):
+                self.refreshed.append(table)
+                if table == "broken":
+                    raise DriverException("Table metadata was not refreshed")
+                if table in self.tables:
+                    table_meta = TableMetadata(keyspace, table)
+                    column = ColumnMetadata(table_meta, "k", "int")
+                    table_meta.columns["k"] = column
+                    table_meta.partition_key.append(column)
+                    self.metadata._update_table(table_meta)
+
+        cluster = LazyMetadataCluster(["t"])
+        table_meta = table_metadata(cluster, "ks", "t")
+        assert [column.name for column in table_meta.partition_key] == ["k"]
+        assert table_metadata(cluster, "ks", "t") is table_meta
+        assert table_metadata(cluster, "ks", "missing") is None
+        assert table_metadata(cluster, "ks", "broken") is None
+        assert table_metadata(cluster, "other", "t") is None
+        assert cluster.refreshed == ["t", "missing", "broken"]
+
+
+class TestSchemaAgreement:
+
+    def test_max_schema_agreement_wait(self):
+        assert read_write_cluster(["127.0.0.1"], 9042, None, None, "LOCAL_ONE").max_schema_agreement_wait == 10
+        cluster = read_write_cluster(["127.0.0.1"], 9042, None, None, "LOCAL_ONE", max_schema_agreement_wait=0)
+        assert cluster.max_schema_agreement_wait == 0
+
+    @pytest.mark.parametrize("agreed, expected", [(True, True), (False, False), (None, False)])
+    def test_wait_for_schema_agreement(self, agreed, expected):
+        class FakeControlConnection(object):
+            def wait_for_schema_agreement(self, wait_time=None):
+                self.wait_time = wait_time
+                return agreed  # None when the cluster is shut down
+
+        class FakeAgreementCluster(object):
+            control_connection = FakeControlConnection()
+
+        cluster = FakeAgreementCluster()
+        assert wait_for_schema_agreement(cluster, 30) is expected
+        assert cluster.control_connection.wait_time == 30
+
+
+class FakeSession(object):
+
+    keyspace = "system"
+
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, query, parameters=None, **kwargs):
+        self.executed.append((query, kwargs.get("execution_profile", EXEC_PROFILE_DEFAULT)))
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return (ep, kwargs)
+
+
+class FakeCluster(object):
+
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        FakeCluster.instances += 1
+        self.connects = 0
+        self.session = FakeSession()
+
+    def connect(self):
+        self.connects += 1
+        return self.session
+
+
+class TestReadAndWriteSessions:
+
+    def test_single_cluster_and_connection(self, monkeypatch):
+        # Used to be two Clusters, each with its own control connection,
+        # topology and schema metadata download and connection pools.
+        FakeCluster.instances = 0
+        monkeypatch.setattr(cassandra_connection, "Cluster", FakeCluster)
+        cluster = read_write_cluster(["127.0.0.1"], 9042, None, None, "QUORUM")
+        session_r, session_w = read_and_write_sessions(cluster)
+        session_r.execute("SELECT")
+        session_w.execute("INSERT")
+        session_w.execute("UPDATE", execution_profile="other")
+        assert FakeCluster.instances == 1
+        assert cluster.connects == 1
+        assert cluster.session.executed == [
+            ("SELECT", EXEC_PROFILE_DEFAULT),
+            ("INSERT", EXEC_PROFILE_WRITE),
+            ("UPDATE", "other"),
+        ]
+
+    def test_profile_session(self):
+        session = ProfileSession(FakeSession(), EXEC_PROFILE_WRITE)
+        assert session.keyspace == "system"
+        assert session.execution_profile_clone_update(EXEC_PROFILE_DEFAULT, row_factory=None) == \
+            (EXEC_PROFILE_WRITE, {"row_factory": None})
+
+
+class FakeFuture(object):
+
+    def __init__(self, error):
+        self.error = error
+        self.has_more_pages = False
+        # What the driver's ResultSet reads from a future
+        self._col_names = None
+        self._col_types = None
+        self._paging_state = None
+        self.row_factory = None
+
+    def add_callbacks(self, callback, errback, callback_args=(), callback_kwargs=None,
+                      errback_args=(), errback_kwargs=None):
+        if self.error is None:
+            callback([], *callback_args, **(callback_kwargs or {}))
+        else:
+            errback(self.error, *errback_args, **(errback_kwargs or {}))
+
+    def clear_callbacks(self):
+        pass
+
+
+class FakeAsyncSession(object):
+
+    def __init__(self):
+        self.executed = []
+
+    def execute_async(self, query, parameters=None, **kwargs):
+        self.executed.append((query, kwargs.get('execution_profile')))
+        return FakeFuture(ValueError(query) if query.startswith("BAD") else None)
+
+
+class TestExecuteConcurrently:
+
+    def test_failures_are_returned(self):
+        session = FakeAsyncSession()
+        failed = execute_concurrently(session, ["CREATE 1", "BAD 2", "CREATE 3"], 2)
+        assert [statement for statement, excep in failed] == ["BAD 2"]
+        assert isinstance(failed[0][1], ValueError)
+        assert sorted(query for query, profile in session.executed) == ["BAD 2", "CREATE 1", "CREATE 3"]
+
+    def test_write_profile(self):
+        session = FakeAsyncSession()
+        assert execute_concurrently(ProfileSession(session, EXEC_PROFILE_WRITE), ["CREATE 1"], 10) == []
+        assert session.executed == [("CREATE 1", EXEC_PROFILE_WRITE)]
@@ -0,0 +1,226 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import datetime
+import os
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import InvalidRequest
+from cassandra.query import dict_factory
+
+from ansible_collections.community.cassandra.plugins.module_utils.cassandra_connection import ProfileSession
+from ansible_collections.community.cassandra.plugins.module_utils.cql_broker import (
+    BrokerSession,
+    CqlBrokerError,
+    CqlBrokerHandler,
+    broker_key,
+    broker_sessions,
+    connect_read_write,
+    encode_value,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.local_daemon import (
+    DaemonUnavailable,
+    daemon_socket_path,
+)
+
+
+class FakeResult(list):
+
+    def __init__(self, columns, rows):
+        super(FakeResult, self).__init__(rows)
+        self.column_names = columns
+
+
+class FakeSession(object):
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return kwargs
+
+    def execute(self, query, parameters=None, execution_profile=None):
+        self.cluster.statements.append((query, parameters, execution_profile))
+        if query.startswith("SELECT pid"):
+            return FakeResult(["pid", "connects"], [(os.getpid(), self.cluster.connects)])
+        if query.startswith("SELECT"):
+            return FakeResult(["role", "member_of"], [("alice", set(["admins"])), ("bob", None)])
+        if query.startswith("BAD"):
+            raise InvalidRequest("line 1:0 no viable alternative")
+        if query.startswith("TIMEOUT"):
+            raise RuntimeError("Operation timed out")
+        return FakeResult(None, [])
+
+
+class FakeCluster(object):
+
+    def __init__(self):
+        self.connects = 0
+        self.statements = []
+        self.is_shutdown = False
+
+    def connect(self):
+        self.connects += 1
+        return FakeSession(self)
+
+    def shutdown(self):
+        self.is_shutdown = True
+
+
+class FakeModule(object):
+
+    def __init__(self, **params):
+        self.params = dict(
+            login_user="cassandra",
+            login_password="secret",
+            login_port=9042,
+            ssl=False,
+            ssl_cert_reqs="CERT_NONE",
+            ssl_ca_certs="",
+            consistency_level="LOCAL_ONE",
+            metadata_mode="full",
+            connection_backend="broker",
+            broker_idle_timeout=5,
+        )
+        self.params.update(params)
+        self.messages = []
+
+    def debug(self, msg):
+        self.messages.append(msg)
+
+
+def failing_factory():
+    raise RuntimeError("Authentication failed")
+
+
+class TestEncodeValue:
+
+    def test_values(self):
+        host_id = uuid.UUID("5e4ab8bc-7c3a-4e5c-9a4c-2a4b8c3f1d10")
+        assert encode_value(host_id) == str(host_id)
+        assert encode_value(b"\x01\xff") == "01ff"
+        assert encode_value(datetime.datetime(2020, 1, 2, 3, 4, 5)) == "2020-01-02T03:04:05"
+        assert encode_value(set(["a"])) == ["a"]
+        assert encode_value({"class": "SimpleStrategy", 1: (2, 3)}) == {"class": "SimpleStrategy", "1": [2, 3]}
+        assert encode_value(True) is True
+        assert encode_value(None) is None
+
+
+class TestCqlBrokerHandler:
+
+    def test_rows_and_columns(self):
+        handler = CqlBrokerHandler(FakeCluster)
+        response = handler.handle({"profile": "read", "query": "SELECT role FROM system_auth.roles"})
+        assert response == {"columns": ["role", "member_of"], "rows": [["alice", ["admins"]], ["bob", None]]}
+
+    def test_statement_without_rows(self):
+        handler = CqlBrokerHandler(FakeCluster)
+        response = handler.handle({"profile": "write", "query": "CREATE ROLE alice", "parameters": None})
+        assert response == {"columns": [], "rows": []}
+        assert handler.cluster.statements[-1][2]["row_factory"].__name__ == "tuple_factory"
+
+    def test_failed_statement(self):
+        handler = CqlBrokerHandler(FakeCluster)
+        response = handler.handle({"profile": "read", "query": "BAD"})
+        assert response["exception"] == "InvalidRequest"
+        assert handler.alive
+
+    def test_use_is_refused(self):
+        handler = CqlBrokerHandler(FakeCluster)
+        response = handler.handle({"profile": "read", "query": "  use mykeyspace"})
+        assert response["exception"] == "CqlBrokerError"
+        assert handler.cluster.statements == []
+
+    def test_connection_failure(self):
+        handler = CqlBrokerHandler(failing_factory)
+        assert handler.alive  # Until the error has been reported
+        assert "Authentication failed" in handler.handle({"ping": True})["error"]
+        assert not handler.alive
+        handler.close()
+
+
+class TestBroker:
+
+    def test_broker_is_reused_between_tasks(self):
+        key = {"hosts": ["127.0.0.1"], "port": 1}
+        session_r, session_w = broker_sessions(key, FakeCluster, 5)
+        first = session_r.execute("SELECT pid")[0]
+        session_r, session_w = broker_sessions(key, FakeCluster, 5)
+        second = session_w.execute("SELECT pid")[0]
+        assert first.pid == second.pid != os.getpid()
+        assert second.connects == 1
+
+    def test_rows(self):
+        session_r, session_w = broker_sessions({"port": 2}, FakeCluster, 5)
+        rows = session_r.execute("SELECT role FROM system_auth.roles")
+        assert [(row.role, row.member_of) for row in rows] == [("alice", ["admins"]), ("bob", None)]
+        profile = session_r.execution_profile_clone_update(None, row_factory=dict_factory)
+        rows = session_r.execute("SELECT role FROM system_auth.roles", execution_profile=profile)
+        assert rows[0] == {"role": "alice", "member_of": ["admins"]}
+
+    def test_exceptions(self):
+        session_r, session_w = broker_sessions({"port": 3}, FakeCluster, 5)
+        with pytest.raises(InvalidRequest):
+            session_w.execute("BAD")
+        with pytest.raises(CqlBrokerError, match="RuntimeError: Operation timed out"):
+            session_w.execute("TIMEOUT")
+
+    def test_broker_exits_when_idle(self):
+        key = {"port": 4}
+        broker_sessions(key, FakeCluster, 1)
+        socket_path = daemon_socket_path("cql", key)
+        deadline = time.time() + 10
+        while os.path.exists(socket_path) and time.time() < deadline:
+            time.sleep(0.1)
+        assert not os.path.exists(socket_path)
+
+    def test_broker_that_cannot_connect_is_unavailable(self):
+        with pytest.raises(DaemonUnavailable, match="Authentication failed"):
+            broker_sessions({"port": 5}, failing_factory, 5)
+
+
+class TestConnectReadWrite:
+
+    def test_credentials_are_hashed(self):
+        key = broker_key(FakeModule().params, ["127.0.0.2", "127.0.0.1"])
+        assert key["hosts"] == ["127.0.0.1", "127.0.0.2"]
+        assert "secret" not in str(key)
+        assert key != broker_key(FakeModule(login_password="other").params, ["127.0.0.1", "127.0.0.2"])
+
+    def test_key_without_login_host(self):
+        assert broker_key(FakeModule().params, None) == broker_key(FakeModule().params, ["127.0.0.1"])
+
+    def test_broker_without_login_host(self):
+        session_r, session_w = connect_read_write(FakeModule(), None, FakeCluster)
+        assert isinstance(session_r, BrokerSession)
+
+    def test_broker(self):
+        module = FakeModule()
+        session_r, session_w = connect_read_write(module, ["127.0.0.1"], FakeCluster)
+        assert isinstance(session_r, BrokerSession)
+        assert session_w.profile == "write"
+
+    def test_direct(self):
+        module = FakeModule(connection_backend="direct")
+        session_r, session_w = connect_read_write(module, ["127.0.0.1"], FakeCluster)
+        assert isinstance(session_r, FakeSession)
+        assert isinstance(session_w, ProfileSession)
+
+    def test_falls_back_to_direct_connection(self):
+        # Only the broker fails to connect, the module connects directly
+        pid = os.getpid()
+
+        def factory():
+            if os.getpid() != pid:
+                raise RuntimeError("No host available")
+            return FakeCluster()
+
+        module = FakeModule(login_port=9043)
+        session_r, session_w = connect_read_write(module, ["127.0.0.1"], factory)
+        assert isinstance(session_r, FakeSession)
+        assert "No host available" in module.messages[0]
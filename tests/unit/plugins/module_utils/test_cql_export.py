@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import csv
+import io
+import json
+import os
+import uuid
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_export import (
+    csv_cell,
+    export_rows,
+    join_exports,
+)
+
+USERID = uuid.UUID("8bbd9a2e-6b1e-4d3a-8a5e-0a0b3d8b1c7d")
+
+ROWS = [
+    [USERID, u"zoë@example.com", set([u"admin"]), True],
+    [uuid.UUID(int=1), None, None, False],
+]
+
+COLUMNS = ["userid", "email", "tags", "active"]
+
+
+class TestExportRows:
+
+    def test_jsonl(self, tmp_path):
+        path = str(tmp_path / "users.jsonl")
+        assert export_rows(iter(ROWS), COLUMNS, path, "jsonl") == 2
+        with io.open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert lines == [
+            {"userid": str(USERID), "email": u"zoë@example.com", "tags": [u"admin"], "active": True},
+            {"userid": str(uuid.UUID(int=1)), "email": None, "tags": None, "active": False},
+        ]
+
+    def test_csv(self, tmp_path):
+        path = str(tmp_path / "users.csv")
+        assert export_rows(iter(ROWS), COLUMNS, path, "csv") == 2
+        with io.open(path, encoding="utf-8", newline="") as f:
+            lines = list(csv.reader(f))
+        assert lines == [
+            COLUMNS,
+            [str(USERID), u"zoë@example.com", '["admin"]', "true"],
+            [str(uuid.UUID(int=1)), "", "", "false"],
+        ]
+
+    def test_csv_quotes_separators(self, tmp_path):
+        path = str(tmp_path / "comments.csv")
+        export_rows([[1, u'a, "quoted"\ncomment']], ["k", "comment"], path, "csv")
+        with io.open(path, encoding="utf-8", newline="") as f:
+            assert list(csv.reader(f))[1] == ["1", u'a, "quoted"\ncomment']
+
+    def test_no_rows_writes_the_header(self, tmp_path):
+        path = str(tmp_path / "empty.csv")
+        assert export_rows(iter([]), COLUMNS, path, "csv") == 0
+        with io.open(path, encoding="utf-8") as f:
+            assert f.read() == u"userid,email,tags,active\n"
+
+    def test_rows_are_streamed(self, tmp_path):
+        path = str(tmp_path / "many.jsonl")
+        seen = []
+
+        def rows():
+            for i in range(10000):
+                # every row already written when the next is produced
+                seen.append(i)
+                yield [i, "x" * 10]
+
+        assert export_rows(rows(), ["k", "v"], path, "jsonl") == 10000
+        assert os.path.getsize(path) == sum(len('{"k": %d, "v": "xxxxxxxxxx"}\n' % i) for i in range(10000))
+
+    def test_failure_keeps_the_previous_file(self, tmp_path):
+        path = tmp_path / "users.jsonl"
+        path.write_text(u"previous\n")
+
+        def rows():
+            yield [1]
+            raise RuntimeError("Timed out fetching the next page")
+
+        with pytest.raises(RuntimeError):
+            export_rows(rows(), ["k"], str(path), "jsonl")
+        assert path.read_text() == u"previous\n"
+        assert os.listdir(str(tmp_path)) == ["users.jsonl"]
+
+    def test_replaced_file_keeps_its_mode(self, tmp_path):
+        path = tmp_path / "users.jsonl"
+        path.write_text(u"previous\n")
+        os.chmod(str(path), 0o644)
+        export_rows([[1]], ["k"], str(path), "jsonl")
+        assert os.stat(str(path)).st_mode & 0o777 == 0o644
+
+    def test_move(self, tmp_path):
+        path = str(tmp_path / "users.jsonl")
+        moves = []
+
+        def move(src, dest):
+            moves.append((os.path.dirname(src), dest))
+            os.rename(src, dest)
+
+        export_rows([[1]], ["k"], path, "jsonl", move=move)
+        assert moves == [(str(tmp_path), path)]
+        with io.open(path, encoding="utf-8") as f:
+            assert f.read() == u'{"k": 1}\n'
+
+
+class TestCsvCell:
+
+    def test_cells(self):
+        assert csv_cell(None) == ""
+        assert csv_cell(u"text") == u"text"
+        assert csv_cell(1.5) == "1.5"
+        assert csv_cell({"b": 1, "a": [1, 2]}) == '{"a": [1, 2], "b": 1}'
+
+
+class TestJoinExports:
+
+    def test_parts_under_one_header(self, tmp_path):
+        parts = []
+        for i in range(3):
+            parts.append(str(tmp_path / "part{0}".format(i)))
+            export_rows([[i, u"ü{0}".format(i)]], ["k", "v"], parts[-1], "csv", header=False)
+        path = str(tmp_path / "all.csv")
+        join_exports(parts, ["k", "v"], path, "csv")
+        with io.open(path, encoding="utf-8") as f:
+            assert f.read() == u"k,v\n0,ü0\n1,ü1\n2,ü2\n"
+
+    def test_jsonl_parts(self, tmp_path):
+        parts = [str(tmp_path / "part0"), str(tmp_path / "part1")]
+        export_rows([[1]], ["k"], parts[0], "jsonl", header=False)
+        export_rows([], ["k"], parts[1], "jsonl", header=False)
+        path = str(tmp_path / "all.jsonl")
+        join_exports(parts, ["k"], path, "jsonl")
+        with io.open(path, encoding="utf-8") as f:
+            assert f.read() == u'{"k": 1}\n'
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_load import (
+    csv_header,
+    decode_value,
+    parse_timestamp,
+    partition_batches,
+    read_rows,
+)
+
+USERID = "8bbd9a2e-6b1e-4d3a-8a5e-0a0b3d8b1c7d"
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    with io.open(str(path), "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return str(path)
+
+
+class TestReadRows:
+
+    def test_csv_with_header(self, tmp_path):
+        path = write(tmp_path, "users.csv", u'userid,email,tags\n1,zoë@example.com,"[""a"", ""b""]"\n\n2,,\n')
+        assert csv_header(path) == ["userid", "email", "tags"]
+        assert list(read_rows(path, "csv")) == [
+            (2, {"userid": u"1", "email": u"zoë@example.com", "tags": u'["a", "b"]'}, None),
+            (4, {"userid": u"2", "email": None, "tags": None}, None),
+        ]
+
+    def test_csv_without_header(self, tmp_path):
+        path = write(tmp_path, "users.csv", u"1,a@example.com\n2,b@example.com\n")
+        rows = list(read_rows(path, "csv", ["userid", "email"], header=False))
+        assert [row for line, row, error in rows] == [{"userid": u"1", "email": u"a@example.com"},
+                                                      {"userid": u"2", "email": u"b@example.com"}]
+
+    def test_csv_columns_are_selected(self, tmp_path):
+        path = write(tmp_path, "users.csv", u"userid,email,tags\n1,a@example.com,\n")
+        assert list(read_rows(path, "csv", ["userid", "tags"])) == [(2, {"userid": u"1", "tags": None}, None)]
+
+    def test_csv_bad_row_does_not_stop_reading(self, tmp_path):
+        path = write(tmp_path, "users.csv", u"userid,email\n1\n2,b@example.com\n")
+        rows = list(read_rows(path, "csv"))
+        assert rows[0][0] == 2
+        assert str(rows[0][2]) == "line 2: 1 values for 2 columns"
+        assert rows[1] == (3, {"userid": u"2", "email": u"b@example.com"}, None)
+
+    def test_jsonl(self, tmp_path):
+        path = write(tmp_path, "users.jsonl", u'{"userid": 1, "tags": ["a"]}\n\n[1]\n{"userid": \n{"userid": 2}\n')
+        rows = list(read_rows(path, "jsonl"))
+        assert rows[0] == (1, {"userid": 1, "tags": ["a"]}, None)
+        assert (rows[1][0], str(rows[1][2])) == (3, "line 3: a row must be a JSON object")
+        assert rows[2][0] == 4
+        assert str(rows[2][2]).startswith("line 4: invalid JSON")
+        assert rows[3] == (5, {"userid": 2}, None)
+
+
+class TestPartitionBatches:
+
+    def test_rows_of_a_partition_are_batched(self):
+        rows = [(1, [1, "a"]), (2, [2, "a"]), (3, [1, "b"]), (4, [1, "c"]), (5, [2, "b"])]
+        assert partition_batches(rows, [0], 2) == [
+            [(1, [1, "a"]), (3, [1, "b"])],
+            [(2, [2, "a"]), (5, [2, "b"])],
+            [(4, [1, "c"])],
+        ]
+
+    def test_composite_and_unhashable_keys(self):
+        rows = [(1, [[1], "x", 1]), (2, [[1], "x", 2]), (3, [[1], "y", 3])]
+        assert partition_batches(rows, [0, 1], 10) == [[(1, [[1], "x", 1]), (2, [[1], "x", 2])], [(3, [[1], "y", 3])]]
+
+    def test_batch_size_one(self):
+        rows = [(1, [1]), (2, [1])]
+        assert partition_batches(rows, [0], 1) == [[(1, [1])], [(2, [1])]]
+
+
+class TestParseTimestamp:
+
+    def test_formats(self):
+        assert parse_timestamp("2024-05-01T10:15:00.25Z") == datetime.datetime(2024, 5, 1, 10, 15, 0, 250000)
+        assert parse_timestamp("2024-05-01 10:15:00") == datetime.datetime(2024, 5, 1, 10, 15)
+        assert parse_timestamp("2024-05-01T12:15:00+02:00") == datetime.datetime(2024, 5, 1, 10, 15)
+        assert parse_timestamp("2024-05-01T08:15-0200") == datetime.datetime(2024, 5, 1, 10, 15)
+        assert parse_timestamp("2024-05-01") == datetime.datetime(2024, 5, 1)
+        assert parse_timestamp(1714558500000) == datetime.datetime(2024, 5, 1, 10, 15)
+
+    def test_not_a_timestamp(self):
+        with pytest.raises(ValueError):
+            parse_timestamp("yesterday")
+
+
+class TestDecodeValue:
+
+    @pytest.fixture(autouse=True)
+    def cqltypes(self):
+        self.types = pytest.importorskip("cassandra.cqltypes")
+
+    def decode(self, casstype, value):
+        return decode_value(self.types.lookup_casstype(casstype), value)
+
+    def test_scalars(self):
+        assert self.decode("Int32Type", u"42") == 42
+        assert self.decode("LongType", 42) == 42
+        assert self.decode("DoubleType", u"1.5") == 1.5
+        assert self.decode("DecimalType", 1.1) == decimal.Decimal("1.1")
+        assert self.decode("BooleanType", u"TRUE") is True
+        assert self.decode("UUIDType", USERID) == uuid.UUID(USERID)
+        assert self.decode("SimpleDateType", u"2024-05-01") == datetime.date(2024, 5, 1)
+        assert self.decode("BytesType", u"0x0102") == bytearray(b"\x01\x02")
+        assert self.decode("UTF8Type", u"zoë") == u"zoë"
+        assert self.decode("UTF8Type", None) is None
+        assert self.decode("InetAddressType", u"10.0.0.1") == u"10.0.0.1"
+        assert self.decode("TimeType", u"10:15:00") == u"10:15:00"
+        assert self.decode("TimeType", 5) == 5
+
+    def test_durations(self):
+        util = pytest.importorskip("cassandra.util")
+        assert self.decode("DurationType", u"1mo2d3ns") == util.Duration(1, 2, 3)
+        assert self.decode("DurationType", str(util.Duration(14, 0, 90 * 10 ** 9))) == util.Duration(14, 0, 90 * 10 ** 9)
+        assert self.decode("DurationType", u"1y2w1h30m10s5ms") == util.Duration(12, 14, (5410 * 1000 + 5) * 10 ** 6)
+        assert self.decode("DurationType", u"-3d") == util.Duration(0, -3, 0)
+
+    def test_collections(self):
+        assert self.decode("ListType(Int32Type)", u"[1, 2]") == [1, 2]
+        assert self.decode("SetType(UUIDType)", [USERID]) == set([uuid.UUID(USERID)])
+        assert self.decode("MapType(Int32Type, TimestampType)", {"1": "2024-05-01"}) == {1: datetime.datetime(2024, 5, 1)}
+        assert self.decode("FrozenType(TupleType(Int32Type, UTF8Type))", u'[1, "a"]') == (1, u"a")
+        assert self.decode("ReversedType(Int32Type)", u"3") == 3
+
+    def test_user_defined_types(self):
+        address = self.types.UserType.make_udt_class("ks", "address", ["street", "zip"],
+                                                     [self.types.UTF8Type, self.types.Int32Type])
+        assert decode_value(address, u'{"zip": "8000", "street": "Main"}') == (u"Main", 8000)
+        assert decode_value(address, {"street": "Main"}) == (u"Main", None)
+
+    def test_bad_values(self):
+        for casstype, value in (("Int32Type", u"1.5x"), ("Int32Type", 1.5), ("BooleanType", u"yes"),
+                                ("UUIDType", u"not-a-uuid"), ("BytesType", u"zz"), ("ListType(Int32Type)", u"[1"),
+                                ("UTF8Type", 5), ("AsciiType", True), ("VarcharType", [1]), ("InetAddressType", 1),
+                                ("TimeType", 1.5), ("DurationType", u"3 days"), ("DurationType", 3)):
+            with pytest.raises(ValueError):
+                self.decode(casstype, value)
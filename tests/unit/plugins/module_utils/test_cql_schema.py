@@ -0,0 +1,187 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_schema import (
+    alter_options_cql,
+    changed_options,
+    create_index_cql,
+    create_table_cql,
+    create_view_cql,
+    cql_literal,
+    index_target,
+    key_layout,
+    layout_conflicts,
+    live_table_layout,
+    missing_columns,
+    normalize_type,
+    parse_option_value,
+    table_layout,
+    type_levels,
+)
+
+# A system_schema.tables row of Cassandra 4.0, as a dict
+TABLE_ROW = {
+    "bloom_filter_fp_chance": 0.01,
+    "caching": {"keys": "ALL", "rows_per_partition": "NONE"},
+    "comment": "Users",
+    "compaction": {"class": "org.apache.cassandra.db.compaction.SizeTieredCompactionStrategy",
+                   "max_threshold": "32", "min_threshold": "4"},
+    "compression": {"chunk_length_in_kb": "16", "class": "org.apache.cassandra.io.compress.LZ4Compressor"},
+    "default_time_to_live": 0,
+    "gc_grace_seconds": 864000,
+    "speculative_retry": "99p",
+}
+
+
+def column_row(name, kind, position, cql_type, clustering_order="none"):
+    return {"column_name": name, "kind": kind, "position": position, "type": cql_type,
+            "clustering_order": clustering_order}
+
+
+class TestTypesAndOptions:
+
+    @pytest.mark.parametrize("cql_type, expected", [
+        ("Map<text, VARCHAR>", "map<text,text>"),
+        ("set<frozen<video_metadata>>", "set<frozen<video_metadata>>"),
+        ("varchar", "text"),
+    ])
+    def test_normalize_type(self, cql_type, expected):
+        assert normalize_type(cql_type) == expected
+
+    @pytest.mark.parametrize("value, expected", [
+        ("{'class': 'LeveledCompactionStrategy'}", {"class": "LeveledCompactionStrategy"}),
+        ("'a comment'", "a comment"),
+        ("0.1", 0.1),
+        ("true", True),
+        ("99PERCENTILE", "99PERCENTILE"),
+        (3600, 3600),
+    ])
+    def test_parse_option_value(self, value, expected):
+        assert parse_option_value(value) == expected
+
+    def test_unchanged_options(self):
+        assert changed_options({
+            "compaction": "{'class': 'SizeTieredCompactionStrategy', 'min_threshold': 4}",
+            "compression": {"chunk_length_kb": 16},
+            "caching": "{'keys': 'all'}",
+            "gc_grace_seconds": "864000",
+            "bloom_filter_fp_chance": 0.010,
+            "speculative_retry": "'99PERCENTILE'",
+            "comment": "'Users'",
+        }, TABLE_ROW) == []
+
+    def test_changed_options(self):
+        assert changed_options({
+            "compaction": {"class": "LeveledCompactionStrategy"},
+            "compression": {"chunk_length_in_kb": 64},
+            "gc_grace_seconds": 3600,
+            "comment": "users",
+            "default_time_to_live": 0,
+            "unknown_option": 1,
+        }, TABLE_ROW) == ["comment", "compaction", "compression", "gc_grace_seconds", "unknown_option"]
+
+    def test_alter_options(self):
+        options = {"compaction": "{'class': 'LeveledCompactionStrategy', 'sstable_size_in_mb': 160}",
+                   "comment": "it's", "gc_grace_seconds": 3600}
+        assert alter_options_cql("TABLE", "ks1.users", options, ["comment", "compaction"]) == (
+            "ALTER TABLE ks1.users WITH comment = 'it''s' AND "
+            "compaction = {'class': 'LeveledCompactionStrategy', 'sstable_size_in_mb': 160}")
+
+    def test_alter_map_options_keeps_their_other_keys(self):
+        options = {"compaction": "{'tombstone_threshold': '0.3'}",
+                   "compression": {"chunk_length_kb": 64},
+                   "caching": "{'keys': 'NONE'}"}
+        assert alter_options_cql("TABLE", "ks1.users", options, ["caching", "compaction", "compression"], TABLE_ROW) == (
+            "ALTER TABLE ks1.users WITH caching = {'keys': 'NONE', 'rows_per_partition': 'NONE'} AND "
+            "compaction = {'class': 'org.apache.cassandra.db.compaction.SizeTieredCompactionStrategy', "
+            "'max_threshold': '32', 'min_threshold': '4', 'tombstone_threshold': '0.3'} AND "
+            "compression = {'chunk_length_kb': 64, 'class': 'org.apache.cassandra.io.compress.LZ4Compressor'}")
+
+    def test_alter_map_options_with_a_class(self):
+        options = {"compaction": {"class": "SizeTieredCompactionStrategy", "min_threshold": 6},
+                   "compression": "{'sstable_compression': 'ZstdCompressor'}"}
+        assert alter_options_cql("TABLE", "ks1.users", options, ["compaction", "compression"], TABLE_ROW) == (
+            "ALTER TABLE ks1.users WITH compaction = {'class': 'SizeTieredCompactionStrategy', "
+            "'max_threshold': '32', 'min_threshold': 6} AND "
+            "compression = {'sstable_compression': 'ZstdCompressor'}")
+
+    def test_cql_literal(self):
+        assert cql_literal(True) == "true"
+        assert cql_literal(0.5) == "0.5"
+        assert cql_literal({"b": 1, "a": "x"}) == "{'a': 'x', 'b': 1}"
+
+
+class TestLayout:
+
+    def test_table_layout(self):
+        layout = table_layout([{"userid": "uuid"}, {"added_date": "timestamp"}, {"videoid": "uuid"},
+                               {"name": "text"}, {"owner": "text static"}],
+                              ["userid", "added_date", "videoid"], [], [{"added_date": "DESC"}])
+        assert layout["partition_key"] == ["userid"]
+        assert layout["clustering"] == [("added_date", "desc"), ("videoid", "asc")]
+        assert layout["static"] == ["owner"]
+        assert create_table_cql("ks1.user_videos", layout, {"gc_grace_seconds": 3600}) == (
+            "CREATE TABLE ks1.user_videos (userid uuid, added_date timestamp, videoid uuid, name text, owner text static, "
+            "PRIMARY KEY (userid, added_date, videoid)) "
+            "WITH CLUSTERING ORDER BY (added_date DESC, videoid ASC) AND gc_grace_seconds = 3600")
+
+    def test_composite_partition_key(self):
+        layout = table_layout([{"a": "int"}, {"b": "int"}, {"c": "int"}], ["a", "b", "c"], ["a", "b"], None)
+        assert create_table_cql("ks1.t", layout, None) == "CREATE TABLE ks1.t (a int, b int, c int, PRIMARY KEY ((a, b), c))"
+
+    @pytest.mark.parametrize("columns, primary_key, partition_key, clustering, message", [
+        ([{"a": "int"}], None, None, None, "primary_key is required"),
+        ([{"a": "int"}, {"b": "int"}], ["a", "b"], ["b"], None, "partition_key list elements do not match"),
+        ([{"a": "int"}], ["a", "b"], None, None, "primary_key columns b have no type"),
+        ([{"a": "int"}, {"b": "int"}], ["a", "b"], None, [{"c": "DESC"}], "clustering columns c are not in"),
+    ])
+    def test_invalid_layout(self, columns, primary_key, partition_key, clustering, message):
+        with pytest.raises(ValueError, match=message):
+            table_layout(columns, primary_key, partition_key, clustering)
+
+    def test_live_layout_conflicts_and_missing_columns(self):
+        current = live_table_layout([
+            column_row("name", "regular", -1, "text"),
+            column_row("videoid", "clustering", 1, "uuid", "asc"),
+            column_row("added_date", "clustering", 0, "timestamp", "desc"),
+            column_row("userid", "partition_key", 0, "uuid"),
+        ])
+        wanted = table_layout([{"userid": "uuid"}, {"added_date": "timestamp"}, {"videoid": "uuid"},
+                               {"name": "varchar"}, {"tags": "set<text>"}, {"owner": "text static"}],
+                              ["userid", "added_date", "videoid"], None, [{"added_date": "DESC"}])
+        assert layout_conflicts("ks1.t", wanted, current) == []
+        assert missing_columns(wanted, current) == [("owner", "text static"), ("tags", "set<text>")]
+        wanted["columns"]["name"] = "int"
+        wanted["clustering"][0] = ("added_date", "asc")
+        assert layout_conflicts("ks1.t", wanted, current) == [
+            "ks1.t: the primary key or clustering order differs and can't be altered",
+            "ks1.t: column name is text, it can't be altered to int"]
+
+
+class TestIndexesViewsAndTypes:
+
+    def test_indexes(self):
+        assert create_index_cql("users_email", "ks1.users", "email") == "CREATE INDEX users_email ON ks1.users (email)"
+        assert create_index_cql("users_name", "ks1.users", "name", "org.apache.cassandra.index.sasi.SASIIndex",
+                                {"mode": "CONTAINS"}) == (
+            "CREATE CUSTOM INDEX users_name ON ks1.users (name) USING 'org.apache.cassandra.index.sasi.SASIIndex' "
+            "WITH OPTIONS = {'mode': 'CONTAINS'}")
+        assert index_target("values(tags)") == index_target("Tags")
+        assert index_target("keys(tags)") != index_target("tags")
+
+    def test_view(self):
+        layout = key_layout(["email", "userid"], None, None)
+        assert create_view_cql("ks1.users_by_email", "ks1.users", None, layout, {"comment": "By email"}) == (
+            "CREATE MATERIALIZED VIEW ks1.users_by_email AS SELECT * FROM ks1.users "
+            "WHERE email IS NOT NULL AND userid IS NOT NULL PRIMARY KEY (email, userid) WITH comment = 'By email'")
+
+    def test_type_levels(self):
+        assert type_levels({
+            "address": ["text", "text"],
+            "phone": ["text"],
+            "contact": ["frozen<address>", "list<frozen<phone>>"],
+            "person": ["text", "frozen<contact>"],
+            "loop": ["frozen<loop>"],
+        }) == {"address": 1, "phone": 1, "contact": 2, "person": 3, "loop": 1}
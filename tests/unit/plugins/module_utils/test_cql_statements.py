@@ -0,0 +1,75 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_statements import (
+    is_cqlsh_command,
+    is_terminated,
+    is_read_statement,
+    split_statements,
+)
+
+
+class TestSplitStatements:
+
+    def test_semicolons_end_statements(self):
+        assert split_statements("SELECT * FROM a; SELECT * FROM b;\n") == ["SELECT * FROM a", "SELECT * FROM b"]
+
+    def test_last_statement_needs_no_semicolon(self):
+        assert split_statements("USE ks; SELECT * FROM a") == ["USE ks", "SELECT * FROM a"]
+
+    def test_empty_statements_are_dropped(self):
+        assert split_statements(" ;;\n; ") == []
+
+    def test_semicolons_in_strings(self):
+        text = "INSERT INTO t (k, v) VALUES (1, 'a;b'); INSERT INTO t (k, v) VALUES (2, 'it''s;')"
+        assert split_statements(text) == ["INSERT INTO t (k, v) VALUES (1, 'a;b')",
+                                          "INSERT INTO t (k, v) VALUES (2, 'it''s;')"]
+
+    def test_semicolons_in_quoted_identifiers_and_dollar_strings(self):
+        text = 'SELECT "a;b" FROM t; CREATE FUNCTION f () RETURNS NULL ON NULL INPUT RETURNS int LANGUAGE java AS $$ return 1; $$;'
+        assert split_statements(text) == [
+            'SELECT "a;b" FROM t',
+            "CREATE FUNCTION f () RETURNS NULL ON NULL INPUT RETURNS int LANGUAGE java AS $$ return 1; $$",
+        ]
+
+    def test_comments_are_removed(self):
+        text = "-- header; still a comment\nSELECT * FROM a; // trailing;\n/* block; comment */SELECT * FROM b;"
+        assert split_statements(text) == ["SELECT * FROM a", "SELECT * FROM b"]
+
+    def test_comment_markers_in_strings_are_kept(self):
+        assert split_statements("INSERT INTO t (k, v) VALUES (1, '-- not /* a comment')") == \
+            ["INSERT INTO t (k, v) VALUES (1, '-- not /* a comment')"]
+
+    def test_batches_are_one_statement(self):
+        text = ("BEGIN UNLOGGED BATCH\n"
+                "  INSERT INTO t (k) VALUES (1);\n"
+                "  INSERT INTO t (k) VALUES (2);\n"
+                "APPLY BATCH;\n"
+                "SELECT * FROM t;")
+        assert split_statements(text) == [
+            "BEGIN UNLOGGED BATCH\n  INSERT INTO t (k) VALUES (1);\n  INSERT INTO t (k) VALUES (2);\nAPPLY BATCH",
+            "SELECT * FROM t",
+        ]
+
+    def test_is_terminated(self):
+        assert is_terminated("SELECT * FROM a;\n-- done; really\n")
+        assert is_terminated("")
+        assert not is_terminated("SELECT * FROM a; SELECT * FROM b")
+        assert not is_terminated("BEGIN BATCH INSERT INTO t (k) VALUES (1);")
+        assert not is_terminated("INSERT INTO t (k, v) VALUES (1, ';")
+
+
+class TestClassification:
+
+    def test_cqlsh_commands(self):
+        for statement in ("CONSISTENCY QUORUM", "copy ks.t TO 'x.csv'", "SOURCE 'f.cql'",
+                          "serial consistency SERIAL", "TRACING ON"):
+            assert is_cqlsh_command(statement)
+        for statement in ("SELECT * FROM copy_jobs", "CREATE TABLE show (k int PRIMARY KEY)"):
+            assert not is_cqlsh_command(statement)
+
+    def test_read_statements(self):
+        for statement in ("SELECT * FROM t", "select * from t", "DESCRIBE KEYSPACES", "LIST ROLES"):
+            assert is_read_statement(statement)
+        for statement in ("INSERT INTO selected (k) VALUES (1)", "UPDATE t SET v = 1 WHERE k = 1", "CREATE ROLE r"):
+            assert not is_read_statement(statement)
@@ -0,0 +1,89 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_token_ranges import (
+    load_checkpoint,
+    partitioner_bounds,
+    ring_ranges,
+    save_checkpoint,
+    scan_fingerprint,
+    scan_ranges,
+    split_range,
+)
+
+MURMUR3 = "org.apache.cassandra.dht.Murmur3Partitioner"
+LOWEST, HIGHEST = -2 ** 63, 2 ** 63 - 1
+
+
+def covers(ranges, lowest, highest):
+    '''Whether ranges are contiguous from lowest to highest.'''
+    return ranges[0][0] == lowest and ranges[-1][1] == highest and \
+        all(previous[1] == current[0] for previous, current in zip(ranges, ranges[1:]))
+
+
+class TestRingRanges:
+
+    def test_partitioners(self):
+        assert partitioner_bounds(MURMUR3) == (LOWEST, HIGHEST)
+        assert partitioner_bounds("org.apache.cassandra.dht.RandomPartitioner") == (-1, 2 ** 127)
+        with pytest.raises(ValueError, match="ByteOrderedPartitioner"):
+            partitioner_bounds("org.apache.cassandra.dht.ByteOrderedPartitioner")
+
+    def test_wrapping_range_is_split(self):
+        assert ring_ranges([100, -100, 0], LOWEST, HIGHEST) == [
+            (LOWEST, -100), (-100, 0), (0, 100), (100, HIGHEST)]
+
+    def test_single_token(self):
+        assert ring_ranges([42], LOWEST, HIGHEST) == [(LOWEST, 42), (42, HIGHEST)]
+
+    def test_token_at_the_bounds(self):
+        assert ring_ranges([LOWEST, 0, HIGHEST], LOWEST, HIGHEST) == [(LOWEST, 0), (0, HIGHEST)]
+
+    def test_no_tokens(self):
+        assert ring_ranges([], LOWEST, HIGHEST) == [(LOWEST, HIGHEST)]
+
+
+class TestSplitRange:
+
+    def test_even_parts(self):
+        assert split_range(0, 100, 4) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+
+    def test_parts_cover_the_range(self):
+        parts = split_range(LOWEST, HIGHEST, 7)
+        assert len(parts) == 7
+        assert covers(parts, LOWEST, HIGHEST)
+
+    def test_small_range(self):
+        assert split_range(10, 12, 8) == [(10, 11), (11, 12)]
+        assert split_range(10, 11, 0) == [(10, 11)]
+
+    def test_scan_ranges(self):
+        ring = [-2 ** 62, 0, 2 ** 62]
+        ranges = scan_ranges(ring, MURMUR3, 3)
+        assert len(ranges) == 12
+        assert covers(ranges, LOWEST, HIGHEST)
+
+
+class TestCheckpoint:
+
+    def test_round_trip(self, tmp_path):
+        path = str(tmp_path / "scan.checkpoint")
+        fingerprint = scan_fingerprint("ks", "t", None, [(0, 1)])
+        assert load_checkpoint(path, fingerprint) == {}
+        save_checkpoint(path, fingerprint, {0: 10, 7: 0})
+        assert load_checkpoint(path, fingerprint) == {0: 10, 7: 0}
+        assert os.listdir(str(tmp_path)) == ["scan.checkpoint"]
+
+    def test_other_scan_is_ignored(self, tmp_path):
+        path = str(tmp_path / "scan.checkpoint")
+        save_checkpoint(path, scan_fingerprint("ks", "t", None, [(0, 1)]), {0: 10})
+        assert load_checkpoint(path, scan_fingerprint("ks", "t", None, [(0, 2)])) == {}
+
+    def test_unreadable_checkpoint_is_ignored(self, tmp_path):
+        path = tmp_path / "scan.checkpoint"
+        path.write_text(u"{not json")
+        assert load_checkpoint(str(path), "x") == {}
@@ -0,0 +1,97 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from collections import namedtuple
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_topology import (
+    InvalidRequest,
+    cql_cluster_status,
+    cql_schema_versions,
+    host_states,
+    local_and_peers,
+)
+
+Local = namedtuple("Local", ["key", "broadcast_address", "listen_address", "data_center", "rack", "host_id", "tokens",
+                             "schema_version"])
+Peer = namedtuple("Peer", ["peer", "peer_port", "data_center", "rack", "host_id", "tokens", "schema_version"])
+Host = namedtuple("Host", ["host_id", "is_up"])
+
+V1 = "1176b7ac-8993-395d-85fd-41b89ef49fbb"
+V2 = "d4f18346-f81f-3786-aed4-40e03558b299"
+LOCAL = Local("local", "10.0.0.1", "10.0.0.1", "dc1", "rack1", "aaaa", set(["1", "2"]), V1)
+PEERS = [
+    Peer("10.0.0.10", 7000, "dc1", "rack2", "bbbb", set(["3", "4"]), V1),
+    Peer("10.0.0.9", 7000, "dc1", "rack1", "cccc", set(["5", "6"]), V2),
+    Peer("10.1.0.1", 7000, "dc2", "rack1", "dddd", set(["7", "8"]), V2),
+]
+
+
+class FakeSession(object):
+
+    def __init__(self, peers_v2=True):
+        self.peers_v2 = peers_v2
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query)
+        if "system.local" in query:
+            return [LOCAL]
+        if "peers_v2" in query and not self.peers_v2:
+            raise InvalidRequest("unconfigured table peers_v2")
+        return PEERS
+
+
+class TestCqlClusterStatus:
+
+    def test_same_shape_as_nodetool(self):
+        is_up = host_states([Host("aaaa", True), Host("bbbb", True), Host("cccc", False), Host(None, True)])
+        status = cql_cluster_status(LOCAL, PEERS, is_up)
+        assert sorted(status.keys()) == ["dc1", "dc2"]
+        assert status["dc1"]["up"] == ["10.0.0.1", "10.0.0.10"]
+        assert status["dc1"]["down"] == ["10.0.0.9"]
+        assert status["dc2"]["down"] == ["10.1.0.1"]  # Unknown to the driver
+        assert [n["address"] for n in status["dc1"]["nodes"]] == ["10.0.0.1", "10.0.0.9", "10.0.0.10"]
+        assert status["dc1"]["nodes"][0] == {
+            "address": "10.0.0.1",
+            "load": "?",
+            "tokens": "2",
+            "owns": "?",
+            "host_id": "aaaa",
+            "rack": "rack1",
+            "status": "U",
+            "state": "N",
+        }
+
+    def test_local_node_is_up(self):
+        status = cql_cluster_status(LOCAL, [], {})
+        assert status["dc1"]["up"] == ["10.0.0.1"]
+
+
+class TestCqlSchemaVersions:
+
+    def test_disagreement(self):
+        is_up = {"aaaa": True, "bbbb": True, "cccc": True, "dddd": True}
+        assert cql_schema_versions(LOCAL, PEERS, is_up) == {
+            V1: ["10.0.0.1", "10.0.0.10"],
+            V2: ["10.0.0.9", "10.1.0.1"],
+        }
+
+    def test_down_nodes_are_left_out(self):
+        is_up = {"bbbb": True, "cccc": False}
+        assert cql_schema_versions(LOCAL, PEERS, is_up) == {V1: ["10.0.0.1", "10.0.0.10"]}
+
+
+class TestLocalAndPeers:
+
+    def test_peers_v2(self):
+        session = FakeSession()
+        local, peers = local_and_peers(session)
+        assert local is LOCAL
+        assert peers == PEERS
+        assert session.queries[-1] == "SELECT * FROM system.peers_v2"
+
+    def test_falls_back_to_peers(self):
+        session = FakeSession(peers_v2=False)
+        local, peers = local_and_peers(session)
+        assert peers == PEERS
+        assert session.queries[-1] == "SELECT * FROM system.peers"
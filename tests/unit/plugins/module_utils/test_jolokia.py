@@ -0,0 +1,179 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import threading
+
+import pytest
+
+from ansible.module_utils.six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from ansible.module_utils.six.moves.socketserver import ThreadingMixIn
+
+from ansible_collections.community.cassandra.plugins.module_utils import jolokia
+from ansible_collections.community.cassandra.plugins.module_utils.jolokia import (
+    STORAGE_PROXY,
+    STORAGE_SERVICE,
+    JolokiaClient,
+    JolokiaError,
+    jolokia_nodetool_cmd,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolCmd
+
+from .test_nodetool_session import FakeModule
+
+
+class FakeJolokiaServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeJolokiaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes, don't let Nagle's
+    # algorithm hold back the body
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if server.auth and self.headers.get("Authorization") != server.auth:
+            return self._send(401, b"")
+        request = json.loads(body.decode("utf-8"))
+        server.requests.append(request)
+        key = (request["mbean"], request.get("attribute"))
+        if request["type"] == "read" and key in server.attributes:
+            response = {"status": 200, "value": server.attributes[key]}
+        elif request["type"] == "write" and key in server.attributes:
+            response = {"status": 200, "value": server.attributes[key]}
+            server.attributes[key] = request["value"]
+        elif request["type"] == "exec":
+            response = {"status": 200, "value": None}
+        else:
+            response = {"status": 404, "error": "javax.management.AttributeNotFoundException : {0}".format(key)}
+        self._send(200, json.dumps(response).encode("utf-8"))
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def jolokia_server():
+    server = FakeJolokiaServer(("127.0.0.1", 0), FakeJolokiaHandler)
+    server.auth = None
+    server.requests = []
+    server.connections = 0
+    server.attributes = {
+        (STORAGE_SERVICE, "ReleaseVersion"): "4.1.3",
+        (STORAGE_SERVICE, "ReadRpcTimeout"): 5000,
+        (STORAGE_SERVICE, "CompactionThroughputMbPerSec"): 64,
+        (STORAGE_SERVICE, "StreamThroughputMbPerSec"): 24,
+        (STORAGE_SERVICE, "TraceProbability"): 0.0,
+        (STORAGE_SERVICE, "GossipRunning"): True,
+        (STORAGE_SERVICE, "IncrementalBackupsEnabled"): False,
+        (STORAGE_PROXY, "HintedHandoffEnabled"): True,
+    }
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    server.url = "http://127.0.0.1:{0}/jolokia/".format(server.server_address[1])
+    yield server
+    for conn in jolokia._CONNECTIONS.values():
+        conn.close()
+    jolokia._CONNECTIONS.clear()
+    server.shutdown()
+    server.server_close()
+
+
+class TestJolokiaClient:
+
+    def test_requests_share_one_connection(self, jolokia_server):
+        client = JolokiaClient(jolokia_server.url)
+        for i in range(5):
+            assert client.read(STORAGE_SERVICE, "ReleaseVersion") == "4.1.3"
+        assert JolokiaClient(jolokia_server.url).read(STORAGE_SERVICE, "GossipRunning") is True
+        assert jolokia_server.connections == 1
+
+    def test_error_status_raises(self, jolokia_server):
+        with pytest.raises(JolokiaError, match="AttributeNotFoundException"):
+            JolokiaClient(jolokia_server.url).read(STORAGE_SERVICE, "NoSuchAttribute")
+
+    def test_basic_auth(self, jolokia_server):
+        jolokia_server.auth = "Basic Y2Fzc2FuZHJhOnNlY3JldA=="
+        with pytest.raises(JolokiaError, match="HTTP 401"):
+            JolokiaClient(jolokia_server.url).read(STORAGE_SERVICE, "ReleaseVersion")
+        client = JolokiaClient(jolokia_server.url, "cassandra", "secret")
+        assert client.read(STORAGE_SERVICE, "ReleaseVersion") == "4.1.3"
+
+    def test_unreachable_agent_raises(self):
+        with pytest.raises(JolokiaError):
+            JolokiaClient("http://127.0.0.1:1/jolokia/", timeout=1).read(STORAGE_SERVICE, "ReleaseVersion")
+
+
+class TestJolokiaNodetoolCmd:
+
+    def test_get_commands_match_nodetool_output(self, jolokia_server):
+        client = JolokiaClient(jolokia_server.url)
+        assert jolokia_nodetool_cmd(client, "gettimeout read") == (0, "Current timeout for type read: 5000 ms", "")
+        assert jolokia_nodetool_cmd(client, "getcompactionthroughput") == (0, "Current compaction throughput: 64 MB/s", "")
+        assert jolokia_nodetool_cmd(client, "getstreamthroughput") == (0, "Current stream throughput: 24 Mb/s", "")
+        assert jolokia_nodetool_cmd(client, "statushandoff") == (0, "Hinted handoff is running", "")
+        assert jolokia_nodetool_cmd(client, "statusgossip") == (0, "running", "")
+        assert jolokia_nodetool_cmd(client, "statusbackup") == (0, "not running", "")
+
+    def test_set_commands_write_attributes(self, jolokia_server):
+        client = JolokiaClient(jolokia_server.url)
+        assert jolokia_nodetool_cmd(client, "settimeout read 10000") == (0, "", "")
+        assert jolokia_nodetool_cmd(client, "setcompactionthroughput 128") == (0, "", "")
+        assert jolokia_nodetool_cmd(client, "disablehandoff") == (0, "", "")
+        attributes = jolokia_server.attributes
+        assert attributes[(STORAGE_SERVICE, "ReadRpcTimeout")] == 10000
+        assert attributes[(STORAGE_SERVICE, "CompactionThroughputMbPerSec")] == 128
+        assert attributes[(STORAGE_PROXY, "HintedHandoffEnabled")] is False
+
+    def test_enable_binary_executes_operation(self, jolokia_server):
+        client = JolokiaClient(jolokia_server.url)
+        assert jolokia_nodetool_cmd(client, "enablebinary") == (0, "", "")
+        assert jolokia_server.requests[-1] == {"type": "exec", "mbean": STORAGE_SERVICE,
+                                               "operation": "startNativeTransport", "arguments": []}
+
+    def test_unmapped_commands_return_none(self, jolokia_server):
+        client = JolokiaClient(jolokia_server.url)
+        assert jolokia_nodetool_cmd(client, "status") is None
+        assert jolokia_nodetool_cmd(client, "settimeout read abc") is None
+        assert jolokia_nodetool_cmd(client, "setstreamthroughput fast") is None
+        assert jolokia_server.requests == []
+
+
+class TestNodeToolCmdJolokiaBackend:
+
+    def test_jolokia_backend_skips_nodetool(self, jolokia_server):
+        module = FakeModule(nodetool_backend="jolokia", jolokia_url=jolokia_server.url)
+        n = NodeToolCmd(module)
+        assert n.nodetool_cmd("gettimeout read") == (0, "Current timeout for type read: 5000 ms", "")
+        assert module.commands == []
+
+    def test_unmapped_command_falls_back_to_subprocess(self, jolokia_server):
+        module = FakeModule(nodetool_backend="jolokia", jolokia_url=jolokia_server.url)
+        n = NodeToolCmd(module)
+        assert n.nodetool_cmd("status") == (0, "forked", "")
+        assert module.commands[-1].endswith("--host 127.0.0.1 --port 7199 status")
+
+    def test_unreachable_agent_falls_back_to_subprocess(self):
+        module = FakeModule(nodetool_backend="jolokia", jolokia_url="http://127.0.0.1:1/jolokia/")
+        n = NodeToolCmd(module)
+        assert n.nodetool_cmd("gettimeout read") == (0, "forked", "")
+        assert len(module.commands) == 1
+
+    def test_default_url(self):
+        n = NodeToolCmd(FakeModule(nodetool_backend="jolokia"))
+        assert n.jolokia_url == "http://127.0.0.1:8778/jolokia/"
@@ -0,0 +1,131 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import re
+import threading
+import time
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import (
+    NodeToolCmd,
+    nodetool_fan_out,
+)
+from ansible_collections.community.cassandra.plugins.modules import cassandra_timeout
+
+from .test_nodetool_session import FakeModule
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class ClusterModule(FakeModule):
+    """
+    Answers gettimeout/settimeout like a cluster of nodes would, the read
+    timeout of every node starting out at 5000 ms. Nodes listed in broken
+    fail every command.
+    """
+
+    def __init__(self, broken=(), delay=0, **params):
+        FakeModule.__init__(self, **params)
+        self.broken = broken
+        self.delay = delay
+        self.timeouts = {}
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.result = None
+
+    def run_command(self, cmd):
+        host = re.search(r"--host (\S+)", cmd).group(1)
+        with self.lock:
+            self.commands.append(cmd)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            if host in self.broken:
+                return 1, "", "nodetool: Failed to connect to '{0}:7199'".format(host)
+            match = re.search(r"settimeout read (\d+)", cmd)
+            if match:
+                self.timeouts[host] = int(match.group(1))
+                return 0, "", ""
+            return 0, "Current timeout for type read: {0} ms".format(self.timeouts.get(host, 5000)), ""
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def exit_json(self, **kwargs):
+        self.result = kwargs
+        raise ModuleExit()
+
+    def fail_json(self, **kwargs):
+        kwargs['failed'] = True
+        self.result = kwargs
+        raise ModuleExit()
+
+
+def run(module):
+    with pytest.raises(ModuleExit):
+        nodetool_fan_out(module, cassandra_timeout.run_module)
+    return module.result
+
+
+class TestNodetoolFanOut:
+
+    def test_single_host(self):
+        module = ClusterModule(timeout=10000, timeout_type="read")
+        result = run(module)
+        assert result['changed'] is True
+        assert 'hosts' not in result
+        assert module.timeouts == {"127.0.0.1": 10000}
+
+    def test_per_host_results(self):
+        module = ClusterModule(timeout=10000, timeout_type="read", hosts=["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+        module.timeouts["10.0.0.2"] = 10000
+        result = run(module)
+        assert 'failed' not in result
+        assert result['changed'] is True
+        assert result['hosts']["10.0.0.1"]['changed'] is True
+        assert result['hosts']["10.0.0.2"]['changed'] is False
+        assert result['hosts']["10.0.0.3"]['changed'] is True
+        assert module.timeouts == {"10.0.0.1": 10000, "10.0.0.2": 10000, "10.0.0.3": 10000}
+        assert module.params['host'] == "127.0.0.1"
+
+    def test_unchanged_cluster(self):
+        module = ClusterModule(timeout=5000, timeout_type="read", hosts=["10.0.0.1", "10.0.0.2"])
+        result = run(module)
+        assert result['changed'] is False
+        assert result['msg'] == "Succeeded on 2 hosts"
+
+    def test_failed_host_fails_the_module(self):
+        module = ClusterModule(timeout=10000, timeout_type="read", hosts=["10.0.0.1", "10.0.0.2"],
+                               broken=["10.0.0.2"])
+        result = run(module)
+        assert result['failed'] is True
+        assert result['msg'] == "Failed on 1 of 2 hosts: 10.0.0.2"
+        assert result['changed'] is True
+        assert result['hosts']["10.0.0.2"]['failed'] is True
+        assert module.timeouts == {"10.0.0.1": 10000}
+
+    def test_hosts_run_in_parallel(self):
+        hosts = ["10.0.0.{0}".format(i) for i in range(8)]
+        module = ClusterModule(timeout=10000, timeout_type="read", hosts=hosts, max_parallel=8, delay=0.2)
+        start = time.time()
+        run(module)
+        # Two commands per host, 0.2s each: 3.2s if run serially
+        assert time.time() - start < 1.6
+        assert module.max_running > 1
+
+    def test_max_parallel(self):
+        hosts = ["10.0.0.{0}".format(i) for i in range(6)]
+        module = ClusterModule(timeout=10000, timeout_type="read", hosts=hosts, max_parallel=2, delay=0.05)
+        run(module)
+        assert module.max_running == 2
+
+    def test_unsupported_module_fails(self):
+        module = ClusterModule(hosts=["10.0.0.1"])
+        with pytest.raises(ModuleExit):
+            NodeToolCmd(module)
+        assert module.result['msg'] == "This module does not support the hosts option"
@@ -0,0 +1,256 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import time
+
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import (
+    cluster_up_down,
+    column_slicer,
+    column_values,
+    find_nodes,
+    info_cache_entries,
+    node_status_slicer,
+    parse_compactionstats,
+    parse_current_value,
+    parse_describecluster,
+    parse_getfullquerylog,
+    parse_info,
+    parse_last_int,
+    parse_ring,
+    parse_tablestats,
+    parse_throughput,
+    parse_tpstats,
+)
+
+from .nodetool_output import (
+    compactionstats_output,
+    describecluster_output,
+    info_output,
+    ring_output,
+    status_output,
+    tablestats_output,
+    tpstats_output,
+)
+
+
+class TestInfo:
+
+    def test_labels(self):
+        info = parse_info(info_output())
+        assert info["ID"] == "f4ee490c-df8e-4a8d-9236-320903697fbf"
+        assert info["Native Transport active"] == "true"
+        assert info["Heap Memory (MB)"] == "258.26 / 495.00"
+
+    def test_cache_entries(self):
+        assert info_cache_entries(parse_info(info_output())) == {
+            "key_cache_entries": 10,
+            "row_cache_entries": 0,
+            "counter_cache_entries": 0,
+        }
+
+    def test_missing_cache(self):
+        assert info_cache_entries(parse_info("Load : 1 KiB\n"))["key_cache_entries"] is None
+
+    def test_repeated_labels(self):
+        info = parse_info("Token : 1\nToken : 2\n")
+        assert info["Token"] == ["1", "2"]
+
+
+class TestStatus:
+
+    def test_large_cluster(self):
+        status = cluster_up_down(status_output(300, datacenters=2, down=3))
+        assert sorted(status.keys()) == ["dc1", "dc2"]
+        assert len(status["dc1"]["up"]) == 297
+        assert status["dc2"]["down"] == ["10.1.1.48", "10.1.1.49", "10.1.1.50"]
+        node = status["dc1"]["nodes"][0]
+        assert node["load"] == "100.0 GiB"
+        assert node["tokens"] == "16"
+        assert node["rack"] == "rack1"
+
+    def test_list_of_chunks(self):
+        stdout = status_output(20)
+        chunks = [stdout[i:i + 100] for i in range(0, len(stdout), 100)]
+        assert cluster_up_down(chunks) == cluster_up_down(stdout)
+
+    def test_slicer_is_reused_for_the_same_header(self):
+        header = status_output(3).splitlines()[4]
+        assert node_status_slicer(header) is node_status_slicer(header)
+        assert node_status_slicer("-- not a status header") is None
+
+    def test_parsing_scales_linearly(self):
+        def seconds(nodes):
+            stdout = status_output(nodes)
+            best = None
+            for i in range(3):
+                start = time.time()
+                cluster_up_down(stdout)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+            return best
+        small, large = seconds(500), seconds(4000)
+        # 8 times the nodes, allow for plenty of timing noise but nothing
+        # like the 64 times a quadratic parser would take
+        assert large < small * 24
+
+
+class TestFindNodes:
+
+    def test_by_address_and_host_id(self):
+        stdout = status_output(100, datacenters=2, down=5)
+        found = find_nodes(stdout, ["10.0.0.3", "00000001-0063-4000-8000-000000000063", "10.9.9.9"])
+        assert sorted(found.keys()) == ["00000001-0063-4000-8000-000000000063", "10.0.0.3"]
+        assert found["10.0.0.3"]["status"] + found["10.0.0.3"]["state"] == "UN"
+        assert found["10.0.0.3"]["datacenter"] == "dc1"
+        down_node = found["00000001-0063-4000-8000-000000000063"]
+        assert down_node["address"] == "10.1.0.100"
+        assert down_node["status"] == "D"
+        assert down_node["datacenter"] == "dc2"
+
+    def test_same_node_by_address_and_host_id(self):
+        found = find_nodes(status_output(3), ["10.0.0.2", "00000000-0001-4000-8000-000000000001"])
+        assert found["10.0.0.2"] is found["00000000-0001-4000-8000-000000000001"]
+
+    def test_matches_cluster_up_down(self):
+        stdout = status_output(20, datacenters=2, down=2)
+        node = find_nodes(stdout, ["10.1.0.20"])["10.1.0.20"]
+        assert cluster_up_down(stdout)["dc2"]["nodes"][-1] == dict((k, v) for k, v in node.items() if k != "datacenter")
+
+    def test_stops_once_all_targets_are_found(self):
+        stdout = status_output(5) + "\nDatacenter: broken\n-- Address  Load  Host ID  Rack\nUN  10.0.0.1  1 KiB  xx  r1\n"
+        assert find_nodes(stdout, ["10.0.0.1"])["10.0.0.1"]["datacenter"] == "dc1"
+
+    def test_no_targets(self):
+        assert find_nodes(status_output(5), []) == {}
+
+
+class TestColumnSlicer:
+
+    def test_slices_between_offsets(self):
+        slicer = column_slicer({"b": 4, "a": 0, "c": 9})
+        assert column_values("aaa bbbb ccccc", slicer) == {"a": "aaa", "b": "bbbb", "c": "ccccc"}
+        assert column_values("aaa", slicer) == {"a": "aaa", "b": "", "c": ""}
+
+
+class TestRing:
+
+    def test_tokens(self):
+        ring = parse_ring(ring_output(10, tokens_per_node=4))
+        assert len(ring) == 40
+        assert ring[0] == {
+            "datacenter": "dc1",
+            "address": "10.0.0.1",
+            "rack": "rack1",
+            "status": "Up",
+            "state": "Normal",
+            "load": "100.5 GiB",
+            "owns": "10.00%",
+            "token": "-9223372036854775808",
+        }
+
+
+class TestDescribeCluster:
+
+    def test_schema_agreement(self):
+        cluster = parse_describecluster(describecluster_output(5))
+        assert cluster["name"] == "Test Cluster"
+        assert cluster["partitioner"] == "org.apache.cassandra.dht.Murmur3Partitioner"
+        assert cluster["schema_versions"] == {
+            "00000000-f81f-3786-aed4-40e03558b299": ["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.5"]
+        }
+        assert cluster["unreachable"] == []
+
+    def test_disagreement_and_unreachable(self):
+        cluster = parse_describecluster(describecluster_output(6, schema_versions=2, unreachable=2))
+        assert len(cluster["schema_versions"]) == 2
+        assert cluster["unreachable"] == ["10.0.0.5", "10.0.0.6"]
+
+    def test_hosts_with_ports(self):
+        stdout = "\tSchema versions:\n\t\td4f18346-f81f-3786-aed4-40e03558b299: [127.0.0.1:7000, 127.0.0.2:7000]\n"
+        assert parse_describecluster(stdout)["schema_versions"] == {
+            "d4f18346-f81f-3786-aed4-40e03558b299": ["127.0.0.1:7000", "127.0.0.2:7000"]
+        }
+
+
+class TestCompactionStats:
+
+    def test_running_compactions(self):
+        stats = parse_compactionstats(compactionstats_output(3))
+        assert stats["pending_tasks"] == 3
+        assert stats["pending"]["keyspace1.table1"] == 1
+        assert stats["remaining_time"] == "0h00m04s"
+        assert stats["compactions"][0]["compaction_type"] == "Anticompaction after repair"
+        assert stats["compactions"][1] == {
+            "id": "e2bff090-6d8a-11ec-a6a3-000000000001",
+            "compaction_type": "Compaction",
+            "keyspace": "keyspace1",
+            "table": "table1",
+            "completed": 1000,
+            "total": 64806010,
+            "unit": "bytes",
+            "progress": "0.00%",
+        }
+
+    def test_idle(self):
+        stats = parse_compactionstats("pending tasks: 0\n")
+        assert stats["pending_tasks"] == 0
+        assert stats["compactions"] == []
+
+
+class TestTpStats:
+
+    def test_pools_and_dropped(self):
+        stats = parse_tpstats(tpstats_output())
+        assert len(stats["thread_pools"]) == 23
+        assert stats["thread_pools"]["CompactionExecutor"] == {
+            "active": 2, "pending": 0, "completed": 2000, "blocked": 0, "all_time_blocked": 2
+        }
+        assert stats["dropped"]["MUTATION_REQ"] == 3
+
+    def test_cassandra_3_dropped_section(self):
+        stats = parse_tpstats("Message type           Dropped\nREAD                         5\n")
+        assert stats["dropped"] == {"READ": 5}
+
+
+class TestTableStats:
+
+    def test_keyspaces_and_tables(self):
+        stats = parse_tablestats(tablestats_output(2, 3))
+        assert sorted(stats.keys()) == ["keyspace0", "keyspace1"]
+        assert stats["keyspace1"]["stats"]["Write Count"] == 20
+        assert stats["keyspace1"]["stats"]["Read Latency"] == "NaN ms"
+        assert stats["keyspace1"]["tables"]["table2"]["Space used (live)"] == 21470
+        assert stats["keyspace1"]["tables"]["table2"]["SSTable Compression Ratio"] == 0.49
+
+
+class TestGetOutputs:
+
+    def test_last_int(self):
+        assert parse_last_int("Stage  CorePoolSize  MaximumPoolSize\nReadStage  32  64") == 64
+        assert parse_last_int("Current concurrent compactors in the system is: \n4\n") == 4
+        assert parse_last_int("error: unknown stage") is None
+
+    def test_current_value(self):
+        assert parse_current_value("Current timeout for type read: 5000 ms") == "5000"
+        assert parse_current_value("Current trace probability: 0.5") == "0.5"
+        assert parse_current_value("") is None
+
+    def test_throughput(self):
+        assert parse_throughput("Current stream throughput: 24 Mb/s") == 24.0
+        assert parse_throughput("Current stream throughput: 24.5 MiB/s") == 24.5
+        assert parse_throughput("unlimited") is None
+
+    def test_getfullquerylog(self):
+        stdout = ("enabled             false\nlog_dir\narchive_command\nroll_cycle          HOURLY\n"
+                  "block               true\nmax_log_size        17179869184\nmax_queue_weight    268435456\n"
+                  "max_archive_retries 10\n")
+        assert parse_getfullquerylog(stdout) == {
+            "enabled": False,
+            "log_dir": None,
+            "archive_command": None,
+            "roll_cycle": "HOURLY",
+            "block": True,
+            "max_log_size": 17179869184,
+            "max_queue_weight": 268435456,
+            "max_archive_retries": 10,
+        }
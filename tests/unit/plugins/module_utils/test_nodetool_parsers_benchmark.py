@@ -0,0 +1,92 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Parsing cost over synthetic output of growing clusters. Run with
+#   pytest tests/unit/plugins/module_utils/test_nodetool_parsers_benchmark.py --benchmark-only
+# and compare runs with --benchmark-autosave/--benchmark-compare.
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import (
+    cluster_up_down,
+    find_nodes,
+    parse_compactionstats,
+    parse_describecluster,
+    parse_info,
+    parse_ring,
+    parse_tablestats,
+    parse_tpstats,
+)
+
+from .nodetool_output import (
+    compactionstats_output,
+    describecluster_output,
+    info_output,
+    ring_output,
+    status_output,
+    tablestats_output,
+    tpstats_output,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+CLUSTER_SIZES = [10, 100, 1000]
+
+
+@pytest.fixture(params=[150, 1500, 6000])
+def multi_dc_status(request):
+    # nodetool status of a cluster spread over 3 datacenters
+    return request.param, status_output(request.param // 3, datacenters=3, down=2)
+
+
+@pytest.mark.parametrize("nodes", CLUSTER_SIZES)
+def test_status(benchmark, nodes):
+    stdout = status_output(nodes // 2, datacenters=2)
+    result = benchmark(cluster_up_down, stdout)
+    assert len(result["dc1"]["nodes"]) == nodes // 2
+
+
+def test_status_multi_dc(benchmark, multi_dc_status):
+    nodes, stdout = multi_dc_status
+    result = benchmark(cluster_up_down, stdout)
+    assert sum(len(dc["nodes"]) for dc in result.values()) == nodes
+
+
+def test_status_find_one_node(benchmark, multi_dc_status):
+    # Waiting for the last node of the output, the worst case
+    nodes, stdout = multi_dc_status
+    target = "10.2.{0}.{1}".format((nodes // 3 - 1) // 250, (nodes // 3 - 1) % 250 + 1)
+    result = benchmark(find_nodes, stdout, [target])
+    assert result[target]["status"] == "D"
+
+
+@pytest.mark.parametrize("nodes", CLUSTER_SIZES)
+def test_ring(benchmark, nodes):
+    stdout = ring_output(nodes)
+    assert len(benchmark(parse_ring, stdout)) == nodes * 16
+
+
+@pytest.mark.parametrize("nodes", CLUSTER_SIZES)
+def test_describecluster(benchmark, nodes):
+    stdout = describecluster_output(nodes, schema_versions=3, unreachable=nodes // 10)
+    assert len(benchmark(parse_describecluster, stdout)["schema_versions"]) == 3
+
+
+@pytest.mark.parametrize("compactions", [0, 10, 100])
+def test_compactionstats(benchmark, compactions):
+    stdout = compactionstats_output(compactions)
+    assert len(benchmark(parse_compactionstats, stdout)["compactions"]) == compactions
+
+
+@pytest.mark.parametrize("tables", [10, 100, 1000])
+def test_tablestats(benchmark, tables):
+    stdout = tablestats_output(10, tables // 10)
+    assert len(benchmark(parse_tablestats, stdout)) == 10
+
+
+def test_tpstats(benchmark):
+    assert len(benchmark(parse_tpstats, tpstats_output())["thread_pools"]) == 23
+
+
+def test_info(benchmark):
+    assert benchmark(parse_info, info_output())["Rack"] == "rack1"
@@ -0,0 +1,231 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import sys
+import time
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.local_daemon import (
+    DaemonUnavailable,
+    daemon_socket_path,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_session import (
+    NodeToolSession,
+    nodetool_daemon_cmd,
+    split_nodetool_flags,
+)
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import (
+    NodeToolBatch,
+    NodeToolCmd,
+    NodeToolGetSetCommand,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FAKE_LAUNCHER = [sys.executable, os.path.join(FIXTURES_DIR, "fake_nodetool_session.py")]
+
+
+class FakeModule(object):
+
+    def __init__(self, **params):
+        self.params = dict(
+            host="127.0.0.1",
+            hosts=None,
+            max_parallel=10,
+            port=7199,
+            password=None,
+            password_file=None,
+            username=None,
+            nodetool_path=None,
+            nodetool_flags="-Dcom.sun.jndi.rmiURLParsing=legacy",
+            debug=False,
+            cassandra_version="4.1",
+            version_cache_ttl=3600,
+            nodetool_backend="subprocess",
+            nodetool_daemon_idle_timeout=300,
+            jolokia_url=None,
+        )
+        self.params.update(params)
+        self.commands = []
+        self.check_mode = False
+
+    def run_command(self, cmd):
+        self.commands.append(cmd)
+        return 0, "forked", ""
+
+    def get_bin_path(self, name):
+        return None
+
+    def debug(self, msg):
+        pass
+
+    def fail_json(self, **kwargs):
+        raise AssertionError(kwargs)
+
+
+class TestSplitNodetoolFlags:
+
+    def test_jvm_properties_are_separated_from_nodetool_options(self):
+        jvm_flags, args = split_nodetool_flags("-Dcom.sun.jndi.rmiURLParsing=legacy --ssl")
+        assert jvm_flags == ["-Dcom.sun.jndi.rmiURLParsing=legacy"]
+        assert args == ["--ssl"]
+
+    def test_none(self):
+        assert split_nodetool_flags(None) == ([], [])
+
+
+class TestNodeToolSession:
+
+    def test_commands_share_one_process(self):
+        session = NodeToolSession(FAKE_LAUNCHER)
+        session.start()
+        try:
+            rc1, out1, err1 = session.run(["-h", "127.0.0.1", "info"])
+            rc2, out2, err2 = session.run(["-h", "127.0.0.1", "status"])
+        finally:
+            session.close()
+        assert (rc1, rc2) == (0, 0)
+        assert out1.endswith("args=-h 127.0.0.1 info\n")
+        assert out1.split()[0] == out2.split()[0]  # same pid
+        assert not session.alive
+
+    def test_failed_command_returns_rc_and_stderr(self):
+        session = NodeToolSession(FAKE_LAUNCHER)
+        session.start()
+        try:
+            assert session.run(["fail"]) == (1, "", "error: command failed\n")
+        finally:
+            session.close()
+
+    def test_launcher_that_never_gets_ready(self):
+        session = NodeToolSession([sys.executable, "-c", "pass"])
+        with pytest.raises(DaemonUnavailable):
+            session.start()
+
+    def test_newlines_in_arguments_are_rejected(self):
+        session = NodeToolSession(FAKE_LAUNCHER)
+        session.start()
+        try:
+            with pytest.raises(ValueError):
+                session.run(["status\nversion"])
+        finally:
+            session.close()
+
+
+class TestNodeToolDaemon:
+
+    def test_daemon_is_reused_between_calls(self):
+        key = ["127.0.0.1", 7199, None, None, None]
+        rc1, out1, err1 = nodetool_daemon_cmd(FAKE_LAUNCHER, key, ["info"], 5)
+        rc2, out2, err2 = nodetool_daemon_cmd(FAKE_LAUNCHER, key, ["status"], 5)
+        assert (rc1, rc2) == (0, 0)
+        assert out1.split()[0] == out2.split()[0]
+        assert os.getpid() != int(out1.split()[0].split("=")[1])
+
+    def test_daemon_exits_when_idle(self):
+        key = ["127.0.0.1", 7299, None, None, None]
+        nodetool_daemon_cmd(FAKE_LAUNCHER, key, ["info"], 1)
+        socket_path = daemon_socket_path("nodetool", [key, FAKE_LAUNCHER])
+        assert os.path.exists(socket_path)
+        deadline = time.time() + 10
+        while os.path.exists(socket_path) and time.time() < deadline:
+            time.sleep(0.1)
+        assert not os.path.exists(socket_path)
+
+    def test_daemon_with_broken_launcher_is_unavailable(self):
+        with pytest.raises(DaemonUnavailable):
+            nodetool_daemon_cmd([sys.executable, "-c", "pass"], ["h", 1], ["version"], 5)
+
+
+class TestNodeToolCmdBackend:
+
+    def test_nodetool_args(self):
+        module = FakeModule(username="cassandra", password="secret", nodetool_flags="-Dfoo=bar --ssl")
+        n = NodeToolCmd(module)
+        assert n.nodetool_args("getconcurrency -- ReadStage") == [
+            "--ssl", "-h", "127.0.0.1", "-p", "7199", "-u", "cassandra", "-pw", "secret",
+            "getconcurrency", "--", "ReadStage"
+        ]
+
+    def test_nodetool_args_without_password(self):
+        n = NodeToolCmd(FakeModule(username="cassandra"))
+        assert n.nodetool_args("status") == ["-h", "127.0.0.1", "-p", "7199", "-u", "cassandra", "status"]
+
+    def test_daemon_backend_falls_back_to_subprocess(self):
+        # No java and no Cassandra installation here, so the daemon can't
+        # be started and nodetool gets forked as usual.
+        module = FakeModule(nodetool_backend="daemon")
+        n = NodeToolCmd(module)
+        assert n.nodetool_cmd("status") == (0, "forked", "")
+        assert module.commands[-1].endswith("--host 127.0.0.1 --port 7199 status")
+
+    def test_daemon_backend_uses_daemon(self, monkeypatch):
+        monkeypatch.setattr(
+            "ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects.session_launcher",
+            lambda *args: FAKE_LAUNCHER)
+        module = FakeModule(nodetool_backend="daemon", nodetool_daemon_idle_timeout=2)
+        n = NodeToolCmd(module)
+        rc, out, err = n.nodetool_cmd("status")
+        assert rc == 0
+        assert out.endswith("args=-h 127.0.0.1 -p 7199 status\n")
+        assert module.commands == []
+
+
+class TestNodeToolBatch:
+
+    @pytest.fixture
+    def fake_launcher(self, monkeypatch):
+        monkeypatch.setattr(
+            "ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects.session_launcher",
+            lambda *args: FAKE_LAUNCHER)
+
+    def test_version_get_and_set_share_one_session(self, fake_launcher):
+        module = FakeModule(cassandra_version=None, version_cache_ttl=0, nodetool_backend="session")
+        n = NodeToolGetSetCommand(module, "gettimeout read", "settimeout read 10000", batch=True)
+        try:
+            assert module.params["cassandra_version"] == "4.1"
+            rc1, out1, err1 = n.get_command()
+            rc2, out2, err2 = n.set_command()
+        finally:
+            n.close()
+        assert out1.endswith("args=-h 127.0.0.1 -p 7199 gettimeout read\n")
+        assert out1.split()[0] == out2.split()[0]
+        assert module.commands == []
+
+    def test_results_are_demultiplexed_in_order(self, fake_launcher):
+        n = NodeToolBatch(FakeModule(nodetool_backend="session"))
+        n.add("getconcurrency -- ReadStage")
+        n.add("fail")
+        n.add("getconcurrency -- MutationStage")
+        try:
+            results = n.run()
+        finally:
+            n.close()
+        assert [rc for rc, out, err in results] == [0, 1, 0]
+        assert results[0][1].endswith("getconcurrency -- ReadStage\n")
+        assert results[1] == (1, "", "error: command failed\n")
+        assert results[2][1].endswith("getconcurrency -- MutationStage\n")
+        assert n.sub_commands == []
+
+    def test_falls_back_to_forking_nodetool(self):
+        module = FakeModule(nodetool_backend="session")
+        n = NodeToolBatch(module)
+        n.add("getconcurrency -- ReadStage")
+        n.add("getconcurrency -- MutationStage")
+        assert n.run() == [(0, "forked", ""), (0, "forked", "")]
+        assert len(module.commands) == 2
+
+    def test_get_set_commands_fork_by_default(self, fake_launcher):
+        module = FakeModule()
+        n = NodeToolGetSetCommand(module, "gettimeout read", "settimeout read 10000")
+        assert n.get_command() == (0, "forked", "")
+        assert n.session is None
+
+    def test_batch_needs_the_session_backend(self, fake_launcher):
+        module = FakeModule()
+        n = NodeToolGetSetCommand(module, "gettimeout read", "settimeout read 10000", batch=True)
+        assert n.get_command() == (0, "forked", "")
+        assert n.set_command() == (0, "forked", "")
+        assert n.session is None
+        assert len(module.commands) == 2
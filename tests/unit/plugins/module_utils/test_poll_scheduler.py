@@ -0,0 +1,115 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.module_utils.poll_scheduler import PollScheduler
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def scheduler(clock, **kwargs):
+    return PollScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def run(s, clock, attempts, transitions=(), duration=1.0):
+    while s.attempt():
+        clock.now += duration
+        s.record(rc=0)
+        if s.iterations == attempts:
+            break
+        s.wait(s.iterations in transitions)
+
+
+class TestPollScheduler:
+
+    def test_fixed_interval_by_default(self):
+        clock = FakeClock()
+        s = scheduler(clock, poll=4, interval=30)
+        run(s, clock, 10)
+        assert s.iterations == 4
+        assert clock.sleeps == [30, 30, 30]  # No sleep after the last poll
+        assert not s.timed_out
+
+    def test_single_poll_by_default(self):
+        clock = FakeClock()
+        s = scheduler(clock)
+        run(s, clock, 10)
+        assert s.iterations == 1
+        assert clock.sleeps == []
+
+    def test_exponential_backoff_is_capped(self):
+        clock = FakeClock()
+        s = scheduler(clock, poll=6, interval=2, backoff=2, max_interval=10)
+        run(s, clock, 10)
+        assert clock.sleeps == [2, 4, 8, 10, 10]
+
+    def test_transition_resets_to_fast_interval(self):
+        clock = FakeClock()
+        s = scheduler(clock, poll=6, interval=8, backoff=2, max_interval=30, fast_interval=1)
+        run(s, clock, 10, transitions=(2,))
+        assert clock.sleeps == [8, 1, 2, 4, 8]
+
+    def test_transition_without_fast_interval_is_ignored(self):
+        clock = FakeClock()
+        s = scheduler(clock, poll=3, interval=5)
+        run(s, clock, 10, transitions=(1, 2))
+        assert clock.sleeps == [5, 5]
+
+    def test_jitter_stays_within_bounds(self):
+        clock = FakeClock()
+        low = PollScheduler(interval=10, jitter=0.2, clock=clock, rand=lambda: 0.0)
+        high = PollScheduler(interval=10, jitter=0.2, clock=clock, rand=lambda: 1.0)
+        assert low.next_delay() == pytest.approx(8)
+        assert high.next_delay() == pytest.approx(12)
+
+    def test_timeout_without_poll_limit(self):
+        clock = FakeClock()
+        s = scheduler(clock, interval=10, timeout=35)
+        run(s, clock, 100)
+        # Polls at 0, 11, 22 and 33 take a second each, the last sleep is
+        # cut short at the deadline for one last poll.
+        assert clock.sleeps == [10, 10, 10, 1]
+        assert s.iterations == 5
+        assert s.timed_out
+        assert s.elapsed() == 36
+
+    def test_poll_limit_reached_before_timeout(self):
+        clock = FakeClock()
+        s = scheduler(clock, poll=2, interval=10, timeout=600)
+        run(s, clock, 100)
+        assert s.iterations == 2
+        assert not s.timed_out
+
+    def test_timings(self):
+        clock = FakeClock()
+        s = scheduler(clock, poll=3, interval=4, backoff=1.5)
+        run(s, clock, 2, duration=0.25)
+        assert s.timings == [
+            dict(iteration=1, duration=0.25, sleep=4, rc=0),
+            dict(iteration=2, duration=0.25, sleep=0.0, rc=0),
+        ]
+
+    @pytest.mark.parametrize("kwargs", [
+        dict(poll=-1),
+        dict(poll=0),
+        dict(poll=0, timeout=60),
+        dict(backoff=0.5),
+        dict(jitter=2),
+        dict(interval=-1),
+    ])
+    def test_invalid_options(self, kwargs):
+        with pytest.raises(ValueError):
+            PollScheduler(**kwargs)
@@ -0,0 +1,95 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_cmd_objects import NodeToolCmd
+from ansible_collections.community.cassandra.plugins.module_utils.version_cache import (
+    read_cached_version,
+    version_fingerprint,
+    write_cached_version,
+)
+
+from .test_nodetool_session import FakeModule
+
+
+class VersionModule(FakeModule):
+
+    def __init__(self, **params):
+        params.setdefault("cassandra_version", None)
+        FakeModule.__init__(self, **params)
+
+    def run_command(self, cmd):
+        self.commands.append(cmd)
+        return 0, "ReleaseVersion: 4.1.3\n", ""
+
+
+def detect(**params):
+    module = VersionModule(**params)
+    n = NodeToolCmd(module)
+    return n, module
+
+
+class TestVersionCache:
+
+    def test_only_first_task_runs_nodetool_version(self):
+        n, module = detect()
+        assert n.version_cache == "miss"
+        assert module.params["cassandra_version"] == "4.1"
+        assert len(module.commands) == 1
+        n, module = detect()
+        assert n.version_cache == "hit"
+        assert module.params["cassandra_version"] == "4.1"
+        assert module.commands == []
+
+    def test_cache_is_per_endpoint(self):
+        detect()
+        n, module = detect(port=7299)
+        assert n.version_cache == "miss"
+
+    def test_ttl_zero_disables_cache(self):
+        detect(version_cache_ttl=0)
+        n, module = detect(version_cache_ttl=0)
+        assert n.version_cache == "disabled"
+        assert len(module.commands) == 1
+
+    def test_provided_version(self):
+        n, module = detect(cassandra_version="5.0")
+        assert n.version_cache == "provided"
+        assert module.commands == []
+
+    def test_changed_nodetool_invalidates_cache(self, runtime_tmp):
+        bin_dir = os.path.join(runtime_tmp, "bin")
+        os.mkdir(bin_dir)
+        nodetool = os.path.join(bin_dir, "nodetool")
+        with open(nodetool, "w") as f:
+            f.write("#!/bin/sh\n")
+        detect(nodetool_path=bin_dir)
+        assert detect(nodetool_path=bin_dir)[0].version_cache == "hit"
+        with open(nodetool, "a") as f:
+            f.write("# upgraded\n")
+        assert detect(nodetool_path=bin_dir)[0].version_cache == "miss"
+
+    def test_restarted_cassandra_invalidates_cache(self, monkeypatch):
+        monkeypatch.setattr("ansible_collections.community.cassandra.plugins.module_utils.version_cache.cassandra_pids",
+                            lambda: [1234])
+        detect()
+        assert detect()[0].version_cache == "hit"
+        monkeypatch.setattr("ansible_collections.community.cassandra.plugins.module_utils.version_cache.cassandra_pids",
+                            lambda: [5678])
+        assert detect()[0].version_cache == "miss"
+
+    def test_expired_entry(self):
+        fingerprint = version_fingerprint(None)
+        write_cached_version("127.0.0.1", 7199, "4.0", -1, fingerprint)
+        assert read_cached_version("127.0.0.1", 7199, fingerprint) is None
+        write_cached_version("127.0.0.1", 7199, "4.0", 60, fingerprint)
+        assert read_cached_version("127.0.0.1", 7199, fingerprint) == "4.0"
+
+    def test_unusable_runtime_dir_disables_cache(self, runtime_tmp):
+        os.chmod(runtime_tmp, 0o755)
+        path = os.path.join(runtime_tmp, "ansible-cassandra-{0}".format(os.getuid()))
+        os.mkdir(path, 0o755)  # Readable by others, refused
+        n, module = detect()
+        assert n.version_cache == "disabled"
+        assert len(module.commands) == 1
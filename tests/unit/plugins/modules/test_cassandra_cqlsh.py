@@ -0,0 +1,165 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import hashlib
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.modules.cassandra_cqlsh import (
+    build_script,
+    file_checksum,
+    file_results,
+    find_files,
+    ledger_script,
+    parse_markers,
+    read_cql,
+    record_script,
+    script_errors,
+    strip_markers,
+)
+
+
+def marker_result(index, millis):
+    header = " ansible_file_{0}".format(index)
+    return "\n{0}\n{1}\n {2}\n\n(1 rows)\n".format(header, "-" * len(header), str(millis).rjust(len(header) - 1))
+
+
+class TestFindFiles:
+
+    def test_directory_files_sorted_by_name(self, tmp_path):
+        for name in ("010_data.cql", "002_tables.cql", "001_keyspace.cql", "notes.txt"):
+            (tmp_path / name).write_text(u"")
+        (tmp_path / "sub.cql").mkdir()
+        found = find_files(directory=str(tmp_path))
+        assert [name for name, path in found] == ["001_keyspace.cql", "002_tables.cql", "010_data.cql"]
+        assert found[0][1] == str(tmp_path / "001_keyspace.cql")
+
+    def test_directory_pattern(self, tmp_path):
+        (tmp_path / "v1").mkdir()
+        (tmp_path / "v1" / "a.cql").write_text(u"")
+        (tmp_path / "b.cql").write_text(u"")
+        assert [name for name, path in find_files(directory=str(tmp_path), pattern="*/*.cql")] == ["v1/a.cql"]
+
+    def test_files_keep_their_order(self, tmp_path):
+        paths = [str(tmp_path / name) for name in ("b.cql", "a.cql")]
+        for path in paths:
+            open(path, "w").close()
+        assert find_files(files=paths) == [("b.cql", paths[0]), ("a.cql", paths[1])]
+
+    def test_missing_file_and_duplicate_names(self, tmp_path):
+        with pytest.raises(ValueError, match="is not a file"):
+            find_files(files=[str(tmp_path / "missing.cql")])
+        with pytest.raises(ValueError, match="is not a directory"):
+            find_files(directory=str(tmp_path / "missing"))
+        (tmp_path / "one").mkdir()
+        (tmp_path / "two").mkdir()
+        paths = [str(tmp_path / "one" / "a.cql"), str(tmp_path / "two" / "a.cql")]
+        for path in paths:
+            open(path, "w").close()
+        with pytest.raises(ValueError, match="Several files are named a.cql"):
+            find_files(files=paths)
+
+
+class TestFiles:
+
+    def test_file_checksum(self, tmp_path):
+        path = tmp_path / "a.cql"
+        path.write_bytes(b"CREATE TABLE t (k int PRIMARY KEY);\n")
+        assert file_checksum(str(path)) == hashlib.sha256(b"CREATE TABLE t (k int PRIMARY KEY);\n").hexdigest()
+
+    def test_read_cql_normalizes_line_endings(self, tmp_path):
+        path = tmp_path / "a.cql"
+        path.write_bytes(b"SELECT *\r\nFROM t;\rSELECT 1;\n")
+        assert read_cql(str(path)) == u"SELECT *\nFROM t;\nSELECT 1;\n"
+
+
+class TestScript:
+
+    def test_build_script(self):
+        script, spans = build_script([u"USE ks;\nCREATE TABLE t (k int PRIMARY KEY);\n", u"INSERT INTO t (k) VALUES (1)"])
+        lines = script.split("\n")
+        assert lines == [
+            "SELECT toUnixTimestamp(now()) AS ansible_file_0 FROM system.local;",
+            "USE ks;",
+            "CREATE TABLE t (k int PRIMARY KEY);",
+            "SELECT toUnixTimestamp(now()) AS ansible_file_1 FROM system.local;",
+            "INSERT INTO t (k) VALUES (1)",
+            ";",
+            "SELECT toUnixTimestamp(now()) AS ansible_file_2 FROM system.local;",
+            "",
+        ]
+        assert spans == [(2, 4), (5, 7)]
+
+    def test_build_script_trailing_comment_and_empty_file(self):
+        script, spans = build_script([u"SELECT 1;\n-- done\n", u""])
+        assert script.split("\n")[1:4] == ["SELECT 1;", "-- done", "SELECT toUnixTimestamp(now()) AS ansible_file_1 FROM system.local;"]
+        assert spans == [(2, 4), (5, 5)]
+
+    def test_markers(self):
+        output = marker_result(0, 1000) + "\n k\n---\n 1\n\n(1 rows)\n" + marker_result(1, 2500)
+        assert parse_markers(output) == {0: 1000, 1: 2500}
+        assert strip_markers(output) == "\n k\n---\n 1\n\n(1 rows)\n"
+
+    def test_expanded_markers(self):
+        output = "\n@ Row 1\n----------------+---------------\n ansible_file_3 | 1714558500123\n\n(1 rows)\n"
+        assert parse_markers(output) == {3: 1714558500123}
+
+    def test_script_errors(self):
+        errors = "\n".join([
+            "Warning: using the default protocol version",
+            "/tmp/s.cql:3:InvalidRequest: Error from server: code=2200 message=\"t exists\"",
+            "/tmp/s.cql:7:SyntaxException: line 1:0 no viable alternative",
+            "/tmp/s.cql:2:Unavailable: system.local",
+        ])
+        by_text, others = script_errors(errors, "/tmp/s.cql", [(2, 4), (5, 7)])
+        assert by_text == {
+            0: ["line 1: InvalidRequest: Error from server: code=2200 message=\"t exists\""],
+            1: ["line 2: SyntaxException: line 1:0 no viable alternative"],
+        }
+        assert others == ["Unavailable: system.local"]
+
+
+class TestFileResults:
+
+    entries = [("a.cql", "ca"), ("b.cql", "cb"), ("c.cql", "cc")]
+    spans = [(2, 4), (5, 7), (8, 10)]
+
+    def test_all_applied(self):
+        output = marker_result(0, 1000) + marker_result(1, 3500) + marker_result(2, 3600) + marker_result(3, 4000)
+        results, others = file_results(self.entries, self.spans, 0, output, "", "/tmp/s.cql")
+        assert [(r['file'], r['status'], r['seconds']) for r in results] == [
+            ("a.cql", "applied", 2.5), ("b.cql", "applied", 0.1), ("c.cql", "applied", 0.4)]
+        assert results[0]['checksum'] == "ca"
+        assert others == []
+
+    def test_failed_and_not_run(self):
+        output = marker_result(0, 1000) + marker_result(1, 3500)
+        errors = "/tmp/s.cql:6:InvalidRequest: no keyspace"
+        results, others = file_results(self.entries, self.spans, 2, output, errors, "/tmp/s.cql")
+        assert [r['status'] for r in results] == ["applied", "failed", "not_run"]
+        assert results[1]['errors'] == ["line 1: InvalidRequest: no keyspace"]
+        assert results[1]['seconds'] is None
+
+    def test_without_markers(self):
+        results, others = file_results(self.entries, self.spans, 1, "", "Connection error", "/tmp/s.cql")
+        assert [r['status'] for r in results] == ["not_run"] * 3
+        results, others = file_results(self.entries, self.spans, 0, "", "", "/tmp/s.cql")
+        assert [r['status'] for r in results] == ["applied"] * 3
+
+
+class TestLedger:
+
+    def test_ledger_script(self):
+        assert ledger_script("ks.applied") == (
+            "CREATE TABLE IF NOT EXISTS ks.applied (file text PRIMARY KEY, checksum text, applied_at timestamp, seconds double);\n"
+            "SELECT JSON file, checksum FROM ks.applied;\n")
+
+    def test_record_script(self):
+        results = [
+            dict(file="it's.cql", checksum="c1", status="applied", seconds=1.5),
+            dict(file="b.cql", checksum="c2", status="applied", seconds=None),
+            dict(file="c.cql", checksum="c3", status="failed", seconds=None),
+        ]
+        assert record_script("ks.applied", results) == (
+            "INSERT INTO ks.applied (file, checksum, applied_at, seconds) VALUES ('it''s.cql', 'c1', toTimestamp(now()), 1.5);\n"
+            "INSERT INTO ks.applied (file, checksum, applied_at, seconds) VALUES ('b.cql', 'c2', toTimestamp(now()), null);\n")
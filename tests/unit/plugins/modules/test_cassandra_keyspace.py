@@ -0,0 +1,79 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from ansible_collections.community.cassandra.plugins.modules.cassandra_keyspace import (
+    get_keyspace_config,
+    keyspace_is_changed,
+)
+
+Version = namedtuple("Version", "release_version")
+Keyspace = namedtuple("Keyspace", "replication durable_writes")
+LegacyKeyspace = namedtuple("LegacyKeyspace", "strategy_class strategy_options durable_writes")
+
+
+class FakeSession(object):
+
+    def __init__(self, version, row):
+        self.version = version
+        self.row = row
+        self.queries = []
+
+    def execute(self, query, parameters=None):
+        self.queries.append((query, parameters))
+        if "system.local" in query:
+            return [Version(self.version)]
+        return [self.row]
+
+
+class TestGetKeyspaceConfig:
+
+    def test_reads_only_the_target_keyspace(self):
+        session = FakeSession("4.1.3", Keyspace(
+            {"class": "org.apache.cassandra.locator.NetworkTopologyStrategy", "dc1": "3", "dc2": "2"}, False))
+        assert get_keyspace_config(None, session, "ks1") == {
+            "class": "NetworkTopologyStrategy",
+            "dc1": "3",
+            "dc2": "2",
+            "durable_writes": False,
+        }
+        assert session.queries[-1] == (
+            "SELECT replication, durable_writes FROM system_schema.keyspaces WHERE keyspace_name = %s", ["ks1"])
+
+    def test_cassandra_2(self):
+        session = FakeSession("2.2.19", LegacyKeyspace(
+            "org.apache.cassandra.locator.SimpleStrategy", '{"replication_factor":"1"}', True))
+        assert get_keyspace_config(None, session, "ks1") == {
+            "class": "SimpleStrategy",
+            "replication_factor": "1",
+            "durable_writes": True,
+        }
+
+
+class TestKeyspaceIsChanged:
+
+    def session(self, durable_writes=True):
+        return FakeSession("4.0.11", Keyspace(
+            {"class": "org.apache.cassandra.locator.NetworkTopologyStrategy", "dc1": "3"}, durable_writes))
+
+    def test_unchanged(self):
+        assert not keyspace_is_changed(None, self.session(), "ks1", 1, True, {"dc1": 3})
+
+    def test_durable_writes_disabled_is_unchanged(self):
+        # Regression: durable_writes used to be parsed as always true, so a
+        # keyspace without durable writes was altered on every run.
+        assert not keyspace_is_changed(None, self.session(False), "ks1", 1, False, {"dc1": 3})
+
+    @pytest.mark.parametrize("durable_writes, data_centres", [
+        (True, {"dc1": 2}),
+        (True, {"dc1": 3, "dc2": 3}),
+        (True, {}),
+        (False, {"dc1": 3}),
+    ])
+    def test_changed(self, durable_writes, data_centres):
+        assert keyspace_is_changed(None, self.session(), "ks1", 1, durable_writes, data_centres)
@@ -0,0 +1,110 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import InvalidRequest
+
+from ansible_collections.community.cassandra.plugins.modules.cassandra_keyspaces import (
+    apply_plans,
+    keyspace_summary,
+    load_keyspaces,
+    plan_keyspaces,
+)
+
+Keyspace = namedtuple("Keyspace", "keyspace_name replication durable_writes")
+LegacyKeyspace = namedtuple("LegacyKeyspace", "keyspace_name strategy_class strategy_options durable_writes")
+
+NTS = "org.apache.cassandra.locator.NetworkTopologyStrategy"
+SIMPLE = "org.apache.cassandra.locator.SimpleStrategy"
+
+
+class FakeSession(object):
+
+    def __init__(self, rows=(), legacy_rows=None, fail=()):
+        self.rows = rows
+        self.legacy_rows = legacy_rows
+        self.fail = fail
+        self.queries = []
+
+    def execute(self, query, parameters=None):
+        self.queries.append(query)
+        if "system_schema.keyspaces" in query and self.legacy_rows is not None:
+            raise InvalidRequest("unconfigured table keyspaces")
+        if "system.schema_keyspaces" in query:
+            return list(self.legacy_rows)
+        if "system_schema.keyspaces" in query:
+            return list(self.rows)
+        if any(name in query for name in self.fail):
+            raise InvalidRequest("Cannot add existing keyspace")
+        return []
+
+
+def spec(name, **kwargs):
+    keyspace = dict(name=name, state="present", replication_factor=1, durable_writes=True, data_centres=None)
+    keyspace.update(kwargs)
+    return keyspace
+
+
+class TestLoadKeyspaces:
+
+    def test_one_query_whatever_the_number_of_keyspaces(self):
+        session = FakeSession(rows=[Keyspace("ks{0}".format(i), {"class": NTS, "dc1": "3"}, True)
+                                    for i in range(1000)])
+        keyspaces = load_keyspaces(session)
+        assert len(keyspaces) == 1000
+        assert keyspaces["ks7"] == {"class": "NetworkTopologyStrategy", "dc1": "3", "durable_writes": True}
+        assert len(session.queries) == 1
+
+    def test_cassandra_2(self):
+        session = FakeSession(legacy_rows=[LegacyKeyspace("ks1", SIMPLE, '{"replication_factor":"2"}', False)])
+        assert load_keyspaces(session) == {
+            "ks1": {"class": "SimpleStrategy", "replication_factor": "2", "durable_writes": False}}
+
+
+class TestPlanKeyspaces:
+
+    def test_create_alter_drop_and_unchanged(self):
+        keyspaces = {
+            "same": {"class": "NetworkTopologyStrategy", "dc1": "3", "durable_writes": True},
+            "changed": {"class": "SimpleStrategy", "replication_factor": "1", "durable_writes": True},
+            "gone": {"class": "SimpleStrategy", "replication_factor": "1", "durable_writes": True},
+        }
+        plans = plan_keyspaces([
+            spec("new", data_centres={"dc1": 3}),
+            spec("same", data_centres={"dc1": 3}),
+            spec("changed", replication_factor=3),
+            spec("gone", state="absent"),
+            spec("never_existed", state="absent"),
+        ], keyspaces)
+        summary = dict((keyspace["keyspace"], keyspace["cql"]) for keyspace in keyspace_summary(plans))
+        assert summary == {
+            "new": ["CREATE KEYSPACE new WITH REPLICATION = { 'class' : 'NetworkTopologyStrategy',  'dc1' : 3 } "
+                    "AND DURABLE_WRITES = True"],
+            "same": [],
+            "changed": ["ALTER KEYSPACE changed WITH REPLICATION = { 'class' : 'SimpleStrategy', "
+                        "'replication_factor': 3 } AND DURABLE_WRITES = True"],
+            "gone": ["DROP KEYSPACE gone"],
+            "never_existed": [],
+        }
+
+    def test_unknown_strategy(self):
+        keyspaces = {"ks1": {"class": "EverywhereStrategy", "durable_writes": True}}
+        with pytest.raises(ValueError, match="Keyspace ks1: Unknown Replication strategy"):
+            plan_keyspaces([spec("ks1")], keyspaces)
+
+
+class TestApplyPlans:
+
+    def test_statements_run_in_order_past_failures(self):
+        session = FakeSession(fail=("bad",))
+        plans = plan_keyspaces([spec("good"), spec("bad"), spec("old", state="absent")],
+                               {"old": {"class": "SimpleStrategy", "replication_factor": "1", "durable_writes": True}})
+        failed = apply_plans(session, plans)
+        assert [query.split(" WITH")[0] for query in session.queries] == [
+            "CREATE KEYSPACE good", "CREATE KEYSPACE bad", "DROP KEYSPACE old"]
+        assert failed == [{"keyspace": "bad", "cql": plans[1]["cql"][0], "error": "Cannot add existing keyspace"}]
@@ -0,0 +1,216 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import io
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import OperationTimedOut, metadata
+from cassandra.cqltypes import Int32Type, UTF8Type, SetType
+from cassandra.protocol import ColumnMetadata
+from cassandra.query import BatchStatement, BoundStatement, PreparedStatement, UNSET_VALUE
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_load import read_rows
+from ansible_collections.community.cassandra.plugins.modules import cassandra_load
+from ansible_collections.community.cassandra.plugins.modules.cassandra_load import (
+    RowLoader,
+    insert_cql,
+    load_columns,
+)
+
+COLUMNS = ["tenant", "id", "tags"]
+TYPES = [Int32Type, Int32Type, SetType.apply_parameters([UTF8Type])]
+
+
+def prepared_insert():
+    return PreparedStatement(
+        column_metadata=[ColumnMetadata("ks", "t", name, cql_type) for name, cql_type in zip(COLUMNS, TYPES)],
+        query_id=b"id",
+        routing_key_indexes=[0],
+        query=insert_cql("ks", "t", COLUMNS),
+        keyspace="ks",
+        protocol_version=4,
+        result_metadata=[],
+        result_metadata_id=None)
+
+
+class FakeExecutor(object):
+    '''
+    Stands in for execute_concurrently(), failing the statements of the
+    partitions in fail the number of times given.
+    '''
+
+    def __init__(self, fail=None):
+        self.fail = dict(fail or {})
+        self.calls = []
+
+    def __call__(self, session, statements, concurrency):
+        self.calls.append(statements)
+        failed = []
+        for statement in statements:
+            tenant = Int32Type.deserialize(statement.routing_key, 4)
+            if self.fail.get(tenant, 0) > 0:
+                self.fail[tenant] -= 1
+                failed.append((statement, OperationTimedOut("timed out")))
+        return failed
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    fake = FakeExecutor()
+    monkeypatch.setattr(cassandra_load, "execute_concurrently", fake)
+    monkeypatch.setattr(cassandra_load, "RETRY_DELAY", 0)
+    return fake
+
+
+def loader_for(**kwargs):
+    return RowLoader(None, prepared_insert(), COLUMNS, TYPES, kwargs.pop("concurrency", 4), **kwargs)
+
+
+def rows(count, tenants=3):
+    return [(line, {"tenant": str(line % tenants), "id": str(line), "tags": '["t{0}"]'.format(line)}, None)
+            for line in range(1, count + 1)]
+
+
+class TestRowLoader:
+
+    def test_insert_cql(self):
+        assert insert_cql("ks", "Events", ["id", "select"]) == 'INSERT INTO ks."Events" (id, "select") VALUES (?, ?)'
+
+    def test_rows_are_written_in_chunks(self, executor):
+        loader = loader_for(concurrency=2)
+        loader.load(rows(50))
+        assert loader.rows == 50
+        assert loader.batches == 50
+        # 2 writes in flight * 1 row a batch * CHUNK_FACTOR rows at a time
+        assert [len(statements) for statements in executor.calls] == [8] * 6 + [2]
+        assert all(isinstance(statement, BoundStatement) for statement in executor.calls[0])
+
+    def test_rows_of_a_partition_are_batched(self, executor):
+        loader = loader_for(concurrency=2, batch_size=4)
+        loader.load(rows(32, tenants=2))
+        assert loader.rows == 32
+        assert loader.batches == 8
+        assert all(isinstance(statement, BatchStatement) and len(statement) == 4
+                   for statements in executor.calls for statement in statements)
+
+    def test_failed_rows_are_retried_on_their_own(self, executor):
+        executor.fail = {1: 2}
+        loader = loader_for(batch_size=4)
+        loader.load(rows(9))
+        assert loader.rows == 9
+        assert loader.rows_failed == 0
+        # the batch of tenant 1 failed, then the first of its 3 rows
+        assert loader.rows_retried == 4
+        assert [len(statements) for statements in executor.calls] == [3, 3, 1]
+
+    def test_rows_failing_every_retry(self, executor):
+        executor.fail = {1: 100}
+        loader = loader_for(retries=2, max_errors=-1)
+        loader.load(rows(6))
+        assert loader.rows == 4
+        assert loader.rows_failed == 2
+        assert [error["line"] for error in loader.errors] == [1, 4]
+        assert loader.errors[0]["msg"].startswith("line 1: ")
+
+    def test_bad_rows_are_reported(self, executor):
+        loader = loader_for(max_errors=10)
+        loader.load([(1, {"tenant": "1", "id": "x"}, None),
+                     (2, {"id": "2"}, None),
+                     (3, {"tenant": "1", "id": "3"}, None)])
+        assert loader.rows == 1
+        assert [error["msg"] for error in loader.errors] == [
+            "line 1: column id: invalid literal for int() with base 10: 'x'",
+            "line 2: partition key column tenant has no value",
+        ]
+
+    def test_missing_columns_are_unset(self):
+        loader = loader_for()
+        values, statement = loader.bind_values(1, {"tenant": 1, "tags": None})
+        assert values == [1, UNSET_VALUE, None]
+        assert isinstance(statement, BoundStatement)
+
+    def test_values_that_do_not_serialize_are_bad_rows(self, executor):
+        loader = loader_for(max_errors=10)
+        loader.load([(1, {"tenant": "1", "id": "1", "tags": ["a"]}, None),
+                     (2, {"tenant": "1", "id": "2", "tags": [5]}, None),
+                     (3, {"tenant": "1", "id": str(2 ** 40)}, None),
+                     (4, {"tenant": "1", "id": "4"}, None)])
+        assert loader.rows == 2
+        assert loader.rows_failed == 2
+        assert [error["line"] for error in loader.errors] == [2, 3]
+        assert loader.errors[0]["msg"] == "line 2: column tags: 5 is not a string"
+        assert loader.errors[1]["msg"].startswith("line 3: ")
+
+    def test_stops_after_max_errors(self, executor):
+        loader = loader_for(max_errors=1)
+        loader.load([(line, {"id": str(line)}, None) for line in range(1, 100)])
+        assert loader.rows_failed == 2
+        assert loader.stopped_at == 2
+        assert executor.calls == []
+
+    def test_check_mode_writes_nothing(self, executor):
+        loader = loader_for(check_mode=True)
+        loader.load(rows(20))
+        assert loader.rows == 20
+        assert executor.calls == []
+
+    def test_memory_is_bounded_by_the_chunk(self, executor, tmp_path):
+        path = str(tmp_path / "big.csv")
+        with io.open(path, "w", encoding="utf-8") as f:
+            f.write(u"tenant,id,tags\n")
+            for i in range(5000):
+                f.write(u'{0},{1},"[""t""]"\n'.format(i % 10, i))
+        loader = loader_for(concurrency=8, batch_size=2)
+        loader.load(read_rows(path, "csv"))
+        assert loader.rows == 5000
+        assert max(sum(len(statement) if isinstance(statement, BatchStatement) else 1 for statement in statements)
+                   for statements in executor.calls) <= 8 * 2 * 4
+
+
+class LazyMetadataCluster(object):
+    '''
+    Refreshes metadata as the driver does with schema metadata disabled:
+    a keyspace comes without its tables, which are only fetched one at a
+    time.
+    '''
+
+    def __init__(self):
+        self.metadata = metadata.Metadata()
+
+    def refresh_keyspace_metadata(self, keyspace):
+        if keyspace == "ks":
+            self.metadata._update_keyspace(metadata.KeyspaceMetadata("ks", True, "SimpleStrategy", {"replication_factor": "1"}))
+
+    def refresh_table_metadata(self, keyspace, table):
+        if table != "t":
+            return
+        table_meta = metadata.TableMetadata(keyspace, table)
+        for name, cql_type in zip(COLUMNS, ("int", "int", "set<text>")):
+            table_meta.columns[name] = metadata.ColumnMetadata(table_meta, name, cql_type)
+        table_meta.partition_key.append(table_meta.columns["tenant"])
+        table_meta.clustering_key.append(table_meta.columns["id"])
+        self.metadata._update_table(table_meta)
+
+
+class TestLoadColumns:
+
+    def test_columns_of_the_table(self, tmp_path):
+        src = tmp_path / "rows.csv"
+        src.write_text(u"id,tenant\n1,2\n")
+        assert load_columns(LazyMetadataCluster(), "ks", "t", None, str(src), "jsonl") == COLUMNS
+        assert load_columns(LazyMetadataCluster(), "ks", "t", None, str(src), "csv") == ["id", "tenant"]
+        assert load_columns(LazyMetadataCluster(), "ks", "t", ["tenant", "id"], str(src), "jsonl") == ["tenant", "id"]
+
+    def test_invalid_columns(self, tmp_path):
+        src = str(tmp_path / "rows.jsonl")
+        with pytest.raises(ValueError, match="Table ks.missing does not exist"):
+            load_columns(LazyMetadataCluster(), "ks", "missing", None, src, "jsonl")
+        with pytest.raises(ValueError, match="Table other.t does not exist"):
+            load_columns(LazyMetadataCluster(), "other", "t", None, src, "jsonl")
+        with pytest.raises(ValueError, match="has no column name"):
+            load_columns(LazyMetadataCluster(), "ks", "t", ["tenant", "id", "name"], src, "jsonl")
+        with pytest.raises(ValueError, match="The primary key column id is not loaded"):
+            load_columns(LazyMetadataCluster(), "ks", "t", ["tenant", "tags"], src, "jsonl")
@@ -0,0 +1,184 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import uuid
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import ConsistencyLevel, InvalidRequest
+from cassandra.query import BoundStatement, SimpleStatement
+
+from ansible_collections.community.cassandra.plugins.modules.cassandra_query import (
+    StatementRunner,
+    read_statements,
+    run_statements,
+)
+
+
+class FakeResult(list):
+
+    def __init__(self, column_names, rows):
+        super(FakeResult, self).__init__(rows)
+        self.column_names = column_names
+
+
+class FakePrepared(object):
+
+    def __init__(self, query):
+        self.query = query
+
+    def bind(self, parameters):
+        bound = BoundStatement.__new__(BoundStatement)
+        bound.query = self.query
+        bound.parameters = parameters
+        bound.consistency_level = None
+        return bound
+
+
+class FakeSession(object):
+
+    def __init__(self, rows=None, fail=()):
+        self.rows = rows or []
+        self.fail = fail
+        self.prepares = []
+        self.executed = []
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return ("profile", self)
+
+    def prepare(self, query):
+        self.prepares.append(query)
+        return FakePrepared(query)
+
+    def execute(self, statement, parameters=None, timeout=None, execution_profile=None):
+        self.executed.append((statement, parameters, timeout))
+        query = getattr(statement, 'query', getattr(statement, 'query_string', None))
+        if any(name in query for name in self.fail):
+            raise InvalidRequest("unconfigured table {0}".format(query.split()[-1]))
+        if query.startswith("SELECT"):
+            return FakeResult(list(self.rows[0]) if self.rows else ["k"], self.rows)
+        return FakeResult(None, [])
+
+
+def params(**kwargs):
+    values = dict(query=None, file=None, parameters=None, statements=None)
+    values.update(kwargs)
+    return values
+
+
+class TestReadStatements:
+
+    def test_query_is_split(self):
+        statements = read_statements(params(query="USE ks; SELECT * FROM t;"))
+        assert [statement['query'] for statement in statements] == ["USE ks", "SELECT * FROM t"]
+
+    def test_file(self, tmp_path):
+        cql = tmp_path / "migration.cql"
+        cql.write_text(u"-- users\nCREATE TABLE ks.users (id uuid PRIMARY KEY);\nINSERT INTO ks.users (id) VALUES (uuid());\n")
+        statements = read_statements(params(file=str(cql)))
+        assert [statement['query'] for statement in statements] == [
+            "CREATE TABLE ks.users (id uuid PRIMARY KEY)", "INSERT INTO ks.users (id) VALUES (uuid())"]
+
+    def test_parameters_need_a_single_statement(self):
+        with pytest.raises(ValueError, match="single statement"):
+            read_statements(params(query="SELECT * FROM a; SELECT * FROM b", parameters=[1]))
+
+    def test_statements_keep_their_settings(self):
+        statements = read_statements(params(statements=[
+            dict(query="SELECT * FROM t WHERE k = ?;", parameters=[1], consistency_level="QUORUM", timeout=None)]))
+        assert statements == [dict(query="SELECT * FROM t WHERE k = ?", parameters=[1],
+                                   consistency_level="QUORUM", timeout=None)]
+
+    def test_cqlsh_commands_are_refused(self):
+        with pytest.raises(ValueError, match="CONSISTENCY is a cqlsh command"):
+            read_statements(params(query="CONSISTENCY QUORUM; SELECT * FROM t"))
+
+
+class TestStatementRunner:
+
+    def test_reads_and_writes_use_their_session(self):
+        session_r = FakeSession(rows=[{"k": 1}])
+        session_w = FakeSession()
+        runner = StatementRunner(session_r, session_w, True, 10)
+        assert runner.run("SELECT k FROM t") == [{"k": 1}]
+        assert runner.run("INSERT INTO t (k) VALUES (1)") == []
+        assert len(session_r.executed) == 1
+        assert len(session_w.executed) == 1
+
+    def test_rows_are_encoded(self):
+        userid = uuid.UUID("8bbd9a2e-6b1e-4d3a-8a5e-0a0b3d8b1c7d")
+        runner = StatementRunner(FakeSession(rows=[{"userid": userid, "avatar": b"\x01\x02"}]), FakeSession(), True, 10)
+        assert runner.run("SELECT userid, avatar FROM users") == [{"userid": str(userid), "avatar": "0102"}]
+
+    def test_statements_are_prepared_once(self):
+        session_w = FakeSession()
+        runner = StatementRunner(FakeSession(), session_w, True, 10)
+        for i in range(100):
+            runner.run("INSERT INTO t (k) VALUES (?)", [i])
+        runner.run("INSERT INTO t (k, v) VALUES (?, ?)", [1, 2])
+        assert session_w.prepares == ["INSERT INTO t (k) VALUES (?)", "INSERT INTO t (k, v) VALUES (?, ?)"]
+        statement, parameters, timeout = session_w.executed[-1]
+        assert isinstance(statement, BoundStatement)
+        assert parameters is None
+
+    def test_statements_without_parameters_are_not_prepared(self):
+        session_w = FakeSession()
+        StatementRunner(FakeSession(), session_w, True, 10).run("TRUNCATE t")
+        assert session_w.prepares == []
+        assert isinstance(session_w.executed[0][0], SimpleStatement)
+
+    def test_parameters_bound_by_the_module_without_prepare(self):
+        session_w = FakeSession()
+        StatementRunner(FakeSession(), session_w, False, 10).run("INSERT INTO t (k) VALUES (%s)", [1])
+        statement, parameters, timeout = session_w.executed[0]
+        assert session_w.prepares == []
+        assert isinstance(statement, SimpleStatement)
+        assert parameters == [1]
+
+    def test_consistency_level_and_timeout(self):
+        session_w = FakeSession()
+        runner = StatementRunner(FakeSession(), session_w, True, 10)
+        runner.run("INSERT INTO t (k) VALUES (?)", [1], "QUORUM", 60)
+        runner.run("INSERT INTO t (k) VALUES (2)")
+        assert session_w.executed[0][0].consistency_level == ConsistencyLevel.QUORUM
+        assert session_w.executed[0][2] == 60
+        assert session_w.executed[1][0].consistency_level is None
+        assert session_w.executed[1][2] == 10
+
+    def test_fetch_size(self):
+        session_r = FakeSession()
+        runner = StatementRunner(session_r, FakeSession(), True, 10, fetch_size=200)
+        runner.run("SELECT * FROM t")
+        runner.run("SELECT * FROM t WHERE k = ?", [1])
+        assert [statement.fetch_size for statement, parameters, timeout in session_r.executed] == [200, 200]
+
+
+class TestRunStatements:
+
+    def test_stops_at_the_first_failure(self):
+        session_w = FakeSession(fail=("missing",))
+        runner = StatementRunner(FakeSession(), session_w, True, 10)
+        statements = read_statements(params(query="INSERT INTO t (k) VALUES (1); INSERT INTO missing (k) VALUES (1); "
+                                                  "INSERT INTO t (k) VALUES (2)"))
+        results, failed, export = run_statements(runner, statements)
+        assert export is None
+        assert results == [{"query": "INSERT INTO t (k) VALUES (1)", "rows": []}]
+        assert failed[0] == "INSERT INTO missing (k) VALUES (1)"
+        assert isinstance(failed[1], InvalidRequest)
+        assert len(session_w.executed) == 2
+
+    def test_rows_of_the_last_statement_are_exported(self, tmp_path):
+        session_r = FakeSession(rows=[{"k": i, "v": "x"} for i in range(3)])
+        runner = StatementRunner(session_r, FakeSession(), True, 10)
+        statements = read_statements(params(query="INSERT INTO t (k, v) VALUES (1, 'x'); SELECT k, v FROM t"))
+        dest = str(tmp_path / "t.jsonl")
+        results, failed, export = run_statements(runner, statements, dest, "jsonl")
+        assert failed is None
+        assert results == [{"query": "INSERT INTO t (k, v) VALUES (1, 'x')", "rows": []},
+                           {"query": "SELECT k, v FROM t", "rows_written": 3}]
+        assert export["rows"] == 3
+        assert export["bytes"] == len(open(dest).read())
+        assert export["format"] == "jsonl"
+        assert open(dest).readline() == '{"k": 0, "v": "x"}\n'
@@ -0,0 +1,150 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_roles import (
+    ALL_PERMISSIONS,
+    does_role_have_permission,
+    role_permission_set,
+)
+from ansible_collections.community.cassandra.plugins.modules.cassandra_role import (
+    build_role_grants,
+    build_role_permissions,
+)
+
+
+def permission_row(role, resource, permission):
+    return {"role": role, "username": role, "resource": resource, "permission": permission}
+
+
+class FakeSession(object):
+    """
+    Answers LIST ALL OF with rows, counting the queries.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return kwargs
+
+    def execute(self, query, parameters=None, execution_profile=None):
+        self.queries.append(query)
+        return iter(self.rows)  # Like a ResultSet, can only be read once
+
+
+def matrix(keyspaces, permissions):
+    return dict(("ks{0}".format(i), list(permissions)) for i in range(keyspaces))
+
+
+def granted(role, keyspace_permissions):
+    return [permission_row(role, "<keyspace {0}>".format(ks), p)
+            for ks, perms in keyspace_permissions.items() for p in perms]
+
+
+class TestDoesRoleHavePermission:
+
+    def test_specific_permission(self):
+        permission_set = role_permission_set([permission_row("app", "  <keyspace rhys> ", "  SELECT")])
+        assert does_role_have_permission(permission_set, "SELECT", "rhys")
+        assert not does_role_have_permission(permission_set, "MODIFY", "rhys")
+        assert not does_role_have_permission(permission_set, "SELECT", "other")
+
+    def test_all_permissions(self):
+        rows = [permission_row("app", "<all keyspaces>", p) for p in ALL_PERMISSIONS]
+        assert does_role_have_permission(role_permission_set(rows), "ALL PERMISSIONS", "all_keyspaces")
+        assert not does_role_have_permission(role_permission_set(rows[1:]), "ALL PERMISSIONS", "all_keyspaces")
+
+    def test_duplicate_rows_do_not_make_all_permissions(self):
+        # The same permission inherited from another role is listed twice
+        rows = [permission_row("app", "<keyspace rhys>", "SELECT") for i in range(6)]
+        assert not does_role_have_permission(role_permission_set(rows), "ALL PERMISSIONS", "rhys")
+
+
+class TestBuildRolePermissions:
+
+    def test_grants_and_revokes(self):
+        session = FakeSession([
+            permission_row("app", "<keyspace ks1>", "SELECT"),
+            permission_row("app", "<keyspace ks1>", "DROP"),
+            permission_row("app", "<keyspace ks2>", "SELECT"),
+        ])
+        cql = build_role_permissions(session, {"ks1": ["SELECT", "MODIFY"]}, "app")
+        assert cql["grant"] == set(["GRANT MODIFY ON KEYSPACE ks1 TO 'app'"])
+        assert cql["revoke"] == set(["REVOKE DROP ON KEYSPACE ks1 FROM 'app'",
+                                     "REVOKE SELECT ON KEYSPACE ks2 FROM 'app'"])
+        assert len(session.queries) == 1
+
+    def test_no_keyspace_permissions_revokes_them_all(self):
+        rows = [
+            permission_row("app", "<all keyspaces>", "SELECT"),
+            permission_row("app", "<keyspace ks1>", "SELECT"),
+            permission_row("readers", "<keyspace ks2>", "SELECT"),
+        ]
+        cql = build_role_permissions(FakeSession(rows), None, "app")
+        assert cql["grant"] == set()
+        assert cql["revoke"] == set(["REVOKE SELECT ON KEYSPACE ks1 FROM 'app'"])
+        cql = build_role_permissions(FakeSession(rows), {}, "app")
+        assert cql["grant"] == set()
+        assert cql["revoke"] == set(["REVOKE ALL PERMISSIONS ON ALL KEYSPACES FROM 'app'",
+                                     "REVOKE SELECT ON KEYSPACE ks1 FROM 'app'"])
+
+    def test_all_keyspaces_are_revoked_when_not_wanted(self):
+        session = FakeSession([permission_row("app", "<all keyspaces>", "SELECT")])
+        cql = build_role_permissions(session, {"ks1": ["SELECT"]}, "app")
+        assert cql["revoke"] == set(["REVOKE ALL PERMISSIONS ON ALL KEYSPACES FROM 'app'"])
+
+    def test_inherited_permissions_are_not_granted(self):
+        session = FakeSession([permission_row("readers", "<keyspace ks1>", "SELECT")])
+        cql = build_role_permissions(session, {"ks1": ["SELECT"]}, "app")
+        assert cql["grant"] == set()
+        assert cql["revoke"] == set()
+
+    def test_rows_already_fetched(self):
+        session = FakeSession([])
+        rows = [permission_row("app", "<all keyspaces>", p) for p in ALL_PERMISSIONS]
+        cql = build_role_permissions(session, {"all_keyspaces": ["ALL PERMISSIONS"]}, "app", rows)
+        assert cql["grant"] == set()
+        assert session.queries == []
+
+    @pytest.mark.parametrize("keyspaces", [1, 10, 50])
+    def test_query_count_is_constant(self, keyspaces):
+        wanted = matrix(keyspaces, ALL_PERMISSIONS)
+        session = FakeSession(granted("app", matrix(keyspaces, ["SELECT", "MODIFY"])))
+        cql = build_role_permissions(session, wanted, "app")
+        assert len(cql["grant"]) == keyspaces * 4
+        assert cql["revoke"] == set()
+        assert len(session.queries) == 1
+
+
+class TestBuildRoleGrants:
+
+    def test_grants_and_revokes(self):
+        session = FakeSession([
+            permission_row("app", "<keyspace ks1>", "SELECT"),
+            permission_row("readers", "<keyspace ks1>", "SELECT"),
+            permission_row("legacy", "<keyspace ks2>", "SELECT"),
+        ])
+        roles = build_role_grants(session, "app", ["readers", "writers"])
+        assert roles["grant"] == set(["GRANT 'writers' TO 'app'"])
+        assert roles["revoke"] == set(["REVOKE 'legacy' FROM 'app'"])
+
+
+@pytest.mark.parametrize("keyspaces", [1, 50, 500])
+def test_build_role_permissions_benchmark(benchmark, keyspaces):
+    # Planning does a single LIST ALL OF whatever the size of the permission
+    # matrix, the rest is done in memory.
+    wanted = matrix(keyspaces, ALL_PERMISSIONS)
+    rows = granted("app", matrix(keyspaces, ["SELECT", "MODIFY", "DROP"]))
+
+    def plan():
+        session = FakeSession(rows)
+        build_role_permissions(session, wanted, "app")
+        return session
+
+    session = benchmark(plan)
+    assert len(session.queries) == 1
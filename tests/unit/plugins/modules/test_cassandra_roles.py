@@ -0,0 +1,168 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from ansible_collections.community.cassandra.plugins.modules import cassandra_roles
+from ansible_collections.community.cassandra.plugins.modules.cassandra_roles import (
+    apply_plans,
+    load_permissions,
+    load_roles,
+    permission_resource,
+    plan_roles,
+    role_permission_rows,
+    role_summary,
+)
+
+PermissionRow = namedtuple("PermissionRow", "role resource permissions")
+
+
+class FakeSession(object):
+
+    def __init__(self, roles=(), permissions=()):
+        self.roles = roles
+        self.permissions = permissions
+        self.queries = []
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return kwargs
+
+    def execute(self, query, parameters=None, execution_profile=None):
+        self.queries.append(query)
+        if "system_auth.roles" in query:
+            return [dict(row) for row in self.roles]
+        return list(self.permissions)
+
+
+def role_row(role, can_login=True, is_superuser=False, member_of=None):
+    # As load_roles() returns them
+    return {"role": role, "can_login": can_login, "is_superuser": is_superuser, "member_of": member_of or set()}
+
+
+def spec(name, **kwargs):
+    role = dict(name=name, state="present", super_user=False, login=True, password=None,
+                update_password=False, options=None, data_centres=None,
+                keyspace_permissions=None, roles=None)
+    role.update(kwargs)
+    return role
+
+
+class TestLoad:
+
+    def test_two_queries_whatever_the_number_of_roles(self):
+        session = FakeSession(
+            roles=[role_row("role{0}".format(i)) for i in range(2000)],
+            permissions=[PermissionRow("role{0}".format(i), "data/ks{0}".format(i), set(["SELECT"]))
+                         for i in range(2000)])
+        roles = load_roles(session)
+        permissions = load_permissions(session)
+        assert len(roles) == 2000
+        assert permissions["role7"] == [("<keyspace ks7>", "SELECT")]
+        assert len(session.queries) == 2
+
+    def test_member_of_is_a_set(self):
+        roles = load_roles(FakeSession(roles=[dict(role_row("app"), member_of=["readers"]),
+                                              dict(role_row("readers"), member_of=None)]))
+        assert roles["app"]["member_of"] == set(["readers"])
+        assert roles["readers"]["member_of"] == set()
+
+    @pytest.mark.parametrize("resource, expected", [
+        ("data", "<all keyspaces>"),
+        ("data/ks1", "<keyspace ks1>"),
+        ("data/ks1/table1", None),
+        ("roles/app", None),
+    ])
+    def test_permission_resource(self, resource, expected):
+        assert permission_resource(resource) == expected
+
+    def test_inherited_permissions(self):
+        roles = {
+            "app": role_row("app", member_of=set(["readers"])),
+            "readers": role_row("readers", member_of=set(["base"])),
+            "base": role_row("base", member_of=set(["readers"])),  # A cycle
+        }
+        permissions = {"readers": [("<keyspace ks1>", "SELECT")], "base": [("<all keyspaces>", "DESCRIBE")]}
+        rows = role_permission_rows("app", roles, permissions)
+        assert sorted((row["role"], row["resource"]) for row in rows) == [
+            ("base", "<all keyspaces>"), ("readers", "<keyspace ks1>")]
+
+
+class TestPlanRoles:
+
+    def test_create_alter_drop_and_unchanged(self):
+        roles = {
+            "changed": role_row("changed", is_superuser=False),
+            "same": role_row("same"),
+            "gone": role_row("gone"),
+        }
+        plans = plan_roles([
+            spec("new", password="pw"),
+            spec("changed", super_user=True),
+            spec("same"),
+            spec("gone", state="absent"),
+            spec("never_existed", state="absent"),
+        ], roles, {})
+        summary = dict((role["role"], role["cql"]) for role in role_summary(plans))
+        assert summary["new"] == ["CREATE ROLE 'new' WITH SUPERUSER = False AND LOGIN = True AND PASSWORD = 'pw' "]
+        assert summary["changed"] == ["ALTER ROLE 'changed' WITH SUPERUSER = True AND LOGIN = True "]
+        assert summary["same"] == []
+        assert summary["gone"] == ["DROP ROLE 'gone'"]
+        assert summary["never_existed"] == []
+
+    def test_permissions_and_roles(self):
+        roles = {
+            "app": role_row("app", member_of=set(["legacy"])),
+            "legacy": role_row("legacy", can_login=False),
+        }
+        permissions = {"app": [("<keyspace ks1>", "SELECT"), ("<keyspace ks2>", "MODIFY")]}
+        plans = plan_roles([spec("app", keyspace_permissions={"ks1": ["SELECT", "MODIFY"]}, roles=["readers"])],
+                           roles, permissions)
+        assert plans[0]["cql"] == {
+            "role": [],
+            "revoke": ["REVOKE MODIFY ON KEYSPACE ks2 FROM 'app'", "REVOKE 'legacy' FROM 'app'"],
+            "grant": ["GRANT MODIFY ON KEYSPACE ks1 TO 'app'", "GRANT 'readers' TO 'app'"],
+            "drop": [],
+        }
+
+    def test_empty_permissions_revoke_all_keyspaces(self):
+        permissions = {"app": [("<all keyspaces>", "SELECT"), ("<keyspace ks1>", "SELECT")]}
+        plans = plan_roles([spec("app", keyspace_permissions={})], {"app": role_row("app")}, permissions)
+        assert plans[0]["cql"]["revoke"] == [
+            "REVOKE ALL PERMISSIONS ON ALL KEYSPACES FROM 'app'",
+            "REVOKE SELECT ON KEYSPACE ks1 FROM 'app'",
+        ]
+
+    def test_permissions_are_left_alone_when_not_set(self):
+        permissions = {"app": [("<keyspace ks1>", "SELECT")]}
+        plans = plan_roles([spec("app")], {"app": role_row("app")}, permissions)
+        assert role_summary(plans)[0]["changed"] is False
+
+
+class TestApplyPlans:
+
+    def test_steps_run_in_order_and_failed_roles_are_skipped(self, monkeypatch):
+        batches = []
+
+        def execute_concurrently(session, statements, concurrency):
+            batches.append(list(statements))
+            return [(cql, Exception("Unauthorized")) for cql in statements if "'bad'" in cql]
+
+        monkeypatch.setattr(cassandra_roles, "execute_concurrently", execute_concurrently)
+        plans = plan_roles([
+            spec("good", keyspace_permissions={"ks1": ["SELECT"]}),
+            spec("bad", keyspace_permissions={"ks1": ["SELECT"]}),
+            spec("old", state="absent"),
+        ], {"old": role_row("old")}, {})
+        failed = apply_plans(None, plans, 8)
+        assert batches == [
+            ["CREATE ROLE 'good' WITH SUPERUSER = False AND LOGIN = True ",
+             "CREATE ROLE 'bad' WITH SUPERUSER = False AND LOGIN = True "],
+            ["GRANT SELECT ON KEYSPACE ks1 TO 'good'"],
+            ["DROP ROLE 'old'"],
+        ]
+        assert failed == [{"role": "bad", "cql": "CREATE ROLE 'bad' WITH SUPERUSER = False AND LOGIN = True ",
+                           "error": "Unauthorized"}]
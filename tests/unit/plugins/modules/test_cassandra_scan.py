@@ -0,0 +1,237 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import io
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import OperationTimedOut
+from cassandra.metadata import Murmur3Token
+from cassandra.policies import HostDistance
+
+from ansible_collections.community.cassandra.plugins.module_utils.cql_export import join_exports
+from ansible_collections.community.cassandra.plugins.module_utils.cql_token_ranges import (
+    load_checkpoint,
+    save_checkpoint,
+    scan_ranges,
+)
+from ansible_collections.community.cassandra.plugins.modules.cassandra_scan import (
+    TableScanner,
+    resumed_ranges,
+    run_scan,
+)
+
+MURMUR3 = "org.apache.cassandra.dht.Murmur3Partitioner"
+
+
+class FakeHost(object):
+
+    def __init__(self, endpoint, dc="dc1", is_up=True):
+        self.endpoint = endpoint
+        self.dc = dc
+        self.is_up = is_up
+
+
+class FakeTokenMap(object):
+    token_class = Murmur3Token
+
+    def __init__(self, ring, owners):
+        self.ring = ring
+        self.owners = owners
+
+    def get_replicas(self, keyspace, token):
+        for end, hosts in self.owners:
+            if token.value <= end:
+                return hosts
+        return self.owners[0][1]
+
+
+class FakeCluster(object):
+
+    def __init__(self, owners):
+        self.metadata = self
+        self.profile_manager = self
+        self.token_map = FakeTokenMap([end for end, hosts in owners], owners)
+
+    def distance(self, host):
+        return HostDistance.LOCAL if host.dc == "dc1" else HostDistance.REMOTE
+
+
+class FakeResult(list):
+
+    def __init__(self, rows):
+        super(FakeResult, self).__init__(rows)
+
+    def one(self):
+        return self[0]
+
+
+class FakePrepared(object):
+
+    def __init__(self, query):
+        self.query = query
+        self.fetch_size = None
+        self.result_metadata = [("ks", "t", "k", None), ("ks", "t", "v", None)]
+
+    def bind(self, values):
+        return tuple(values)
+
+
+class FakeSession(object):
+    '''
+    Holds rows keyed by token, answering range queries with those in range.
+    '''
+
+    def __init__(self, tokens, down=()):
+        self.tokens = tokens
+        self.down = down
+        self.queries = []
+        self.executed = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def prepare(self, query):
+        self.queries.append(query)
+        self.prepared = FakePrepared(query)
+        return self.prepared
+
+    def execute(self, bound, timeout=None, host=None):
+        with self.lock:
+            self.executed.append((bound, host))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.001)
+            if host is not None and host.endpoint in self.down:
+                raise OperationTimedOut("timed out", host.endpoint)
+            start, end = bound
+            tokens = [token for token in self.tokens if start < token <= end]
+            if "count(*)" in self.prepared.query:
+                return FakeResult([(len(tokens),)])
+            return FakeResult([(token, "v{0}".format(token)) for token in tokens])
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+A, B, C, REMOTE = FakeHost("10.0.0.1"), FakeHost("10.0.0.2"), FakeHost("10.0.0.3"), FakeHost("10.1.0.1", "dc2")
+
+OWNERS = [(-1000, [A, B, REMOTE]), (0, [B, C, REMOTE]), (1000, [C, A, REMOTE])]
+
+TOKENS = [-2000, -1000, -5, 0, 1, 999, 5000]
+
+
+def scanner_for(session, ranges=None, **kwargs):
+    cluster = FakeCluster(OWNERS)
+    ranges = ranges or scan_ranges([end for end, hosts in OWNERS], MURMUR3)
+    return TableScanner(cluster, session, "ks", "t", kwargs.pop("partition_key", ["k"]), ranges, **kwargs)
+
+
+class TestTableScanner:
+
+    def test_count_query(self):
+        session = FakeSession(TOKENS)
+        scanner_for(session, partition_key=["tenant", "Day"])
+        assert session.queries == ['SELECT count(*) FROM ks.t WHERE token(tenant, "Day") > ? AND token(tenant, "Day") <= ?']
+
+    def test_export_query(self, tmp_path):
+        session = FakeSession(TOKENS)
+        scanner = scanner_for(session, columns=["k", "v"], parts_dir=str(tmp_path), fetch_size=100)
+        assert session.queries == ["SELECT k, v FROM ks.t WHERE token(k) > ? AND token(k) <= ?"]
+        assert session.prepared.fetch_size == 100
+        assert scanner.column_names == ["k", "v"]
+
+    def test_replicas_are_local_and_rotated(self):
+        scanner = scanner_for(FakeSession(TOKENS))
+        assert scanner.replicas(0) == [A, B, None]
+        assert scanner.replicas(1) == [C, B, None]
+        assert scanner.replicas(2) == [A, C, None]
+
+    def test_down_replicas_are_skipped(self):
+        scanner = scanner_for(FakeSession(TOKENS))
+        B.is_up = False
+        try:
+            assert scanner.replicas(1) == [C, None]
+        finally:
+            B.is_up = True
+
+    def test_failed_range_is_retried_on_the_next_replica(self):
+        session = FakeSession(TOKENS, down=("10.0.0.1",))
+        index, rows, error = scanner_for(session).scan(0)
+        assert (index, rows, error) == (0, 2, None)
+        assert [host for bound, host in session.executed] == [A, B]
+
+    def test_range_fails_after_its_retries(self):
+        session = FakeSession(TOKENS, down=("10.0.0.1", "10.0.0.2"))
+        index, rows, error = scanner_for(session, retries=1).scan(0)
+        assert rows is None
+        assert isinstance(error, OperationTimedOut)
+        assert len(session.executed) == 2
+
+
+class TestRunScan:
+
+    def test_counts_every_range_once(self):
+        session = FakeSession(TOKENS)
+        scanner = scanner_for(session, ranges=scan_ranges([-1000, 0, 1000], MURMUR3, 8))
+        done = {}
+        assert run_scan(scanner, list(range(len(scanner.ranges))), done, 4) == []
+        assert sum(done.values()) == len(TOKENS)
+        assert sorted(done) == list(range(32))
+
+    def test_in_flight_is_bounded(self):
+        session = FakeSession(TOKENS)
+        scanner = scanner_for(session, ranges=scan_ranges([-1000, 0, 1000], MURMUR3, 16))
+        run_scan(scanner, list(range(len(scanner.ranges))), {}, 3)
+        assert 1 <= session.max_in_flight <= 3
+
+    def test_failures_are_checkpointed(self, tmp_path):
+        session = FakeSession(TOKENS, down=("10.0.0.1", "10.0.0.2"))
+        scanner = scanner_for(session, retries=1)
+        checkpoint = str(tmp_path / "scan.checkpoint")
+        done = {}
+        failed = run_scan(scanner, list(range(len(scanner.ranges))), done, 2, checkpoint, "fp")
+        # the range wrapping around the ring is A's and B's too
+        assert [index for index, error in failed] == [0, 3]
+        assert load_checkpoint(checkpoint, "fp") == done
+        assert done == {1: 2, 2: 2}
+
+    def test_resume_scans_only_what_is_left(self, tmp_path):
+        session = FakeSession(TOKENS)
+        scanner = scanner_for(session)
+        checkpoint = str(tmp_path / "scan.checkpoint")
+        save_checkpoint(checkpoint, "fp", {0: 2, 1: 2})
+        done = resumed_ranges(checkpoint, "fp", scanner)
+        run_scan(scanner, [index for index in range(len(scanner.ranges)) if index not in done], done, 2)
+        assert sorted(bound for bound, host in session.executed) == sorted(scanner.ranges[2:])
+        assert sum(done.values()) == len(TOKENS)
+
+
+class TestExport:
+
+    def test_parts_are_joined_in_token_order(self, tmp_path):
+        parts_dir = tmp_path / "t.csv.parts"
+        parts_dir.mkdir()
+        session = FakeSession(TOKENS)
+        scanner = scanner_for(session, parts_dir=str(parts_dir), file_format="csv")
+        done = {}
+        assert run_scan(scanner, list(range(len(scanner.ranges))), done, 4) == []
+        dest = str(tmp_path / "t.csv")
+        join_exports([scanner.part_path(index) for index in range(len(scanner.ranges))],
+                     scanner.column_names, dest, "csv")
+        with io.open(dest, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert lines[0] == "k,v"
+        assert [int(line.split(",")[0]) for line in lines[1:]] == sorted(TOKENS)
+
+    def test_missing_parts_are_scanned_again(self, tmp_path):
+        scanner = scanner_for(FakeSession(TOKENS), parts_dir=str(tmp_path))
+        checkpoint = str(tmp_path / "scan.checkpoint")
+        run_scan(scanner, [0, 1], {}, 1)
+        save_checkpoint(checkpoint, "fp", {0: 2, 1: 2, 2: 2})
+        assert resumed_ranges(checkpoint, "fp", scanner) == {0: 2, 1: 2}
@@ -0,0 +1,111 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from collections import namedtuple
+
+import pytest
+
+from ansible_collections.community.cassandra.plugins.modules import cassandra_schema
+from ansible_collections.community.cassandra.plugins.module_utils.poll_scheduler import PollScheduler
+from ansible_collections.community.cassandra.tests.unit.plugins.module_utils.nodetool_output import describecluster_output
+
+
+class FakeModule(object):
+
+    def __init__(self, outputs=(), **params):
+        self.params = dict(backend="nodetool")
+        self.params.update(params)
+        self.outputs = list(outputs)
+
+
+class FakeDescribeClusterCommand(cassandra_schema.NodeToolStatusCommand):
+
+    def __init__(self, module):
+        self.module = module
+        self.version_cache = "hit"
+        self.session = None
+
+    def status_command(self):
+        return self.module.outputs.pop(0)
+
+
+class TestNodetoolBackend:
+
+    @pytest.fixture(autouse=True)
+    def fake_command(self, monkeypatch):
+        monkeypatch.setattr(cassandra_schema, "schema_command", FakeDescribeClusterCommand)
+
+    def poll(self, outputs, **kwargs):
+        sleeps = []
+        scheduler = PollScheduler(sleep=sleeps.append, **kwargs)
+        return cassandra_schema.nodetool_status_poll(FakeModule(outputs), scheduler), sleeps
+
+    def test_counts_distinct_versions(self):
+        # Regression: the number of versions used to be the number of polls,
+        # so a single poll always reported consensus.
+        result, sleeps = self.poll([(0, describecluster_output(6, schema_versions=2), "")])
+        schema_status, schema_list, iterations, return_codes, stdout_list, stderr_list, count, version_cache, scheduler = result
+        assert iterations == 1
+        assert count == 2
+        assert len(schema_status) == 2
+
+    def test_polls_with_backoff_until_agreement(self):
+        outputs = [(0, describecluster_output(6, schema_versions=3), ""),
+                   (0, describecluster_output(6, schema_versions=3), ""),
+                   (0, describecluster_output(6, schema_versions=2), ""),
+                   (0, describecluster_output(6), "")]
+        result, sleeps = self.poll(outputs, poll=10, interval=1, backoff=2, max_interval=3)
+        schema_status, schema_list, iterations, return_codes, stdout_list, stderr_list, count, version_cache, scheduler = result
+        assert iterations == 4
+        assert count == 1
+        assert sleeps == [1, 2, 3]
+        assert [t["versions"] for t in scheduler.timings] == [3, 3, 2, 1]
+
+    def test_nodetool_error_on_first_poll(self):
+        result, sleeps = self.poll([(1, "", "Connection refused")])
+        schema_status, schema_list, iterations, return_codes, stdout_list, stderr_list, count, version_cache, scheduler = result
+        assert schema_status is None
+        assert count is None
+        assert return_codes == [1]
+
+
+Row = namedtuple("Row", "peer data_center rack host_id tokens schema_version")
+
+
+class FakeCluster(object):
+
+    def __init__(self, versions):
+        self.versions = versions
+        self.connects = 0
+        self.metadata = self
+
+    def connect(self):
+        self.connects += 1
+        return self
+
+    def execute(self, query):
+        # system.local is read first, then the peers
+        versions = self.versions[0] if "system.local" in query else self.versions.pop(0)
+        rows = [Row("10.0.0.{0}".format(i + 1), "dc1", "rack1", "host{0}".format(i), [], version)
+                for i, version in enumerate(versions)]
+        return rows[:1] if "system.local" in query else rows[1:]
+
+    def all_hosts(self):
+        Host = namedtuple("Host", "host_id is_up")
+        return [Host("host{0}".format(i), True) for i in range(3)]
+
+    def shutdown(self):
+        pass
+
+
+class TestCqlBackend:
+
+    def test_one_connection_for_all_polls(self, monkeypatch):
+        cluster = FakeCluster([["v1", "v2", "v2"], ["v1", "v1", "v2"], ["v1", "v1", "v1"], ["v1", "v1", "v1"]])
+        monkeypatch.setattr(cassandra_schema, "topology_cluster", lambda module: cluster)
+        scheduler = PollScheduler(poll=5, interval=0)
+        result = cassandra_schema.nodetool_status_poll(FakeModule(backend="cql"), scheduler)
+        assert result[0] == {"v1": ["10.0.0.1", "10.0.0.2", "10.0.0.3"]}
+        assert result[2] == 3
+        assert result[6] == 1
+        assert cluster.connects == 1
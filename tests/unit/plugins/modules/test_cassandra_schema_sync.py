@@ -0,0 +1,251 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from ansible_collections.community.cassandra.plugins.modules.cassandra_schema_sync import (
+    apply_steps,
+    load_schema,
+    plan_schema,
+)
+
+NTS = "org.apache.cassandra.locator.NetworkTopologyStrategy"
+
+
+class FakeSession(object):
+    """
+    Answers the system_schema queries with rows, keyed by table name, and
+    records every statement.
+    """
+
+    def __init__(self, rows=None, fail=None):
+        self.rows = rows or {}
+        self.fail = fail
+        self.queries = []
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return kwargs
+
+    def execute(self, query, parameters=None, execution_profile=None):
+        self.queries.append((query, parameters))
+        if "system_schema." in query:
+            return list(self.rows.get(query.split("system_schema.")[1].split()[0], ()))
+        if self.fail and self.fail in query:
+            raise Exception("Unknown type ks1.missing")
+        return []
+
+
+def column_row(keyspace, table, name, kind, position, cql_type, clustering_order="none"):
+    return {"keyspace_name": keyspace, "table_name": table, "column_name": name, "kind": kind,
+            "position": position, "type": cql_type, "clustering_order": clustering_order}
+
+
+def users_rows(tables=1):
+    rows = {
+        "keyspaces": [{"keyspace_name": "ks1", "replication": {"class": NTS, "dc1": "3"}, "durable_writes": True}],
+        "types": [{"keyspace_name": "ks1", "type_name": "address", "field_names": ["street"], "field_types": ["text"]}],
+        "tables": [],
+        "columns": [],
+        "indexes": [{"keyspace_name": "ks1", "table_name": "users", "index_name": "users_email",
+                     "options": {"target": "email"}}],
+        "views": [{"keyspace_name": "ks1", "view_name": "users_by_email", "base_table_name": "users",
+                   "gc_grace_seconds": 864000}],
+    }
+    for i in range(tables):
+        table = "users" if i == 0 else "users{0}".format(i)
+        rows["tables"].append({"keyspace_name": "ks1", "table_name": table, "gc_grace_seconds": 864000,
+                               "compaction": {"class": "org.apache.cassandra.db.compaction.SizeTieredCompactionStrategy"}})
+        rows["columns"].extend([
+            column_row("ks1", table, "userid", "partition_key", 0, "uuid"),
+            column_row("ks1", table, "email", "regular", -1, "text"),
+        ])
+    rows["columns"].extend([
+        column_row("ks1", "users_by_email", "email", "partition_key", 0, "text"),
+        column_row("ks1", "users_by_email", "userid", "clustering", 0, "uuid", "asc"),
+    ])
+    return rows
+
+
+def keyspace(name="ks1", **kwargs):
+    spec = dict(name=name, state="present", replication_factor=None, durable_writes=None, data_centres=None,
+                types=None, tables=None, views=None)
+    spec.update(kwargs)
+    return spec
+
+
+def table(name, **kwargs):
+    spec = dict(name=name, state="present", columns=[{"userid": "uuid"}, {"email": "text"}], primary_key=["userid"],
+                partition_key=None, clustering=None, table_options=None, indexes=None)
+    spec.update(kwargs)
+    return spec
+
+
+def index(name, target, **kwargs):
+    spec = dict(name=name, state="present", target=target, using=None, options=None)
+    spec.update(kwargs)
+    return spec
+
+
+def view(name, **kwargs):
+    spec = dict(name=name, state="present", base_table="users", columns=None, primary_key=["email", "userid"],
+                partition_key=None, clustering=None, table_options=None)
+    spec.update(kwargs)
+    return spec
+
+
+def udt(name, fields, **kwargs):
+    spec = dict(name=name, state="present", fields=fields)
+    spec.update(kwargs)
+    return spec
+
+
+class TestLoadSchema:
+
+    def test_six_queries_whatever_the_number_of_tables(self):
+        session = FakeSession(users_rows(tables=2000))
+        schema = load_schema(session, ["ks1", "ks2"])
+        assert len(session.queries) == 6
+        assert all(parameters == [("ks1", "ks2")] for query, parameters in session.queries)
+        assert sorted(schema) == ["ks1"]
+        ks1 = schema["ks1"]
+        assert len(ks1["tables"]) == 2000
+        assert ks1["tables"]["users"]["layout"]["partition_key"] == ["userid"]
+        assert ks1["types"] == {"address": [("street", "text")]}
+        assert ks1["indexes"]["users_email"] == {"table": "users", "target": "email", "class_name": None}
+        assert ks1["views"]["users_by_email"]["layout"]["clustering"] == [("userid", "asc")]
+
+
+class TestPlanSchema:
+
+    def schema(self):
+        return load_schema(FakeSession(users_rows()), ["ks1"])
+
+    def test_in_line(self):
+        plan = plan_schema([keyspace(
+            data_centres={"dc1": 3},
+            types=[udt("address", [{"street": "text"}])],
+            tables=[table("users", table_options={"compaction": "{'class': 'SizeTieredCompactionStrategy'}"},
+                          indexes=[index("users_email", "email")])],
+            views=[view("users_by_email")],
+        )], self.schema())
+        assert plan.steps() == []
+        assert plan.conflicts == []
+
+    def test_new_keyspace_in_dependency_order(self):
+        plan = plan_schema([keyspace(
+            "ks2",
+            tables=[table("people", columns=[{"id": "uuid"}, {"contact": "frozen<contact>"}], primary_key=["id"],
+                          indexes=[index("people_contact", "contact")])],
+            types=[udt("contact", [{"home": "frozen<address>"}]), udt("address", [{"street": "text"}])],
+            views=[view("people_by_contact", base_table="people", primary_key=["contact", "id"])],
+        )], self.schema())
+        assert plan.steps() == [
+            {"step": "keyspaces", "cql": [
+                "CREATE KEYSPACE ks2 WITH REPLICATION = { 'class' : 'SimpleStrategy', 'replication_factor': 1 } "
+                "AND DURABLE_WRITES = True"]},
+            {"step": "types", "cql": ["CREATE TYPE ks2.address (street text)"]},
+            {"step": "types", "cql": ["CREATE TYPE ks2.contact (home frozen<address>)"]},
+            {"step": "tables", "cql": [
+                "CREATE TABLE ks2.people (id uuid, contact frozen<contact>, PRIMARY KEY (id))"]},
+            {"step": "indexes_and_views", "cql": [
+                "CREATE INDEX people_contact ON ks2.people (contact)",
+                "CREATE MATERIALIZED VIEW ks2.people_by_contact AS SELECT * FROM ks2.people "
+                "WHERE contact IS NOT NULL AND id IS NOT NULL PRIMARY KEY (contact, id)"]},
+        ]
+
+    def test_alters_rather_than_recreates(self):
+        plan = plan_schema([keyspace(
+            durable_writes=False,
+            types=[udt("address", [{"street": "text"}, {"city": "text"}])],
+            tables=[table("users", columns=[{"userid": "uuid"}, {"email": "text"}, {"age": "int"}],
+                          table_options={"gc_grace_seconds": 3600})],
+            views=[view("users_by_email", table_options={"gc_grace_seconds": 3600})],
+        )], self.schema())
+        assert plan.steps() == [
+            {"step": "keyspaces", "cql": ["ALTER KEYSPACE ks1 WITH DURABLE_WRITES = False"]},
+            {"step": "types", "cql": ["ALTER TYPE ks1.address ADD city text"]},
+            {"step": "tables", "cql": ["ALTER TABLE ks1.users ADD age int",
+                                       "ALTER TABLE ks1.users WITH gc_grace_seconds = 3600"]},
+            {"step": "indexes_and_views", "cql": [
+                "ALTER MATERIALIZED VIEW ks1.users_by_email WITH gc_grace_seconds = 3600"]},
+        ]
+
+    def test_drops_in_reverse_order(self):
+        plan = plan_schema([
+            keyspace(types=[udt("address", None, state="absent")],
+                     tables=[table("users", state="absent"),
+                             table("missing", state="absent")],
+                     views=[view("users_by_email", state="absent")]),
+            keyspace("ks2", state="absent"),
+        ], self.schema())
+        assert plan.steps() == [
+            {"step": "drop_indexes_and_views", "cql": ["DROP MATERIALIZED VIEW ks1.users_by_email"]},
+            {"step": "drop_tables", "cql": ["DROP TABLE ks1.users"]},
+            {"step": "drop_types", "cql": ["DROP TYPE ks1.address"]},
+        ]
+
+    def test_conflicts(self):
+        plan = plan_schema([keyspace(
+            replication_factor=3,
+            types=[udt("address", [{"street": "int"}])],
+            tables=[table("users", columns=[{"userid": "uuid"}, {"email": "int"}],
+                          indexes=[index("users_email", "userid")])],
+            views=[view("users_by_email", primary_key=["email", "userid"], clustering=[{"userid": "DESC"}])],
+        )], self.schema())
+        assert plan.conflicts == [
+            "ks1: the replication strategy is NetworkTopologyStrategy, migrating it to SimpleStrategy isn't supported",
+            "ks1.address: field street is text, it can't be altered to int",
+            "ks1.users: column email is text, it can't be altered to int",
+            "ks1.users_email: the index is on users(email), it can't be altered to users(userid)",
+            "ks1.users_by_email: the primary key or clustering order differs and can't be altered",
+        ]
+
+    def test_invalid_document(self):
+        with pytest.raises(ValueError, match="Table ks1.users: primary_key is required"):
+            plan_schema([keyspace(tables=[table("users", primary_key=None)])], self.schema())
+
+
+class TestApplySteps:
+
+    def test_agreement_is_waited_for_after_each_step(self):
+        session = FakeSession()
+        waits = []
+        steps = [{"step": "types", "cql": ["CREATE TYPE ks1.a (b int)", "CREATE TYPE ks1.c (d int)"]},
+                 {"step": "tables", "cql": ["CREATE TABLE ks1.t (a int PRIMARY KEY)"]}]
+        assert apply_steps(session, steps, lambda: waits.append(len(session.queries)) or True) is None
+        assert waits == [2, 3]
+
+    def test_stops_at_the_first_failure(self):
+        session = FakeSession(fail="missing")
+        steps = [{"step": "tables", "cql": ["CREATE TABLE ks1.t (a frozen<missing> PRIMARY KEY)", "CREATE TABLE ks1.u"]},
+                 {"step": "indexes_and_views", "cql": ["CREATE INDEX i ON ks1.t (a)"]}]
+        failed = apply_steps(session, steps, lambda: True)
+        assert failed == {"step": "tables", "cql": steps[0]["cql"][0], "error": "Unknown type ks1.missing"}
+        assert len(session.queries) == 1
+
+    def test_stops_without_agreement(self):
+        session = FakeSession()
+        steps = [{"step": "types", "cql": ["CREATE TYPE ks1.a (b int)"]},
+                 {"step": "tables", "cql": ["CREATE TABLE ks1.t (a frozen<a> PRIMARY KEY)"]}]
+        failed = apply_steps(session, steps, lambda: False)
+        assert failed["step"] == "types"
+        assert len(session.queries) == 1
+
+
+@pytest.mark.parametrize("tables", [10, 1000])
+def test_plan_schema_benchmark(benchmark, tables):
+    # Planning reads the schema with six queries and compares it in memory,
+    # whatever the number of tables
+    rows = users_rows(tables)
+    specs = [keyspace(tables=[table("users" if i == 0 else "users{0}".format(i), table_options={"gc_grace_seconds": 864000})
+                              for i in range(tables)])]
+
+    def plan():
+        session = FakeSession(rows)
+        return session, plan_schema(specs, load_schema(session, ["ks1"]))
+
+    session, schema_plan = benchmark(plan)
+    assert len(session.queries) == 6
+    assert schema_plan.steps() == []
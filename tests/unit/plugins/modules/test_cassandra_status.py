@@ -1,14 +1,17 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import json
+from collections import namedtuple
 import os
 
 import pytest
 
-from ansible_collections.community.cassandra.plugins.modules.cassandra_status import (
-    cluster_up_down,
-    node_status_column_offsets,
-)
+from ansible_collections.community.cassandra.plugins.modules import cassandra_status
+from ansible_collections.community.cassandra.plugins.modules.cassandra_status import cluster_up_down
+from ansible_collections.community.cassandra.plugins.module_utils.nodetool_parsers import node_status_column_offsets
+from ansible_collections.community.cassandra.plugins.module_utils.poll_scheduler import PollScheduler
+from ansible_collections.community.cassandra.tests.unit.plugins.module_utils.nodetool_output import status_output
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
 
@@ -146,3 +149,235 @@ class TestClusterUpDown:
         stdout = "Datacenter: datacenter1\n===\nUN  looks like a node line but no header yet\n"
         result = cluster_up_down(stdout)
         assert result["datacenter1"]["nodes"] == []
+
+
+class FakeStatusModule(object):
+
+    def __init__(self, outputs):
+        self.params = dict(resolve_ip=False, keyspace=None)
+        self.outputs = list(outputs)
+
+
+class FakeStatusCommand(cassandra_status.NodeToolStatusCommand):
+
+    def __init__(self, module):
+        self.module = module
+        self.version_cache = "hit"
+        self.session = None
+
+    def status_command(self):
+        return self.module.outputs.pop(0)
+
+
+class TestNodetoolStatusPoll:
+
+    @pytest.fixture(autouse=True)
+    def fake_command(self, monkeypatch):
+        monkeypatch.setattr(cassandra_status, "status_command", FakeStatusCommand)
+
+    def poll(self, outputs, **kwargs):
+        sleeps = []
+        scheduler = PollScheduler(sleep=sleeps.append, **kwargs)
+        result = cassandra_status.nodetool_status_poll(FakeStatusModule(outputs), scheduler)
+        return result, scheduler, sleeps
+
+    def test_node_coming_up_triggers_fast_path(self):
+        outputs = [(0, status_output(5, down=2), ""),
+                   (0, status_output(5, down=2), ""),
+                   (0, status_output(5, down=1), ""),
+                   (0, status_output(5), "")]
+        result, scheduler, sleeps = self.poll(outputs, poll=10, interval=10, backoff=2,
+                                              max_interval=60, fast_interval=1)
+        assert result[2] == 4
+        assert result[6] == 0  # No down nodes left
+        assert sleeps == [10, 20, 1]
+        assert [t["down"] for t in scheduler.timings] == [2, 2, 1, 0]
+        assert [t["transition"] for t in scheduler.timings] == [False, False, True, True]
+
+    def test_no_sleep_after_last_poll(self):
+        outputs = [(0, status_output(3, down=1), "")] * 2
+        result, scheduler, sleeps = self.poll(outputs, poll=2, interval=10)
+        assert result[2] == 2
+        assert result[6] == 1
+        assert sleeps == [10]
+
+    def test_nodetool_errors_are_retried(self):
+        outputs = [(1, "", "Connection refused"), (0, status_output(3), "")]
+        result, scheduler, sleeps = self.poll(outputs, poll=3, interval=5)
+        assert result[3] == [1, 0]
+        assert scheduler.timings[0]["rc"] == 1
+        assert sleeps == [5]
+
+
+class TestNodetoolWaitFor:
+
+    @pytest.fixture(autouse=True)
+    def fake_command(self, monkeypatch):
+        monkeypatch.setattr(cassandra_status, "status_command", FakeStatusCommand)
+
+    def wait_for(self, outputs, targets, state="UN", **kwargs):
+        module = FakeStatusModule(outputs)
+        module.params.update(wait_for=targets, wait_for_state=state)
+        scheduler = PollScheduler(sleep=lambda seconds: None, **kwargs)
+        return cassandra_status.nodetool_wait_for(module, scheduler)
+
+    def test_stops_once_target_is_up(self):
+        # 10.0.0.5 comes up first, the other down node never does
+        outputs = [(0, status_output(5, down=2), ""),
+                   (0, status_output(5, down=1), ""),
+                   (0, status_output(5, down=1), "")]
+        nodes, pending, iterations, return_codes, out, err, version_cache, scheduler \
+            = self.wait_for(outputs, ["10.0.0.4"], poll=10, interval=1)
+        assert iterations == 2
+        assert pending == []
+        assert nodes["10.0.0.4"]["status"] == "U"
+        assert [t["pending"] for t in scheduler.timings] == [1, 0]
+        assert scheduler.timings[1]["transition"]
+
+    def test_target_not_reaching_state(self):
+        outputs = [(0, status_output(5, down=1), "")] * 3
+        nodes, pending, iterations, return_codes, out, err, version_cache, scheduler \
+            = self.wait_for(outputs, ["10.0.0.5", "10.0.0.1", "10.9.9.9"], poll=3, interval=1)
+        assert iterations == 3
+        assert pending == ["10.0.0.5", "10.9.9.9"]
+        assert nodes["10.9.9.9"] is None
+        assert out == status_output(5, down=1).strip()  # Only the last output is kept
+
+    def test_other_target_state(self):
+        outputs = [(0, status_output(5, down=1), "")]
+        nodes, pending, iterations, return_codes, out, err, version_cache, scheduler \
+            = self.wait_for(outputs, ["10.0.0.5"], state="DN")
+        assert pending == []
+
+
+class TestStatusHistory:
+
+    def test_delta(self):
+        first = cluster_up_down(status_output(5, down=2))
+        second = cluster_up_down(status_output(5, down=1))
+        assert cassandra_status.cluster_status_delta(first, second) == {
+            "changed": [{"address": "10.0.0.4", "datacenter": "dc1", "status": "U", "state": "N"}],
+            "removed": [],
+        }
+        assert cassandra_status.cluster_status_delta(second, second) == {"changed": [], "removed": []}
+
+    def test_added_and_removed_nodes(self):
+        first = cluster_up_down(status_output(5))
+        second = cluster_up_down(status_output(4, datacenters=2))
+        delta = cassandra_status.cluster_status_delta(first, second)
+        assert delta["removed"] == ["10.0.0.5"]
+        assert [node["address"] for node in delta["changed"]] == ["10.1.0.1", "10.1.0.2", "10.1.0.3", "10.1.0.4"]
+
+    def test_full_history(self):
+        history = cassandra_status.StatusHistory()
+        for i in range(3):
+            history.add_output("out{0}\n".format(i), "")
+            history.add_status(i + 1, {})
+        result = history.debug_result()
+        assert result["stdout_list"] == ["out0", "out1", "out2"]
+        assert len(result["cluster_status_list"]) == 3
+
+    def test_delta_history_is_bounded(self):
+        # 60 polls of a 1000 node cluster, a node coming back every 10 polls
+        history = cassandra_status.StatusHistory("delta", 3)
+        full = cassandra_status.StatusHistory("full")
+        for i in range(60):
+            stdout = status_output(1000, down=6 - i // 10)
+            for h in (history, full):
+                h.add_output(stdout, "")
+                h.add_status(i + 1, cluster_up_down(stdout))
+        result = history.debug_result()
+        assert len(result["stdout_list"]) == 3
+        assert result["cluster_status_history"]["first"]["iteration"] == 1
+        assert [d["iteration"] for d in result["cluster_status_history"]["deltas"]] == [11, 21, 31, 41, 51]
+        assert history.snapshots == []
+        full_size = len(json.dumps(full.debug_result()))
+        delta_size = len(json.dumps(result))
+        # The first cluster status and 3 outputs, against 60 of each
+        assert delta_size < 600000
+        assert full_size > 20 * delta_size
+        assert len(json.dumps(result["cluster_status_history"]["deltas"])) < 1000
+
+    def test_last_output_only(self):
+        history = cassandra_status.StatusHistory("last", 10)
+        for i in range(3):
+            history.add_output("out{0}".format(i), "err{0}".format(i))
+            history.add_status(i + 1, {})
+        assert list(history.stdout) == ["out2"]
+        assert list(history.stderr) == ["err2"]
+        assert history.snapshots == []
+
+
+class FakeCluster(object):
+
+    def __init__(self, hosts):
+        self.connects = 0
+        self.shutdowns = 0
+        self.metadata = self
+        self.hosts = hosts
+
+    def connect(self):
+        self.connects += 1
+        return FakeCqlSession()
+
+    def all_hosts(self):
+        return self.hosts
+
+    def shutdown(self):
+        self.shutdowns += 1
+
+
+class FakeCqlSession(object):
+
+    def execute(self, query):
+        if "system.local" in query:
+            return [namedtuple("Local", "broadcast_address data_center rack host_id tokens")(
+                "10.0.0.1", "dc1", "rack1", "aaaa", ["1"])]
+        return [namedtuple("Peer", "peer data_center rack host_id tokens")(
+            "10.0.0.2", "dc1", "rack1", "bbbb", ["2"])]
+
+
+class FakeHost(object):
+
+    def __init__(self, host_id, is_up):
+        self.host_id = host_id
+        self.is_up = is_up
+
+
+class TestCqlBackend:
+
+    @pytest.fixture
+    def cluster(self, monkeypatch):
+        cluster = FakeCluster([FakeHost("aaaa", True), FakeHost("bbbb", False)])
+        monkeypatch.setattr(cassandra_status, "topology_cluster", lambda module: cluster)
+        return cluster
+
+    def module(self, **params):
+        module = FakeStatusModule([])
+        module.params.update(backend="cql", **params)
+        return module
+
+    def test_polls_share_one_connection(self, cluster):
+        hosts = cluster.hosts
+        scheduler = PollScheduler(poll=5, interval=1, sleep=lambda seconds: hosts.__setitem__(1, FakeHost("bbbb", True)))
+        result = cassandra_status.nodetool_status_poll(self.module(), scheduler)
+        assert result[2] == 2
+        assert result[0]["dc1"]["up"] == ["10.0.0.1", "10.0.0.2"]
+        assert cluster.connects == 1
+        assert cluster.shutdowns == 1
+
+    def test_wait_for_host_id(self, cluster):
+        module = self.module(wait_for=["bbbb"], wait_for_state="DN")
+        nodes, pending, iterations, return_codes, out, err, version_cache, scheduler \
+            = cassandra_status.nodetool_wait_for(module, PollScheduler())
+        assert pending == []
+        assert nodes["bbbb"]["address"] == "10.0.0.2"
+        assert nodes["bbbb"]["datacenter"] == "dc1"
+
+    def test_connection_errors_are_retried(self, cluster, monkeypatch):
+        def connect():
+            raise Exception("NoHostAvailable")
+        monkeypatch.setattr(cluster, "connect", connect)
+        result = cassandra_status.nodetool_status_poll(self.module(), PollScheduler(poll=2, interval=0))
+        assert result[3] == [1, 1]
+        assert result[5][-1] == "Error reading cluster status: NoHostAvailable"
@@ -0,0 +1,77 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+pytest.importorskip("cassandra")
+
+from cassandra import InvalidRequest
+
+from ansible_collections.community.cassandra.plugins.modules.cassandra_table import alter_table_options
+
+# The system_schema.tables row of a table created with default options on
+# Cassandra 4.0
+TABLE_ROW = {
+    "keyspace_name": "myapp",
+    "table_name": "users",
+    "bloom_filter_fp_chance": 0.01,
+    "caching": {"keys": "ALL", "rows_per_partition": "NONE"},
+    "comment": "",
+    "compaction": {"class": "org.apache.cassandra.db.compaction.SizeTieredCompactionStrategy",
+                   "max_threshold": "32", "min_threshold": "4"},
+    "compression": {"chunk_length_in_kb": "16", "class": "org.apache.cassandra.io.compress.LZ4Compressor"},
+    "gc_grace_seconds": 864000,
+    "speculative_retry": "99p",
+}
+
+
+class FakeSession(object):
+
+    def __init__(self, rows=(TABLE_ROW,), legacy=False):
+        self.rows = rows
+        self.legacy = legacy
+        self.queries = []
+
+    def execution_profile_clone_update(self, ep, **kwargs):
+        return kwargs
+
+    def execute(self, query, parameters=None, execution_profile=None):
+        self.queries.append((query, parameters))
+        if self.legacy:
+            raise InvalidRequest("Keyspace system_schema does not exist")
+        return list(self.rows)
+
+
+class TestAlterTableOptions:
+
+    def test_unchanged(self):
+        session = FakeSession()
+        assert alter_table_options(session, "myapp", "users", {
+            "bloom_filter_fp_chance": "0.01",
+            "compaction": "{'class': 'SizeTieredCompactionStrategy'}",
+            "compression": "{'class': 'LZ4Compressor', 'chunk_length_kb': 16}",
+            "speculative_retry": "'99PERCENTILE'",
+        }) is None
+        assert session.queries == [("SELECT * FROM system_schema.tables WHERE keyspace_name = %s AND table_name = %s",
+                                    ["myapp", "users"])]
+
+    def test_only_changed_options_are_altered(self):
+        cql = alter_table_options(FakeSession(), "myapp", "users", {
+            "bloom_filter_fp_chance": "0.01",
+            "compaction": "{'class': 'LeveledCompactionStrategy', 'sstable_size_in_mb': 160}",
+            "compression": "{'class': 'LZ4Compressor', 'chunk_length_in_kb': 64}",
+            "gc_grace_seconds": 864000,
+            "comment": "'Users'",
+        })
+        assert cql == ("ALTER TABLE myapp.users WITH comment = 'Users' AND "
+                       "compaction = {'class': 'LeveledCompactionStrategy', 'sstable_size_in_mb': 160} AND "
+                       "compression = {'chunk_length_in_kb': 64, 'class': 'LZ4Compressor'}")
+
+    def test_map_options_keep_their_other_keys(self):
+        cql = alter_table_options(FakeSession(), "myapp", "users", {"compaction": "{'tombstone_threshold': '0.3'}"})
+        assert cql == ("ALTER TABLE myapp.users WITH "
+                       "compaction = {'class': 'org.apache.cassandra.db.compaction.SizeTieredCompactionStrategy', "
+                       "'max_threshold': '32', 'min_threshold': '4', 'tombstone_threshold': '0.3'}")
+
+    def test_cassandra_2_is_left_alone(self):
+        assert alter_table_options(FakeSession(legacy=True), "myapp", "users", {"gc_grace_seconds": 3600}) is None